@@ -8,6 +8,10 @@ Streamlit dashboard reading:
 - Live status API (P50/P95, error budgets, Guardian state)
 - Test results (/data/tests/results.jsonl)
 
+JSONL is tailed into the local HUD store (hud_store.py); each refresh
+reads the minute rollups for the selected time window, and raw records only
+for the few most recent events.
+
 Shows:
 - Guardian state timeline (GREEN/YELLOW/RED)
 - Route latency trends (P50/P95 per micro/planner/deep)
@@ -18,10 +22,9 @@ Shows:
 Usage: streamlit run alice_hud.py
 """
 
-import json
 import pathlib
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Dict
 
 import pandas as pd
@@ -29,6 +32,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 import requests
 import streamlit as st
+from hud_store import HudStore
 from plotly.subplots import make_subplots
 
 # Configuration
@@ -44,6 +48,7 @@ ORCHESTRATOR_BASE = "http://localhost:8000"
 GUARDIAN_BASE = "http://localhost:8787"
 TELEMETRY_DIR = pathlib.Path("/data/telemetry")
 TEST_RESULTS_DIR = pathlib.Path("/data/tests")
+TEST_RESULTS_FILE = TEST_RESULTS_DIR / "results.jsonl"
 
 # SLO thresholds
 SLO_THRESHOLDS = {
@@ -66,39 +71,42 @@ COLORS = {
 }
 
 
-@st.cache_data(ttl=30)  # Cache for 30 seconds
-def load_guardian_timeline(hours_back: int = 24) -> pd.DataFrame:
-    """Load Guardian state timeline from JSONL logs"""
-    timeline_data = []
-
-    # Load last N days of logs
-    for days_ago in range(hours_back // 24 + 1):
-        date = (datetime.now() - timedelta(days=days_ago)).strftime("%Y-%m-%d")
-        log_file = TELEMETRY_DIR / date / "guardian.jsonl"
-
-        if log_file.exists():
-            with open(log_file, "r") as f:
-                for line in f:
-                    try:
-                        event = json.loads(line.strip())
-                        if "ts" in event:
-                            event["timestamp"] = pd.to_datetime(event["ts"])
-                            timeline_data.append(event)
-                    except (json.JSONDecodeError, KeyError):
-                        continue
-
-    if not timeline_data:
-        return pd.DataFrame()
+@st.cache_resource
+def get_store() -> HudStore:
+    """Local time-series store (indexed JSONL tail + minute rollups)"""
+    return HudStore(telemetry_dir=TELEMETRY_DIR, tests_file=TEST_RESULTS_FILE)
+
 
-    df = pd.DataFrame(timeline_data)
+@st.cache_data(ttl=10)
+def sync_store() -> Dict[str, int]:
+    """Tail only what was appended since the last sync"""
+    return get_store().sync()
 
-    # Filter to recent hours
-    cutoff = datetime.now() - timedelta(hours=hours_back)
-    df = df[df["timestamp"] >= cutoff].sort_values("timestamp")
 
+def _window_frame(rows, ts_key: str = "_ts") -> pd.DataFrame:
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows)
+    df["timestamp"] = pd.to_datetime(df.pop(ts_key), unit="s", utc=True)
     return df
 
 
+@st.cache_data(ttl=30)  # Cache for 30 seconds
+def load_guardian_timeline(hours_back: int = 24) -> pd.DataFrame:
+    """Guardian state per minute (avg RAM per state) for the window"""
+    sync_store()
+    since = time.time() - hours_back * 3600
+    df = _window_frame(get_store().guardian_minutes(since), ts_key="ts")
+    return df.rename(columns={"ram_pct_avg": "ram_pct"})
+
+
+@st.cache_data(ttl=10)
+def load_recent_guardian(limit: int = 5) -> pd.DataFrame:
+    """Most recent raw Guardian records"""
+    sync_store()
+    return _window_frame(get_store().guardian_events(limit=limit))
+
+
 @st.cache_data(ttl=10)  # Cache for 10 seconds
 def get_live_status() -> Dict[str, Any]:
     """Get current system status from APIs"""
@@ -128,27 +136,11 @@ def get_guardian_status() -> Dict[str, Any]:
 
 @st.cache_data(ttl=60)  # Cache for 1 minute
 def load_test_results(hours_back: int = 168) -> pd.DataFrame:
-    """Load test results from JSONL logs"""
-    results_file = TEST_RESULTS_DIR / "results.jsonl"
-
-    if not results_file.exists():
-        return pd.DataFrame()
-
-    results = []
-    cutoff = datetime.now() - timedelta(hours=hours_back)
-
-    with open(results_file, "r") as f:
-        for line in f:
-            try:
-                result = json.loads(line.strip())
-                if "timestamp" in result:
-                    timestamp = pd.to_datetime(result["timestamp"])
-                    if timestamp >= cutoff:
-                        results.append(result)
-            except (json.JSONDecodeError, KeyError):
-                continue
-
-    return pd.DataFrame(results) if results else pd.DataFrame()
+    """Test success rate per minute for the window from the HUD store"""
+    sync_store()
+    since = time.time() - hours_back * 3600
+    df = _window_frame(get_store().test_minutes(since), ts_key="ts")
+    return df.rename(columns={"success_rate_avg": "success_rate"})
 
 
 def create_guardian_timeline_chart(df: pd.DataFrame) -> go.Figure:
@@ -486,8 +478,11 @@ def main():
 
         # Recent events
         st.subheader("⚡ Recent Events")
-        if not guardian_df.empty:
-            recent = guardian_df.tail(5)[["timestamp", "state", "reason", "ram_pct"]]
+        recent_df = load_recent_guardian(5)
+        if not recent_df.empty:
+            recent = recent_df.reindex(
+                columns=["timestamp", "state", "reason", "ram_pct"]
+            )
             recent["timestamp"] = recent["timestamp"].dt.strftime("%H:%M:%S")
             st.dataframe(recent, use_container_width=True)
         else:
@@ -502,8 +497,7 @@ def main():
         # Success rate over time
         fig_tests = go.Figure()
 
-        test_df["timestamp"] = pd.to_datetime(test_df["timestamp"])
-        test_df["success_rate"] = test_df.get("success_rate", 0) * 100
+        test_df["success_rate"] = test_df["success_rate"] * 100
 
         fig_tests.add_trace(
             go.Scatter(
@@ -4,8 +4,6 @@ Alice v2 Observability HUD
 Comprehensive dashboard för RAM peak, energy, tool errors, och SLO monitoring
 """
 
-import json
-import os
 import time
 from datetime import datetime
 from typing import Any, Dict, List
@@ -14,6 +12,7 @@ import pandas as pd
 import plotly.graph_objects as go
 import requests
 import streamlit as st
+from hud_store import HudStore
 
 # Page config
 st.set_page_config(
@@ -42,17 +41,32 @@ st.markdown(
 )
 
 
-def load_jsonl_data(filename: str) -> List[Dict[str, Any]]:
-    """Ladda data från JSONL fil"""
-    data = []
-    if os.path.exists(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            for line in f:
-                try:
-                    data.append(json.loads(line.strip()))
-                except json.JSONDecodeError:
-                    continue
-    return data
+@st.cache_resource
+def get_store(telemetry_dir: str) -> HudStore:
+    """HUD store för telemetry-katalogen (JSONL tailas in, indexerat per tid)"""
+    return HudStore(telemetry_dir=telemetry_dir)
+
+
+@st.cache_data(ttl=10)
+def load_window(telemetry_dir: str, hours_back: int) -> Dict[str, Any]:
+    """Minut-rollups för tidsfönstret + de senaste råa turn events"""
+    store = get_store(telemetry_dir)
+    store.sync()
+    since = time.time() - hours_back * 3600
+    return {
+        "turn_minutes": store.turn_minutes(since),
+        "tool_errors": store.tool_error_minutes(since),
+        "p95_ms": store.turn_latency_quantile(since, q=0.95),
+        "guardian_minutes": store.guardian_minutes(since),
+        "recent_events": store.turn_events(limit=10),
+    }
+
+
+def _minute_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df["timestamp"] = pd.to_datetime(df["ts"], unit="s", utc=True)
+    return df
 
 
 def get_guardian_status() -> Dict[str, Any]:
@@ -79,29 +93,23 @@ def get_orchestrator_status() -> Dict[str, Any]:
         return {"status": "ERROR", "error": str(e)}
 
 
-def create_ram_peak_chart(events_data: List[Dict[str, Any]]) -> go.Figure:
-    """Skapa RAM peak chart"""
-    if not events_data:
+def create_ram_peak_chart(turn_minutes: List[Dict[str, Any]]) -> go.Figure:
+    """Skapa RAM peak chart (max per minut över alla routes)"""
+    if not turn_minutes:
         return go.Figure().add_annotation(text="Ingen data tillgänglig", x=0.5, y=0.5)
 
-    df = pd.DataFrame(
-        [
-            {
-                "timestamp": event.get("ts", ""),
-                "proc_mb": event.get("ram_peak_mb", {}).get("proc_mb", 0),
-                "sys_mb": event.get("ram_peak_mb", {}).get("sys_mb", 0),
-            }
-            for event in events_data
-            if "ram_peak_mb" in event
-        ]
+    df = (
+        _minute_frame(turn_minutes)
+        .groupby("timestamp")[["proc_mb_max", "sys_mb_max"]]
+        .max()
+        .dropna(how="all")
+        .reset_index()
+        .rename(columns={"proc_mb_max": "proc_mb", "sys_mb_max": "sys_mb"})
     )
 
     if df.empty:
         return go.Figure().add_annotation(text="Ingen RAM data", x=0.5, y=0.5)
 
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df = df.sort_values("timestamp")
-
     fig = go.Figure()
 
     fig.add_trace(
@@ -127,7 +135,7 @@ def create_ram_peak_chart(events_data: List[Dict[str, Any]]) -> go.Figure:
     )
 
     fig.update_layout(
-        title="RAM Peak per Turn",
+        title="RAM Peak per Minute",
         xaxis_title="Tid",
         yaxis_title="RAM (MB)",
         height=400,
@@ -137,25 +145,22 @@ def create_ram_peak_chart(events_data: List[Dict[str, Any]]) -> go.Figure:
     return fig
 
 
-def create_energy_chart(events_data: List[Dict[str, Any]]) -> go.Figure:
-    """Skapa energy consumption chart"""
-    if not events_data:
+def create_energy_chart(turn_minutes: List[Dict[str, Any]]) -> go.Figure:
+    """Skapa energy consumption chart (summa per minut)"""
+    if not turn_minutes:
         return go.Figure().add_annotation(text="Ingen data tillgänglig", x=0.5, y=0.5)
 
-    df = pd.DataFrame(
-        [
-            {"timestamp": event.get("ts", ""), "energy_wh": event.get("energy_wh", 0)}
-            for event in events_data
-            if "energy_wh" in event
-        ]
+    df = (
+        _minute_frame(turn_minutes)
+        .groupby("timestamp")["energy_wh"]
+        .sum(min_count=1)
+        .dropna()
+        .reset_index()
     )
 
     if df.empty:
         return go.Figure().add_annotation(text="Ingen energy data", x=0.5, y=0.5)
 
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df = df.sort_values("timestamp")
-
     fig = go.Figure()
 
     fig.add_trace(
@@ -170,7 +175,7 @@ def create_energy_chart(events_data: List[Dict[str, Any]]) -> go.Figure:
     )
 
     fig.update_layout(
-        title="Energy Consumption per Turn",
+        title="Energy Consumption per Minute",
         xaxis_title="Tid",
         yaxis_title="Energy (Wh)",
         height=400,
@@ -180,19 +185,15 @@ def create_energy_chart(events_data: List[Dict[str, Any]]) -> go.Figure:
     return fig
 
 
-def create_tool_errors_chart(events_data: List[Dict[str, Any]]) -> go.Figure:
+def create_tool_errors_chart(tool_errors: List[Dict[str, Any]]) -> go.Figure:
     """Skapa tool errors chart"""
-    if not events_data:
-        return go.Figure().add_annotation(text="Ingen data tillgänglig", x=0.5, y=0.5)
+    if not tool_errors:
+        return go.Figure().add_annotation(text="Inga tool errors", x=0.5, y=0.5)
 
-    # Samla tool errors
+    # Summera minut-rollupen per felklass
     error_counts = {}
-    for event in events_data:
-        if "tool_calls" in event:
-            for tool_call in event["tool_calls"]:
-                if not tool_call.get("ok", True):
-                    error_class = tool_call.get("klass", "unknown")
-                    error_counts[error_class] = error_counts.get(error_class, 0) + 1
+    for row in tool_errors:
+        error_counts[row["klass"]] = error_counts.get(row["klass"], 0) + row["n"]
 
     if not error_counts:
         return go.Figure().add_annotation(text="Inga tool errors", x=0.5, y=0.5)
@@ -217,29 +218,17 @@ def create_tool_errors_chart(events_data: List[Dict[str, Any]]) -> go.Figure:
     return fig
 
 
-def create_latency_chart(events_data: List[Dict[str, Any]]) -> go.Figure:
-    """Skapa latency chart per route"""
-    if not events_data:
+def create_latency_chart(turn_minutes: List[Dict[str, Any]]) -> go.Figure:
+    """Skapa latency chart per route (medel per minut)"""
+    if not turn_minutes:
         return go.Figure().add_annotation(text="Ingen data tillgänglig", x=0.5, y=0.5)
 
-    df = pd.DataFrame(
-        [
-            {
-                "timestamp": event.get("ts", ""),
-                "route": event.get("route", "unknown"),
-                "e2e_full_ms": event.get("e2e_full_ms", 0),
-            }
-            for event in events_data
-            if "e2e_full_ms" in event
-        ]
-    )
+    df = _minute_frame(turn_minutes).dropna(subset=["e2e_avg_ms"])
+    df["route"] = df["route"].fillna("unknown")
 
     if df.empty:
         return go.Figure().add_annotation(text="Ingen latency data", x=0.5, y=0.5)
 
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df = df.sort_values("timestamp")
-
     fig = go.Figure()
 
     colors = {"micro": "#1f77b4", "planner": "#ff7f0e", "deep": "#2ca02c"}
@@ -249,7 +238,7 @@ def create_latency_chart(events_data: List[Dict[str, Any]]) -> go.Figure:
         fig.add_trace(
             go.Scatter(
                 x=route_data["timestamp"],
-                y=route_data["e2e_full_ms"],
+                y=route_data["e2e_avg_ms"],
                 mode="lines+markers",
                 name=f"{route} (ms)",
                 line=dict(color=colors.get(route, "#9467bd"), width=2),
@@ -285,17 +274,18 @@ def main():
 
     # Data sources
     st.sidebar.subheader("Data Sources")
-    events_file = st.sidebar.text_input(
-        "Events JSONL file", value="data/telemetry/events_2025-08-31.jsonl"
+    telemetry_dir = st.sidebar.text_input("Telemetry dir", value="data/telemetry")
+    hours_back = st.sidebar.selectbox(
+        "Tidsfönster",
+        [1, 4, 12, 24, 48, 168],
+        index=3,
+        format_func=lambda x: f"{x}h" if x < 168 else "7 dagar",
     )
 
-    guardian_file = st.sidebar.text_input(
-        "Guardian JSONL file", value="data/telemetry/guardian_2025-08-31.jsonl"
-    )
-
-    # Ladda data
-    events_data = load_jsonl_data(events_file)
-    guardian_data = load_jsonl_data(guardian_file)
+    # Ladda data (minut-rollups för valt fönster ur HUD store)
+    window = load_window(telemetry_dir, hours_back)
+    turn_minutes = window["turn_minutes"]
+    events_data = window["recent_events"]
 
     # Status row
     col1, col2, col3, col4 = st.columns(4)
@@ -348,55 +338,33 @@ def main():
     col1, col2 = st.columns(2)
 
     with col1:
-        ram_fig = create_ram_peak_chart(events_data)
+        ram_fig = create_ram_peak_chart(turn_minutes)
         st.plotly_chart(ram_fig, use_container_width=True)
 
     with col2:
-        energy_fig = create_energy_chart(events_data)
+        energy_fig = create_energy_chart(turn_minutes)
         st.plotly_chart(energy_fig, use_container_width=True)
 
     # Charts row 2
     col1, col2 = st.columns(2)
 
     with col1:
-        latency_fig = create_latency_chart(events_data)
+        latency_fig = create_latency_chart(turn_minutes)
         st.plotly_chart(latency_fig, use_container_width=True)
 
     with col2:
-        errors_fig = create_tool_errors_chart(events_data)
+        errors_fig = create_tool_errors_chart(window["tool_errors"])
         st.plotly_chart(errors_fig, use_container_width=True)
 
     # SLO Compliance
     st.subheader("🎯 SLO Compliance")
 
-    if events_data:
-        # Beräkna SLO metrics
-        micro_latencies = [
-            event["e2e_full_ms"]
-            for event in events_data
-            if event.get("route") == "micro"
-        ]
-        planner_latencies = [
-            event["e2e_full_ms"]
-            for event in events_data
-            if event.get("route") == "planner"
-        ]
-        deep_latencies = [
-            event["e2e_full_ms"]
-            for event in events_data
-            if event.get("route") == "deep"
-        ]
-
-        def p95(values):
-            if not values:
-                return 0
-            sorted_values = sorted(values)
-            index = int(len(sorted_values) * 0.95)
-            return sorted_values[index]
-
-        p95_micro = p95(micro_latencies)
-        p95_planner = p95(planner_latencies)
-        p95_deep = p95(deep_latencies)
+    if turn_minutes:
+        # P95 ur latency-histogrammet (bucketens övre gräns)
+        p95_ms = window["p95_ms"]
+        p95_micro = p95_ms.get("micro", 0)
+        p95_planner = p95_ms.get("planner", 0)
+        p95_deep = p95_ms.get("deep", 0)
 
         # SLO thresholds
         slo_micro = p95_micro <= 250
@@ -448,7 +416,8 @@ def main():
     st.markdown("---")
     st.markdown(
         f"*HUD uppdaterad: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | "
-        f"Events: {len(events_data)} | Guardian records: {len(guardian_data)}*"
+        f"Events: {sum(row['n'] for row in turn_minutes)} | "
+        f"Guardian records: {sum(row['n'] for row in window['guardian_minutes'])}*"
     )
 
 
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Alice v2 HUD Store - local time-series store for the Streamlit HUDs
+===================================================================
+
+A tailer reads only bytes appended since the last sync (per-file byte offset
++ inode) from:
+- Guardian JSONL logs (<telemetry>/YYYY-MM-DD/guardian.jsonl, guardian_*.jsonl)
+- Turn events (<telemetry>/YYYY-MM-DD/events_*.jsonl, events_*.jsonl)
+- Test results (/data/tests/results.jsonl)
+
+Rows land in SQLite tables indexed by time, and the minute rollups
+(guardian_minute, turn_minute, turn_latency, tool_error_minute, test_minute)
+are rebuilt for the minutes a sync touched. HUD panels over a time window
+read the rollups; raw docs are only fetched for small limit= lookups, so
+refresh cost depends on the window, not on the turn volume.
+
+A rotated/rewritten file (new inode or shrunk, e.g. GDPR compaction) is
+re-read from the start: its old rows are dropped and the affected minutes
+re-rolled. Raw rows older than retention_days are pruned; rollups are kept.
+
+Usage:
+    python hud_store.py --follow             # standalone tailer
+    python hud_store.py                      # one sync, print stats
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+TELEMETRY_DIR = pathlib.Path(os.getenv("LOG_DIR", "/data/telemetry"))
+TESTS_FILE = pathlib.Path(os.getenv("TESTS_FILE", "/data/tests/results.jsonl"))
+STORE_PATH = os.getenv("HUD_STORE_PATH")  # Default: <telemetry>/../hud/hud_store.db
+
+# Latency histogram bucket upper bounds (ms); p95 reports the bucket bound
+LATENCY_BUCKETS_MS = (
+    25,
+    50,
+    100,
+    150,
+    250,
+    400,
+    600,
+    1000,
+    1500,
+    2000,
+    3000,
+    5000,
+    10000,
+    30000,
+)
+OVERFLOW_BUCKET = 10**9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE, kind TEXT,
+    inode INTEGER, offset INTEGER
+);
+CREATE TABLE IF NOT EXISTS guardian (
+    ts REAL, minute INTEGER, src INTEGER, state TEXT,
+    ram_pct REAL, cpu_pct REAL, doc TEXT
+);
+CREATE INDEX IF NOT EXISTS guardian_ts ON guardian (ts);
+CREATE TABLE IF NOT EXISTS turns (
+    ts REAL, minute INTEGER, src INTEGER, route TEXT, e2e_full_ms REAL,
+    lat_bucket INTEGER, proc_mb REAL, sys_mb REAL, energy_wh REAL,
+    tool_calls INTEGER, tool_errors INTEGER, doc TEXT
+);
+CREATE INDEX IF NOT EXISTS turns_ts ON turns (ts);
+CREATE INDEX IF NOT EXISTS turns_minute ON turns (minute);
+CREATE TABLE IF NOT EXISTS tests (
+    ts REAL, minute INTEGER, src INTEGER, ok INTEGER, success_rate REAL,
+    lat_ms REAL, doc TEXT
+);
+CREATE INDEX IF NOT EXISTS tests_ts ON tests (ts);
+CREATE TABLE IF NOT EXISTS guardian_minute (
+    minute INTEGER, state TEXT, n INTEGER, ram_pct_avg REAL,
+    ram_pct_max REAL, cpu_pct_avg REAL, PRIMARY KEY (minute, state)
+);
+CREATE TABLE IF NOT EXISTS turn_minute (
+    minute INTEGER, route TEXT, n INTEGER, e2e_avg_ms REAL, e2e_max_ms REAL,
+    proc_mb_max REAL, sys_mb_max REAL, energy_wh REAL, tool_calls INTEGER,
+    tool_errors INTEGER, PRIMARY KEY (minute, route)
+);
+CREATE TABLE IF NOT EXISTS turn_latency (
+    minute INTEGER, route TEXT, bucket INTEGER, n INTEGER,
+    PRIMARY KEY (minute, route, bucket)
+);
+CREATE TABLE IF NOT EXISTS tool_error_minute (
+    minute INTEGER, klass TEXT, n INTEGER, PRIMARY KEY (minute, klass)
+);
+CREATE TABLE IF NOT EXISTS test_minute (
+    minute INTEGER PRIMARY KEY, n INTEGER, ok INTEGER,
+    success_rate_avg REAL, lat_ms_avg REAL
+);
+"""
+
+# kind -> rollup rebuild statements over the touched minutes
+ROLLUPS = {
+    "guardian": [
+        "DELETE FROM guardian_minute WHERE minute IN (SELECT m FROM touched)",
+        """INSERT INTO guardian_minute
+           SELECT minute, state, COUNT(*), AVG(ram_pct), MAX(ram_pct),
+                  AVG(cpu_pct)
+           FROM guardian WHERE minute IN (SELECT m FROM touched)
+           GROUP BY minute, state""",
+    ],
+    "turns": [
+        "DELETE FROM turn_minute WHERE minute IN (SELECT m FROM touched)",
+        """INSERT INTO turn_minute
+           SELECT minute, route, COUNT(*), AVG(e2e_full_ms),
+                  MAX(e2e_full_ms), MAX(proc_mb), MAX(sys_mb),
+                  SUM(energy_wh), SUM(tool_calls), SUM(tool_errors)
+           FROM turns WHERE minute IN (SELECT m FROM touched)
+           GROUP BY minute, route""",
+        "DELETE FROM turn_latency WHERE minute IN (SELECT m FROM touched)",
+        """INSERT INTO turn_latency
+           SELECT minute, route, lat_bucket, COUNT(*)
+           FROM turns WHERE minute IN (SELECT m FROM touched)
+             AND lat_bucket IS NOT NULL
+           GROUP BY minute, route, lat_bucket""",
+        "DELETE FROM tool_error_minute WHERE minute IN (SELECT m FROM touched)",
+        """INSERT INTO tool_error_minute
+           SELECT t.minute, COALESCE(json_extract(c.value, '$.klass'), 'unknown'),
+                  COUNT(*)
+           FROM turns t, json_each(t.doc, '$.tool_calls') c
+           WHERE t.minute IN (SELECT m FROM touched) AND t.tool_errors > 0
+             AND c.type = 'object'
+             AND NOT COALESCE(json_extract(c.value, '$.ok'), 1)
+           GROUP BY 1, 2""",
+    ],
+    "tests": [
+        "DELETE FROM test_minute WHERE minute IN (SELECT m FROM touched)",
+        """INSERT INTO test_minute
+           SELECT minute, COUNT(*), SUM(ok), AVG(success_rate), AVG(lat_ms)
+           FROM tests WHERE minute IN (SELECT m FROM touched)
+           GROUP BY minute""",
+    ],
+}
+
+
+def parse_ts(value: Any) -> Optional[float]:
+    """Epoch seconds from ISO-8601 (naive = UTC) or epoch s/ms"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000.0 if value > 1e12 else float(value)
+    try:
+        text = str(value)
+        if text.endswith("Z"):
+            text = text[:-1] + "+00:00"
+        dt = datetime.fromisoformat(text)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    except ValueError:
+        return None
+
+
+def latency_bucket(ms: Optional[float]) -> Optional[int]:
+    if ms is None:
+        return None
+    for bound in LATENCY_BUCKETS_MS:
+        if ms <= bound:
+            return bound
+    return OVERFLOW_BUCKET
+
+
+def _num(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def _guardian_row(ev: Dict[str, Any]) -> Tuple:
+    return (
+        ev.get("state"),
+        _num(ev.get("ram_pct")),
+        _num(ev.get("cpu_pct")),
+    )
+
+
+def _turn_row(ev: Dict[str, Any]) -> Tuple:
+    ram = ev.get("ram_peak_mb") or {}
+    if not isinstance(ram, dict):
+        ram = {"proc_mb": ram}
+    tool_calls = ev.get("tool_calls") or []
+    e2e = _num(ev.get("e2e_full_ms"))
+    return (
+        ev.get("route"),
+        e2e,
+        latency_bucket(e2e),
+        _num(ram.get("proc_mb")),
+        _num(ram.get("sys_mb")),
+        _num(ev.get("energy_wh")),
+        len(tool_calls),
+        sum(1 for c in tool_calls if isinstance(c, dict) and not c.get("ok", True)),
+    )
+
+
+def _test_row(ev: Dict[str, Any]) -> Tuple:
+    ok = ev.get("ok")
+    return (
+        None if ok is None else int(bool(ok)),
+        _num(ev.get("success_rate")),
+        _num(ev.get("lat_ms")),
+    )
+
+
+# kind -> (table, timestamp keys, extra columns, row builder)
+KINDS = {
+    "guardian": (
+        "guardian",
+        ("ts",),
+        ("state", "ram_pct", "cpu_pct"),
+        _guardian_row,
+    ),
+    "turns": (
+        "turns",
+        ("ts",),
+        (
+            "route",
+            "e2e_full_ms",
+            "lat_bucket",
+            "proc_mb",
+            "sys_mb",
+            "energy_wh",
+            "tool_calls",
+            "tool_errors",
+        ),
+        _turn_row,
+    ),
+    "tests": (
+        "tests",
+        ("timestamp", "ts"),
+        ("ok", "success_rate", "lat_ms"),
+        _test_row,
+    ),
+}
+
+
+class HudStore:
+    """SQLite time-series store with minute rollups, fed by a JSONL tailer"""
+
+    def __init__(
+        self,
+        path: Optional[pathlib.Path] = STORE_PATH,
+        telemetry_dir: pathlib.Path = TELEMETRY_DIR,
+        tests_file: Optional[pathlib.Path] = TESTS_FILE,
+        retention_days: float = 7.0,
+    ):
+        self.telemetry_dir = pathlib.Path(telemetry_dir)
+        self.path = pathlib.Path(
+            path or self.telemetry_dir.parent / "hud" / "hud_store.db"
+        )
+        self.tests_file = pathlib.Path(tests_file) if tests_file else None
+        self.retention_s = retention_days * 86400
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+            # Rollup added after the store existed: build it from raw rows
+            if db.execute("SELECT 1 FROM tool_error_minute LIMIT 1").fetchone() is None:
+                minutes = {
+                    r[0]
+                    for r in db.execute(
+                        "SELECT DISTINCT minute FROM turns WHERE tool_errors > 0"
+                    )
+                }
+                if minutes:
+                    self._reroll(db, "turns", minutes)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One connection per call: Streamlit reruns on different threads
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield db
+            db.commit()
+        finally:
+            db.close()
+
+    # --- Tailer -----------------------------------------------------------
+
+    def _sources(self) -> List[Tuple[pathlib.Path, str]]:
+        tdir = self.telemetry_dir
+        sources = []
+        for pattern in ("*/guardian.jsonl", "guardian_*.jsonl"):
+            sources += [(p, "guardian") for p in tdir.glob(pattern)]
+        for pattern in ("*/events_*.jsonl", "events_*.jsonl"):
+            sources += [(p, "turns") for p in tdir.glob(pattern)]
+        if self.tests_file and self.tests_file.exists():
+            sources.append((self.tests_file, "tests"))
+        return sorted(sources)
+
+    def sync(self, max_bytes_per_file: Optional[int] = None) -> Dict[str, int]:
+        """Ingest appended lines from all sources and re-roll touched minutes"""
+        stats = {"files": 0, "rows": 0, "bytes": 0, "resets": 0}
+        cutoff = time.time() - self.retention_s
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")  # One syncer at a time
+            known = {row["path"]: row for row in db.execute("SELECT * FROM files")}
+            touched: Dict[str, set] = {kind: set() for kind in KINDS}
+
+            for path, kind in self._sources():
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                mark = known.get(str(path))
+                if mark and mark["inode"] == st.st_ino and mark["offset"] == st.st_size:
+                    continue  # Unchanged: no open, no read
+
+                if mark is None:
+                    src = db.execute(
+                        "INSERT INTO files (path, kind, inode, offset) VALUES (?, ?, ?, 0)",
+                        (str(path), kind, st.st_ino),
+                    ).lastrowid
+                    offset = 0
+                else:
+                    src = mark["id"]
+                    offset = mark["offset"]
+                    if mark["inode"] != st.st_ino or st.st_size < offset:
+                        # Rotated/rewritten: drop its rows, read again
+                        table = KINDS[kind][0]
+                        touched[kind].update(
+                            r[0]
+                            for r in db.execute(
+                                f"SELECT DISTINCT minute FROM {table} WHERE src = ?",
+                                (src,),
+                            )
+                        )
+                        db.execute(f"DELETE FROM {table} WHERE src = ?", (src,))
+                        offset = 0
+                        stats["resets"] += 1
+
+                start = offset
+                offset, rows = self._ingest(
+                    db, path, kind, src, offset, cutoff, max_bytes_per_file, touched
+                )
+                db.execute(
+                    "UPDATE files SET inode = ?, offset = ? WHERE id = ?",
+                    (st.st_ino, offset, src),
+                )
+                stats["files"] += 1
+                stats["rows"] += rows
+                stats["bytes"] += offset - start
+
+            for kind, minutes in touched.items():
+                if minutes:
+                    self._reroll(db, kind, minutes)
+
+            for table, _, _, _ in KINDS.values():
+                db.execute(f"DELETE FROM {table} WHERE ts < ?", (cutoff,))
+        return stats
+
+    def _ingest(
+        self,
+        db: sqlite3.Connection,
+        path: pathlib.Path,
+        kind: str,
+        src: int,
+        offset: int,
+        cutoff: float,
+        max_bytes: Optional[int],
+        touched: Dict[str, set],
+    ) -> Tuple[int, int]:
+        table, ts_keys, columns, build = KINDS[kind]
+        placeholders = ", ".join("?" * (len(columns) + 4))
+        sql = (
+            f"INSERT INTO {table} (ts, minute, src, {', '.join(columns)}, doc) "
+            f"VALUES ({placeholders})"
+        )
+        batch = []
+        rows = 0
+        start = offset
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partial line: the writer is mid-append
+                offset += len(line)
+                try:
+                    ev = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(ev, dict):
+                    continue
+                ts = next(
+                    (t for t in (parse_ts(ev.get(k)) for k in ts_keys) if t), None
+                )
+                if ts is None or ts < cutoff:
+                    continue
+                minute = int(ts // 60)
+                touched[kind].add(minute)
+                batch.append(
+                    (ts, minute, src, *build(ev), line.decode("utf-8").rstrip())
+                )
+                if len(batch) >= 1000:
+                    db.executemany(sql, batch)
+                    rows += len(batch)
+                    batch.clear()
+                if max_bytes is not None and offset - start >= max_bytes:
+                    break  # Rest on the next sync
+        if batch:
+            db.executemany(sql, batch)
+            rows += len(batch)
+        return offset, rows
+
+    def _reroll(self, db: sqlite3.Connection, kind: str, minutes: set) -> None:
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS touched (m INTEGER PRIMARY KEY)")
+        db.execute("DELETE FROM touched")
+        db.executemany("INSERT INTO touched VALUES (?)", ((m,) for m in minutes))
+        for statement in ROLLUPS[kind]:
+            db.execute(statement)
+
+    # --- Queries (window only) --------------------------------------------
+
+    def _docs(
+        self, table: str, since: float, until: Optional[float], limit: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        until = until if until is not None else float("inf")
+        with self._connect() as db:
+            if limit:
+                rows = db.execute(
+                    f"SELECT ts, doc FROM {table} WHERE ts >= ? AND ts <= ? "
+                    "ORDER BY ts DESC LIMIT ?",
+                    (since, until, limit),
+                ).fetchall()[::-1]
+            else:
+                rows = db.execute(
+                    f"SELECT ts, doc FROM {table} WHERE ts >= ? AND ts <= ? "
+                    "ORDER BY ts",
+                    (since, until),
+                ).fetchall()
+        docs = []
+        for row in rows:
+            doc = json.loads(row["doc"])
+            doc["_ts"] = row["ts"]
+            docs.append(doc)
+        return docs
+
+    def guardian_events(
+        self,
+        since: float = 0,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Raw Guardian records in [since, until], oldest first (_ts = epoch s)"""
+        return self._docs("guardian", since, until, limit)
+
+    def turn_events(
+        self,
+        since: float = 0,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Raw turn events in [since, until], oldest first (_ts = epoch s)"""
+        return self._docs("turns", since, until, limit)
+
+    def test_results(
+        self,
+        since: float = 0,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Raw test results in [since, until], oldest first (_ts = epoch s)"""
+        return self._docs("tests", since, until, limit)
+
+    def _minutes(self, table: str, since: float) -> List[Dict[str, Any]]:
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT * FROM {table} WHERE minute >= ? ORDER BY minute",
+                (int(since // 60),),
+            ).fetchall()
+        return [{**dict(row), "ts": row["minute"] * 60} for row in rows]
+
+    def guardian_minutes(self, since: float) -> List[Dict[str, Any]]:
+        return self._minutes("guardian_minute", since)
+
+    def turn_minutes(self, since: float) -> List[Dict[str, Any]]:
+        return self._minutes("turn_minute", since)
+
+    def tool_error_minutes(self, since: float) -> List[Dict[str, Any]]:
+        return self._minutes("tool_error_minute", since)
+
+    def test_minutes(self, since: float) -> List[Dict[str, Any]]:
+        return self._minutes("test_minute", since)
+
+    def turn_latency_quantile(self, since: float, q: float = 0.95) -> Dict[str, int]:
+        """Per-route latency quantile (bucket upper bound, ms) over the window"""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT route, bucket, SUM(n) AS n FROM turn_latency "
+                "WHERE minute >= ? GROUP BY route, bucket ORDER BY route, bucket",
+                (int(since // 60),),
+            ).fetchall()
+        hist: Dict[str, List[Tuple[int, int]]] = {}
+        for row in rows:
+            hist.setdefault(row["route"], []).append((row["bucket"], row["n"]))
+        result = {}
+        for route, buckets in hist.items():
+            target = q * sum(n for _, n in buckets)
+            seen = 0
+            for bucket, n in buckets:
+                seen += n
+                if seen >= target:
+                    result[route] = bucket
+                    break
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alice HUD store tailer")
+    parser.add_argument("--follow", action="store_true", help="Keep tailing")
+    parser.add_argument("--interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    store = HudStore()
+    while True:
+        print(json.dumps({"ts": time.time(), **store.sync()}))
+        if not args.follow:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import json
 import time
 from datetime import datetime
 from pathlib import Path
@@ -7,6 +6,7 @@ import pandas as pd
 import plotly.express as px
 import requests
 import streamlit as st
+from hud_store import HudStore
 
 st.set_page_config(page_title="Alice v2 Mini HUD", layout="wide")
 st.title("🤖 Alice v2 Mini HUD")
@@ -14,26 +14,31 @@ st.title("🤖 Alice v2 Mini HUD")
 # Data paths
 results_file = Path("data/tests/results.jsonl")
 telemetry_dir = Path("data/telemetry")
-guardian_files = list(telemetry_dir.glob("*/guardian.jsonl"))
+WINDOW_HOURS = 168
+RECENT_RESULTS = 500  # Raw results for the latency histogram
 
 
-# Load eval results
+@st.cache_resource
+def get_store():
+    # JSONL tailed into the local HUD store; queries read only the window
+    return HudStore(telemetry_dir=telemetry_dir, tests_file=results_file)
+
+
+# Load eval results: window totals from the minute rollup, recent raw results
 @st.cache_data(ttl=30)
 def load_results():
-    if results_file.exists():
-        lines = results_file.read_text().strip().split("\n")
-        return [json.loads(line) for line in lines if line]
-    return []
+    store = get_store()
+    store.sync()
+    minutes = store.test_minutes(since=time.time() - WINDOW_HOURS * 3600)
+    return minutes, store.test_results(limit=RECENT_RESULTS)
 
 
 # Load guardian logs
 @st.cache_data(ttl=30)
 def load_guardian():
-    if guardian_files:
-        latest = max(guardian_files, key=lambda x: x.stat().st_mtime)
-        lines = latest.read_text().strip().split("\n")
-        return [json.loads(line) for line in lines[-100:] if line]
-    return []
+    store = get_store()
+    store.sync()
+    return store.guardian_events(limit=100)
 
 
 # Auto-refresh
@@ -46,11 +51,10 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("📊 Eval Results")
-    results = load_results()
-    if results:
-        df = pd.DataFrame(results)
-        total = len(df)
-        passed = df["ok"].sum()
+    result_minutes, results = load_results()
+    if result_minutes:
+        total = sum(row["n"] for row in result_minutes)
+        passed = sum(row["ok"] or 0 for row in result_minutes)
         rate = (passed / total) * 100 if total > 0 else 0
 
         st.metric("Pass Rate", f"{rate:.1f}%")
@@ -58,8 +62,13 @@ with col1:
         st.metric("Passed", passed)
 
         # Latency chart
+        df = pd.DataFrame(results)
         if "lat_ms" in df.columns:
-            fig = px.histogram(df, x="lat_ms", title="Response Latency Distribution")
+            fig = px.histogram(
+                df,
+                x="lat_ms",
+                title=f"Response Latency Distribution (last {len(df)})",
+            )
             st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("No eval results yet")
@@ -125,20 +134,16 @@ with sec_col1:
 with sec_col2:
     # Latest turn-event security fields
     try:
-        latest_dir = max(telemetry_dir.glob("*/"), key=lambda p: p.stat().st_mtime)
-        ev = latest_dir / f"events_{latest_dir.name}.jsonl"
-        if ev.exists():
-            lines = ev.read_text().strip().split("\n")
-            if lines:
-                last = json.loads(lines[-1])
-                sec = last.get("security") or {}
-                st.json(
-                    {
-                        "mode": sec.get("mode"),
-                        "inj": sec.get("injection_score"),
-                        "sanitised": sec.get("sanitised_context"),
-                    }
-                )
+        latest_turn = get_store().turn_events(limit=1)
+        if latest_turn:
+            sec = latest_turn[-1].get("security") or {}
+            st.json(
+                {
+                    "mode": sec.get("mode"),
+                    "inj": sec.get("injection_score"),
+                    "sanitised": sec.get("sanitised_context"),
+                }
+            )
         else:
             st.info("No turn events yet")
     except Exception as e:
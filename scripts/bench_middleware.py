@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Per-request middleware overhead for the orchestrator.
+
+Drives a minimal FastAPI app directly over ASGI (no sockets, no HTTP client)
+and compares:
+  none     - no middleware
+  legacy   - the former Logging + Metrics BaseHTTPMiddleware stack that
+             main.py installed (reproduced here for comparison)
+  current  - InstrumentationMiddleware
+
+Logs are rendered to /dev/null so their formatting cost is included.
+
+Usage:
+    python scripts/bench_middleware.py --requests 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import statistics
+import sys
+import time
+import uuid
+
+ORCH_DIR = pathlib.Path(__file__).resolve().parents[1] / "services" / "orchestrator"
+sys.path.insert(0, str(ORCH_DIR))
+
+import structlog  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from src.metrics import METRICS  # noqa: E402
+from src.middleware.instrumentation import InstrumentationMiddleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+logger = structlog.get_logger("bench")
+
+
+class LegacyLogging(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        trace_id = str(uuid.uuid4())
+        start = time.time()
+        request.state.trace_id = trace_id
+        client_ip = request.client.host if request.client else "unknown"
+        logger.info(
+            "Request started",
+            trace_id=trace_id,
+            method=request.method,
+            url=str(request.url),
+            path=request.url.path,
+            client_ip=client_ip,
+            user_agent=request.headers.get("user-agent", "unknown"),
+        )
+        response = await call_next(request)
+        response.headers["X-Trace-ID"] = trace_id
+        logger.info(
+            "Request completed",
+            trace_id=trace_id,
+            method=request.method,
+            path=request.url.path,
+            status_code=response.status_code,
+            response_time_ms=int((time.time() - start) * 1000),
+            client_ip=client_ip,
+        )
+        return response
+
+
+class LegacyMetrics(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        t0 = time.perf_counter()
+        resp = await call_next(request)
+        ms = (time.perf_counter() - t0) * 1000.0
+        METRICS.observe_latency(resp.headers.get("X-Route") or "other", ms)
+        METRICS.observe_status(resp.status_code)
+        return resp
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    if variant == "legacy":
+        app.add_middleware(LegacyLogging)
+        app.add_middleware(LegacyMetrics)
+    elif variant == "current":
+        app.add_middleware(InstrumentationMiddleware)
+    return app
+
+
+async def drive(app: FastAPI, n: int) -> list:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/ping",
+        "raw_path": b"/api/ping",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        await app(dict(scope), receive, send)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+
+def summarize(samples: list) -> dict:
+    samples = sorted(samples)
+    return {
+        "mean_us": round(statistics.fmean(samples), 1),
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[int(len(samples) * 0.95)], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Middleware overhead benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=500)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    structlog.configure(
+        processors=[
+            structlog.processors.add_log_level,
+            structlog.processors.TimeStamper(fmt="ISO"),
+            structlog.processors.JSONRenderer(),
+        ],
+        logger_factory=structlog.PrintLoggerFactory(file=devnull),
+        cache_logger_on_first_use=True,
+    )
+
+    results = {}
+    for variant in ("none", "legacy", "current"):
+        app = build_app(variant)
+        asyncio.run(drive(app, args.warmup))
+        results[variant] = summarize(asyncio.run(drive(app, args.requests)))
+
+    base = results["none"]["mean_us"]
+    for variant in ("legacy", "current"):
+        results[variant]["overhead_us"] = round(results[variant]["mean_us"] - base, 1)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Response assembly cost per chat turn in the orchestrator.
+
+Compares, for the same planner turn (LLM text, plan execution, NLU info):
+  legacy   - metadata + rag_data dicts built from repeated llm_response.get
+             calls, pydantic ChatResponse through FastAPI's encoder
+             (jsonable_encoder + JSONResponse) and json.dumps for telemetry
+             (reproduced here for comparison)
+  current  - TurnResult assembled once, encoded once, bytes spliced into
+             the response body and the turn event line
+
+Usage:
+    python scripts/bench_turn_response.py --turns 20000
+"""
+
+import argparse
+import json
+import pathlib
+import statistics
+import sys
+import time
+
+ORCH_DIR = pathlib.Path(__file__).resolve().parents[1] / "services" / "orchestrator"
+sys.path.insert(0, str(ORCH_DIR))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from src.models.api import ChatResponse  # noqa: E402
+from src.models.turn_result import TurnResult, splice_json  # noqa: E402
+
+LLM_RESPONSE = {
+    "text": "Jag har bokat mötet med Anna imorgon kl 14 och skickat en inbjudan. " * 8,
+    "model": "qwen2.5:3b",
+    "meta": {"schema_ok": True},
+    "repair_used": False,
+    "tokens_used": 187,
+    "json_parsed": True,
+}
+PLANNER_EXECUTION = {
+    "executed_steps": [
+        {"tool": "calendar.create_draft", "success": True, "latency_ms": 12.4},
+        {"tool": "email.create_draft", "success": True, "latency_ms": 9.1},
+    ],
+    "fallback_used": False,
+    "total_time_ms": 21.5,
+}
+NLU = {"intent": "calendar.create_draft", "slots": {"when": "2025-09-04T14:00"}}
+EVENT_BASE = {
+    "v": "1",
+    "ts": "2025-09-03T12:00:00Z",
+    "trace_id": "5f0c2c8e-1b7e-4b52-9d1f-6f8c0f1e2a3b",
+    "session_id": "bench",
+    "route": "planner",
+    "e2e_first_ms": 420,
+    "e2e_full_ms": 420,
+    "ram_peak_mb": {"proc_mb": 512.3, "sys_mb": 8123.4},
+    "tool_calls": [],
+    "energy_wh": 0.0007,
+    "guardian_state": "NORMAL",
+    "pii_masked": True,
+    "consent_scopes": ["basic_logging"],
+    "input_text": "Boka möte med Anna imorgon kl 14 och mejla henne",
+    "lang": "sv",
+}
+
+
+def legacy_turn(llm_response):
+    rag_data = {
+        "top_k": 0,
+        "hits": 0,
+        "llm_model": llm_response["model"],
+        "planner_schema_ok": (
+            llm_response.get(
+                "schema_ok", llm_response.get("meta", {}).get("schema_ok", False)
+            )
+            if llm_response
+            else False
+        ),
+        "repair_used": llm_response.get("repair_used", False)
+        if llm_response
+        else False,
+        "circuit_open": (
+            llm_response.get("circuit_open", False) if llm_response else False
+        ),
+        "fallback_used": (
+            llm_response.get("fallback_used", False) if llm_response else False
+        ),
+        "fallback_reason": (
+            llm_response.get("fallback_reason", None) if llm_response else None
+        ),
+        "blocked_by_guardian": False,
+        "tokens_used": llm_response.get("tokens_used", 0) if llm_response else 0,
+    }
+    event = {
+        **EVENT_BASE,
+        "rag": rag_data,
+        "output_text": (llm_response or {}).get("text", ""),
+    }
+    line = (json.dumps(event) + "\n").encode("utf-8")
+
+    metadata = {
+        "route": "planner",
+        "llm_model": llm_response["model"],
+        "planner_schema_ok": (
+            llm_response.get(
+                "schema_ok", llm_response.get("meta", {}).get("schema_ok", False)
+            )
+            if llm_response
+            else False
+        ),
+        "repair_used": llm_response.get("repair_used", False)
+        if llm_response
+        else False,
+        "circuit_open": (
+            llm_response.get("circuit_open", False) if llm_response else False
+        ),
+        "fallback_used": (
+            llm_response.get("fallback_used", False) if llm_response else False
+        ),
+        "fallback_reason": (
+            llm_response.get("fallback_reason", None) if llm_response else None
+        ),
+        "blocked_by_guardian": False,
+        "tokens_used": llm_response.get("tokens_used", 0) if llm_response else 0,
+        "planner_execution": PLANNER_EXECUTION,
+        "nlu": NLU,
+        "shadow": {"enabled": False},
+    }
+    response_data = ChatResponse(
+        session_id="bench",
+        timestamp=int(time.time() * 1000),
+        trace_id=EVENT_BASE["trace_id"],
+        response=llm_response["text"],
+        model_used="planner",
+        latency_ms=420,
+        metadata=metadata,
+    )
+    # FastAPI: validate against response_model, jsonable_encoder, JSONResponse
+    validated = ChatResponse.model_validate(response_data.model_dump())
+    body = JSONResponse(jsonable_encoder(validated)).body
+    return body, line
+
+
+def current_turn(llm_response):
+    result = TurnResult.from_llm(
+        "planner",
+        llm_response["model"],
+        llm_response,
+        requested_route="planner",
+        planner_execution=PLANNER_EXECUTION,
+        nlu=NLU,
+    )
+    body = result.response_body(
+        "bench", int(time.time() * 1000), EVENT_BASE["trace_id"], 420
+    )
+    line = (
+        splice_json(
+            EVENT_BASE,
+            {"rag": result.rag_json(), "output_text": result.output_text_json()},
+        )
+        + b"\n"
+    )
+    return body, line
+
+
+def run(fn, n):
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn(LLM_RESPONSE)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return {
+        "mean_us": round(statistics.fmean(samples), 1),
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[int(len(samples) * 0.95)], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Turn response assembly benchmark")
+    parser.add_argument("--turns", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=1000)
+    args = parser.parse_args()
+
+    # Same documents either way (timestamps aside)
+    legacy_body, legacy_line = legacy_turn(LLM_RESPONSE)
+    body, line = current_turn(LLM_RESPONSE)
+    legacy_doc, doc = json.loads(legacy_body), json.loads(body)
+    legacy_doc.pop("timestamp"), doc.pop("timestamp")
+    assert legacy_doc == doc
+    assert json.loads(legacy_line) == json.loads(line)
+
+    results = {}
+    for name, fn in (("legacy", legacy_turn), ("current", current_turn)):
+        run(fn, args.warmup)
+        results[name] = run(fn, args.turns)
+        body, line = fn(LLM_RESPONSE)
+        results[name]["bytes"] = len(body) + len(line)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
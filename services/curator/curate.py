@@ -1,6 +1,25 @@
+"""
+Curator: telemetry turns -> bronze/silver/gold datasets + exports.
+
+Single streaming pass per day: each event is routed to its tier writers as
+it is read, so memory stays constant regardless of day size. Outputs are
+gzip-compressed JSONL, written to temp files and renamed into place; a
+per-day manifest lists row counts and sha256 of each compressed file.
+Several days run in parallel across processes.
+
+Usage:
+    python curate.py                      # yesterday (UTC)
+    python curate.py --days 7 --workers 4
+    python curate.py --day 2025-09-01
+"""
+
+import argparse
+import gzip
+import hashlib
 import json
 import os
 import pathlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 LOG_DIR = pathlib.Path(os.getenv("LOG_DIR", "/data/telemetry"))
@@ -30,6 +49,17 @@ def iter_jsonl(path: pathlib.Path):
                 continue
 
 
+def load_tombstones():
+    """GDPR: sessions/users forgotten but not yet purged by the compactor"""
+    sessions, users = set(), set()
+    for rec in iter_jsonl(LOG_DIR / "_privacy" / "tombstones.jsonl"):
+        if rec.get("type") == "user_deletion":
+            sessions.update(rec.get("session_ids") or [])
+            if rec.get("user_hash"):
+                users.add(rec["user_hash"])
+    return sessions, users
+
+
 def pii_ok(ev: dict) -> bool:
     scopes = ev.get("consent_scopes") or []
     return bool(ev.get("pii_masked", True)) and (
@@ -54,87 +84,202 @@ def implicit_positive(ev: dict) -> bool:
     )
 
 
-def curate(day: datetime):
-    src = day_dir(day)
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+class _HashingFile:
+    """Raw file wrapper hashing the (compressed) bytes as they are written"""
+
+    def __init__(self, path: pathlib.Path):
+        self.f = open(path, "wb")
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        self.bytes += len(data)
+        return self.f.write(data)
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class TierWriter:
+    """Streams rows into <name>.gz via a temp file; commit() renames it"""
+
+    def __init__(self, path: pathlib.Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.tmp = path.with_name(f".{path.name}.tmp")
+        self.raw = _HashingFile(self.tmp)
+        self.gz = gzip.GzipFile(
+            filename="", mode="wb", fileobj=self.raw, compresslevel=6, mtime=0
+        )
+        self.rows = 0
+
+    def write(self, row: dict):
+        self.gz.write((_encode(row) + "\n").encode("utf-8"))
+        self.rows += 1
+
+    def commit(self) -> dict:
+        self.gz.close()
+        self.raw.close()
+        os.replace(self.tmp, self.path)
+        return {
+            "path": str(self.path.relative_to(OUT_DIR)),
+            "rows": self.rows,
+            "bytes": self.raw.bytes,
+            "sha256": self.raw.sha256.hexdigest(),
+        }
+
+    def abort(self):
+        self.gz.close()
+        self.raw.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+def iter_day_events(day: datetime):
+    """Events for a day, minus tombstoned (forgotten) sessions/users"""
+    forgotten_sessions, forgotten_users = load_tombstones()
     # read both subdir file and flat daily file
-    events = list(iter_jsonl(src / "events.jsonl")) + list(
-        iter_jsonl(LOG_DIR / f"events_{day.strftime('%Y-%m-%d')}.jsonl")
-    )
+    for path in (
+        day_dir(day) / "events.jsonl",
+        LOG_DIR / f"events_{day.strftime('%Y-%m-%d')}.jsonl",
+    ):
+        for e in iter_jsonl(path):
+            if (
+                e.get("session_id") in forgotten_sessions
+                or e.get("user_hash") in forgotten_users
+            ):
+                continue
+            yield e
 
-    # BRONZE: rå (maskad) chat-turns med output_text
-    bronze = [e for e in events if e.get("output_text") and pii_ok(e)]
-    # SILVER: bronze + SLO OK + tool success
-    silver = [e for e in bronze if slo_ok(e)]
-    # GOLD: silver + implicit/explicit positiv feedback
-    gold = [
-        e
-        for e in silver
-        if implicit_positive(e)
-        or ((e.get("quality") or {}).get("explicit") or {}).get("thumbs_up")
-    ]
-
-    # Exports: RAG-chunks + finetune-instruct (endast consent)
-    exports_rag = []
-    exports_ft = []
-    for e in gold:
-        if "rag:index" in (e.get("consent_scopes") or []):
-            txt = (e.get("output_text") or "").strip()
-            if txt:
-                exports_rag.append(
-                    {
-                        "id": f"{e.get('trace_id','')[:8]}#{e.get('session_id','')[:8]}",
-                        "text": txt,
-                        "source": "chat",
-                        "lang": e.get("lang", "sv"),
-                        "ts": e.get("ts") or iso_now(),
-                        "consent": "rag:index",
-                    }
-                )
-        inp = (e.get("input_text") or "").strip()
-        out = (e.get("output_text") or "").strip()
-        if inp and out and len(out) >= 12:
-            exports_ft.append(
-                {
-                    "prompt": f"[SV] {inp}",
-                    "completion": f"[SV] {out}",
-                    "route": e.get("route"),
-                    "ok": True,
-                }
-            )
 
+def rag_chunk(e: dict):
+    if "rag:index" not in (e.get("consent_scopes") or []):
+        return None
+    txt = (e.get("output_text") or "").strip()
+    if not txt:
+        return None
+    return {
+        "id": f"{e.get('trace_id','')[:8]}#{e.get('session_id','')[:8]}",
+        "text": txt,
+        "source": "chat",
+        "lang": e.get("lang", "sv"),
+        "ts": e.get("ts") or iso_now(),
+        "consent": "rag:index",
+    }
+
+
+def finetune_pair(e: dict):
+    inp = (e.get("input_text") or "").strip()
+    out = (e.get("output_text") or "").strip()
+    if not (inp and out and len(out) >= 12):
+        return None
+    return {
+        "prompt": f"[SV] {inp}",
+        "completion": f"[SV] {out}",
+        "route": e.get("route"),
+        "ok": True,
+    }
+
+
+def curate(day: datetime) -> dict:
     stamp = day.strftime("%Y%m%d")
-    (OUT_DIR / "bronze").mkdir(parents=True, exist_ok=True)
-    (OUT_DIR / "silver").mkdir(parents=True, exist_ok=True)
-    (OUT_DIR / "gold").mkdir(parents=True, exist_ok=True)
-    (OUT_DIR / "exports").mkdir(parents=True, exist_ok=True)
-
-    def dump(path: pathlib.Path, rows):
-        with open(path, "w", encoding="utf-8") as f:
-            for r in rows:
-                f.write(json.dumps(r, ensure_ascii=False) + "\n")
-
-    dump(OUT_DIR / "bronze" / f"turns-{stamp}.jsonl", bronze)
-    dump(OUT_DIR / "silver" / f"turns-{stamp}.jsonl", silver)
-    dump(OUT_DIR / "gold" / f"turns-{stamp}.jsonl", gold)
-    dump(OUT_DIR / "exports" / f"rag-chunks-{stamp}.jsonl", exports_rag)
-    dump(OUT_DIR / "exports" / f"finetune-instruct-{stamp}.jsonl", exports_ft)
+    writers = {
+        "bronze": TierWriter(OUT_DIR / "bronze" / f"turns-{stamp}.jsonl.gz"),
+        "silver": TierWriter(OUT_DIR / "silver" / f"turns-{stamp}.jsonl.gz"),
+        "gold": TierWriter(OUT_DIR / "gold" / f"turns-{stamp}.jsonl.gz"),
+        "rag_chunks": TierWriter(OUT_DIR / "exports" / f"rag-chunks-{stamp}.jsonl.gz"),
+        "finetune_pairs": TierWriter(
+            OUT_DIR / "exports" / f"finetune-instruct-{stamp}.jsonl.gz"
+        ),
+    }
+
+    events = 0
+    try:
+        for e in iter_day_events(day):
+            events += 1
+            # BRONZE: rå (maskad) chat-turns med output_text
+            if not (e.get("output_text") and pii_ok(e)):
+                continue
+            writers["bronze"].write(e)
+            # SILVER: bronze + SLO OK + tool success
+            if not slo_ok(e):
+                continue
+            writers["silver"].write(e)
+            # GOLD: silver + implicit/explicit positiv feedback
+            if not (
+                implicit_positive(e)
+                or ((e.get("quality") or {}).get("explicit") or {}).get("thumbs_up")
+            ):
+                continue
+            writers["gold"].write(e)
+            # Exports: RAG-chunks + finetune-instruct (endast consent)
+            chunk = rag_chunk(e)
+            if chunk:
+                writers["rag_chunks"].write(chunk)
+            pair = finetune_pair(e)
+            if pair:
+                writers["finetune_pairs"].write(pair)
+    except BaseException:
+        for w in writers.values():
+            w.abort()
+        raise
 
+    files = {name: w.commit() for name, w in writers.items()}
     summary = {
         "v": "1",
         "ts": iso_now(),
         "day": stamp,
         "counts": {
-            "events": len(events),
-            "bronze": len(bronze),
-            "silver": len(silver),
-            "gold": len(gold),
-            "rag_chunks": len(exports_rag),
-            "finetune_pairs": len(exports_ft),
+            "events": events,
+            **{name: f["rows"] for name, f in files.items()},
         },
     }
-    print(json.dumps(summary, ensure_ascii=False))
+
+    # Manifest last: its presence means the day's outputs are complete
+    manifest_dir = OUT_DIR / "manifests"
+    manifest_dir.mkdir(parents=True, exist_ok=True)
+    manifest = manifest_dir / f"curate-{stamp}.json"
+    tmp = manifest.with_name(f".{manifest.name}.tmp")
+    tmp.write_text(
+        json.dumps({**summary, "files": files}, ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+    os.replace(tmp, manifest)
+    return summary
+
+
+def curate_days(days, workers: int = 1):
+    """Curate several days, one process per day (up to workers)"""
+    if workers <= 1 or len(days) <= 1:
+        return [curate(d) for d in days]
+    with ProcessPoolExecutor(max_workers=min(workers, len(days))) as pool:
+        return list(pool.map(curate, days))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Curate telemetry into datasets")
+    parser.add_argument("--day", help="YYYY-MM-DD (default: yesterday, UTC)")
+    parser.add_argument(
+        "--days", type=int, default=1, help="Number of days ending at --day"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.day:
+        last = datetime.strptime(args.day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    else:
+        last = datetime.now(timezone.utc) - timedelta(days=1)
+    days = [last - timedelta(days=i) for i in reversed(range(max(args.days, 1)))]
+
+    for summary in curate_days(days, args.workers):
+        print(json.dumps(summary, ensure_ascii=False))
 
 
 if __name__ == "__main__":
-    d = datetime.now(timezone.utc) - timedelta(days=1)
-    curate(d)
+    main()
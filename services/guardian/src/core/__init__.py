@@ -4,6 +4,7 @@ from .brownout_manager import BrownoutManager
 from .guardian import Guardian, GuardianConfig, GuardianState
 from .kill_sequence import GracefulKillSequence, KillSequenceConfig
 from .metrics import MetricsCollector, SystemMetrics
+from .predictor import ModelFootprintTracker, PredictorConfig, ResourcePredictor
 
 __all__ = [
     "Guardian",
@@ -14,4 +15,7 @@ __all__ = [
     "BrownoutManager",
     "SystemMetrics",
     "MetricsCollector",
+    "ResourcePredictor",
+    "PredictorConfig",
+    "ModelFootprintTracker",
 ]
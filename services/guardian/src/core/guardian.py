@@ -20,14 +20,18 @@ Kommunikation:
 import asyncio
 import logging
 import signal
+import time
 from collections import deque
 from datetime import datetime, timedelta
 from typing import Any
 
+import httpx
+
 from .brownout_manager import BrownoutConfig, BrownoutLevel, BrownoutManager
 from .guardian_state import GuardianConfig, GuardianState
 from .kill_sequence import GracefulKillSequence, KillSequenceConfig
 from .metrics import MetricsCollector, SystemMetrics
+from .predictor import PredictorConfig, ResourcePredictor
 
 
 class Guardian:
@@ -43,9 +47,23 @@ class Guardian:
         self.state_start_time = datetime.now()
 
         # Metrics collection
-        self.metrics_collector = MetricsCollector()
+        self.metrics_collector = MetricsCollector(
+            slow_probe_interval_s=config.slow_probe_interval_s,
+        )
         self.metrics_history: deque = deque(maxlen=config.flap_detection_window)
 
+        # Trend forecasting on metrics history
+        self.predictor = ResourcePredictor(
+            soft_pct=config.ram_soft_pct * 100,
+            hard_pct=config.ram_hard_pct * 100,
+            config=PredictorConfig(
+                horizon_s=config.prediction_horizon_s,
+                brownout_lead_s=config.prediction_lead_s,
+            ),
+        )
+        self.predictive_triggers = 0
+        self._last_model_poll = 0.0
+
         # Hysteresis tracking
         self.soft_trigger_measurements: deque = deque(maxlen=config.measurement_window)
         self.recovery_start_time: datetime | None = None
@@ -102,10 +120,14 @@ class Guardian:
         """Main monitoring loop"""
         while self.running and not self.shutdown_requested:
             try:
-                # Collect system metrics
-                metrics = self.metrics_collector.collect_metrics()
+                # Collect system metrics (worker thread, non-blocking)
+                metrics = await self.metrics_collector.collect_metrics_async()
                 self.metrics_history.append(metrics)
 
+                # Update trend forecast and learned model footprints
+                self.predictor.update(metrics)
+                await self._poll_loaded_models(metrics)
+
                 # Check lockdown status
                 if self._is_in_lockdown():
                     await asyncio.sleep(self.config.poll_interval_s)
@@ -154,13 +176,17 @@ class Guardian:
         else:
             self.soft_trigger_measurements.append(False)
 
-        # Check for soft trigger activation
-        if len(self.soft_trigger_measurements) == self.config.measurement_window:
-            if all(self.soft_trigger_measurements):
-                if self.state == GuardianState.NORMAL:
-                    return GuardianState.BROWNOUT
-                if self.state == GuardianState.BROWNOUT:
-                    return GuardianState.DEGRADED
+        # Check for soft trigger activation (hysteresis window or forecast)
+        reason = self._escalation_reason()
+        if reason and self.state in (GuardianState.NORMAL, GuardianState.BROWNOUT):
+            target = (
+                GuardianState.BROWNOUT
+                if self.state == GuardianState.NORMAL
+                else GuardianState.DEGRADED
+            )
+            if reason == "predictive":
+                self._log_predictive_trigger(target)
+            return target
 
         # Check for recovery
         is_recovery = (
@@ -184,9 +210,62 @@ class Guardian:
         # No state change
         return self.state
 
-    async def _transition_to_state(
-        self, new_state: GuardianState, metrics: SystemMetrics
-    ):
+    def _escalation_reason(self) -> str | None:
+        """Why to escalate now: "hysteresis" (soft window) or "predictive" (forecast)"""
+        if len(self.soft_trigger_measurements) == self.config.measurement_window:
+            if all(self.soft_trigger_measurements):
+                return "hysteresis"
+
+        # Predictive triggers (trend crosses threshold within lead time)
+        if not self.config.enable_predictive_brownout:
+            return None
+        if (self.state == GuardianState.NORMAL and self.predictor.should_preempt_soft()) or (
+            self.state == GuardianState.BROWNOUT and self.predictor.should_preempt_hard()
+        ):
+            return "predictive"
+        return None
+
+    def _log_predictive_trigger(self, target: GuardianState):
+        """Record an early transition driven by the forecast"""
+        self.predictive_triggers += 1
+        forecast = self.predictor.get_state()["forecast"] or {}
+        self.logger.warning(
+            f"Predictive trigger → {target.value}: "
+            f"slope={forecast.get('slope_pct_per_s')}%/s "
+            f"time_to_soft={forecast.get('time_to_soft_s')}s "
+            f"time_to_hard={forecast.get('time_to_hard_s')}s"
+        )
+
+    async def _poll_loaded_models(self, metrics: SystemMetrics):
+        """Fetch loaded models from Ollama and learn their RAM footprints"""
+        now = time.time()
+        if now - self._last_model_poll < self.config.model_poll_interval_s:
+            return
+        self._last_model_poll = now
+
+        try:
+            async with httpx.AsyncClient(timeout=1.0) as client:
+                response = await client.get(f"{self.config.ollama_base_url}/api/ps")
+                response.raise_for_status()
+                models = response.json().get("models", [])
+        except (httpx.HTTPError, ValueError) as e:
+            self.logger.debug(f"Ollama model poll failed: {e}")
+            return
+
+        loaded = {}
+        for model in models:
+            digest = (model.get("digest") or "").removeprefix("sha256:")
+            name = model.get("name") or model.get("model")
+            if name:
+                loaded[digest or name] = name
+
+        self.predictor.footprints.observe(
+            loaded_models=loaded,
+            runner_rss_gb=self.metrics_collector.get_ollama_runner_rss(),
+            total_rss_gb=metrics.ollama_rss_gb,
+        )
+
+    async def _transition_to_state(self, new_state: GuardianState, metrics: SystemMetrics):
         """Handle transition to new state"""
         old_state = self.state
         self.logger.info(f"State transition: {old_state.value} → {new_state.value}")
@@ -225,9 +304,7 @@ class Guardian:
 
     async def _execute_emergency_procedure(self, metrics: SystemMetrics):
         """Execute emergency kill sequence"""
-        self.logger.warning(
-            f"EMERGENCY: RAM={metrics.ram_pct:.1f}% CPU={metrics.cpu_pct:.1f}%"
-        )
+        self.logger.warning(f"EMERGENCY: RAM={metrics.ram_pct:.1f}% CPU={metrics.cpu_pct:.1f}%")
 
         # Check kill rate limiting
         if not self._can_execute_kill():
@@ -329,14 +406,13 @@ class Guardian:
         log_data = {
             "timestamp": metrics.timestamp,
             "guardian_state": self.state.value,
-            "state_duration_s": (
-                datetime.now() - self.state_start_time
-            ).total_seconds(),
+            "state_duration_s": (datetime.now() - self.state_start_time).total_seconds(),
             "ram_pct": metrics.ram_pct,
             "cpu_pct": metrics.cpu_pct,
             "disk_pct": metrics.disk_pct,
             "temp_c": metrics.temp_c,
             "ollama_pids": len(metrics.ollama_pids),
+            "collect_ms": round(metrics.collect_ms, 3),
             "brownout_active": self.brownout_manager.state.active,
             "brownout_level": (
                 self.brownout_manager.state.level.name
@@ -372,13 +448,22 @@ class Guardian:
                     GuardianState.EMERGENCY,
                     GuardianState.LOCKDOWN,
                 ],
-                "intake_blocked": self.state
-                in [GuardianState.EMERGENCY, GuardianState.LOCKDOWN],
-                "emergency_mode": self.state
-                in [GuardianState.EMERGENCY, GuardianState.LOCKDOWN],
+                "intake_blocked": self.state in [GuardianState.EMERGENCY, GuardianState.LOCKDOWN],
+                "emergency_mode": self.state in [GuardianState.EMERGENCY, GuardianState.LOCKDOWN],
             },
         }
 
+        # Add trend forecast, learned footprints and deep-route admission
+        status["prediction"] = self.predictor.get_state(
+            deep_model=self.config.deep_model,
+            ram_total_gb=latest_metrics.ram_total_gb if latest_metrics else 0.0,
+        )
+        status["prediction"]["predictive_triggers"] = self.predictive_triggers
+        status["prediction"]["kills_in_window"] = len(self.kill_times)
+
+        # Add Guardian's own sampling overhead
+        status["collector"] = self.metrics_collector.get_overhead()
+
         # Add killswitch info
         status["killswitch"] = self.kill_sequence.get_status()
 
@@ -20,6 +20,7 @@ class GuardianConfig:
 
     # Polling
     poll_interval_s: float = 1.0
+    slow_probe_interval_s: float = 10.0  # Disk/temperatur mäts mer sällan
 
     # Hysteresis trösklar (andel av total) - Optimized för production
     ram_soft_pct: float = 0.80  # Mjuk degradation trigger (var 0.85)
@@ -36,6 +37,13 @@ class GuardianConfig:
     recovery_window_s: float = 45.0  # Återställningstid i sekunder (var 60.0)
     flap_detection_window: int = 15  # Fönster för oscillation detection (var 10)
 
+    # Prediktiv brownout (trend på metrics-historiken)
+    enable_predictive_brownout: bool = True
+    prediction_horizon_s: float = 60.0  # Extrapolationshorisont
+    prediction_lead_s: float = 20.0  # Brownout så här långt före korsning
+    model_poll_interval_s: float = 5.0  # Ollama /api/ps för modellavtryck
+    deep_model: str = "llama3.1:8b"  # Modell som deep-admission gäller
+
     # Kill cooldown settings
     kill_cooldown_short_s: float = 300.0  # 5 min mellan kills
     kill_cooldown_long_s: float = 1800.0  # 30 min window för max kills
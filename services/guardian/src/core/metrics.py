@@ -1,7 +1,12 @@
 """System metrics collection for Guardian"""
 
+import asyncio
+import contextlib
+import re
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any
 
 import psutil
 
@@ -17,32 +22,121 @@ class SystemMetrics:
     disk_pct: float
     temp_c: float | None
     ollama_pids: list[int]
+    ram_total_gb: float = 0.0
+    ollama_rss_gb: float = 0.0
     degraded: bool = False
     intake_blocked: bool = False
     emergency_mode: bool = False
+    collect_ms: float = 0.0
+
+
+@dataclass
+class CollectorStats:
+    """Guardian's own sampling overhead"""
+
+    samples: int = 0
+    last_collect_ms: float = 0.0
+    avg_collect_ms: float = 0.0  # EWMA
+    max_collect_ms: float = 0.0
+    pid_rescans: int = 0  # Process churn detected
+    pids_inspected: int = 0  # Individual processes opened for name/cmdline
+    slow_probes: int = 0
+    last_pid_count: int = 0
+    started_at: float = field(default_factory=time.time)
+    cpu_time_start_s: float = 0.0
+
+
+_BLOB_DIGEST_RE = re.compile(r"sha256[-:]([0-9a-f]{12,64})")
 
 
 class MetricsCollector:
-    """Collects and manages system metrics"""
+    """Collects and manages system metrics
+
+    Sampling is designed to be cheap enough to run every poll interval on
+    busy hosts:
+    - CPU uses non-blocking deltas (`cpu_percent(interval=None)`) instead of
+      sleeping inside the sampler.
+    - Ollama PIDs are cached; only PIDs that appeared since the last tick are
+      inspected, and dead PIDs are dropped without touching /proc.
+    - Temperature and disk are slow probes refreshed every
+      `slow_probe_interval_s`.
+    """
+
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, slow_probe_interval_s: float = 10.0):
+        self.slow_probe_interval_s = slow_probe_interval_s
 
-    def __init__(self):
-        self.last_cpu_times = None
+        # Prime CPU counters so the first non-blocking read is meaningful
+        psutil.cpu_percent(interval=None)
+
+        # Ollama PID cache
+        self._known_pids: set[int] = set()
+        self._ollama_pids: set[int] = set()
+        self._ollama_cmdlines: dict[int, str] = {}
+        self._ollama_runner_rss_gb: dict[str, float] = {}
+
+        # Slow probe cache
+        self._last_slow_probe = 0.0
+        self._disk_pct = 0.0
+        self._temp_c: float | None = None
+
+        # Serialize samplers (worker thread vs direct calls)
+        self._lock = threading.Lock()
+
+        self._process = psutil.Process()
+        self.stats = CollectorStats(cpu_time_start_s=self._own_cpu_time())
+
+    async def collect_metrics_async(self) -> SystemMetrics:
+        """Collect metrics in a worker thread so the event loop never blocks"""
+        return await asyncio.to_thread(self.collect_metrics)
 
     def collect_metrics(self) -> SystemMetrics:
         """Collect current system metrics"""
-        timestamp = time.time()
+        with self._lock:
+            start = time.perf_counter()
+            timestamp = time.time()
+
+            # RAM metrics
+            memory = psutil.virtual_memory()
+            ram_pct = memory.percent
+            ram_gb = memory.used / (1024**3)
+
+            # CPU metrics (delta since previous sample, never blocks)
+            cpu_pct = psutil.cpu_percent(interval=None)
+
+            # Disk and temperature change slowly - refresh at lower frequency
+            if timestamp - self._last_slow_probe >= self.slow_probe_interval_s:
+                self._run_slow_probes()
+                self._last_slow_probe = timestamp
+
+            # Ollama process detection
+            ollama_pids = self._find_ollama_pids()
+            ollama_rss_gb = self._sample_ollama_rss(ollama_pids)
 
-        # RAM metrics
-        memory = psutil.virtual_memory()
-        ram_pct = memory.percent
-        ram_gb = memory.used / (1024**3)
+            collect_ms = (time.perf_counter() - start) * 1000
+            self._record_sample(collect_ms)
 
-        # CPU metrics (averaged over short interval for responsiveness)
-        cpu_pct = psutil.cpu_percent(interval=0.1)
+            return SystemMetrics(
+                timestamp=timestamp,
+                ram_pct=ram_pct,
+                ram_gb=ram_gb,
+                cpu_pct=cpu_pct,
+                disk_pct=self._disk_pct,
+                temp_c=self._temp_c,
+                ollama_pids=ollama_pids,
+                ram_total_gb=memory.total / (1024**3),
+                ollama_rss_gb=ollama_rss_gb,
+                collect_ms=collect_ms,
+            )
+
+    def _run_slow_probes(self):
+        """Refresh disk usage and temperature"""
+        self.stats.slow_probes += 1
 
         # Disk metrics (root partition)
-        disk = psutil.disk_usage("/")
-        disk_pct = disk.percent
+        with contextlib.suppress(OSError):
+            self._disk_pct = psutil.disk_usage("/").percent
 
         # Temperature (if available)
         temp_c = None
@@ -62,35 +156,106 @@ class MetricsCollector:
                             break
         except (AttributeError, OSError):
             pass
-
-        # Ollama process detection
-        ollama_pids = self._find_ollama_pids()
-
-        return SystemMetrics(
-            timestamp=timestamp,
-            ram_pct=ram_pct,
-            ram_gb=ram_gb,
-            cpu_pct=cpu_pct,
-            disk_pct=disk_pct,
-            temp_c=temp_c,
-            ollama_pids=ollama_pids,
-        )
+        self._temp_c = temp_c
 
     def _find_ollama_pids(self) -> list[int]:
-        """Find all Ollama-related process PIDs"""
-        pids = []
+        """Find all Ollama-related process PIDs
+
+        Only listing PIDs is done every tick. Processes are opened for
+        name/cmdline inspection only when they are new since the last tick.
+        """
         try:
-            for proc in psutil.process_iter(["pid", "name", "cmdline"]):
-                try:
-                    proc_info = proc.info
-                    name = proc_info.get("name", "").lower()
-                    cmdline = " ".join(proc_info.get("cmdline", [])).lower()
-
-                    if "ollama" in name or "ollama" in cmdline:
-                        pids.append(proc_info["pid"])
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
+            current = set(psutil.pids())
         except Exception:
-            pass
+            return sorted(self._ollama_pids)
+
+        self.stats.last_pid_count = len(current)
+        if current == self._known_pids:
+            return sorted(self._ollama_pids)
+
+        self.stats.pid_rescans += 1
+
+        # Drop processes that have exited
+        self._ollama_pids &= current
+        for pid in list(self._ollama_cmdlines):
+            if pid not in current:
+                del self._ollama_cmdlines[pid]
+
+        # Inspect only newly spawned processes
+        for pid in current - self._known_pids:
+            self.stats.pids_inspected += 1
+            cmdline = self._inspect_ollama_process(pid)
+            if cmdline is not None:
+                self._ollama_pids.add(pid)
+                self._ollama_cmdlines[pid] = cmdline
+
+        self._known_pids = current
+        return sorted(self._ollama_pids)
+
+    @staticmethod
+    def _inspect_ollama_process(pid: int) -> str | None:
+        """Return the cmdline if a single PID belongs to Ollama, else None"""
+        try:
+            proc = psutil.Process(pid)
+            name = (proc.name() or "").lower()
+            cmdline = " ".join(proc.cmdline() or []).lower()
+        except (psutil.Error, OSError):
+            return None
+        if "ollama" in name or "ollama" in cmdline:
+            return cmdline
+        return None
+
+    def _sample_ollama_rss(self, pids: list[int]) -> float:
+        """Sum Ollama RSS and attribute runner RSS to model blob digests"""
+        total = 0.0
+        runners: dict[str, float] = {}
+        for pid in pids:
+            try:
+                rss_gb = psutil.Process(pid).memory_info().rss / (1024**3)
+            except (psutil.Error, OSError):
+                continue
+            total += rss_gb
+            match = _BLOB_DIGEST_RE.search(self._ollama_cmdlines.get(pid, ""))
+            if match:
+                digest = match.group(1)
+                runners[digest] = runners.get(digest, 0.0) + rss_gb
+        self._ollama_runner_rss_gb = runners
+        return total
+
+    def get_ollama_runner_rss(self) -> dict[str, float]:
+        """Blob digest → RSS (GB) for Ollama runner processes at last sample"""
+        return dict(self._ollama_runner_rss_gb)
+
+    def _own_cpu_time(self) -> float:
+        try:
+            times = self._process.cpu_times()
+            return times.user + times.system
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0.0
+
+    def _record_sample(self, collect_ms: float):
+        stats = self.stats
+        stats.samples += 1
+        stats.last_collect_ms = collect_ms
+        stats.max_collect_ms = max(stats.max_collect_ms, collect_ms)
+        if stats.samples == 1:
+            stats.avg_collect_ms = collect_ms
+        else:
+            stats.avg_collect_ms += self.EWMA_ALPHA * (collect_ms - stats.avg_collect_ms)
 
-        return pids
+    def get_overhead(self) -> dict[str, Any]:
+        """Guardian sampling overhead for status reporting"""
+        stats = self.stats
+        wall_s = max(time.time() - stats.started_at, 1e-6)
+        cpu_s = max(self._own_cpu_time() - stats.cpu_time_start_s, 0.0)
+        return {
+            "samples": stats.samples,
+            "last_collect_ms": round(stats.last_collect_ms, 3),
+            "avg_collect_ms": round(stats.avg_collect_ms, 3),
+            "max_collect_ms": round(stats.max_collect_ms, 3),
+            "process_count": stats.last_pid_count,
+            "pid_rescans": stats.pid_rescans,
+            "pids_inspected": stats.pids_inspected,
+            "slow_probes": stats.slow_probes,
+            "guardian_cpu_pct": round(cpu_s / wall_s * 100, 3),
+        }
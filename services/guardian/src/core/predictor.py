@@ -0,0 +1,306 @@
+"""
+Predictive resource forecasting för Guardian
+=============================================
+
+Trendbaserad prognos på Guardians metrics-historik så att brownout kan
+startas *innan* RAM korsar tröskeln, i stället för efter:
+
+- EWMA av RAM-lutningen (procentenheter/sekund) över senaste mätpunkterna
+- Linjär extrapolation → tid till soft/hard-tröskel
+- Per-modell minnesavtryck inlärt från Ollama-processernas RSS
+- Träffsäkerhet: varje prognostiserad korsning följs upp (hit/false alarm/miss)
+
+Fortfarande deterministiskt - inga modeller, bara aritmetik på mätdata.
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from .metrics import SystemMetrics
+
+
+@dataclass
+class PredictorConfig:
+    """Konfiguration för trendprognos"""
+
+    ewma_alpha: float = 0.3  # Vikt för senaste lutningen
+    min_points: int = 4  # Mätpunkter innan prognos används
+    horizon_s: float = 60.0  # Hur långt fram vi extrapolerar
+    brownout_lead_s: float = 20.0  # Starta brownout så här långt före korsning
+    min_slope_pct_per_s: float = 0.05  # Brus under denna lutning ignoreras
+    footprint_alpha: float = 0.3  # EWMA för inlärda modellavtryck
+
+
+@dataclass
+class Forecast:
+    """Resultat av en prognos"""
+
+    timestamp: float
+    ram_pct: float
+    slope_pct_per_s: float
+    predicted_ram_pct: float  # Vid horisonten
+    time_to_soft_s: float | None
+    time_to_hard_s: float | None
+    ready: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "ram_pct": round(self.ram_pct, 2),
+            "slope_pct_per_s": round(self.slope_pct_per_s, 4),
+            "predicted_ram_pct": round(self.predicted_ram_pct, 2),
+            "time_to_soft_s": (
+                round(self.time_to_soft_s, 1) if self.time_to_soft_s is not None else None
+            ),
+            "time_to_hard_s": (
+                round(self.time_to_hard_s, 1) if self.time_to_hard_s is not None else None
+            ),
+        }
+
+
+@dataclass
+class _PendingPrediction:
+    predicted_at: float
+    predicted_crossing_at: float
+
+
+@dataclass
+class PredictionAccuracy:
+    """Uppföljning av prognostiserade tröskelkorsningar"""
+
+    predictions: int = 0
+    hits: int = 0  # Korsning skedde inom horisonten
+    false_alarms: int = 0  # Horisonten passerade utan korsning
+    misses: int = 0  # Korsning utan föregående prognos
+    eta_errors_s: deque = field(default_factory=lambda: deque(maxlen=50))
+
+    def to_dict(self) -> dict[str, Any]:
+        resolved = self.hits + self.false_alarms
+        crossings = self.hits + self.misses
+        mean_eta_error = (
+            sum(self.eta_errors_s) / len(self.eta_errors_s) if self.eta_errors_s else None
+        )
+        return {
+            "predictions": self.predictions,
+            "hits": self.hits,
+            "false_alarms": self.false_alarms,
+            "misses": self.misses,
+            "precision": round(self.hits / resolved, 3) if resolved else None,
+            "recall": round(self.hits / crossings, 3) if crossings else None,
+            "mean_abs_eta_error_s": (
+                round(mean_eta_error, 1) if mean_eta_error is not None else None
+            ),
+        }
+
+
+class ModelFootprintTracker:
+    """Lär per-modell RAM-avtryck från Ollama-processer
+
+    Ollama kör varje laddad modell i en egen runner-process vars cmdline
+    innehåller modellens blob-digest. Med `/api/ps` (digest → namn) kan RSS
+    attribueras direkt till modellen. Saknas runner-mappning används
+    RSS-deltat när exakt en ny modell dyker upp.
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self.footprints_gb: dict[str, float] = {}
+        self._loaded: set[str] = set()
+        self._last_total_rss_gb: float | None = None
+
+    def observe(
+        self,
+        loaded_models: dict[str, str],
+        runner_rss_gb: dict[str, float],
+        total_rss_gb: float,
+    ):
+        """
+        Args:
+            loaded_models: digest → modellnamn från Ollama /api/ps
+            runner_rss_gb: digest → RSS för motsvarande runner-process
+            total_rss_gb: Summerad RSS för alla Ollama-processer
+        """
+        attributed = False
+        for digest, name in loaded_models.items():
+            rss = runner_rss_gb.get(digest)
+            if rss:
+                self._learn(name, rss)
+                attributed = True
+
+        names = set(loaded_models.values())
+        added = names - self._loaded
+        if (
+            not attributed
+            and len(added) == 1
+            and self._last_total_rss_gb is not None
+            and total_rss_gb > self._last_total_rss_gb
+        ):
+            self._learn(next(iter(added)), total_rss_gb - self._last_total_rss_gb)
+
+        self._loaded = names
+        self._last_total_rss_gb = total_rss_gb
+
+    def _learn(self, model: str, rss_gb: float):
+        previous = self.footprints_gb.get(model)
+        if previous is None:
+            self.footprints_gb[model] = rss_gb
+        else:
+            self.footprints_gb[model] = previous + self.alpha * (rss_gb - previous)
+
+    def footprint_gb(self, model: str) -> float | None:
+        return self.footprints_gb.get(model)
+
+    def is_loaded(self, model: str) -> bool:
+        return model in self._loaded
+
+    def get_state(self) -> dict[str, Any]:
+        return {
+            "loaded": sorted(self._loaded),
+            "footprints_gb": {k: round(v, 2) for k, v in self.footprints_gb.items()},
+        }
+
+
+class ResourcePredictor:
+    """EWMA-lutning + linjär extrapolation av RAM-användning"""
+
+    def __init__(
+        self,
+        soft_pct: float,
+        hard_pct: float,
+        config: PredictorConfig | None = None,
+    ):
+        self.config = config or PredictorConfig()
+        self.soft_pct = soft_pct  # Procent (0-100)
+        self.hard_pct = hard_pct
+        self.footprints = ModelFootprintTracker(alpha=self.config.footprint_alpha)
+
+        self._points = 0
+        self._last: SystemMetrics | None = None
+        self._slope = 0.0
+        self._forecast: Forecast | None = None
+
+        self._pending: _PendingPrediction | None = None
+        self._above_soft = False
+        self.accuracy = PredictionAccuracy()
+
+    def update(self, metrics: SystemMetrics) -> Forecast:
+        """Mata in en ny mätpunkt och returnera uppdaterad prognos"""
+        if self._last is not None:
+            dt = metrics.timestamp - self._last.timestamp
+            if dt > 0:
+                slope = (metrics.ram_pct - self._last.ram_pct) / dt
+                if self._points <= 1:
+                    self._slope = slope
+                else:
+                    self._slope += self.config.ewma_alpha * (slope - self._slope)
+        self._last = metrics
+        self._points += 1
+
+        forecast = Forecast(
+            timestamp=metrics.timestamp,
+            ram_pct=metrics.ram_pct,
+            slope_pct_per_s=self._slope,
+            predicted_ram_pct=min(100.0, metrics.ram_pct + self._slope * self.config.horizon_s),
+            time_to_soft_s=self._time_to(self.soft_pct, metrics.ram_pct),
+            time_to_hard_s=self._time_to(self.hard_pct, metrics.ram_pct),
+            ready=self._points >= self.config.min_points,
+        )
+        self._forecast = forecast
+        self._track_accuracy(forecast)
+        return forecast
+
+    def _time_to(self, threshold_pct: float, ram_pct: float) -> float | None:
+        if ram_pct >= threshold_pct:
+            return 0.0
+        if self._slope < self.config.min_slope_pct_per_s:
+            return None
+        eta = (threshold_pct - ram_pct) / self._slope
+        return eta if eta <= self.config.horizon_s else None
+
+    def _track_accuracy(self, forecast: Forecast):
+        now = forecast.timestamp
+        above = forecast.ram_pct >= self.soft_pct
+
+        # Faktisk korsning uppåt
+        if above and not self._above_soft:
+            if self._pending is not None:
+                self.accuracy.hits += 1
+                self.accuracy.eta_errors_s.append(abs(now - self._pending.predicted_crossing_at))
+                self._pending = None
+            else:
+                self.accuracy.misses += 1
+        self._above_soft = above
+
+        # Förfallen prognos utan korsning
+        if self._pending is not None and now > self._pending.predicted_at + self.config.horizon_s:
+            self.accuracy.false_alarms += 1
+            self._pending = None
+
+        # Ny prognos
+        if (
+            not above
+            and self._pending is None
+            and forecast.ready
+            and forecast.time_to_soft_s is not None
+        ):
+            self.accuracy.predictions += 1
+            self._pending = _PendingPrediction(
+                predicted_at=now,
+                predicted_crossing_at=now + forecast.time_to_soft_s,
+            )
+
+    def should_preempt_soft(self) -> bool:
+        """Korsar RAM soft-tröskeln inom brownout_lead_s?
+
+        Redan korsade trösklar hanteras av de vanliga triggarna.
+        """
+        f = self._forecast
+        return bool(
+            f
+            and f.ready
+            and f.time_to_soft_s is not None
+            and 0 < f.time_to_soft_s <= self.config.brownout_lead_s,
+        )
+
+    def should_preempt_hard(self) -> bool:
+        """Korsar RAM hard-tröskeln inom brownout_lead_s?"""
+        f = self._forecast
+        return bool(
+            f
+            and f.ready
+            and f.time_to_hard_s is not None
+            and 0 < f.time_to_hard_s <= self.config.brownout_lead_s,
+        )
+
+    def can_admit_model(self, model: str, ram_total_gb: float) -> bool:
+        """Ryms modellen under soft-tröskeln vid horisonten?
+
+        Redan laddade modeller kostar inget extra. Okända avtryck tillåts -
+        vi nekar bara på inlärda siffror.
+        """
+        if self.footprints.is_loaded(model):
+            return not self.should_preempt_hard()
+        if self._forecast is None or ram_total_gb <= 0:
+            return True
+
+        footprint = self.footprints.footprint_gb(model)
+        if footprint is None:
+            return not self.should_preempt_soft()
+
+        predicted = max(self._forecast.ram_pct, self._forecast.predicted_ram_pct)
+        return predicted + footprint / ram_total_gb * 100 < self.soft_pct
+
+    def get_state(self, deep_model: str | None = None, ram_total_gb: float = 0.0):
+        state: dict[str, Any] = {
+            "forecast": self._forecast.to_dict() if self._forecast else None,
+            "accuracy": self.accuracy.to_dict(),
+            "models": self.footprints.get_state(),
+            "preempt_soft": self.should_preempt_soft(),
+            "preempt_hard": self.should_preempt_hard(),
+        }
+        if deep_model:
+            state["deep_admission"] = self.can_admit_model(deep_model, ram_total_gb)
+        state["updated_at"] = time.time()
+        return state
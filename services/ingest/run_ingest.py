@@ -8,19 +8,24 @@ säkra, versionerade datapack.
 """
 
 import argparse
-import gzip
-import hashlib
+import fcntl
 import json
 import os
 import re
 import sys
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
-import pandas as pd
 import structlog
 
+# Shared columnar ingest engine lives in the rl package (services/rl/utils)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rl.utils import columnar  # noqa: E402
+from rl.utils.tombstones import PurgeLog, Tombstones  # noqa: E402
+
 # Configure logging
 structlog.configure(
     processors=[
@@ -42,6 +47,10 @@ structlog.configure(
 
 logger = structlog.get_logger()
 
+# Free-form dicts: stored as JSON strings in Parquet (arbitrary/empty keys
+# cannot form a stable struct schema); the JSONL snapshot keeps them nested
+PARQUET_JSON_COLUMNS = ("nlu.slots", "resources.ram_peak_mb")
+
 # PII masking patterns
 EMAIL_PATTERN = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
 PHONE_PATTERN = r"\b(?:\+46|0)[\s-]?[0-9]{1,3}[\s-]?[0-9]{3,4}[\s-]?[0-9]{3,4}\b"
@@ -63,7 +72,10 @@ class LearnIngestion:
             "dropped_low_margin": 0,
             "dropped_strict": 0,
             "dropped_redteam": 0,
+            "dropped_forgotten": 0,
         }
+        # GDPR: sessions/users forgotten but not yet purged from telemetry
+        self.tombstones = Tombstones()
 
     def mask_pii(self, text: str, policy: str = "bronze") -> str:
         """Mask PII according to policy level."""
@@ -182,8 +194,12 @@ class LearnIngestion:
             logger.error("Failed to normalize event", error=str(e), event=event)
             return None
 
-    def is_learnable(self, row: Dict[str, Any]) -> bool:
+    def is_learnable(
+        self, row: Dict[str, Any], stats: Optional[Dict[str, int]] = None
+    ) -> bool:
         """Check if a normalized row meets learnability criteria."""
+        stats = self.stats if stats is None else stats
+
         # Must be successful
         if not row.get("outcome", {}).get("ok", True):
             return False
@@ -191,84 +207,78 @@ class LearnIngestion:
         # Must meet confidence threshold
         min_conf = float(self.config.get("LEARN_MIN_CONF", 0.60))
         if row.get("nlu", {}).get("conf", 0.0) < min_conf:
-            self.stats["dropped_low_conf"] += 1
+            stats["dropped_low_conf"] += 1
             return False
 
         # Must meet margin threshold
         min_margin = float(self.config.get("LEARN_MIN_MARGIN", 0.05))
         if row.get("nlu", {}).get("margin", 0.0) < min_margin:
-            self.stats["dropped_low_margin"] += 1
+            stats["dropped_low_margin"] += 1
             return False
 
         # Must not be in strict mode (if configured)
         if self.config.get("LEARN_DENY_STRICT", True):
             if row.get("security", {}).get("mode") in ["STRICT", "LOCKDOWN"]:
-                self.stats["dropped_strict"] += 1
+                stats["dropped_strict"] += 1
                 return False
 
         # Must not be redteam
         if row.get("outcome", {}).get("redteam", False):
-            self.stats["dropped_redteam"] += 1
+            stats["dropped_redteam"] += 1
             return False
 
         return True
 
-    def add_learning_labels(self, row: Dict[str, Any]) -> Dict[str, Any]:
+    def add_learning_labels(
+        self, row: Dict[str, Any], stats: Optional[Dict[str, int]] = None
+    ) -> Dict[str, Any]:
         """Add learning labels to identify hard cases."""
+        stats = self.stats if stats is None else stats
         labels = row.get("outcome", {}).get("labels", [])
 
         # Hard intent (low margin)
         if row.get("nlu", {}).get("margin", 1.0) < 0.08:
             labels.append("hard_intent")
-            self.stats["hard_intent"] += 1
+            stats["hard_intent"] += 1
 
         # Tool failures
         tools = row.get("tools", [])
         if any(not tool.get("ok", True) for tool in tools):
             labels.append("tool_fail")
-            self.stats["tool_fail"] += 1
+            stats["tool_fail"] += 1
 
         # RAG misses
         if row.get("rag", {}).get("hits", 0) == 0:
             labels.append("rag_miss")
-            self.stats["rag_miss"] += 1
+            stats["rag_miss"] += 1
 
         # Update labels
         row["outcome"]["labels"] = labels
         return row
 
-    def read_telemetry_files(self, input_dir: str) -> List[Dict[str, Any]]:
-        """Read all telemetry events from JSONL files."""
-        events = []
+    def process_event(
+        self, event: Dict[str, Any], counters: Counter
+    ) -> Optional[Dict[str, Any]]:
+        """Normalize, filter and label one event (runs inside ingest workers)."""
+        if self.tombstones.is_forgotten(event):
+            counters["dropped_forgotten"] += 1
+            return None
+        normalized = self.normalize_event(event)
+        if normalized and self.is_learnable(normalized, counters):
+            return self.add_learning_labels(normalized, counters)
+        return None
+
+    def find_telemetry_files(self, input_dir: str) -> List[Path]:
+        """Find all events.jsonl telemetry files under the input directory."""
         input_path = Path(input_dir)
 
         if not input_path.exists():
             logger.warning("Input directory does not exist", path=input_dir)
-            return events
+            return []
 
-        # Find all events.jsonl files
-        for jsonl_file in input_path.rglob("events.jsonl"):
-            logger.info("Reading telemetry file", file=str(jsonl_file))
-            try:
-                with open(jsonl_file, "r", encoding="utf-8") as f:
-                    for line_num, line in enumerate(f, 1):
-                        try:
-                            event = json.loads(line.strip())
-                            events.append(event)
-                        except json.JSONDecodeError as e:
-                            logger.warning(
-                                "Invalid JSON in telemetry",
-                                file=str(jsonl_file),
-                                line=line_num,
-                                error=str(e),
-                            )
-            except Exception as e:
-                logger.error(
-                    "Failed to read telemetry file", file=str(jsonl_file), error=str(e)
-                )
-
-        logger.info("Read telemetry events", count=len(events))
-        return events
+        files = sorted(input_path.rglob("events.jsonl"))
+        logger.info("Found telemetry files", count=len(files))
+        return files
 
     def read_test_results(self, tests_file: str) -> List[Dict[str, Any]]:
         """Read test results from eval harness."""
@@ -304,42 +314,17 @@ class LearnIngestion:
         logger.info("Read test events", count=len(events))
         return events
 
-    def write_parquet(self, rows: List[Dict[str, Any]], output_dir: str, date: str):
-        """Write normalized data to parquet files."""
-        if not rows:
-            logger.warning("No rows to write to parquet")
-            return
-
-        output_path = Path(output_dir) / date
-        output_path.mkdir(parents=True, exist_ok=True)
-
-        # Convert to DataFrame
-        df = pd.DataFrame(rows)
-
-        # Write parquet
-        parquet_file = output_path / f"learn_{date}.parquet"
-        df.to_parquet(parquet_file, index=False)
-
-        logger.info("Wrote parquet file", file=str(parquet_file), rows=len(rows))
-
-    def write_snapshot(self, rows: List[Dict[str, Any]], output_dir: str, date: str):
-        """Write daily snapshot as compressed JSONL."""
-        if not rows:
-            logger.warning("No rows to write to snapshot")
+    def write_snapshot(self, jsonl_parts: List[Path], output_dir: str, date: str):
+        """Append per-worker gzip JSONL parts to the daily snapshot."""
+        if not jsonl_parts:
+            logger.info("No new rows for snapshot")
             return
 
         output_path = Path(output_dir) / date
-        output_path.mkdir(parents=True, exist_ok=True)
-
-        # Write compressed JSONL
         snapshot_file = output_path / "dataset.jsonl.gz"
-        with gzip.open(snapshot_file, "wt", encoding="utf-8") as f:
-            for row in rows:
-                f.write(json.dumps(row, ensure_ascii=False) + "\n")
 
-        # Calculate checksum
-        with open(snapshot_file, "rb") as f:
-            checksum = hashlib.sha256(f.read()).hexdigest()
+        # Multi-member gzip: parts are appended as-is, hashed while streaming
+        checksum = columnar.concat_gzip(jsonl_parts, snapshot_file, append=True)
 
         # Write checksum file
         checksum_file = output_path / "dataset.jsonl.gz.sha256"
@@ -347,13 +332,16 @@ class LearnIngestion:
             f.write(checksum)
 
         logger.info(
-            "Wrote snapshot", file=str(snapshot_file), rows=len(rows), checksum=checksum
+            "Wrote snapshot",
+            file=str(snapshot_file),
+            rows_appended=self.stats["rows_learnable"],
+            checksum=checksum,
         )
 
-    def log_stats(self, log_file: str):
-        """Log ingestion statistics."""
+    def log_stats(self, log_file: str) -> Dict[str, Any]:
+        """Log ingestion statistics for this run (new data only)."""
         if not self.stats["rows_raw"]:
-            return
+            return {}
 
         learning_rate = self.stats["rows_learnable"] / self.stats["rows_raw"]
 
@@ -371,6 +359,7 @@ class LearnIngestion:
             "dropped_low_margin": self.stats["dropped_low_margin"],
             "dropped_strict": self.stats["dropped_strict"],
             "dropped_redteam": self.stats["dropped_redteam"],
+            "dropped_forgotten": self.stats["dropped_forgotten"],
         }
 
         # Ensure log directory exists
@@ -382,6 +371,7 @@ class LearnIngestion:
             f.write(json.dumps(stats_entry, ensure_ascii=False) + "\n")
 
         logger.info("Ingestion completed", **stats_entry)
+        return stats_entry
 
     def run(
         self,
@@ -390,40 +380,107 @@ class LearnIngestion:
         parquet_out: str,
         snapshot_out: str,
         log_out: str,
-    ):
-        """Run the complete ingestion pipeline."""
+        workers: Optional[int] = None,
+        on_progress: Optional[Callable[[int, int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run the ingestion pipeline over data that arrived since the last run.
+
+        Per-file byte-offset watermarks (``<parquet_out>/_watermarks.json``)
+        make each run read only appended telemetry. New rows go to fresh
+        Parquet parts in the day partition and are appended to the daily
+        snapshot; earlier output is never rewritten. Telemetry is streamed
+        through the shared columnar engine, so memory stays bounded by the
+        batch size.
+
+        Returns:
+            Statistics entry for this run (empty if there was no new data)
+        """
         logger.info("Starting Alice learning ingestion")
 
-        # Read input data
-        telemetry_events = self.read_telemetry_files(input_dir)
-        test_events = self.read_test_results(tests_file)
-
-        all_events = telemetry_events + test_events
-        self.stats["rows_raw"] = len(all_events)
-
-        logger.info("Processing events", total=len(all_events))
+        now = datetime.now()
+        date = now.strftime("%Y-%m-%d")
+        run_id = now.strftime("%H%M%S%f")
+        parquet_root = Path(parquet_out)
+        parquet_root.mkdir(parents=True, exist_ok=True)
+        parquet_dir = parquet_root / date
+        parts_dir = Path(snapshot_out) / date / f".parts-{run_id}"
+
+        # One ingestion at a time; concurrent runs would double-read offsets
+        with open(parquet_root / "_ingest.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            watermarks = columnar.Watermarks(parquet_root / "_watermarks.json")
+            self.tombstones = Tombstones.load(input_dir)
+            files = self.find_telemetry_files(input_dir)
+            result = columnar.ingest_to_parquet(
+                files,
+                self.process_event,
+                parquet_dir,
+                prefix=f"learn_{date}-{run_id}",
+                workers=workers,
+                jsonl_dir=parts_dir,
+                json_columns=PARQUET_JSON_COLUMNS,
+                start_offsets=watermarks.offsets(files, PurgeLog.load(input_dir)),
+                on_progress=on_progress,
+            )
+
+            # Test results are one JSON document: re-read only when it changed
+            tests_path = Path(tests_file)
+            test_events = []
+            if tests_path.exists():
+                size = tests_path.stat().st_size
+                if watermarks.offsets([tests_path]).get(str(tests_path)) != size:
+                    test_events = self.read_test_results(tests_file)
+                    result.offsets[str(tests_path)] = size
+
+            test_rows = [
+                row
+                for row in (self.process_event(e, result.counters) for e in test_events)
+                if row is not None
+            ]
+            if test_rows:
+                stem = f"learn_{date}-{run_id}-tests"
+                result.parts.extend(
+                    columnar.write_rows(
+                        test_rows, parquet_dir, stem, json_columns=PARQUET_JSON_COLUMNS
+                    )
+                )
+                result.jsonl_parts.append(
+                    columnar.write_jsonl_gz(test_rows, parts_dir / f"{stem}.jsonl.gz")
+                )
 
-        # Process events
-        learnable_rows = []
-        for event in all_events:
-            normalized = self.normalize_event(event)
-            if normalized and self.is_learnable(normalized):
-                labeled = self.add_learning_labels(normalized)
-                learnable_rows.append(labeled)
+            for key, value in result.counters.items():
+                self.stats[key] = self.stats.get(key, 0) + value
+            self.stats["rows_raw"] = result.rows_in + len(test_events)
+            self.stats["rows_learnable"] = result.rows_out + len(test_rows)
+
+            if result.parts:
+                logger.info(
+                    "Wrote parquet files",
+                    dir=str(parquet_dir),
+                    parts=len(result.parts),
+                    rows=self.stats["rows_learnable"],
+                )
+            else:
+                logger.info("No new learnable rows")
 
-        self.stats["rows_learnable"] = len(learnable_rows)
+            # Write outputs, then commit the watermarks
+            self.write_snapshot(result.jsonl_parts, snapshot_out, date)
+            columnar.remove_parts(result.jsonl_parts)
+            watermarks.advance(result.offsets)
+            watermarks.save()
 
-        # Write outputs
-        date = datetime.now().strftime("%Y-%m-%d")
-        self.write_parquet(learnable_rows, parquet_out, date)
-        self.write_snapshot(learnable_rows, snapshot_out, date)
-        self.log_stats(log_out)
+        stats_entry = self.log_stats(log_out)
 
         logger.info(
             "Ingestion pipeline completed",
             raw=self.stats["rows_raw"],
             learnable=self.stats["rows_learnable"],
+            bad_lines=result.bad_lines,
+            files_with_new_data=len(result.offsets),
         )
+        return stats_entry
 
 
 def main():
@@ -447,6 +504,14 @@ def main():
         "--log_out", default="data/learn/logs/learn.jsonl", help="Statistics log file"
     )
     parser.add_argument("--config", help="Configuration file (JSON)")
+    parser.add_argument(
+        "--workers", type=int, help="Ingest worker processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Print JSON progress lines and a final result line to stdout",
+    )
 
     args = parser.parse_args()
 
@@ -485,14 +550,25 @@ def main():
 
     # Run ingestion
     try:
+        on_progress = None
+        if args.progress:
+
+            def on_progress(done: int, total: int, rows: int):
+                progress = {"tasks_done": done, "tasks_total": total, "rows": rows}
+                print(json.dumps({"progress": progress}), flush=True)
+
         ingestion = LearnIngestion(config)
-        ingestion.run(
+        stats_entry = ingestion.run(
             input_dir=args.input,
             tests_file=args.tests,
             parquet_out=args.parquet_out,
             snapshot_out=args.snapshot_out,
             log_out=args.log_out,
+            workers=args.workers,
+            on_progress=on_progress,
         )
+        if args.progress:
+            print(json.dumps({"result": stats_entry}), flush=True)
     except Exception as e:
         logger.error("Ingestion failed", error=str(e))
         sys.exit(1)
@@ -8,7 +8,12 @@ from fastapi import FastAPI, HTTPException
 from .intent_embedder import IntentEmbedder
 from .intent_validator import IntentValidator
 from .model_registry import NLURegistry
-from .schema import ParseRequest, ParseResponse
+from .schema import (
+    ParseBatchRequest,
+    ParseBatchResponse,
+    ParseRequest,
+    ParseResponse,
+)
 from .slot_sv import extract_slots_sv
 
 app = FastAPI(title="Alice NLU v1", version="1.0.0")
@@ -27,7 +32,16 @@ OLLAMA = os.getenv("OLLAMA_HOST", "http://ollama:11434")
 
 @app.get("/health")
 async def health():
-    return {"ok": True, "service": "nlu", "version": "1.0.0"}
+    return {
+        "ok": True,
+        "service": "nlu",
+        "version": "1.0.0",
+        "encoder": {
+            "onnx": registry._encoder is not None,
+            "warmup_ms": round(registry.warmup_ms, 1),
+            "embed_cache": registry.cache_info(),
+        },
+    }
 
 
 @app.get("/healthz")
@@ -42,14 +56,15 @@ async def healthz():
         raise HTTPException(503, f"downstream: {e}")
 
 
-@app.post("/api/nlu/parse", response_model=ParseResponse)
-async def parse(req: ParseRequest):
-    t0 = time.perf_counter()
+def _encode_stats() -> dict:
+    # encode_ms = tid i registry.encode_batch (0 om heuristiken räckte),
+    # cache_hits/cache_misses = query-embeddings från LRU-cachen resp. encodern
+    return {"encode_ms": 0.0, "cache_hits": 0.0, "cache_misses": 0.0}
 
-    emb_t0 = time.perf_counter()
-    sim = embedder.match_intent(req.text)
-    emb_ms = (time.perf_counter() - emb_t0) * 1000
 
+def _finish_parse(text: str, lang: str, sim, timings_ms: dict) -> ParseResponse:
+    """Validering, slots och route hint för ett redan matchat intent."""
+    t0 = time.perf_counter()
     label = sim.label
     conf = sim.score
     validated = False
@@ -57,34 +72,85 @@ async def parse(req: ParseRequest):
 
     if not sim.accepted:
         val_t0 = time.perf_counter()
-        ok, label2 = validator.validate(req.text, [sim.label, sim.second_label])
+        ok, label2 = validator.validate(text, [sim.label, sim.second_label])
         xnli_ms = (time.perf_counter() - val_t0) * 1000
         if ok:
             label = label2
             validated = True
 
     slots_t0 = time.perf_counter()
-    slots = extract_slots_sv(req.text)
+    slot_timings: dict = {}
+    slots = extract_slots_sv(text, timings=slot_timings)
     slots_ms = (time.perf_counter() - slots_t0) * 1000
 
-    total_ms = (time.perf_counter() - t0) * 1000
     route_hint = (
         "planner"
         if label.startswith("calendar.") or label.startswith("email.")
         else "micro"
     )
 
+    timings_ms = dict(timings_ms)
+    timings_ms["xnli"] = xnli_ms
+    timings_ms["slots"] = slots_ms
+    timings_ms.update(slot_timings)  # bara de extractors som faktiskt körde
+    timings_ms["total"] = (
+        timings_ms.get("total", 0.0) + (time.perf_counter() - t0) * 1000
+    )
+
     return ParseResponse(
         v="1",
-        lang=req.lang or "sv",
+        lang=lang or "sv",
         intent={"label": label, "confidence": conf, "validated": validated},
         slots=slots,
         route_hint=route_hint,
+        timings_ms=timings_ms,
+    )
+
+
+@app.post("/api/nlu/parse", response_model=ParseResponse)
+async def parse(req: ParseRequest):
+    emb_t0 = time.perf_counter()
+    enc = _encode_stats()
+    sim = embedder.match_intent(req.text, stats=enc)
+    emb_ms = (time.perf_counter() - emb_t0) * 1000
+
+    return _finish_parse(
+        req.text,
+        req.lang,
+        sim,
+        {"embed": emb_ms, "sim": 0.0, **enc, "total": emb_ms},
+    )
+
+
+@app.post("/api/nlu/parse_batch", response_model=ParseBatchResponse)
+async def parse_batch(req: ParseBatchRequest):
+    """Parsa flera texter; alla embeddings tas i en enda encoder-körning."""
+    t0 = time.perf_counter()
+
+    emb_t0 = time.perf_counter()
+    enc = _encode_stats()
+    sims = embedder.match_intents(req.texts, stats=enc)
+    emb_ms = (time.perf_counter() - emb_t0) * 1000
+    # Batchens embed-tid fördelas per text så att per-item totals går att jämföra
+    per_item_ms = emb_ms / len(req.texts)
+
+    results = [
+        _finish_parse(
+            text,
+            req.lang,
+            sim,
+            {"embed": per_item_ms, "sim": 0.0, "total": per_item_ms},
+        )
+        for text, sim in zip(req.texts, sims)
+    ]
+
+    return ParseBatchResponse(
+        v="1",
+        results=results,
         timings_ms={
             "embed": emb_ms,
-            "sim": 0.0,
-            "xnli": xnli_ms,
-            "slots": slots_ms,
-            "total": total_ms,
+            **enc,
+            "total": (time.perf_counter() - t0) * 1000,
+            "batch_size": float(len(req.texts)),
         },
     )
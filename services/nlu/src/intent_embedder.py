@@ -1,5 +1,6 @@
 import os
 from dataclasses import dataclass
+from typing import Dict, List, Optional
 
 import numpy as np
 
@@ -22,7 +23,7 @@ class IntentEmbedder:
         self.sim_thresh = float(env_sim) if env_sim else float(sim_thresh)
         self.margin_min = float(env_margin) if env_margin else float(margin_min)
 
-    def match_intent(self, text: str) -> SimResult:
+    def _heuristic(self, text: str) -> Optional[SimResult]:
         # Snabb svensk heuristik för tydliga verbfraser
         lt = text.lower()
         if any(w in lt for w in ["boka", "skapa"]):
@@ -51,16 +52,48 @@ class IntentEmbedder:
                 second_score=0.0,
                 accepted=True,
             )
+        return None
 
-        q = self.registry.encode(text)
-        labels = list(self.registry.embeddings.keys())
-        embs = np.stack([self.registry.embeddings[l] for l in labels], axis=0)
-        sims = embs @ q  # cos om vektorer är normaliserade
-        top_idx = np.argsort(-sims)[:2]
-        l1, l2 = labels[top_idx[0]], labels[top_idx[1]]
-        s1, s2 = float(sims[top_idx[0]]), float(sims[top_idx[1]])
-        margin = s1 - s2
-        accept = (s1 >= self.sim_thresh) and (margin >= self.margin_min)
-        return SimResult(
-            label=l1, score=s1, second_label=l2, second_score=s2, accepted=accept
-        )
+    def _results(self, sims: np.ndarray) -> List[SimResult]:
+        """Top-2 per row of a (n, n_labels) similarity matrix."""
+        labels = self.registry.labels
+        # argpartition with kth=1 places the best at 0 and second best at 1
+        # in O(n_labels), instead of a full argsort
+        top2 = np.argpartition(-sims, 1, axis=1)[:, :2]
+        top2_sims = np.take_along_axis(sims, top2, axis=1)
+
+        results = []
+        for (i1, i2), (s1, s2) in zip(top2.tolist(), top2_sims.tolist()):
+            margin = s1 - s2
+            accept = (s1 >= self.sim_thresh) and (margin >= self.margin_min)
+            results.append(
+                SimResult(
+                    label=labels[i1],
+                    score=s1,
+                    second_label=labels[i2],
+                    second_score=s2,
+                    accepted=accept,
+                )
+            )
+        return results
+
+    def match_intent(
+        self, text: str, stats: Optional[Dict[str, float]] = None
+    ) -> SimResult:
+        return self.match_intents([text], stats=stats)[0]
+
+    def match_intents(
+        self, texts: List[str], stats: Optional[Dict[str, float]] = None
+    ) -> List[SimResult]:
+        """Match many texts; all non-heuristic texts share one encoder run.
+
+        stats (optional) receives the registry's cache/encode counters.
+        """
+        results: List[Optional[SimResult]] = [self._heuristic(t) for t in texts]
+        pending = [i for i, r in enumerate(results) if r is None]
+        if pending:
+            q = self.registry.encode_batch([texts[i] for i in pending], stats=stats)
+            sims = q @ self.registry.label_matrix.T  # cos om vektorer är normaliserade
+            for i, result in zip(pending, self._results(sims)):
+                results[i] = result
+        return results
@@ -1,5 +1,9 @@
 import os
-from typing import Optional
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
 
 import numpy as np
 
@@ -25,16 +29,49 @@ INTENT_LABELS = {
     "info.query": "faktafråga, fråga information, sök uppgifter, what is, how to",
 }
 
+# Representativa yttranden i olika längder för warmup av encodern
+WARMUP_TEXTS = [
+    "hej",
+    "vad är klockan",
+    "boka möte med Anna imorgon klockan 14",
+    "kan du skicka ett mejl till teamet om att fredagens demo flyttas till nästa vecka",
+]
+
+
+def normalize_text(text: str) -> str:
+    """Cache-nyckel: NFC, casefold och kollapsade blanksteg."""
+    return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
 
 class NLURegistry:
     def __init__(self):
         self.intent_labels = INTENT_LABELS
+        # LRU cache för query-embeddings (normaliserad text -> vektor)
+        self.cache_size = max(0, _env_int("NLU_EMBED_CACHE_SIZE", 2048))
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
         # Optional ONNX encoder setup
         self._encoder = self._init_onnx_encoder()
         # Precompute label embeddings
         self.embeddings = {
             k: self._encode_label(v) for k, v in self.intent_labels.items()
         }
+        # Label order + stacked matrix (n_labels, dim) for one-matmul matching
+        self.labels = list(self.embeddings.keys())
+        self.label_matrix = np.stack(
+            [self.embeddings[k] for k in self.labels], axis=0
+        ).astype(np.float32)
+        self.label_matrix.setflags(write=False)
+        self.warmup_ms = self._warmup()
 
     def _fake_embed(self, text: str) -> np.ndarray:
         # Förbättrad hashbaserad vektor med keyword-matching
@@ -158,11 +195,39 @@ class NLURegistry:
         v /= np.linalg.norm(v) + 1e-9
         return v
 
+    def _session_options(self, onnx_path: str):
+        """SessionOptions + vilken modellfil som ska laddas.
+
+        Env:
+          NLU_ORT_INTRA_THREADS: trådar inom en operator (0 = ORT default)
+          NLU_ORT_INTER_THREADS: trådar mellan operatorer (0 = ORT default)
+          E5_ONNX_OPTIMIZED_PATH: föroptimerad modell; skrivs vid första start
+            om den saknas och laddas sedan utan ny grafoptimering
+        """
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = max(0, _env_int("NLU_ORT_INTRA_THREADS", 0))
+        opts.inter_op_num_threads = max(0, _env_int("NLU_ORT_INTER_THREADS", 0))
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+
+        optimized_path = os.getenv("E5_ONNX_OPTIMIZED_PATH")
+        if optimized_path and os.path.exists(optimized_path):
+            # Redan optimerad offline, hoppa över optimeringen vid laddning
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            return opts, optimized_path
+
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if optimized_path and os.access(
+            os.path.dirname(os.path.abspath(optimized_path)), os.W_OK
+        ):
+            opts.optimized_model_filepath = optimized_path
+        return opts, onnx_path
+
     def _init_onnx_encoder(self):
         """Init multilingual-e5-small ONNX session om tillgänglig via env.
         Env:
           E5_ONNX_PATH: sökväg till onnx-modell
           E5_TOKENIZER_JSON: sökväg till tokenizer.json
+        Se även _session_options för trådar och föroptimerad modell.
         """
         onnx_path = os.getenv("E5_ONNX_PATH")
         tok_path = os.getenv("E5_TOKENIZER_JSON")
@@ -171,52 +236,184 @@ class NLURegistry:
         if ort is None:
             return None
         try:
-            sess = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+            opts, model_path = self._session_options(onnx_path)
+            try:
+                sess = ort.InferenceSession(
+                    model_path, sess_options=opts, providers=["CPUExecutionProvider"]
+                )
+            except Exception:
+                if model_path == onnx_path:
+                    raise
+                # Trasig/inkompatibel föroptimerad fil: ladda originalet
+                opts, _ = self._session_options(onnx_path)
+                opts.graph_optimization_level = (
+                    ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+                )
+                sess = ort.InferenceSession(
+                    onnx_path, sess_options=opts, providers=["CPUExecutionProvider"]
+                )
             tok = None
             if tok_path and os.path.exists(tok_path) and Tokenizer is not None:
                 tok = Tokenizer.from_file(tok_path)
-            return {"session": sess, "tokenizer": tok}
+            return {
+                "session": sess,
+                "tokenizer": tok,
+                "token_type_ids": any(
+                    n.name == "token_type_ids" for n in sess.get_inputs()
+                ),
+            }
         except Exception:
             return None
 
-    def _encode_text(self, text: str, prefix: str | None = None) -> np.ndarray:
-        """Encode text with ONNX encoder if available, otherwise fake embedding."""
-        if prefix:
-            text = f"{prefix} {text}".strip()
-        if not self._encoder:
-            return self._fake_embed(text)
+    def _warmup(self) -> float:
+        """Kör encodern på representativa indata så första requesten slipper
+        lazy init (allokeringar, kernelval) i ONNX Runtime."""
+        if not self._encoder or self._encoder.get("tokenizer") is None:
+            return 0.0
+        if os.getenv("NLU_ENCODER_WARMUP", "true").lower() in ("0", "false", "no"):
+            return 0.0
+        t0 = time.perf_counter()
+        try:
+            texts = [f"query: {t}" for t in WARMUP_TEXTS]
+            # En text åt gången och en hel batch: båda formerna används i drift
+            self._run_encoder(texts[:1])
+            self._run_encoder(texts)
+        except Exception:
+            pass
+        return (time.perf_counter() - t0) * 1000
+
+    def _run_encoder(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts in one ONNX run.
+
+        Sequences are right-padded to the longest one in the batch; the
+        attention mask keeps padding out of both attention and mean pooling.
+        """
         sess = self._encoder["session"]
-        tok: Optional[Tokenizer] = self._encoder.get("tokenizer")
+        tok: Tokenizer = self._encoder["tokenizer"]
+        encodings = tok.encode_batch(texts)
+        max_len = max(len(enc.ids) for enc in encodings)
+
+        input_ids = np.zeros((len(texts), max_len), dtype=np.int64)
+        attention_mask = np.zeros((len(texts), max_len), dtype=np.int64)
+        for i, enc in enumerate(encodings):
+            input_ids[i, : len(enc.ids)] = enc.ids
+            attention_mask[i, : len(enc.ids)] = 1
+
+        # Common E5 ONNX inputs (may vary per export)
+        inputs = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+        }
+        # Some exports use token_type_ids
+        if self._encoder["token_type_ids"]:
+            inputs["token_type_ids"] = np.zeros_like(input_ids, dtype=np.int64)
+        outs = sess.run(None, inputs)
+        # Use first output; masked mean-pool if sequence
+        out = outs[0]
+        if out.ndim == 3:  # [batch, seq, hidden]
+            mask = attention_mask[:, :, None].astype(out.dtype)
+            vecs = (out * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1.0)
+        else:
+            vecs = out
+        vecs = vecs.astype(np.float32)
+        return vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-9)
+
+    def _encode_texts(self, texts: List[str], prefix: str | None = None) -> np.ndarray:
+        """Encode many texts (n, dim) with ONNX if available, otherwise fake embeddings."""
+        if prefix:
+            texts = [f"{prefix} {text}".strip() for text in texts]
+        if not texts:
+            return np.zeros((0, 384), dtype=np.float32)
+        if not self._encoder or self._encoder.get("tokenizer") is None:
+            # Minimal whitespace tokens → ids = hash-based fallback
+            return np.stack([self._fake_embed(text) for text in texts], axis=0)
         try:
-            if tok is None:
-                # Minimal whitespace tokens → ids = hash-based fallback
-                return self._fake_embed(text)
-            enc = tok.encode(text)
-            input_ids = np.array([enc.ids], dtype=np.int64)
-            attention_mask = np.ones_like(input_ids, dtype=np.int64)
-            # Common E5 ONNX inputs (may vary per export)
-            inputs = {
-                "input_ids": input_ids,
-                "attention_mask": attention_mask,
-            }
-            # Some exports use token_type_ids
-            if any(n.name == "token_type_ids" for n in sess.get_inputs()):
-                inputs["token_type_ids"] = np.zeros_like(input_ids, dtype=np.int64)
-            outs = sess.run(None, inputs)
-            # Use first output; mean-pool if sequence
-            out = outs[0]
-            vec = out[0]
-            if vec.ndim == 2:  # [seq, hidden]
-                vec = vec.mean(axis=0)
-            vec = vec.astype(np.float32)
-            norm = np.linalg.norm(vec) + 1e-9
-            return vec / norm
+            return self._run_encoder(texts)
         except Exception:
-            return self._fake_embed(text)
+            return np.stack([self._fake_embed(text) for text in texts], axis=0)
+
+    def _encode_text(self, text: str, prefix: str | None = None) -> np.ndarray:
+        """Encode text with ONNX encoder if available, otherwise fake embedding."""
+        return self._encode_texts([text], prefix=prefix)[0]
 
     def encode(self, text: str) -> np.ndarray:
         # E5 queries preprended with "query:"
-        return self._encode_text(text, prefix="query:")
+        return self.encode_batch([text])[0]
+
+    def encode_batch(
+        self, texts: List[str], stats: Optional[Dict[str, float]] = None
+    ) -> np.ndarray:
+        """
+        Batched queries (n, dim). Texts are normalized and looked up in the
+        LRU cache; only the misses go through one ONNX run.
+
+        Args:
+            texts: Query texts
+            stats: Optional dict that receives cache_hits, cache_misses and
+                encode_ms for this call
+        """
+        t0 = time.perf_counter()
+        keys = [normalize_text(t) for t in texts]
+        vecs: List[Optional[np.ndarray]] = [None] * len(keys)
+
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                vec = self._cache.get(key)
+                if vec is not None:
+                    self._cache.move_to_end(key)
+                    vecs[i] = vec
+
+        hits = sum(1 for v in vecs if v is not None)
+        # Unika missar, så en batch med dubbletter bara kodar texten en gång
+        missing = list(dict.fromkeys(k for k, v in zip(keys, vecs) if v is None))
+        if missing:
+            encoded = self._encode_texts(missing, prefix="query:")
+            fresh = dict(zip(missing, encoded))
+            for i, key in enumerate(keys):
+                if vecs[i] is None:
+                    vecs[i] = fresh[key]
+            self._cache_put(fresh)
+
+        with self._cache_lock:
+            self.cache_hits += hits
+            self.cache_misses += len(missing)
+
+        out = (
+            np.stack(vecs, axis=0)
+            if vecs
+            else np.zeros((0, self.label_matrix.shape[1]), dtype=np.float32)
+        )
+        if stats is not None:
+            stats["cache_hits"] = stats.get("cache_hits", 0) + hits
+            stats["cache_misses"] = stats.get("cache_misses", 0) + len(missing)
+            stats["encode_ms"] = (
+                stats.get("encode_ms", 0.0) + (time.perf_counter() - t0) * 1000
+            )
+        return out
+
+    def _cache_put(self, fresh: Dict[str, np.ndarray]) -> None:
+        if not self.cache_size:
+            return
+        with self._cache_lock:
+            for key, vec in fresh.items():
+                vec = np.array(vec, dtype=np.float32)
+                vec.setflags(write=False)  # delas mellan anropare
+                self._cache[key] = vec
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def cache_info(self) -> Dict[str, float]:
+        with self._cache_lock:
+            total = self.cache_hits + self.cache_misses
+            return {
+                "size": len(self._cache),
+                "capacity": self.cache_size,
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": round(self.cache_hits / total, 4) if total else 0.0,
+            }
 
     def _encode_label(self, text: str) -> np.ndarray:
         # E5 passages (labels) preprended with "passage:"
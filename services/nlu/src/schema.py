@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -17,3 +17,16 @@ class ParseResponse(BaseModel):
     slots: Dict[str, Any]
     route_hint: str
     timings_ms: Dict[str, float]
+
+
+class ParseBatchRequest(BaseModel):
+    v: str = Field(default="1")
+    texts: List[str] = Field(..., min_length=1, max_length=256)
+    lang: Optional[str] = "sv"
+    session_id: Optional[str] = None
+
+
+class ParseBatchResponse(BaseModel):
+    v: str
+    results: List[ParseResponse]
+    timings_ms: Dict[str, float]
@@ -1,11 +1,37 @@
 import re
+import time
 from datetime import datetime
+from functools import lru_cache
 
 import dateparser
 import phonenumbers
 
 RE_EMAIL = re.compile(r"[\w.\+\-]+@[\w\.-]+\.[A-Za-z]{2,}")
 RE_TIME = re.compile(r"\b(?:(?:kl\s*)?(\d{1,2})(?::(\d{2}))?)\b", re.IGNORECASE)
+RE_PERSON = re.compile(r"med\s+([A-ZÅÄÖ][a-zåäö]+)")
+
+# Förfilter: billiga regexar som avgör vilka extractors som behöver köras.
+# RE_TEMPORAL ska täcka allt dateparser förstår på svenska (relativa dagar,
+# veckodagar, månader, tidsenheter); siffror öppnar alltid datetime-grinden.
+RE_TEMPORAL = re.compile(
+    r"\d"
+    r"|\b(?:idag|igår|imorgon|i\s+(?:dag|går|morgon|förrgår|övermorgon)"
+    r"|förrgår|övermorgon|nu|klockan|kl"
+    r"|måndag|tisdag|onsdag|torsdag|fredag|lördag|söndag"
+    r"|jan|feb|mar|apr|maj|jun|jul|aug|sep|okt|nov|dec"
+    r"|sekund|minut|timm|dag|dygn|veck|månad|år|helg"
+    r"|morgon|förmiddag|middag|eftermiddag|kväll|natt|sedan|sen)",
+    re.IGNORECASE,
+)
+# Minst sju siffror (ev. inledande +) med vanliga avgränsare emellan
+RE_PHONE_LIKE = re.compile(r"\+?\d(?:[\s\-()./]*\d){6,}")
+
+
+@lru_cache(maxsize=1)
+def _date_parser() -> "dateparser.DateDataParser":
+    # dateparser.parse() bygger en ny DateDataParser (settings + språkladdning)
+    # vid varje anrop när languages anges; en delad instans gör det en gång
+    return dateparser.DateDataParser(languages=["sv"])
 
 
 def to_iso(dt: datetime) -> str:
@@ -16,35 +42,60 @@ def to_iso(dt: datetime) -> str:
 
 
 def parse_datetime_sv(text: str) -> str | None:
-    dt = dateparser.parse(text, languages=["sv"])  # bäst-effort
+    dt = _date_parser().get_date_data(text).date_obj  # bäst-effort
     return to_iso(dt) if dt else None
 
 
-def extract_slots_sv(text: str) -> dict:
+def extract_slots_sv(text: str, timings: dict | None = None) -> dict:
+    """
+    Extrahera slots ur svensk text.
+
+    Ett förfilter avgör vilka extractors som körs, så "hej" aldrig når
+    dateparser eller phonenumbers.
+
+    Args:
+        text: Yttrande
+        timings: Optional dict som får ms per körd extractor
+            (slots_datetime, slots_email, slots_phone, slots_person)
+    """
     slots = {}
+
+    def _timed(name: str, t0: float) -> None:
+        if timings is not None:
+            timings[f"slots_{name}"] = (time.perf_counter() - t0) * 1000
+
     # datetime
-    iso = parse_datetime_sv(text)
-    if iso:
-        slots["datetime_iso"] = iso
+    if RE_TEMPORAL.search(text):
+        t0 = time.perf_counter()
+        iso = parse_datetime_sv(text)
+        if iso:
+            slots["datetime_iso"] = iso
+        _timed("datetime", t0)
 
     # email
-    m = RE_EMAIL.search(text)
-    if m:
-        slots["email"] = m.group(0)
+    if "@" in text:
+        t0 = time.perf_counter()
+        m = RE_EMAIL.search(text)
+        if m:
+            slots["email"] = m.group(0)
+        _timed("email", t0)
 
     # phone
-    for m in phonenumbers.PhoneNumberMatcher(text, "SE"):
-        slots["phone_e164"] = phonenumbers.format_number(
-            m.number, phonenumbers.PhoneNumberFormat.E164
-        )
-        break
-
-    # person (enkel baseline)
-    # Tokens (utan \p{L} som inte stöds av re)
-    tokens = [t for t in re.findall(r"\b[A-Za-zÅÄÖåäö]+\b", text)]
-    # fallback: leta ett kapitaliserat ord efter "med"
-    m = re.search(r"med\s+([A-ZÅÄÖ][a-zåäö]+)", text)
-    if m:
-        slots["person"] = m.group(1)
+    if RE_PHONE_LIKE.search(text):
+        t0 = time.perf_counter()
+        for m in phonenumbers.PhoneNumberMatcher(text, "SE"):
+            slots["phone_e164"] = phonenumbers.format_number(
+                m.number, phonenumbers.PhoneNumberFormat.E164
+            )
+            break
+        _timed("phone", t0)
+
+    # person (enkel baseline): ett kapitaliserat ord efter "med"
+    if "med" in text:
+        t0 = time.perf_counter()
+        m = RE_PERSON.search(text)
+        if m:
+            slots["person"] = m.group(1)
+        _timed("person", t0)
 
     return slots
@@ -4,6 +4,8 @@ Alice v2 Orchestrator Service
 Main FastAPI application entry point - production-ready with operational polish
 """
 
+import asyncio
+import os
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
@@ -11,8 +13,11 @@ import structlog
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from src.health import check_liveness, check_readiness, wait_for_readiness
-from src.middleware.logging import LoggingMiddleware, setup_logging
-from src.mw_metrics import MetricsMiddleware
+from src.llm.ollama_client import OllamaClient, OllamaConfig
+from src.llm.residency import get_residency_manager
+from src.middleware.idempotency import IdempotencyMiddleware
+from src.middleware.instrumentation import InstrumentationMiddleware
+from src.middleware.logging import setup_logging
 from src.privacy import privacy_manager
 from src.routers import (
     chat,
@@ -40,6 +45,17 @@ logger = structlog.get_logger(__name__)
 guardian_client = GuardianClient()
 
 
+async def _privacy_compactor() -> None:
+    """Background GDPR compaction: one batch of segments per interval"""
+    interval_s = float(os.getenv("PRIVACY_COMPACT_INTERVAL_S", "600"))
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            await asyncio.to_thread(privacy_manager.compact_telemetry)
+        except Exception as e:
+            logger.warning("Privacy compaction failed", error=str(e))
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan management with graceful shutdown"""
@@ -74,9 +90,27 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         except Exception as e:
             logger.warning("Security policy load failed", error=str(e))
 
+        # Model residency: keep the right models warm within Guardian's budget
+        residency_task = asyncio.create_task(
+            get_residency_manager().run(
+                client_factory=lambda: OllamaClient(
+                    OllamaConfig(
+                        host=os.getenv("OLLAMA_HOST", "http://dev-proxy:80/ollama"),
+                        timeout_ms=30000,  # Preloads can take several seconds
+                    )
+                ),
+                health_provider=guardian_client.get_health,
+            )
+        )
+
+        # Purge tombstoned telemetry in small batches off the request path
+        compactor_task = asyncio.create_task(_privacy_compactor())
+
         yield
 
         logger.info("Alice v2 Orchestrator shutting down")
+        residency_task.cancel()
+        compactor_task.cancel()
 
         # Perform graceful shutdown
         await shutdown_app()
@@ -109,11 +143,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add logging middleware
-app.add_middleware(LoggingMiddleware)
+# Idempotency-Key support (Redis-backed, shared across workers)
+if os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true":
+    app.add_middleware(IdempotencyMiddleware)
 
-# Add metrics middleware for real latency/status tracking
-app.add_middleware(MetricsMiddleware)
+# Trace id, timing, METRICS/Prometheus and access logs in one ASGI layer
+app.add_middleware(InstrumentationMiddleware)
 
 
 # Health check endpoints
@@ -179,6 +214,18 @@ async def cleanup_expired_data():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/privacy/compact")
+async def compact_telemetry(max_segments: int = 20):
+    """Purge tombstoned telemetry now (normally done by the background task)"""
+    try:
+        return await asyncio.to_thread(
+            privacy_manager.compact_telemetry, max_segments=max_segments
+        )
+    except Exception as e:
+        logger.error("Telemetry compaction failed", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Include API routers
 app.include_router(chat.router, prefix="/api", tags=["chat"])  # NLU‑aware chat mock
 app.include_router(
@@ -13,6 +13,7 @@ import redis
 import structlog
 
 from ..cache_key import build_cache_key, canonical_prompt
+from ..utils.tracing import span
 
 logger = structlog.get_logger(__name__)
 
@@ -68,6 +69,20 @@ class SmartCache:
         prompt: str,
         model_id: str = "qwen2.5:3b",
         schema_version: str = "v4",
+    ) -> CacheResult:
+        """Get from cache; traced as a cache.lookup span of the current turn"""
+        with span("cache.lookup", intent=intent) as s:
+            result = await self._lookup(intent, prompt, model_id, schema_version)
+            if s is not None:
+                s.set(hit=result.hit, source=result.source)
+            return result
+
+    async def _lookup(
+        self,
+        intent: str,
+        prompt: str,
+        model_id: str = "qwen2.5:3b",
+        schema_version: str = "v4",
     ) -> CacheResult:
         """Get from cache with multi-tier lookup and telemetry"""
 
@@ -1,5 +1,8 @@
+import json
+import os
 import re
-from typing import Optional
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
 # Svenska lexikon för deterministisk intent-klassificering
 RE_WEATHER = re.compile(
@@ -22,34 +25,36 @@ RE_GREETING = re.compile(
 )
 
 
+# Prioritetsordning: email först (högst prioritet för "agenda")
+GUARD_PATTERNS = (
+    ("email.create_draft", RE_EMAIL),
+    ("weather.lookup", RE_WEATHER),
+    ("calendar.create_draft", RE_CAL),
+    ("memory.query", RE_MEMORY),
+    ("greeting.hello", RE_GREETING),
+)
+
+
 def guard_intent_sv(text: str) -> Optional[str]:
     """
     Deterministic intent classification using Swedish regex patterns.
     Returns intent name or None if no clear match.
     """
-    text_lower = text.lower().strip()
-
-    # Email patterns (högst prioritet för "agenda")
-    if RE_EMAIL.search(text):
-        return "email.create_draft"
-
-    # Weather patterns
-    if RE_WEATHER.search(text):
-        return "weather.lookup"
-
-    # Calendar patterns
-    if RE_CAL.search(text):
-        return "calendar.create_draft"
-
-    # Memory patterns
-    if RE_MEMORY.search(text):
-        return "memory.query"
+    for intent, pattern in GUARD_PATTERNS:
+        if pattern.search(text):
+            return intent
+    return None
 
-    # Greeting patterns
-    if RE_GREETING.search(text):
-        return "greeting.hello"
 
-    return None
+def guard_intent_confident_sv(text: str, max_words: int = 12) -> Optional[str]:
+    """
+    Guard intent only for short utterances where exactly one lexicon matches
+    (e.g. "Hej, boka ett möte" is ambiguous and returns None).
+    """
+    if len(text.split()) > max_words:
+        return None
+    hits = [intent for intent, pattern in GUARD_PATTERNS if pattern.search(text)]
+    return hits[0] if len(hits) == 1 else None
 
 
 def intent_to_tool(intent: str) -> str:
@@ -67,6 +72,86 @@ def intent_to_tool(intent: str) -> str:
     return tool_map.get(intent, "none")
 
 
+def _render_guard_response(intent: str) -> str:
+    return json.dumps(
+        {
+            "intent": intent,
+            "tool": intent_to_tool(intent),
+            "args": {},
+            "render_instruction": {"type": "text", "content": f"Intent: {intent}"},
+        }
+    )
+
+
+# Förrenderade svar per guard-intent (byggs en gång vid import)
+GUARD_RESPONSE_TEXT: Dict[str, str] = {
+    intent: _render_guard_response(intent) for intent, _ in GUARD_PATTERNS
+}
+
+
+def guard_response_text(intent: str) -> str:
+    """Precomputed response body for a guard intent"""
+    text = GUARD_RESPONSE_TEXT.get(intent)
+    return text if text is not None else _render_guard_response(intent)
+
+
+class GuardDecisionCache:
+    """
+    Per-session short-circuit cache: (session_id, normalized text) -> confident
+    guard intent, or None for a negative result. Only the guard verdict is
+    cached: it depends on the text alone, so entries never go stale and the
+    cache is only bounded (LRU). Routing (quota-dependent) is decided per turn.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Optional[str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(session_id: str, text: str) -> Tuple[str, str]:
+        return (session_id, " ".join(text.lower().split()))
+
+    def get(self, key: Tuple[str, str]) -> Tuple[bool, Optional[str]]:
+        """(found, intent) - found with intent None is a cached negative"""
+        if key not in self._entries:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return True, self._entries[key]
+
+    def put(self, key: Tuple[str, str], intent: Optional[str]) -> None:
+        self._entries[key] = intent
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def forget_session(self, session_id: str) -> int:
+        keys = [k for k in self._entries if k[0] == session_id]
+        for k in keys:
+            del self._entries[k]
+        return len(keys)
+
+    def info(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Global guard decision cache (shared by the chat router and right-to-forget)
+_guard_decision_cache: Optional[GuardDecisionCache] = None
+
+
+def get_guard_decision_cache() -> GuardDecisionCache:
+    """Get or create global guard decision cache"""
+    global _guard_decision_cache
+    if _guard_decision_cache is None:
+        _guard_decision_cache = GuardDecisionCache(
+            int(os.getenv("GUARD_FAST_PATH_CACHE_SIZE", "4096"))
+        )
+    return _guard_decision_cache
+
+
 def grammar_for(text: str) -> str:
     """
     Return intent-scoped grammar based on text content.
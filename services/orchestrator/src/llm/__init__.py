@@ -19,6 +19,7 @@ from .planner_classifier import (
 from .planner_hybrid import PlannerHybridDriver, get_hybrid_planner_driver
 from .planner_qwen import PlannerQwenDriver, get_planner_driver
 from .planner_v2 import PlannerV2Driver, get_planner_v2_driver
+from .residency import ModelResidencyManager, get_residency_manager
 
 __all__ = [
     "get_ollama_client",
@@ -41,4 +42,6 @@ __all__ = [
     "PlannerV2Driver",
     "get_deep_driver",
     "DeepLlamaDriver",
+    "get_residency_manager",
+    "ModelResidencyManager",
 ]
@@ -9,6 +9,7 @@ from typing import Any, Dict, Optional
 import structlog
 
 from .ollama_client import get_ollama_client
+from .residency import get_residency_manager
 
 logger = structlog.get_logger(__name__)
 
@@ -19,6 +20,7 @@ class DeepLlamaDriver:
     def __init__(self):
         self.model = os.getenv("LLM_DEEP", "llama3.1:8b")
         self.client = get_ollama_client()
+        get_residency_manager().register_model(self.model, route="deep")
 
         # Deep-specific settings for complex reasoning
         self.temperature = 0.2  # Balanced creativity for complex tasks
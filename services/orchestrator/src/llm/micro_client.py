@@ -10,6 +10,8 @@ from typing import Any, Dict, Optional
 
 import structlog
 
+from .residency import get_residency_manager
+
 logger = structlog.get_logger(__name__)
 
 
@@ -158,6 +160,7 @@ class RealMicroClient(MicroClient):
     def __init__(self, base_url: str, model: str):
         self.base_url = base_url.rstrip("/")
         self.model = model
+        get_residency_manager().register_model(model, route="micro")
 
         # Optimized settings for Swedish accuracy
         self.temperature = 0.0  # Deterministic
@@ -492,12 +495,14 @@ Verktyg:"""
             "grammar", 'root ::= ("time"|"weather"|"memory"|"greeting"|"none")'
         )
 
+        residency = get_residency_manager()
         payload = {
             "model": self.model,
             "prompt": formatted_prompt,
             "stream": False,
             "grammar": grammar,
             "stop": [],
+            "keep_alive": residency.keep_alive_for(self.model),
         }
         payload.update(micro_kwargs)
 
@@ -509,6 +514,7 @@ Verktyg:"""
             response.raise_for_status()
             data = response.json()
 
+        residency.observe_response(self.model, data)
         return data.get("response", "").strip()
 
     def _map_enum_to_json(self, enum_response: str, original_prompt: str) -> str:
@@ -10,6 +10,8 @@ from typing import Any, Dict, Optional
 import httpx
 import structlog
 
+from .residency import get_residency_manager
+
 logger = structlog.get_logger(__name__)
 
 
@@ -19,7 +21,6 @@ class OllamaConfig:
 
     host: str = "http://ollama:11434"
     timeout_ms: int = 1500  # Reduced from 1800ms to 1500ms for SLO compliance
-    keep_alive: int = 120
     max_retries: int = 2
     retry_delay: float = 0.5
 
@@ -69,11 +70,14 @@ class OllamaClient:
 
     def generate(self, model: str, prompt: str, **kwargs) -> Dict[str, Any]:
         """Generate text using Ollama model"""
+        residency = get_residency_manager()
+        # Always counts the request, even when the caller pins keep_alive
+        keep_alive = residency.keep_alive_for(model)
         data = {
             "model": model,
             "prompt": prompt,
             "stream": False,
-            "keep_alive": f"{self.config.keep_alive}s",
+            "keep_alive": kwargs.get("keep_alive") or keep_alive,
         }
 
         # Add grammar if provided
@@ -113,7 +117,25 @@ class OllamaClient:
         if options:
             data["options"] = options
 
-        return self._make_request("/api/generate", data)
+        result = self._make_request("/api/generate", data)
+        residency.observe_response(model, result)
+        return result
+
+    def load_model(self, model: str, keep_alive: str) -> Dict[str, Any]:
+        """Preload a model without generating (empty prompt)"""
+        return self._make_request(
+            "/api/generate", {"model": model, "keep_alive": keep_alive}
+        )
+
+    def unload_model(self, model: str) -> Dict[str, Any]:
+        """Ask Ollama to evict a model immediately"""
+        return self._make_request("/api/generate", {"model": model, "keep_alive": 0})
+
+    def list_running(self) -> list:
+        """List models currently loaded in Ollama (/api/ps)"""
+        response = self.client.get(f"{self._base_url}/api/ps")
+        response.raise_for_status()
+        return response.json().get("models", [])
 
     def health_check(self) -> bool:
         """Check if Ollama is healthy"""
@@ -163,7 +185,6 @@ def get_ollama_client() -> OllamaClient:
         timeout_ms=int(
             os.getenv("LLM_TIMEOUT_MS", "1500")
         ),  # Reduced to 1500ms for SLO compliance
-        keep_alive=int(os.getenv("LLM_KEEP_ALIVE", "120")),
     )
     _ollama_client = OllamaClient(config)
     return _ollama_client
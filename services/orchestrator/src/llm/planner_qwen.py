@@ -15,6 +15,7 @@ from pydantic import ValidationError
 from ..planner.schema import PlannerOutput
 from .ollama_client import get_ollama_client
 from .planner_classifier import get_planner_classifier
+from .residency import get_residency_manager
 
 logger = structlog.get_logger(__name__)
 
@@ -25,6 +26,7 @@ class PlannerQwenDriver:
     def __init__(self):
         self.model = os.getenv("LLM_PLANNER", "llama3.2:1b-instruct-q4_K_M")
         self.client = get_ollama_client()
+        get_residency_manager().register_model(self.model, route="planner")
         self.classifier = get_planner_classifier()
 
         # Robust debug settings - can never crash
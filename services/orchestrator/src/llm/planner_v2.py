@@ -14,6 +14,7 @@ from pydantic import ValidationError
 from ..planner.schema_v4 import PlanOut
 from .ollama_client import get_ollama_client
 from .planner_classifier import get_planner_classifier
+from .residency import get_residency_manager
 
 logger = structlog.get_logger(__name__)
 
@@ -24,6 +25,7 @@ class PlannerV2Driver:
     def __init__(self):
         self.model = os.getenv("LLM_PLANNER_V2", "llama3.2:1b-instruct-q4_K_M")
         self.client = get_ollama_client()
+        get_residency_manager().register_model(self.model, route="planner")
         self.classifier = get_planner_classifier()
 
         # Clean system prompt without placeholders
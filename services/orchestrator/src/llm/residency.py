@@ -0,0 +1,342 @@
+"""
+Model residency manager - decides which Ollama models stay warm.
+
+Tracks per-model request rates, RAM cost and cold-load cost, picks the set of
+models worth keeping resident within a RAM budget, and hands out a per-call
+keep_alive. A background reconcile loop preloads warm models ahead of demand
+and explicitly unloads models that fell out of the warm set.
+
+Drivers call keep_alive_for/observe_response from asyncio.to_thread workers
+while the reconcile loop runs on the event loop, so profile state is guarded
+by a lock that is never held across an await.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# Ollama reports load_duration in nanoseconds; above this we call it a cold start
+COLD_START_THRESHOLD_MS = 500.0
+
+# Conservative RAM estimates until Ollama/Guardian report real sizes
+DEFAULT_RAM_GB = 4.0
+DEFAULT_COLD_LOAD_S = 3.0
+
+
+@dataclass
+class ModelProfile:
+    """Observed usage and cost for one model"""
+
+    model: str
+    routes: Set[str] = field(default_factory=set)
+    ram_gb: float = DEFAULT_RAM_GB
+    ram_gb_observed: bool = False
+    cold_load_s: float = DEFAULT_COLD_LOAD_S
+    requests: Deque[float] = field(default_factory=deque)
+    resident: bool = False
+    cold_starts: int = 0
+    warm_hits: int = 0
+    loads: int = 0
+    unloads: int = 0
+    preloads: int = 0
+    last_request: float = 0.0
+
+
+@dataclass
+class ResidencyConfig:
+    """Residency policy knobs (env-overridable)"""
+
+    ram_budget_gb: float = 10.0
+    warm_keep_alive_s: int = 1800  # Warm set: stay loaded between bursts
+    cold_keep_alive_s: int = 120  # Outside warm set (LLM_KEEP_ALIVE)
+    rate_window_s: float = 600.0
+    min_rate_per_min: float = 0.2  # Below this a model is never kept warm
+    reconcile_interval_s: float = 15.0
+    brownout_budget_factor: float = 0.5
+    max_events: int = 200
+
+    @classmethod
+    def from_env(cls) -> "ResidencyConfig":
+        return cls(
+            ram_budget_gb=float(os.getenv("RESIDENCY_RAM_BUDGET_GB", "10")),
+            warm_keep_alive_s=int(os.getenv("RESIDENCY_WARM_KEEP_ALIVE_S", "1800")),
+            cold_keep_alive_s=int(
+                os.getenv(
+                    "RESIDENCY_COLD_KEEP_ALIVE_S", os.getenv("LLM_KEEP_ALIVE", "120")
+                )
+            ),
+            rate_window_s=float(os.getenv("RESIDENCY_RATE_WINDOW_S", "600")),
+            min_rate_per_min=float(os.getenv("RESIDENCY_MIN_RATE_PER_MIN", "0.2")),
+            reconcile_interval_s=float(os.getenv("RESIDENCY_RECONCILE_S", "15")),
+        )
+
+
+class ModelResidencyManager:
+    """Keeps the most valuable models resident within the RAM budget"""
+
+    def __init__(self, config: Optional[ResidencyConfig] = None):
+        self.config = config or ResidencyConfig.from_env()
+        self._profiles: Dict[str, ModelProfile] = {}
+        self._budget_gb = self.config.ram_budget_gb
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=self.config.max_events)
+        self._lock = threading.RLock()
+
+    # --- Observations -------------------------------------------------------
+
+    def _profile(self, model: str) -> ModelProfile:
+        profile = self._profiles.get(model)
+        if profile is None:
+            profile = ModelProfile(model=model)
+            self._profiles[model] = profile
+        return profile
+
+    def register_model(
+        self, model: str, route: str, ram_gb: Optional[float] = None
+    ) -> None:
+        """Declare that a route uses a model (drivers call this at init)"""
+        with self._lock:
+            profile = self._profile(model)
+            profile.routes.add(route)
+            if ram_gb is not None and not profile.ram_gb_observed:
+                profile.ram_gb = ram_gb
+
+    def keep_alive_for(self, model: str) -> str:
+        """Record a request and return the keep_alive to send with it"""
+        now = time.time()
+        with self._lock:
+            profile = self._profile(model)
+            profile.requests.append(now)
+            profile.last_request = now
+            self._trim(profile, now)
+            warm = model in self.warm_set()
+
+        if warm:
+            keep_alive_s = self.config.warm_keep_alive_s
+        else:
+            keep_alive_s = self.config.cold_keep_alive_s
+        return f"{keep_alive_s}s"
+
+    def observe_response(self, model: str, response: Dict[str, Any]) -> None:
+        """Detect cold starts from Ollama's load_duration and learn load cost"""
+        load_ms = (response.get("load_duration") or 0) / 1e6
+        with self._lock:
+            profile = self._profile(model)
+            if load_ms >= COLD_START_THRESHOLD_MS:
+                profile.cold_starts += 1
+                profile.loads += 1
+                profile.cold_load_s += 0.3 * (load_ms / 1000.0 - profile.cold_load_s)
+            else:
+                profile.warm_hits += 1
+            profile.resident = True
+        if load_ms >= COLD_START_THRESHOLD_MS:
+            self._event("load", model, cause="cold_start", load_ms=round(load_ms, 1))
+
+    def update_running(self, running: List[Dict[str, Any]]) -> None:
+        """Sync residency and sizes from Ollama /api/ps"""
+        running_names = set()
+        with self._lock:
+            for entry in running:
+                name = entry.get("name") or entry.get("model")
+                if not name:
+                    continue
+                running_names.add(name)
+                profile = self._profile(name)
+                size = entry.get("size")
+                if size:
+                    profile.ram_gb = size / (1024**3)
+                    profile.ram_gb_observed = True
+                if not profile.resident:
+                    profile.resident = True
+                    profile.loads += 1
+                    self._event("load", name, cause="observed")
+
+            for name, profile in self._profiles.items():
+                if profile.resident and name not in running_names:
+                    profile.resident = False
+                    profile.unloads += 1
+                    self._event("unload", name, cause="evicted_by_ollama")
+
+    def update_from_guardian(self, health: Dict[str, Any]) -> None:
+        """Shrink the budget under pressure and adopt Guardian's learned footprints"""
+        state = str(health.get("state") or health.get("status") or "NORMAL").upper()
+        budget = self.config.ram_budget_gb
+        if state in ("BROWNOUT", "DEGRADED"):
+            budget *= self.config.brownout_budget_factor
+        elif state in ("EMERGENCY", "LOCKDOWN"):
+            budget = 0.0
+        self._budget_gb = budget
+
+        footprints = (
+            (health.get("prediction") or {}).get("models", {}).get("footprints_gb", {})
+        )
+        with self._lock:
+            for model, ram_gb in footprints.items():
+                profile = self._profiles.get(model)
+                if profile and not profile.ram_gb_observed:
+                    profile.ram_gb = ram_gb
+
+    # --- Policy -------------------------------------------------------------
+
+    def _trim(self, profile: ModelProfile, now: float) -> None:
+        cutoff = now - self.config.rate_window_s
+        while profile.requests and profile.requests[0] < cutoff:
+            profile.requests.popleft()
+
+    def rate_per_min(self, model: str) -> float:
+        with self._lock:
+            profile = self._profiles.get(model)
+            if profile is None:
+                return 0.0
+            self._trim(profile, time.time())
+            return len(profile.requests) / (self.config.rate_window_s / 60.0)
+
+    def warm_set(self) -> Set[str]:
+        """Greedy knapsack: cold-load seconds saved per minute per GB"""
+        candidates = []
+        with self._lock:
+            for model, profile in self._profiles.items():
+                rate = self.rate_per_min(model)
+                if rate < self.config.min_rate_per_min:
+                    continue
+                value = rate * profile.cold_load_s
+                candidates.append(
+                    (value / max(profile.ram_gb, 0.1), model, profile.ram_gb)
+                )
+
+        warm: Set[str] = set()
+        used_gb = 0.0
+        for _, model, ram_gb in sorted(candidates, reverse=True):
+            if used_gb + ram_gb <= self._budget_gb:
+                warm.add(model)
+                used_gb += ram_gb
+        return warm
+
+    def plan(self) -> Dict[str, List[str]]:
+        """Models to preload (warm but not resident) and unload (resident, not warm)"""
+        with self._lock:
+            warm = self.warm_set()
+            preload = [m for m in warm if not self._profiles[m].resident]
+            unload = [
+                m for m, p in self._profiles.items() if p.resident and m not in warm
+            ]
+        return {"preload": preload, "unload": unload}
+
+    # --- Reconcile loop -----------------------------------------------------
+
+    async def reconcile(self, client) -> Dict[str, List[str]]:
+        """Apply the plan through an OllamaClient (blocking calls off-loop)"""
+        try:
+            running = await asyncio.to_thread(client.list_running)
+            self.update_running(running)
+        except Exception as e:
+            logger.debug("Residency: /api/ps failed", error=str(e))
+
+        plan = self.plan()
+        for model in plan["preload"]:
+            try:
+                await asyncio.to_thread(
+                    client.load_model, model, f"{self.config.warm_keep_alive_s}s"
+                )
+                with self._lock:
+                    profile = self._profile(model)
+                    profile.resident = True
+                    profile.preloads += 1
+                    profile.loads += 1
+                self._event("load", model, cause="preload")
+            except Exception as e:
+                logger.warning("Residency preload failed", model=model, error=str(e))
+
+        for model in plan["unload"]:
+            with self._lock:
+                profile = self._profile(model)
+                last_request = profile.last_request
+            # Let models that are still inside their keep_alive serve the tail
+            if time.time() - last_request < self.config.cold_keep_alive_s:
+                continue
+            try:
+                await asyncio.to_thread(client.unload_model, model)
+                with self._lock:
+                    profile.resident = False
+                    profile.unloads += 1
+                self._event("unload", model, cause="budget")
+            except Exception as e:
+                logger.warning("Residency unload failed", model=model, error=str(e))
+
+        return plan
+
+    async def run(
+        self,
+        client_factory: Callable[[], Any],
+        health_provider: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None,
+    ) -> None:
+        """Background loop: Guardian budget → Ollama state → preload/unload"""
+        client = client_factory()
+        while True:
+            try:
+                if health_provider is not None:
+                    self.update_from_guardian(await health_provider())
+                await self.reconcile(client)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Residency reconcile failed", error=str(e))
+            await asyncio.sleep(self.config.reconcile_interval_s)
+
+    # --- Reporting ----------------------------------------------------------
+
+    def _event(self, kind: str, model: str, **fields: Any) -> None:
+        self._events.append(
+            {"ts": time.time(), "event": kind, "model": model, **fields}
+        )
+        logger.info("Model residency event", kind=kind, model=model, **fields)
+
+    def events(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return list(self._events)[-limit:]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> Dict[str, Any]:
+        warm = self.warm_set()
+        return {
+            "ram_budget_gb": round(self._budget_gb, 2),
+            "warm_set": sorted(warm),
+            "warm_ram_gb": round(sum(self._profiles[m].ram_gb for m in warm), 2),
+            "models": {
+                model: {
+                    "routes": sorted(p.routes),
+                    "resident": p.resident,
+                    "ram_gb": round(p.ram_gb, 2),
+                    "cold_load_s": round(p.cold_load_s, 2),
+                    "rate_per_min": round(self.rate_per_min(model), 2),
+                    "cold_starts": p.cold_starts,
+                    "warm_hits": p.warm_hits,
+                    "loads": p.loads,
+                    "unloads": p.unloads,
+                    "preloads": p.preloads,
+                }
+                for model, p in self._profiles.items()
+            },
+            "recent_events": self.events(20),
+        }
+
+
+# Global residency manager
+_residency_manager: Optional[ModelResidencyManager] = None
+
+
+def get_residency_manager() -> ModelResidencyManager:
+    """Get or create global residency manager"""
+    global _residency_manager
+    if _residency_manager is None:
+        _residency_manager = ModelResidencyManager()
+    return _residency_manager
@@ -9,6 +9,8 @@ class SlidingStats:
     def __init__(self):
         # route -> deque[(ts, latency_ms)]
         self.lat = defaultdict(lambda: deque())
+        # turn stage -> deque[(ts, duration_ms)] (from utils.tracing)
+        self.stages = defaultdict(lambda: deque())
         # errors -> deque[(ts, code_class)]
         self.codes = deque()  # store (ts, status_code)
 
@@ -35,6 +37,14 @@ class SlidingStats:
         while q and q[0][0] < cut:
             q.popleft()
 
+    def observe_stage(self, stage: str, ms: float):
+        now = time()
+        q = self.stages[stage]
+        q.append((now, ms))
+        cut = now - WINDOW_S
+        while q and q[0][0] < cut:
+            q.popleft()
+
     def observe_status(self, status_code: int):
         now = time()
         self.codes.append((now, status_code))
@@ -60,6 +70,15 @@ class SlidingStats:
                 "p50_ms": self._pxx(vs, 50) if vs else None,
                 "p95_ms": self._pxx(vs, 95) if vs else None,
             }
+        # turn stage breakdown
+        stages = {}
+        for name, q in self.stages.items():
+            vs = [ms for (_, ms) in q]
+            stages[name] = {
+                "count": len(vs),
+                "p50_ms": self._pxx(vs, 50) if vs else None,
+                "p95_ms": self._pxx(vs, 95) if vs else None,
+            }
         # error budget (rates)
         tot = len(self.codes)
         r429 = sum(1 for _, c in self.codes if c == 429)
@@ -67,6 +86,7 @@ class SlidingStats:
         return {
             "window_s": WINDOW_S,
             "routes": routes,
+            "stages": stages,
             "error_budget": {
                 "total": tot,
                 "r429": r429,
@@ -1,12 +1,11 @@
 """
 Prometheus Metrics Exporter
 Exports P50/P95 per route and error rates for monitoring
+(fed by InstrumentationMiddleware)
 """
 
-import time
-
 import structlog
-from fastapi import Request, Response
+from fastapi import Response
 from prometheus_client import (
     CONTENT_TYPE_LATEST,
     Counter,
@@ -14,7 +13,6 @@ from prometheus_client import (
     Histogram,
     generate_latest,
 )
-from starlette.middleware.base import BaseHTTPMiddleware
 
 logger = structlog.get_logger(__name__)
 
@@ -38,50 +36,18 @@ ERROR_RATE = Counter(
     ["method", "endpoint", "status_code", "route"],
 )
 
+TURN_STAGE_DURATION = Histogram(
+    "alice_turn_stage_duration_seconds",
+    "Chat turn stage duration in seconds (from turn spans)",
+    ["stage"],
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+)
+
 GUARDIAN_STATE = Gauge(
     "alice_guardian_state", "Current Guardian system state", ["state"]
 )
 
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    """Middleware for collecting Prometheus metrics"""
-
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-
-        # Process request
-        response = await call_next(request)
-
-        # Calculate duration
-        duration = time.time() - start_time
-
-        # Extract route from response headers
-        route = response.headers.get("X-Route", "unknown")
-
-        # Record metrics
-        REQUEST_COUNT.labels(
-            method=request.method,
-            endpoint=request.url.path,
-            status_code=response.status_code,
-            route=route,
-        ).inc()
-
-        REQUEST_DURATION.labels(
-            method=request.method, endpoint=request.url.path, route=route
-        ).observe(duration)
-
-        # Record errors (4xx and 5xx)
-        if response.status_code >= 400:
-            ERROR_RATE.labels(
-                method=request.method,
-                endpoint=request.url.path,
-                status_code=response.status_code,
-                route=route,
-            ).inc()
-
-        return response
-
-
 def update_guardian_state(state: str):
     """Update Guardian state metric"""
     # Reset all states to 0
@@ -1,111 +1,458 @@
 """
 Idempotency Middleware
-Implements idempotency key support with 60-second response caching
+Shared-store idempotency keys with in-progress locking and streaming-safe replay
+
+- Redis-backed (shared across workers), in-memory fallback for dev
+- First request with a key takes a lock; duplicates wait for its result
+  instead of executing again
+- Expiry is TTL-based in the store - no scans
+- Response bodies are teed while streaming and stored only up to a size limit
 """
 
+import asyncio
+import hashlib
+import heapq
+import json
+import os
 import time
-from typing import Any, Dict
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
 
 import structlog
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = structlog.get_logger(__name__)
 
-# In-memory cache (in production, use Redis)
-idempotency_cache: Dict[str, Dict[str, Any]] = {}
-CACHE_TTL = 60  # 60 seconds
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "60"))
+LOCK_TTL = int(os.getenv("IDEMPOTENCY_LOCK_TTL", "120"))  # Longest LLM turn
+WAIT_TIMEOUT_S = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT_S", "60"))
+MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", str(256 * 1024)))
+PRIMARY_RETRY_S = 30.0  # Back off from a failing shared store
+KEY_NS = "idem"
+
+# Replaying these would leak per-connection state
+_SKIP_HEADERS = {b"content-length", b"transfer-encoding", b"connection", b"date"}
+
+
+class IIdempotencyStore:
+    async def try_lock(self, key: str, token: str, ttl_s: int) -> bool:
+        raise NotImplementedError
+
+    async def unlock(self, key: str, token: str) -> None:
+        raise NotImplementedError
+
+    async def get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def is_locked(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def complete(
+        self, key: str, token: str, result: Dict[str, Any], ttl_s: int
+    ) -> None:
+        """Store the result and release the lock atomically"""
+        raise NotImplementedError
+
+
+class RedisIdempotencyStore(IIdempotencyStore):
+    # Delete the lock only if we still own it
+    _UNLOCK = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+    # SET result EX ttl + owner-checked unlock in one round-trip
+    _COMPLETE = """
+    redis.call('set', KEYS[2], ARGV[2], 'EX', ARGV[3])
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        redis.call('del', KEYS[1])
+    end
+    return 1
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.cli = redis.from_url(url, decode_responses=False)
+        self._unlock = self.cli.register_script(self._UNLOCK)
+        self._complete = self.cli.register_script(self._COMPLETE)
+
+    @staticmethod
+    def _lock_key(key: str) -> str:
+        return f"{KEY_NS}:lock:{key}"
+
+    @staticmethod
+    def _result_key(key: str) -> str:
+        return f"{KEY_NS}:resp:{key}"
+
+    async def try_lock(self, key: str, token: str, ttl_s: int) -> bool:
+        return bool(await self.cli.set(self._lock_key(key), token, nx=True, ex=ttl_s))
+
+    async def unlock(self, key: str, token: str) -> None:
+        await self._unlock(keys=[self._lock_key(key)], args=[token])
+
+    async def get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        data = await self.cli.get(self._result_key(key))
+        return _decode_result(data) if data else None
+
+    async def is_locked(self, key: str) -> bool:
+        return bool(await self.cli.exists(self._lock_key(key)))
+
+    async def complete(
+        self, key: str, token: str, result: Dict[str, Any], ttl_s: int
+    ) -> None:
+        await self._complete(
+            keys=[self._lock_key(key), self._result_key(key)],
+            args=[token, _encode_result(result), ttl_s],
+        )
+
+
+class InMemoryIdempotencyStore(IIdempotencyStore):
+    """Single-process fallback; expiry via a min-heap, never a full scan"""
+
+    def __init__(self):
+        self._locks: Dict[str, Tuple[str, float]] = {}
+        self._results: Dict[str, Tuple[bytes, float]] = {}
+        self._expiry: List[Tuple[float, str, str]] = []  # (expires_at, kind, key)
+
+    def _evict_expired(self) -> None:
+        now = time.time()
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, kind, key = heapq.heappop(self._expiry)
+            table = self._locks if kind == "lock" else self._results
+            entry = table.get(key)
+            if entry is not None and entry[1] <= now:
+                del table[key]
+
+    def _put(self, table: Dict, kind: str, key: str, value: Any, ttl_s: int) -> None:
+        expires_at = time.time() + ttl_s
+        table[key] = (value, expires_at)
+        heapq.heappush(self._expiry, (expires_at, kind, key))
+
+    async def try_lock(self, key: str, token: str, ttl_s: int) -> bool:
+        self._evict_expired()
+        if key in self._locks:
+            return False
+        self._put(self._locks, "lock", key, token, ttl_s)
+        return True
+
+    async def unlock(self, key: str, token: str) -> None:
+        entry = self._locks.get(key)
+        if entry is not None and entry[0] == token:
+            del self._locks[key]
+
+    async def get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        self._evict_expired()
+        entry = self._results.get(key)
+        return _decode_result(entry[0]) if entry else None
+
+    async def is_locked(self, key: str) -> bool:
+        self._evict_expired()
+        return key in self._locks
+
+    async def complete(
+        self, key: str, token: str, result: Dict[str, Any], ttl_s: int
+    ) -> None:
+        self._put(self._results, "result", key, _encode_result(result), ttl_s)
+        await self.unlock(key, token)
 
 
-class IdempotencyMiddleware(BaseHTTPMiddleware):
-    """Middleware for handling idempotency keys"""
+def _encode_result(result: Dict[str, Any]) -> bytes:
+    meta = {k: v for k, v in result.items() if k != "body"}
+    header = json.dumps(meta, separators=(",", ":")).encode()
+    return len(header).to_bytes(4, "big") + header + result.get("body", b"")
 
-    async def dispatch(self, request: Request, call_next):
+
+def _decode_result(data: bytes) -> Dict[str, Any]:
+    size = int.from_bytes(data[:4], "big")
+    result = json.loads(data[4 : 4 + size])
+    result["body"] = data[4 + size :]
+    return result
+
+
+def create_store() -> IIdempotencyStore:
+    """Redis (shared across workers); in-process store if the client can't be built"""
+    url = os.getenv("REDIS_URL", "redis://alice-cache:6379")
+    try:
+        return RedisIdempotencyStore(url)
+    except Exception as e:
+        logger.warning("Idempotency store falling back to memory", error=str(e))
+        return InMemoryIdempotencyStore()
+
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware for handling idempotency keys"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: Optional[IIdempotencyStore] = None,
+        ttl_s: int = IDEMPOTENCY_TTL,
+        lock_ttl_s: int = LOCK_TTL,
+        wait_timeout_s: float = WAIT_TIMEOUT_S,
+        max_body_bytes: int = MAX_BODY_BYTES,
+    ):
+        self.app = app
+        self.store = store or create_store()
+        self.ttl_s = ttl_s
+        self.lock_ttl_s = lock_ttl_s
+        self.wait_timeout_s = wait_timeout_s
+        self.max_body_bytes = max_body_bytes
+        self._fallback = InMemoryIdempotencyStore()
+        self._primary_retry_at = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         # Only apply to POST endpoints that support idempotency
-        if request.method != "POST" or not request.url.path.startswith("/api/"):
-            return await call_next(request)
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith("/api/")
+        ):
+            await self.app(scope, receive, send)
+            return
 
-        # Check for idempotency key
-        idempotency_key = request.headers.get("Idempotency-Key")
+        idempotency_key = _header(scope, b"idempotency-key")
         if not idempotency_key:
-            return await call_next(request)
-
-        # Create cache key from idempotency key + request path
-        cache_key = f"{idempotency_key}:{request.url.path}"
-
-        # Check if we have a cached response
-        if cache_key in idempotency_cache:
-            cached = idempotency_cache[cache_key]
-
-            # Check if cache is still valid
-            if time.time() - cached["timestamp"] < CACHE_TTL:
-                logger.info(
-                    "Returning cached response for idempotency key",
-                    idempotency_key=idempotency_key[:8] + "...",
-                    cache_age=time.time() - cached["timestamp"],
-                    status_code=cached["status_code"],
-                )
+            await self.app(scope, receive, send)
+            return
 
-                # Return cached response
-                response = Response(
-                    content=cached["content"],
-                    status_code=cached["status_code"],
-                    headers=cached["headers"],
-                )
-                return response
-            else:
-                # Remove expired cache entry
-                del idempotency_cache[cache_key]
-
-        # Process request normally
-        response = await call_next(request)
-
-        # Cache successful responses (2xx status codes)
-        if 200 <= response.status_code < 300:
-            # Read response content
-            response_body = b""
-            async for chunk in response.body_iterator:
-                response_body += chunk
-
-            # Create new response with the same content
-            new_response = Response(
-                content=response_body,
-                status_code=response.status_code,
-                headers=dict(response.headers),
+        # Buffer the (small) request body so we can fingerprint and replay it
+        body, receive = await _buffer_request(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        key = f"{scope['path']}:{idempotency_key}"
+        token = uuid.uuid4().hex
+
+        store = self._active_store()
+        try:
+            owner = await self._acquire_or_replay(
+                store, key, token, fingerprint, idempotency_key, send
+            )
+        except Exception as e:
+            # Shared store unavailable: keep deduplicating within this process
+            logger.warning(
+                "Idempotency store error, using local fallback", error=str(e)
+            )
+            self._primary_retry_at = time.monotonic() + PRIMARY_RETRY_S
+            store = self._fallback
+            owner = await self._acquire_or_replay(
+                store, key, token, fingerprint, idempotency_key, send
             )
 
-            # Cache the response
-            idempotency_cache[cache_key] = {
-                "content": response_body,
-                "status_code": response.status_code,
-                "headers": dict(response.headers),
-                "timestamp": time.time(),
-            }
+        if owner:
+            await self._execute(store, scope, receive, send, key, token, fingerprint)
+
+    def _active_store(self) -> IIdempotencyStore:
+        if time.monotonic() < self._primary_retry_at:
+            return self._fallback
+        return self.store
 
-            # Clean up old cache entries
-            self._cleanup_cache()
+    async def _acquire_or_replay(
+        self,
+        store: IIdempotencyStore,
+        key: str,
+        token: str,
+        fingerprint: str,
+        idempotency_key: str,
+        send: Send,
+    ) -> bool:
+        """Return True if this request owns the key and must execute"""
+        while True:
+            cached = await store.get_result(key)
+            if cached is not None:
+                await self._replay(cached, fingerprint, idempotency_key, send)
+                return False
+            if await store.try_lock(key, token, self.lock_ttl_s):
+                return True
+            # Another request with this key is in flight - wait for it
+            cached = await self._wait_for_result(store, key)
+            if cached is not None:
+                await self._replay(cached, fingerprint, idempotency_key, send)
+                return False
+            if await store.is_locked(key):
+                await _send_json(
+                    send,
+                    409,
+                    {"error": "Request with this Idempotency-Key still in progress"},
+                    retry_after=1,
+                )
+                return False
+            # Owner finished without a cacheable result; try to take over
 
+    async def _wait_for_result(
+        self, store: IIdempotencyStore, key: str
+    ) -> Optional[Dict[str, Any]]:
+        deadline = time.monotonic() + self.wait_timeout_s
+        delay = 0.025
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.25)
+            cached = await store.get_result(key)
+            if cached is not None:
+                return cached
+            if not await store.is_locked(key):
+                return None
+        return None
+
+    async def _execute(
+        self,
+        store: IIdempotencyStore,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        key: str,
+        token: str,
+        fingerprint: str,
+    ) -> None:
+        status = 0
+        headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        size = 0
+        truncated = False
+
+        async def tee_send(message: Message) -> None:
+            nonlocal status, headers, size, truncated
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body" and 200 <= status < 300:
+                chunk = message.get("body", b"")
+                if not truncated:
+                    size += len(chunk)
+                    if size > self.max_body_bytes:
+                        truncated = True
+                        chunks.clear()
+                    else:
+                        chunks.append(chunk)
+            # Streaming bodies pass through untouched
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tee_send)
+        except BaseException:
+            await self._safe_unlock(store, key, token)
+            raise
+
+        if not 200 <= status < 300:
+            # Errors are retryable: release so the next attempt re-executes
+            await self._safe_unlock(store, key, token)
+            return
+
+        result = {
+            "status": status,
+            "headers": [
+                [k.decode("latin-1"), v.decode("latin-1")]
+                for k, v in headers
+                if k.lower() not in _SKIP_HEADERS
+            ],
+            "fingerprint": fingerprint,
+            "truncated": truncated,
+            "stored_at": time.time(),
+            "body": b"" if truncated else b"".join(chunks),
+        }
+        try:
+            await store.complete(key, token, result, self.ttl_s)
             logger.info(
                 "Cached response for idempotency key",
-                idempotency_key=idempotency_key[:8] + "...",
-                status_code=response.status_code,
+                idempotency_key=key.rsplit(":", 1)[-1][:8] + "...",
+                status_code=status,
+                body_bytes=size,
+                truncated=truncated,
             )
+        except Exception as e:
+            logger.warning("Failed to store idempotent response", error=str(e))
+            await self._safe_unlock(store, key, token)
 
-            return new_response
+    async def _safe_unlock(
+        self, store: IIdempotencyStore, key: str, token: str
+    ) -> None:
+        try:
+            await store.unlock(key, token)
+        except Exception as e:
+            logger.warning("Failed to release idempotency lock", error=str(e))
 
-        return response
+    async def _replay(
+        self,
+        cached: Dict[str, Any],
+        fingerprint: str,
+        idempotency_key: str,
+        send: Send,
+    ) -> None:
+        if cached.get("fingerprint") != fingerprint:
+            await _send_json(
+                send, 422, {"error": "Idempotency-Key reused with a different payload"}
+            )
+            return
+        if cached.get("truncated"):
+            # Already executed, but too large to replay - never run it twice
+            await _send_json(
+                send,
+                409,
+                {"error": "Original response too large to replay for this key"},
+            )
+            return
 
-    def _cleanup_cache(self):
-        """Remove expired cache entries"""
-        current_time = time.time()
-        expired_keys = [
-            key
-            for key, value in idempotency_cache.items()
-            if current_time - value["timestamp"] >= CACHE_TTL
+        logger.info(
+            "Returning cached response for idempotency key",
+            idempotency_key=idempotency_key[:8] + "...",
+            cache_age=time.time() - cached.get("stored_at", time.time()),
+            status_code=cached["status"],
+        )
+        body = cached["body"]
+        headers = [
+            (k.encode("latin-1"), v.encode("latin-1")) for k, v in cached["headers"]
         ]
+        headers.append((b"content-length", str(len(body)).encode()))
+        headers.append((b"idempotent-replayed", b"true"))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": cached["status"],
+                "headers": headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for k, v in scope.get("headers", []):
+        if k.lower() == name:
+            return v.decode("latin-1")
+    return None
+
+
+async def _buffer_request(receive: Receive) -> Tuple[bytes, Receive]:
+    """Read the full request body and return a receive() that replays it"""
+    parts = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        parts.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    body = b"".join(parts)
+    replayed = False
+
+    async def replay_receive() -> Message:
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return body, replay_receive
 
-        for key in expired_keys:
-            del idempotency_cache[key]
 
-        if expired_keys:
-            logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
+async def _send_json(
+    send: Send, status: int, content: Dict[str, Any], retry_after: Optional[int] = None
+) -> None:
+    body = json.dumps(content).encode()
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+    ]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
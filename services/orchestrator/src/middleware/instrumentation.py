@@ -0,0 +1,159 @@
+"""
+Instrumentation Middleware
+One pure-ASGI layer for trace ids, request timing, metrics and access logs
+
+Replaces the former Logging/Metrics/Prometheus BaseHTTPMiddleware stack:
+- Trace id is assigned once and exposed as request.state.trace_id + X-Trace-ID
+- The request is timed once; METRICS, Prometheus and the access log all use
+  that single measurement
+- Response messages are forwarded as they come (only the start message gets
+  an extra header), so streaming bodies are never buffered or re-wrapped
+"""
+
+import uuid
+from time import perf_counter
+from typing import Optional
+
+import structlog
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..metrics import METRICS
+
+try:
+    from ..metrics.prometheus import ERROR_RATE, REQUEST_COUNT, REQUEST_DURATION
+except Exception:  # pragma: no cover - prometheus_client missing in dev
+    REQUEST_COUNT = REQUEST_DURATION = ERROR_RATE = None
+
+logger = structlog.get_logger(__name__)
+
+TRACE_HEADER = b"x-trace-id"
+ROUTE_HEADER = b"x-route"
+
+
+def _route_class(path: str, route_header: Optional[str]) -> str:
+    # route klass från svarshuvud satt av handlern, annars infer
+    if route_header:
+        return route_header
+    return "planner" if path.startswith("/api/orchestrator/ingest") else "other"
+
+
+def _endpoint(scope: Scope) -> str:
+    """Route template (bounded label cardinality), "unmatched" if unrouted"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI request instrumentation (trace id, timing, metrics, logs)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = str(uuid.uuid4())
+        # request.state läser scope["state"]
+        scope.setdefault("state", {})["trace_id"] = trace_id
+        trace_header = (TRACE_HEADER, trace_id.encode("latin-1"))
+
+        status_code = 500  # If the app raises before responding
+        route_header: Optional[str] = None
+        started = perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, route_header
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                for key, value in headers:
+                    if key == ROUTE_HEADER:
+                        route_header = value.decode("latin-1")
+                        break
+                headers.append(trace_header)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        error: Optional[BaseException] = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._record(
+                scope,
+                status_code,
+                route_header,
+                perf_counter() - started,
+                trace_id,
+                error,
+            )
+
+    @staticmethod
+    def _record(
+        scope: Scope,
+        status_code: int,
+        route_header: Optional[str],
+        duration_s: float,
+        trace_id: str,
+        error: Optional[BaseException],
+    ) -> None:
+        path = scope["path"]
+        method = scope["method"]
+        route = _route_class(path, route_header)
+        ms = duration_s * 1000.0
+
+        try:
+            METRICS.observe_latency(route, ms)
+            METRICS.observe_status(status_code)
+
+            if REQUEST_COUNT is not None:
+                endpoint = _endpoint(scope)
+                prom_route = route_header or "unknown"
+                REQUEST_COUNT.labels(
+                    method=method,
+                    endpoint=endpoint,
+                    status_code=status_code,
+                    route=prom_route,
+                ).inc()
+                REQUEST_DURATION.labels(
+                    method=method, endpoint=endpoint, route=prom_route
+                ).observe(duration_s)
+                if status_code >= 400:
+                    ERROR_RATE.labels(
+                        method=method,
+                        endpoint=endpoint,
+                        status_code=status_code,
+                        route=prom_route,
+                    ).inc()
+        except Exception as e:  # Metrics must never fail a request
+            logger.warning("Request metrics failed", error=str(e))
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        if error is not None:
+            logger.error(
+                "Request failed",
+                trace_id=trace_id,
+                method=method,
+                path=path,
+                error=str(error),
+                error_type=type(error).__name__,
+                response_time_ms=int(ms),
+                client_ip=client_ip,
+                exc_info=error,
+            )
+        else:
+            logger.info(
+                "Request completed",
+                trace_id=trace_id,
+                method=method,
+                path=path,
+                status_code=status_code,
+                route=route,
+                response_time_ms=int(ms),
+                client_ip=client_ip,
+            )
@@ -1,125 +1,201 @@
 """
-Structured Logging Middleware
+Structured Logging
 JSON formatted logs with trace IDs and request correlation
+
+Request logs and trace ids come from InstrumentationMiddleware.
+
+Hot-path cost is kept low by:
+- Per-event sampling of INFO/DEBUG events (warnings and errors are never
+  sampled), configured in DEFAULT_SAMPLE_RATES / LOG_SAMPLE_RATES
+- Lazy fields (Lazy(fn)) that are only computed for events that survive
+  level filtering and sampling
+- JSON rendering and output on a background thread: the request thread only
+  enqueues the event dict (QueueHandler -> QueueListener)
 """
 
+import atexit
 import logging
+import os
+import queue
+import random
 import sys
-import time
-import uuid
-from typing import Callable
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, Mapping, Optional
 
 import structlog
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from fastapi import Request
+
+# Events that fire on every request/turn; sampled unless overridden
+DEFAULT_SAMPLE_RATES: Dict[str, float] = {
+    "Request completed": 0.1,
+    "Route decision": 0.1,
+    "Orchestrator chat completed": 0.1,
+    # SmartCache lookups/stores, one or two per turn
+    "L1 cache HIT": 0.1,
+    "L2 semantic HIT": 0.1,
+    "Negative cache HIT": 0.1,
+    "Cache MISS": 0.1,
+    "Cache SET": 0.1,
+}
+
+_NEVER_SAMPLED = {"warning", "warn", "error", "exception", "critical", "fatal"}
+
+_listener: Optional[QueueListener] = None
+
+
+class Lazy:
+    """Log field computed only if the event is actually emitted"""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """'Route decision=0.05,Request completed=0' -> {event: rate}"""
+    rates: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, sep, value = part.rpartition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(value)))
+        except ValueError:
+            continue
+    return rates
+
+
+class EventSampler:
+    """
+    structlog processor that keeps a fraction of INFO/DEBUG events per
+    event name. Kept events carry sample_rate so volumes can be scaled back.
+    """
+
+    def __init__(
+        self,
+        rates: Optional[Mapping[str, float]] = None,
+        default_rate: float = 1.0,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.rates = dict(rates or {})
+        self.default_rate = default_rate
+        self.rng = rng
+        self.dropped = 0
+
+    def __call__(self, logger, method_name: str, event_dict: dict) -> dict:
+        if method_name in _NEVER_SAMPLED:
+            return event_dict
+        rate = self.rates.get(event_dict.get("event"), self.default_rate)
+        if rate >= 1.0:
+            return event_dict
+        if rate <= 0.0 or self.rng() >= rate:
+            self.dropped += 1
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+def resolve_lazy(logger, method_name: str, event_dict: dict) -> dict:
+    """Evaluate Lazy fields (on the calling thread, after sampling)"""
+    for key, value in event_dict.items():
+        if isinstance(value, Lazy):
+            try:
+                event_dict[key] = value.fn()
+            except Exception as e:
+                event_dict[key] = f"<lazy error: {e}>"
+    return event_dict
+
+
+def capture_exc_info(logger, method_name: str, event_dict: dict) -> dict:
+    """
+    Turn exc_info=True into the actual exception tuple while still on the
+    raising thread; the traceback is formatted later on the log thread.
+    """
+    exc_info = event_dict.get("exc_info")
+    if exc_info is True:
+        event_dict["exc_info"] = sys.exc_info()
+    elif isinstance(exc_info, BaseException):
+        event_dict["exc_info"] = (type(exc_info), exc_info, exc_info.__traceback__)
+    return event_dict
+
+
+class _EnqueueHandler(QueueHandler):
+    """QueueHandler that defers all formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 def setup_logging() -> None:
     """Configure structured logging for the application"""
+    global _listener
+
+    sampler = EventSampler(
+        {
+            **DEFAULT_SAMPLE_RATES,
+            **parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", "")),
+        },
+        default_rate=float(os.getenv("LOG_SAMPLE_DEFAULT", "1.0")),
+    )
 
-    # Configure structlog
+    # Request thread: filter, sample, stamp, enqueue
     structlog.configure(
         processors=[
             structlog.stdlib.filter_by_level,
+            sampler,
+            resolve_lazy,
             structlog.stdlib.add_logger_name,
             structlog.stdlib.add_log_level,
             structlog.stdlib.PositionalArgumentsFormatter(),
             structlog.processors.TimeStamper(fmt="ISO"),
             structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer(indent=None, sort_keys=True),
+            capture_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
         wrapper_class=structlog.stdlib.BoundLogger,
         logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
 
-    # Configure standard library logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=logging.INFO,
+    # Log thread: render JSON and write
+    formatter = structlog.stdlib.ProcessorFormatter(
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer(indent=None, sort_keys=True),
+        ],
+        # Records from plain stdlib loggers (uvicorn, httpx, ...)
+        foreign_pre_chain=[
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.processors.TimeStamper(fmt="ISO"),
+        ],
     )
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    _stop_listener()
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    if _listener is None:
+        atexit.register(_stop_listener)  # Flush queued records on exit
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_EnqueueHandler(log_queue))
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
 
     # Disable uvicorn access logs (we handle them ourselves)
     logging.getLogger("uvicorn.access").disabled = True
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for request/response logging with trace correlation"""
-
-    def __init__(self, app: ASGIApp):
-        super().__init__(app)
-        self.logger = structlog.get_logger(__name__)
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Process request with structured logging"""
-
-        # Generate trace ID for request correlation
-        trace_id = str(uuid.uuid4())
-        start_time = time.time()
-
-        # Add trace ID to request state
-        request.state.trace_id = trace_id
-
-        # Extract basic request info
-        client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "unknown")
-
-        # Log request start
-        self.logger.info(
-            "Request started",
-            trace_id=trace_id,
-            method=request.method,
-            url=str(request.url),
-            path=request.url.path,
-            client_ip=client_ip,
-            user_agent=user_agent,
-        )
-
-        try:
-            # Process request
-            response = await call_next(request)
-
-            # Calculate response time
-            response_time_ms = int((time.time() - start_time) * 1000)
-
-            # Add trace ID to response headers
-            response.headers["X-Trace-ID"] = trace_id
-
-            # Log successful response
-            self.logger.info(
-                "Request completed",
-                trace_id=trace_id,
-                method=request.method,
-                path=request.url.path,
-                status_code=response.status_code,
-                response_time_ms=response_time_ms,
-                client_ip=client_ip,
-            )
-
-            return response
-
-        except Exception as e:
-            # Calculate response time for error case
-            response_time_ms = int((time.time() - start_time) * 1000)
-
-            # Log error
-            self.logger.error(
-                "Request failed",
-                trace_id=trace_id,
-                method=request.method,
-                path=request.url.path,
-                error=str(e),
-                error_type=type(e).__name__,
-                response_time_ms=response_time_ms,
-                client_ip=client_ip,
-                exc_info=True,
-            )
-
-            raise
+def _stop_listener() -> None:
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
 
 
 def get_trace_id(request: Request) -> str:
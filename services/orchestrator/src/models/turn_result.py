@@ -0,0 +1,192 @@
+"""
+Turn Result
+Typed, slotted outcome of a chat turn, assembled once after generation
+
+The LLM result fields (schema_ok, fallback, tokens, ...) are read from the
+driver response once and encoded once. The encoded bytes are spliced into
+both documents that carry them:
+- the HTTP response body (ChatResponse layout, metadata)
+- the telemetry turn event (rag, output_text)
+Encoding uses orjson when available, json otherwise.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional
+
+from fastapi import Response
+
+from .api import API_VERSION, ModelType
+
+try:
+    import orjson
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str)
+
+except ImportError:  # pragma: no cover - orjson missing in dev
+    orjson = None
+
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(
+            obj, ensure_ascii=False, separators=(",", ":"), default=str
+        ).encode("utf-8")
+
+
+def splice_json(base: Mapping[str, Any], fragments: Mapping[str, bytes]) -> bytes:
+    """Encode base and append already-encoded values as extra keys"""
+    parts = [dumps(dict(base))[:-1]]
+    sep = b"," if base else b""
+    for key, encoded in fragments.items():
+        parts.append(sep + dumps(key) + b":" + encoded)
+        sep = b","
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+@dataclass(slots=True)
+class TurnResult:
+    """What a turn produced; the single source for response and telemetry"""
+
+    route: str
+    llm_model: str
+    text: str
+    generated: bool = True  # False: no LLM response, text is a placeholder
+    planner_schema_ok: bool = False
+    repair_used: bool = False
+    circuit_open: bool = False
+    fallback_used: bool = False
+    fallback_reason: Optional[str] = None
+    blocked_by_guardian: bool = False
+    tokens_used: int = 0
+    fast_path: Optional[str] = None
+    planner_execution: Optional[Dict[str, Any]] = None
+    nlu: Optional[Dict[str, Any]] = None
+    shadow: Dict[str, Any] = field(default_factory=lambda: {"enabled": False})
+    requested_route: Optional[str] = None  # Before fallback; reported as model_used
+    _core: Optional[bytes] = field(default=None, init=False, repr=False)
+    _text: Optional[bytes] = field(default=None, init=False, repr=False)
+
+    @classmethod
+    def from_llm(
+        cls,
+        route: str,
+        llm_model: str,
+        llm_response: Optional[Dict[str, Any]],
+        *,
+        requested_route: str,
+        fallback_used: bool = False,
+        blocked_by_guardian: bool = False,
+        **extra: Any,
+    ) -> "TurnResult":
+        """Read the driver response once"""
+        if not llm_response:
+            return cls(
+                route=route,
+                llm_model=llm_model,
+                text=f"LLM response not available for route {requested_route}",
+                generated=False,
+                requested_route=requested_route,
+                fallback_used=fallback_used,
+                blocked_by_guardian=blocked_by_guardian,
+                **extra,
+            )
+        get = llm_response.get
+        return cls(
+            route=route,
+            llm_model=llm_model,
+            text=llm_response["text"],
+            requested_route=requested_route,
+            planner_schema_ok=get(
+                "schema_ok", (get("meta") or {}).get("schema_ok", False)
+            ),
+            repair_used=get("repair_used", False),
+            circuit_open=get("circuit_open", False),
+            fallback_used=get("fallback_used", False),
+            fallback_reason=get("fallback_reason"),
+            blocked_by_guardian=blocked_by_guardian,
+            tokens_used=get("tokens_used", 0),
+            **extra,
+        )
+
+    def core_json(self) -> bytes:
+        """Fields shared by metadata and rag, encoded once (object body only)"""
+        if self._core is None:
+            core = {
+                "llm_model": self.llm_model,
+                "planner_schema_ok": self.planner_schema_ok,
+                "repair_used": self.repair_used,
+                "circuit_open": self.circuit_open,
+                "fallback_used": self.fallback_used,
+                "fallback_reason": self.fallback_reason,
+                "blocked_by_guardian": self.blocked_by_guardian,
+                "tokens_used": self.tokens_used,
+            }
+            if self.fast_path:
+                core["fast_path"] = self.fast_path
+            self._core = dumps(core)[1:-1]
+        return self._core
+
+    def text_json(self) -> bytes:
+        if self._text is None:
+            self._text = dumps(self.text)
+        return self._text
+
+    def output_text_json(self) -> bytes:
+        return self.text_json() if self.generated else b'""'
+
+    def metadata_json(self) -> bytes:
+        return b"".join(
+            (
+                b'{"route":',
+                dumps(self.route),
+                b",",
+                self.core_json(),
+                b',"planner_execution":',
+                dumps(self.planner_execution),
+                b',"nlu":',
+                dumps(self.nlu),
+                b',"shadow":',
+                dumps(self.shadow),
+                b"}",
+            )
+        )
+
+    def rag_json(self) -> bytes:
+        return b'{"top_k":0,"hits":0,' + self.core_json() + b"}"
+
+    def model_used(self) -> str:
+        """ModelType value: the requested route (route may be e.g. 'fallback')"""
+        route = self.requested_route or self.route
+        try:
+            return ModelType(route).value
+        except ValueError:
+            return ModelType.AUTO.value
+
+    def response_body(
+        self, session_id: str, timestamp: int, trace_id: str, latency_ms: int
+    ) -> bytes:
+        """ChatResponse JSON (same field order as the pydantic model)"""
+        return splice_json(
+            {
+                "v": API_VERSION,
+                "session_id": session_id,
+                "timestamp": timestamp,
+                "trace_id": trace_id,
+            },
+            {
+                "response": self.text_json(),
+                "model_used": dumps(self.model_used()),
+                "latency_ms": dumps(latency_ms),
+                "metadata": self.metadata_json(),
+            },
+        )
+
+
+def json_response(body: bytes, headers: Mapping[str, str]) -> Response:
+    """Pre-encoded JSON response carrying headers set on the injected Response"""
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={k: v for k, v in headers.items() if k.lower() != "content-length"},
+    )
@@ -10,6 +10,7 @@ from pydantic import ValidationError
 
 from ..tools.mcp_registry import get_mcp_registry
 from ..utils.tool_errors import record_tool_call
+from ..utils.tracing import span
 from .schema import Plan, ToolStep
 
 logger = structlog.get_logger(__name__)
@@ -84,6 +85,14 @@ class PlannerExecutor:
         return results
 
     def _execute_step(self, step: ToolStep, step_index: int) -> Dict[str, Any]:
+        """Execute a single step as a "tool" span of the current turn"""
+        with span("tool", tool=step.tool, step_index=step_index) as s:
+            result = self._run_step(step, step_index)
+            if s is not None:
+                s.set(success=result["success"], klass=result.get("klass"))
+            return result
+
+    def _run_step(self, step: ToolStep, step_index: int) -> Dict[str, Any]:
         """Execute a single step with fallback and timeout protection"""
         start_time = time.perf_counter()
 
@@ -0,0 +1,255 @@
+"""
+Compiled LinUCB routing policy for Alice orchestrator runtime.
+
+Turns a routing policy pack (JSON lists) into dense NumPy arrays once, so a
+routing decision is a single feature build, one matvec for the means and one
+batched quadratic form for the confidence widths across all arms.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import structlog
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = structlog.get_logger(__name__)
+
+# Categorical values seen at runtime are low-cardinality (intent, lang, state);
+# cap the slot memo so unexpected free-text values cannot grow it unbounded.
+MAX_CACHED_SLOTS = 4096
+
+
+class CompiledRoutingPolicy:
+    """
+    Immutable, array-backed LinUCB routing policy.
+
+    Built once per policy pack (by RLPolicyLoader or RLRoutingPolicy) and
+    shared read-only between requests.
+    """
+
+    __slots__ = (
+        "arms",
+        "alpha",
+        "algorithm",
+        "version",
+        "weights",
+        "a_inv",
+        "feature_dim",
+        "hash_dim",
+        "categorical_keys",
+        "numeric_keys",
+        "means",
+        "stds",
+        "_slots",
+    )
+
+    def __init__(
+        self,
+        arms: List[str],
+        weights: "np.ndarray",
+        a_inv: "np.ndarray",
+        alpha: float,
+        hash_dim: int,
+        categorical_keys: List[str],
+        numeric_keys: List[str],
+        means: "np.ndarray",
+        stds: "np.ndarray",
+        algorithm: str = "linucb",
+        version: str = "unknown",
+    ):
+        """
+        Args:
+            arms: Arm names, row order of weights/a_inv
+            weights: Stacked arm weights (n_arms, d)
+            a_inv: Stacked inverse design matrices (n_arms, d, d)
+            alpha: UCB exploration parameter
+            hash_dim: Width of the hashed categorical block
+            categorical_keys: Keys hashed into the categorical block
+            numeric_keys: Keys z-scored after the categorical block
+            means: Per numeric key mean (n_numeric,)
+            stds: Per numeric key std (n_numeric,)
+        """
+        feature_dim = hash_dim + len(numeric_keys)
+        if weights.shape != (len(arms), feature_dim):
+            raise ValueError(
+                f"Weight shape {weights.shape} does not match "
+                f"{len(arms)} arms x {feature_dim} features"
+            )
+        if a_inv.shape != (len(arms), feature_dim, feature_dim):
+            raise ValueError(f"A_inv shape {a_inv.shape} does not match weights")
+
+        self.arms = list(arms)
+        self.weights = weights
+        self.a_inv = a_inv
+        self.alpha = float(alpha)
+        self.algorithm = algorithm
+        self.version = version
+        self.feature_dim = feature_dim
+        self.hash_dim = hash_dim
+        self.categorical_keys = list(categorical_keys)
+        self.numeric_keys = list(numeric_keys)
+        self.means = means
+        self.stds = stds
+        self._slots: Dict[Tuple[str, str], Tuple[int, float]] = {}
+
+        # Arrays are shared between threads; make accidental writes fail loudly
+        for arr in (self.weights, self.a_inv, self.means, self.stds):
+            arr.setflags(write=False)
+
+    @classmethod
+    def from_policy_data(cls, policy_data: Dict[str, Any]) -> "CompiledRoutingPolicy":
+        """
+        Compile a routing policy pack.
+
+        Accepts both the runtime pack layout (``models: {arm: {w, A_inv}}``)
+        and the trainer's ``LinUCBRouting.to_dict()`` layout
+        (``weights: {arm: w}``, ``A_inv: {arm: A_inv}``).
+
+        Raises:
+            ValueError: If the pack is incomplete or shapes are inconsistent
+        """
+        if np is None:
+            raise ValueError("numpy not available")
+
+        routing = policy_data.get("routing_policy")
+        feature_maker = policy_data.get("feature_maker")
+        if not routing or not feature_maker:
+            raise ValueError("Policy data needs routing_policy and feature_maker")
+
+        models = routing.get("models")
+        if models is None:
+            models = {
+                arm: {"w": w, "A_inv": routing.get("A_inv", {}).get(arm)}
+                for arm, w in routing.get("weights", {}).items()
+            }
+
+        arms = [
+            arm
+            for arm in routing.get("arms", list(models))
+            if arm in models and models[arm].get("A_inv") is not None
+        ]
+        if not arms:
+            raise ValueError("Routing policy has no usable arms")
+
+        weights = np.asarray([models[arm]["w"] for arm in arms], dtype=np.float64)
+        a_inv = np.asarray([models[arm]["A_inv"] for arm in arms], dtype=np.float64)
+
+        numeric_keys = list(feature_maker.get("numeric_keys", []))
+        means_map = feature_maker.get("means", {})
+        stds_map = feature_maker.get("stds", {})
+        means = np.asarray(
+            [float(means_map.get(k, 0.0)) for k in numeric_keys], dtype=np.float64
+        )
+        stds = np.asarray(
+            [float(stds_map.get(k, 1.0)) or 1.0 for k in numeric_keys],
+            dtype=np.float64,
+        )
+
+        return cls(
+            arms=arms,
+            weights=weights,
+            a_inv=a_inv,
+            alpha=routing.get("alpha", 0.5),
+            hash_dim=int(feature_maker.get("dim", 64)),
+            categorical_keys=list(feature_maker.get("categorical_keys", [])),
+            numeric_keys=numeric_keys,
+            means=means,
+            stds=stds,
+            algorithm=routing.get("algorithm", "linucb"),
+            version=routing.get("version", "unknown"),
+        )
+
+    # --- Features -----------------------------------------------------------
+
+    def _slot(self, key: str, val: str) -> Tuple[int, float]:
+        """Hash slot and sign for a categorical value (memoized)"""
+        slot = self._slots.get((key, val))
+        if slot is None:
+            hash_val = int(hashlib.md5(f"{key}={val}".encode()).hexdigest()[:8], 16)
+            slot = (hash_val % self.hash_dim, 1.0 if hash_val % 2 == 0 else -1.0)
+            if len(self._slots) < MAX_CACHED_SLOTS:
+                self._slots[(key, val)] = slot
+        return slot
+
+    def _fill(self, out: "np.ndarray", episode: Dict[str, Any]) -> None:
+        for key in self.categorical_keys:
+            val = str(episode.get(key, "")).lower()
+            if val and val != "unknown":
+                idx, sign = self._slot(key, val)
+                out[idx] += sign
+
+        if self.numeric_keys:
+            raw = np.fromiter(
+                (float(episode.get(k, 0.0) or 0.0) for k in self.numeric_keys),
+                dtype=np.float64,
+                count=len(self.numeric_keys),
+            )
+            np.clip(
+                (raw - self.means) / self.stds, -10.0, 10.0, out=out[self.hash_dim :]
+            )
+
+    def featurize(self, episode: Dict[str, Any]) -> "np.ndarray":
+        """Feature vector (d,) for one episode-like dict"""
+        x = np.zeros(self.feature_dim, dtype=np.float64)
+        self._fill(x, episode)
+        return x
+
+    def featurize_batch(self, episodes: Sequence[Dict[str, Any]]) -> "np.ndarray":
+        """Feature matrix (n, d) for many episode-like dicts"""
+        X = np.zeros((len(episodes), self.feature_dim), dtype=np.float64)
+        for row, episode in zip(X, episodes):
+            self._fill(row, episode)
+        return X
+
+    # --- Scoring ------------------------------------------------------------
+
+    def score(self, x: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Score all arms for one context.
+
+        Returns:
+            (means, ucb_widths), each shaped (n_arms,)
+        """
+        means = self.weights @ x
+        quad = np.einsum("kde,e->kd", self.a_inv, x) @ x
+        return means, self.alpha * np.sqrt(np.maximum(quad, 0.0))
+
+    def score_batch(self, X: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Score all arms for many contexts.
+
+        Returns:
+            (means, ucb_widths), each shaped (n, n_arms)
+        """
+        means = X @ self.weights.T
+        quad = np.einsum("nd,kde,ne->nk", X, self.a_inv, X, optimize=True)
+        return means, self.alpha * np.sqrt(np.maximum(quad, 0.0))
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "algorithm": self.algorithm,
+            "version": self.version,
+            "arms": self.arms,
+            "feature_dim": self.feature_dim,
+            "alpha": self.alpha,
+            "cached_slots": len(self._slots),
+        }
+
+
+def compile_routing_policy(
+    policy_data: Optional[Dict[str, Any]],
+) -> Optional[CompiledRoutingPolicy]:
+    """Compile a routing policy pack, or None if it is missing/unusable"""
+    if not policy_data or np is None:
+        return None
+    try:
+        return CompiledRoutingPolicy.from_policy_data(policy_data)
+    except (ValueError, TypeError, KeyError) as e:
+        logger.warning("Failed to compile routing policy", error=str(e))
+        return None
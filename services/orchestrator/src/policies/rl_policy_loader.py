@@ -15,6 +15,8 @@ from typing import Any, Callable, Dict, Optional
 
 import structlog
 
+from .compiled_routing import CompiledRoutingPolicy, compile_routing_policy
+
 logger = structlog.get_logger(__name__)
 
 
@@ -52,6 +54,9 @@ class RLPolicyLoader:
         self._tool_policy: Optional[Dict[str, Any]] = None
         self._cache_policy: Optional[Dict[str, Any]] = None
 
+        # Routing policy compiled to arrays once per load, shared by requests
+        self._compiled_routing: Optional[CompiledRoutingPolicy] = None
+
         # File modification times for change detection
         self._file_mtimes: Dict[str, float] = {}
 
@@ -131,10 +136,13 @@ class RLPolicyLoader:
 
             if "routing" in package.get("policies", {}):
                 self._routing_policy = package["policies"]["routing"]
+                self._compiled_routing = compile_routing_policy(self._routing_policy)
                 self._file_mtimes["routing"] = mtime
 
                 logger.info(
-                    "Loaded routing policy", version=package.get("version", "unknown")
+                    "Loaded routing policy",
+                    version=package.get("version", "unknown"),
+                    compiled=self._compiled_routing is not None,
                 )
 
                 # Notify callbacks
@@ -230,6 +238,14 @@ class RLPolicyLoader:
         with self._lock:
             return self._routing_policy.copy() if self._routing_policy else None
 
+    def get_compiled_routing_policy(self) -> Optional[CompiledRoutingPolicy]:
+        """Get current routing policy in compiled (array) form.
+
+        The compiled policy is immutable, so it is shared rather than copied.
+        """
+        with self._lock:
+            return self._compiled_routing
+
     def get_tool_policy(self) -> Optional[Dict[str, Any]]:
         """Get current tool policy."""
         with self._lock:
@@ -290,6 +306,7 @@ class RLPolicyLoader:
                     "tools": self._tool_policy is not None,
                     "cache": self._cache_policy is not None,
                 },
+                "routing_compiled": self._compiled_routing is not None,
                 "last_check": datetime.now().isoformat(),
                 "file_modification_times": self._file_mtimes.copy(),
                 "callbacks_registered": len(self._change_callbacks),
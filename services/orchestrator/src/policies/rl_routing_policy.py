@@ -7,7 +7,7 @@ for intelligent route selection with fallback.
 
 from __future__ import annotations
 
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import structlog
 
@@ -17,6 +17,7 @@ except ImportError:
     np = None
 
 from ..router.policy import RouteDecision
+from .compiled_routing import CompiledRoutingPolicy, compile_routing_policy
 
 logger = structlog.get_logger(__name__)
 
@@ -35,6 +36,7 @@ class RLRoutingPolicy:
         fallback_policy: Optional[object] = None,
         enable_exploration: bool = True,
         exploration_rate: float = 0.1,
+        compiled: Optional[CompiledRoutingPolicy] = None,
     ):
         """
         Initialize RL routing policy.
@@ -44,6 +46,7 @@ class RLRoutingPolicy:
             fallback_policy: Fallback to rule-based policy
             enable_exploration: Whether to use exploration in routing
             exploration_rate: Epsilon for epsilon-greedy exploration
+            compiled: Precompiled form of rl_policy_data, if already built
         """
         self.fallback_policy = fallback_policy
         self.enable_exploration = enable_exploration
@@ -52,11 +55,13 @@ class RLRoutingPolicy:
         # RL model components
         self.rl_model: Optional[Dict[str, Any]] = None
         self.feature_maker: Optional[Dict[str, Any]] = None
+        self.compiled: Optional[CompiledRoutingPolicy] = None
         self.arms = ["micro", "planner", "deep"]
+        self._rng = np.random.default_rng() if np else None
 
         # Load RL policy if provided
         if rl_policy_data:
-            self.load_rl_policy(rl_policy_data)
+            self.load_rl_policy(rl_policy_data, compiled=compiled)
 
         logger.info(
             "RL routing policy initialized",
@@ -65,26 +70,62 @@ class RLRoutingPolicy:
             exploration_enabled=enable_exploration,
         )
 
-    def load_rl_policy(self, policy_data: Dict[str, Any]) -> bool:
+    @classmethod
+    def from_loader(cls, loader, **kwargs: Any) -> "RLRoutingPolicy":
+        """
+        Build a policy that shares RLPolicyLoader's compiled routing policy.
+
+        The loader compiles each pack once; the policy reuses that instance at
+        construction and on every hot reload instead of compiling its own.
+        """
+        policy = cls(
+            loader.get_routing_policy(),
+            compiled=loader.get_compiled_routing_policy(),
+            **kwargs,
+        )
+
+        def _on_change(kind: str, policy_data: Dict[str, Any]) -> None:
+            if kind == "routing":
+                policy.update_policy(
+                    policy_data, compiled=loader.get_compiled_routing_policy()
+                )
+
+        loader.add_change_callback(_on_change)
+        return policy
+
+    def load_rl_policy(
+        self,
+        policy_data: Dict[str, Any],
+        compiled: Optional[CompiledRoutingPolicy] = None,
+    ) -> bool:
         """
         Load RL policy from data.
 
         Args:
             policy_data: Policy data dict
+            compiled: Already compiled policy (e.g. shared by RLPolicyLoader);
+                compiled here when not given
 
         Returns:
             True if loaded successfully
         """
         try:
             if "routing_policy" in policy_data:
+                if compiled is None:
+                    compiled = compile_routing_policy(policy_data)
+                if compiled is None:
+                    logger.warning("Routing policy could not be compiled")
+                    return False
+
                 self.rl_model = policy_data["routing_policy"]
                 self.feature_maker = policy_data.get("feature_maker")
+                self.compiled = compiled
 
                 logger.info(
                     "RL routing policy loaded",
                     algorithm=self.rl_model.get("algorithm"),
-                    arms=self.rl_model.get("arms"),
-                    feature_dim=self.rl_model.get("feature_dim"),
+                    arms=compiled.arms,
+                    feature_dim=compiled.feature_dim,
                 )
 
                 return True
@@ -96,6 +137,21 @@ class RLRoutingPolicy:
             logger.error("Failed to load RL policy", error=str(e))
             return False
 
+    @staticmethod
+    def _episode(text: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Episode-like dict as seen at decision time"""
+        return {
+            "intent": context.get("intent", "unknown"),
+            "lang": context.get("lang", "sv"),
+            "text_len": len(text),
+            "word_count": len(text.split()) if text else 0,
+            "intent_confidence": context.get("intent_confidence", 0.0),
+            "latency_ms": 0.0,  # Not available at decision time
+            "cost_usd": 0.0,  # Not available at decision time
+            "guardian_state": context.get("guardian_state", "NORMAL"),
+            "timestamp": context.get("timestamp"),
+        }
+
     def _make_features(
         self, text: str, context: Dict[str, Any]
     ) -> Optional[np.ndarray]:
@@ -107,87 +163,61 @@ class RLRoutingPolicy:
             context: Additional context information
 
         Returns:
-            Feature vector or None if feature maker not available
+            Feature vector or None if no compiled policy is loaded
         """
-        if not self.feature_maker or not np:
+        if self.compiled is None:
             return None
 
         try:
-            # Create episode-like dict for feature extraction
-            episode = {
-                "intent": context.get("intent", "unknown"),
-                "lang": context.get("lang", "sv"),
-                "text_len": len(text),
-                "word_count": len(text.split()) if text else 0,
-                "intent_confidence": context.get("intent_confidence", 0.0),
-                "latency_ms": 0.0,  # Not available at decision time
-                "cost_usd": 0.0,  # Not available at decision time
-                "guardian_state": context.get("guardian_state", "NORMAL"),
-                "timestamp": context.get("timestamp"),
-            }
-
-            # Transform using feature maker (simplified version)
-            features = self._transform_features(episode)
-            return np.array(features) if features else None
-
+            return self.compiled.featurize(self._episode(text, context))
         except Exception as e:
             logger.error("Feature creation failed", error=str(e))
             return None
 
-    def _transform_features(self, episode: Dict[str, Any]) -> Optional[list[float]]:
+    def _select(
+        self, means: np.ndarray, widths: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
-        Transform episode to features (simplified FeatureMaker implementation).
-
-        Args:
-            episode: Episode dict
+        Final per-arm scores and best arm index for (n, n_arms) score arrays.
 
-        Returns:
-            Feature list or None
+        Exploration replaces an arm's score with a uniform draw with
+        probability exploration_rate, independently per arm.
         """
-        if not self.feature_maker:
-            return None
-
-        try:
-            # Get feature configuration
-            dim = self.feature_maker.get("dim", 64)
-            numeric_keys = self.feature_maker.get("numeric_keys", [])
-            categorical_keys = self.feature_maker.get("categorical_keys", [])
-            means = self.feature_maker.get("means", {})
-            stds = self.feature_maker.get("stds", {})
-
-            # Create feature vector
-            total_dim = dim + len(numeric_keys)
-            features = [0.0] * total_dim
-
-            # Categorical features (hashing trick - simplified)
-            import hashlib
-
-            for key in categorical_keys:
-                val = str(episode.get(key, "")).lower()
-                if val and val != "unknown":
-                    # Simple hash to feature index
-                    hash_val = int(
-                        hashlib.md5(f"{key}={val}".encode()).hexdigest()[:8], 16
-                    )
-                    idx = hash_val % dim
-                    features[idx] += 1.0 if (hash_val % 2 == 0) else -1.0
-
-            # Numeric features (z-score normalization)
-            for i, key in enumerate(numeric_keys):
-                val = float(episode.get(key, 0.0) or 0.0)
-                mean = means.get(key, 0.0)
-                std = stds.get(key, 1.0)
-
-                normalized = (val - mean) / std
-                normalized = max(-10.0, min(10.0, normalized))  # Clip
-
-                features[dim + i] = normalized
-
-            return features
-
-        except Exception as e:
-            logger.error("Feature transformation failed", error=str(e))
-            return None
+        if not self.enable_exploration:
+            scores = means
+        else:
+            scores = means + widths
+            explore = self._rng.random(scores.shape) < self.exploration_rate
+            if explore.any():
+                scores = np.where(explore, self._rng.random(scores.shape), scores)
+
+        best = np.argmax(scores, axis=-1)
+        if scores.shape[-1] >= 2:
+            top2 = -np.partition(-scores, 1, axis=-1)[..., :2]
+            confidence = np.clip(top2[..., 0] - top2[..., 1], 0.1, 1.0)
+        else:
+            confidence = np.full(best.shape, 0.5)
+        return scores, best, confidence
+
+    def _debug_info(
+        self, means, widths, scores, best: int, confidence: float
+    ) -> Dict[str, Any]:
+        arms = self.compiled.arms
+        return {
+            "algorithm": "linucb_rl",
+            "exploration_enabled": self.enable_exploration,
+            "exploration_rate": self.exploration_rate,
+            "arm_scores": {
+                arm: {
+                    "mean": float(means[i]),
+                    "ucb": float(widths[i]),
+                    "score": float(scores[i]),
+                }
+                for i, arm in enumerate(arms)
+            },
+            "selected_arm": arms[best],
+            "confidence": confidence,
+        }
 
     def _rl_predict(self, features: np.ndarray) -> Tuple[str, float, Dict[str, Any]]:
         """
@@ -199,77 +229,44 @@ class RLRoutingPolicy:
         Returns:
             (selected_route, confidence, debug_info)
         """
-        if not self.rl_model or not np:
+        if self.compiled is None:
             raise ValueError("RL model not available")
 
         try:
-            alpha = self.rl_model.get("alpha", 0.5)
-            arms = self.rl_model.get("arms", self.arms)
-            models = self.rl_model.get("models", {})
-
-            best_arm = arms[0]
-            best_score = -float("inf")
-            arm_scores = {}
-
-            for arm in arms:
-                if arm not in models:
-                    continue
-
-                model_data = models[arm]
-                w = np.array(model_data["w"])
-                A_inv = np.array(model_data["A_inv"])
-
-                # Mean prediction
-                mean_pred = float(features @ w)
-
-                # UCB: confidence bound
-                ucb = alpha * float(np.sqrt(features.T @ A_inv @ features))
-
-                # Final score (exploration vs exploitation)
-                if self.enable_exploration:
-                    import random
-
-                    if random.random() < self.exploration_rate:
-                        # Random exploration
-                        score = random.random()
-                    else:
-                        # UCB exploitation
-                        score = mean_pred + ucb
-                else:
-                    # Pure exploitation (greedy)
-                    score = mean_pred
-
-                arm_scores[arm] = {"mean": mean_pred, "ucb": ucb, "score": score}
-
-                if score > best_score:
-                    best_score = score
-                    best_arm = arm
-
-            # Calculate confidence based on score separation
-            sorted_scores = sorted(
-                arm_scores.values(), key=lambda x: x["score"], reverse=True
-            )
-            if len(sorted_scores) >= 2:
-                score_gap = sorted_scores[0]["score"] - sorted_scores[1]["score"]
-                confidence = min(1.0, max(0.1, score_gap))
-            else:
-                confidence = 0.5
-
-            debug_info = {
-                "algorithm": "linucb_rl",
-                "exploration_enabled": self.enable_exploration,
-                "exploration_rate": self.exploration_rate,
-                "arm_scores": arm_scores,
-                "selected_arm": best_arm,
-                "confidence": confidence,
-            }
+            means, widths = self.compiled.score(features)
+            scores, best, confidence = self._select(means, widths)
+            best = int(best)
+            confidence = float(confidence)
 
-            return best_arm, confidence, debug_info
+            debug_info = self._debug_info(means, widths, scores, best, confidence)
+            return self.compiled.arms[best], confidence, debug_info
 
         except Exception as e:
             logger.error("RL prediction failed", error=str(e))
             raise
 
+    def _rl_predict_batch(
+        self, features: np.ndarray
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Batched _rl_predict for a (n, d) feature matrix"""
+        if self.compiled is None:
+            raise ValueError("RL model not available")
+
+        means, widths = self.compiled.score_batch(features)
+        scores, best, confidence = self._select(means, widths)
+
+        results = []
+        for i in range(features.shape[0]):
+            b, c = int(best[i]), float(confidence[i])
+            results.append(
+                (
+                    self.compiled.arms[b],
+                    c,
+                    self._debug_info(means[i], widths[i], scores[i], b, c),
+                )
+            )
+        return results
+
     def decide_route(
         self, text: str, context: Optional[Dict[str, Any]] = None
     ) -> RouteDecision:
@@ -287,7 +284,7 @@ class RLRoutingPolicy:
             context = {}
 
         # Try RL policy first
-        if self.rl_model and np:
+        if self.compiled is not None:
             try:
                 features = self._make_features(text, context)
 
@@ -311,6 +308,44 @@ class RLRoutingPolicy:
             except Exception as e:
                 logger.warning("RL routing failed, using fallback", error=str(e))
 
+        return self._fallback_decision(text)
+
+    def decide_routes_batch(
+        self,
+        texts: Sequence[str],
+        contexts: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> List[RouteDecision]:
+        """
+        Decide routes for many requests with one batched scoring pass.
+
+        Used for offline replay and shadow evaluation; falls back per
+        request exactly like decide_route.
+        """
+        contexts = contexts or [None] * len(texts)
+        if self.compiled is not None and texts:
+            try:
+                episodes = [
+                    self._episode(text, context or {})
+                    for text, context in zip(texts, contexts)
+                ]
+                features = self.compiled.featurize_batch(episodes)
+                return [
+                    RouteDecision(
+                        route=route,
+                        confidence=confidence,
+                        reason=f"RL LinUCB (conf: {confidence:.2f})",
+                        features=debug_info,
+                    )
+                    for route, confidence, debug_info in self._rl_predict_batch(
+                        features
+                    )
+                ]
+            except Exception as e:
+                logger.warning("Batch RL routing failed, using fallback", error=str(e))
+
+        return [self._fallback_decision(text) for text in texts]
+
+    def _fallback_decision(self, text: str) -> RouteDecision:
         # Fallback to rule-based policy
         if self.fallback_policy and hasattr(self.fallback_policy, "decide_route"):
             try:
@@ -342,18 +377,23 @@ class RLRoutingPolicy:
             features={"emergency_fallback": True},
         )
 
-    def update_policy(self, policy_data: Dict[str, Any]) -> bool:
+    def update_policy(
+        self,
+        policy_data: Dict[str, Any],
+        compiled: Optional[CompiledRoutingPolicy] = None,
+    ) -> bool:
         """
         Update RL policy with new data.
 
         Args:
             policy_data: New policy data
+            compiled: Already compiled form of policy_data, if available
 
         Returns:
             True if update successful
         """
         logger.info("Updating RL routing policy")
-        return self.load_rl_policy(policy_data)
+        return self.load_rl_policy(policy_data, compiled=compiled)
 
     def get_status(self) -> Dict[str, Any]:
         """Get policy status for monitoring."""
@@ -366,13 +406,15 @@ class RLRoutingPolicy:
             "arms": self.arms,
         }
 
-        if self.rl_model:
+        if self.compiled is not None:
+            compiled = self.compiled.describe()
             status.update(
                 {
-                    "algorithm": self.rl_model.get("algorithm"),
-                    "feature_dim": self.rl_model.get("feature_dim"),
-                    "model_arms": self.rl_model.get("arms"),
-                    "alpha": self.rl_model.get("alpha"),
+                    "algorithm": compiled["algorithm"],
+                    "feature_dim": compiled["feature_dim"],
+                    "model_arms": compiled["arms"],
+                    "alpha": compiled["alpha"],
+                    "cached_slots": compiled["cached_slots"],
                 }
             )
 
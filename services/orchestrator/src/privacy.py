@@ -1,17 +1,45 @@
 """
 Privacy & Data Management
 Implements "right to forget" with hard deletion and retention policies
+
+Telemetry is forgotten in two steps instead of rewriting every file:
+1. forget_user appends a tombstone (user hash + session ids + the telemetry
+   segments those sessions wrote to, looked up in the segment index, plus
+   every segment the index does not cover - telemetry written before the
+   index existed, or by writers that do not register).
+   Readers (ingest, RL dataset builder, curator) load the tombstone log and
+   drop matching events while streaming.
+2. compact_telemetry physically purges tombstoned lines (the sessions' turn
+   events and trace spans and, as before the index, any line containing the
+   user hash), a batch of segments per run. Segments of the current date and
+   recently written ones are skipped: writers append without a lock.
+
+Both logs live next to the telemetry under _privacy/, so every reader that
+sees the telemetry also sees the tombstones:
+- _privacy/tombstones.jsonl  user_deletion, segment_rewrite + purge records
+- _privacy/segments.jsonl    session_id -> segment, one line per new pair
+
+A purge replaces the segment (new inode, fewer bytes). Its segment_rewrite
+record lists the removed byte ranges so offset-based readers (online RL
+tailer, ingest watermarks) can map their offset into the compacted file
+instead of re-reading it from the start.
 """
 
+import fcntl
 import hashlib
 import json
 import os
+import tempfile
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Set
 
 import structlog
 from fastapi import HTTPException
 
+from .intent_guard import get_guard_decision_cache
+
 logger = structlog.get_logger(__name__)
 
 # Privacy configuration
@@ -20,22 +48,123 @@ PRIVACY_CONFIG = {
     "telemetry_retention_days": 30,
     "faiss_retention_days": 7,
     "deletion_verification": True,
+    "compact_batch_segments": 20,  # Segments rewritten per compaction run
+    "compact_min_age_s": 300,  # Segments written to more recently are live
 }
 
+PRIVACY_SUBDIR = "_privacy"
+TOMBSTONES_FILE = "tombstones.jsonl"
+SEGMENT_INDEX_FILE = "segments.jsonl"
+COMPACT_LOCK_FILE = "compact.lock"
+
+
+def _iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def _line_session_ids(doc: Dict[str, Any]) -> Iterator[Any]:
+    """session_id of a turn event, or of the spans in an OTLP trace line"""
+    yield doc.get("session_id")
+    for resource in doc.get("resourceSpans") or []:
+        for scope in resource.get("scopeSpans") or []:
+            for span in scope.get("spans") or []:
+                for attr in span.get("attributes") or []:
+                    if attr.get("key") == "session_id":
+                        yield (attr.get("value") or {}).get("stringValue")
+
+
+class SegmentIndex:
+    """
+    Append-only session -> telemetry segment index, written by the telemetry
+    and trace writers the first time a session writes to a segment (daily
+    file)
+    """
+
+    def __init__(self, telemetry_dir: str):
+        self.telemetry_dir = telemetry_dir
+        self.path = os.path.join(telemetry_dir, PRIVACY_SUBDIR, SEGMENT_INDEX_FILE)
+        self._seen: Dict[str, Set[str]] = {}  # segment -> sessions indexed
+
+    def register(self, session_id: str, segment_path: str) -> None:
+        segment = os.path.relpath(segment_path, self.telemetry_dir)
+        sessions = self._seen.get(segment)
+        if sessions is None:
+            if len(self._seen) >= 8:  # Only the current day(s) stay hot
+                self._seen.clear()
+            sessions = self._seen[segment] = set()
+        if session_id in sessions:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"session_id": session_id, "segment": segment}))
+                f.write("\n")
+            sessions.add(session_id)
+        except OSError as e:
+            logger.warning("Segment index write failed", error=str(e))
+
+    def segments_for(self, session_ids: Set[str]) -> Set[str]:
+        """Segments (relative to telemetry_dir) holding any of the sessions"""
+        if not session_ids:
+            return set()
+        return {
+            rec["segment"]
+            for rec in _iter_records(self.path)
+            if rec.get("session_id") in session_ids and rec.get("segment")
+        }
+
+    def unindexed_segments(self) -> Set[str]:
+        """Telemetry files with no index entry (pre-index or unregistered)"""
+        indexed = {rec.get("segment") for rec in _iter_records(self.path)}
+        segments = set()
+        for root, dirs, files in os.walk(self.telemetry_dir):
+            dirs[:] = [d for d in dirs if d != PRIVACY_SUBDIR]
+            for name in files:
+                if name.endswith(".jsonl"):
+                    segment = os.path.relpath(
+                        os.path.join(root, name), self.telemetry_dir
+                    )
+                    if segment not in indexed:
+                        segments.add(segment)
+        return segments
+
+
+_segment_indexes: Dict[str, SegmentIndex] = {}
+
+
+def get_segment_index(telemetry_dir: str) -> SegmentIndex:
+    """Segment index for a telemetry dir (one per dir, shared by writers)"""
+    index = _segment_indexes.get(telemetry_dir)
+    if index is None:
+        index = _segment_indexes[telemetry_dir] = SegmentIndex(telemetry_dir)
+    return index
+
 
 class PrivacyManager:
     """Manages user privacy and data deletion"""
 
-    def __init__(self, data_dir: str = "./data"):
+    def __init__(self, data_dir: str = "./data", telemetry_dir: Optional[str] = None):
         self.data_dir = data_dir
-        self.telemetry_dir = os.path.join(data_dir, "telemetry")
+        self.telemetry_dir = telemetry_dir or os.path.join(data_dir, "telemetry")
         self.sessions_dir = os.path.join(data_dir, "sessions")
         self.faiss_dir = os.path.join(data_dir, "faiss")
+        self.privacy_dir = os.path.join(self.telemetry_dir, PRIVACY_SUBDIR)
+        self.tombstone_file = os.path.join(self.privacy_dir, TOMBSTONES_FILE)
+        self.segment_index = get_segment_index(self.telemetry_dir)
 
         # Ensure directories exist
         os.makedirs(self.telemetry_dir, exist_ok=True)
         os.makedirs(self.sessions_dir, exist_ok=True)
         os.makedirs(self.faiss_dir, exist_ok=True)
+        os.makedirs(self.privacy_dir, exist_ok=True)
 
     def hash_user_id(self, user_id: str) -> str:
         """Create a hash of user ID for privacy"""
@@ -55,8 +184,11 @@ class PrivacyManager:
         }
 
         try:
+            session_ids: Set[str] = set()
+
             # Delete session data
             if session_id:
+                session_ids.add(session_id)
                 session_deleted = self._delete_session_data(session_id)
                 if session_deleted:
                     deletion_report["deleted_items"].append(f"session:{session_id}")
@@ -64,22 +196,40 @@ class PrivacyManager:
             # Delete user sessions
             user_sessions_deleted = self._delete_user_sessions(user_hash)
             deletion_report["deleted_items"].extend(user_sessions_deleted)
-
-            # Delete telemetry data
-            telemetry_deleted = self._delete_telemetry_data(user_hash)
-            deletion_report["deleted_items"].extend(telemetry_deleted)
+            session_ids.update(
+                item.split(":", 1)[1].removesuffix(".json")
+                for item in user_sessions_deleted
+            )
 
             # Delete FAISS embeddings
             faiss_deleted = self._delete_faiss_embeddings(user_hash)
             deletion_report["deleted_items"].extend(faiss_deleted)
 
-            # Add tombstone record
-            self._add_tombstone(user_hash, deletion_report)
+            # Guard fast-path decisions are keyed on the session's raw text
+            guard_cache = get_guard_decision_cache()
+            for sid in session_ids:
+                if guard_cache.forget_session(sid):
+                    deletion_report["deleted_items"].append(f"guard_cache:{sid}")
+
+            # Telemetry: tombstone now, purge in the background compactor.
+            # Segments the index does not cover are scanned for the user hash
+            segments = (
+                self.segment_index.segments_for(session_ids)
+                | self.segment_index.unindexed_segments()
+            )
+            tombstone_id = self._add_tombstone(
+                user_hash, session_ids, segments, deletion_report
+            )
+            deletion_report["telemetry"] = {
+                "tombstone_id": tombstone_id,
+                "segments_pending_purge": len(segments),
+            }
 
             logger.info(
                 "User data deleted successfully",
                 user_hash=user_hash,
                 deleted_count=len(deletion_report["deleted_items"]),
+                segments_pending_purge=len(segments),
             )
 
             return deletion_report
@@ -102,24 +252,30 @@ class PrivacyManager:
     def _delete_user_sessions(self, user_hash: str) -> List[str]:
         """Delete all sessions for a user"""
         deleted_sessions = []
+        needle = user_hash.encode()
 
         try:
-            for filename in os.listdir(self.sessions_dir):
-                if filename.endswith(".json"):
-                    filepath = os.path.join(self.sessions_dir, filename)
+            with os.scandir(self.sessions_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json") or not entry.is_file():
+                        continue
                     try:
-                        with open(filepath, "r") as f:
-                            session_data = json.load(f)
+                        with open(entry.path, "rb") as f:
+                            raw = f.read()
+                        # Cheap byte check before parsing
+                        if needle not in raw:
+                            continue
+                        session_data = json.loads(raw)
 
                         # Check if session belongs to user
                         if session_data.get("user_hash") == user_hash:
-                            os.remove(filepath)
-                            deleted_sessions.append(f"session:{filename}")
-                            logger.debug("User session deleted", session_id=filename)
+                            os.remove(entry.path)
+                            deleted_sessions.append(f"session:{entry.name}")
+                            logger.debug("User session deleted", session_id=entry.name)
                     except Exception as e:
                         logger.warning(
                             "Failed to process session file",
-                            filename=filename,
+                            filename=entry.name,
                             error=str(e),
                         )
         except Exception as e:
@@ -127,46 +283,6 @@ class PrivacyManager:
 
         return deleted_sessions
 
-    def _delete_telemetry_data(self, user_hash: str) -> List[str]:
-        """Delete telemetry data for a user"""
-        deleted_telemetry = []
-
-        try:
-            for filename in os.listdir(self.telemetry_dir):
-                if filename.endswith(".jsonl"):
-                    filepath = os.path.join(self.telemetry_dir, filename)
-                    try:
-                        # Read and filter out user data
-                        filtered_lines = []
-                        with open(filepath, "r") as f:
-                            for line in f:
-                                try:
-                                    data = json.loads(line.strip())
-                                    # Remove lines containing user hash
-                                    if user_hash not in str(data):
-                                        filtered_lines.append(line)
-                                    else:
-                                        deleted_telemetry.append(
-                                            f"telemetry:{filename}"
-                                        )
-                                except json.JSONDecodeError:
-                                    filtered_lines.append(line)  # Keep malformed lines
-
-                        # Write filtered data back
-                        with open(filepath, "w") as f:
-                            f.writelines(filtered_lines)
-
-                    except Exception as e:
-                        logger.warning(
-                            "Failed to process telemetry file",
-                            filename=filename,
-                            error=str(e),
-                        )
-        except Exception as e:
-            logger.error("Failed to scan telemetry directory", error=str(e))
-
-        return deleted_telemetry
-
     def _delete_faiss_embeddings(self, user_hash: str) -> List[str]:
         """Delete FAISS embeddings for a user"""
         deleted_embeddings = []
@@ -185,42 +301,193 @@ class PrivacyManager:
 
         return deleted_embeddings
 
-    def _add_tombstone(self, user_hash: str, deletion_report: Dict[str, Any]):
-        """Add tombstone record for audit trail"""
-        tombstone_file = os.path.join(self.data_dir, "tombstones.jsonl")
-
+    def _append_tombstone_log(self, record: Dict[str, Any]) -> None:
+        with open(self.tombstone_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _add_tombstone(
+        self,
+        user_hash: str,
+        session_ids: Set[str],
+        segments: Set[str],
+        deletion_report: Dict[str, Any],
+    ) -> str:
+        """Add tombstone record (reader filter + audit trail)"""
+        tombstone_id = uuid.uuid4().hex
         tombstone_record = {
             "type": "user_deletion",
+            "id": tombstone_id,
             "user_hash": user_hash,
+            "session_ids": sorted(session_ids),
+            "segments": sorted(segments),
             "timestamp": datetime.utcnow().isoformat(),
             "deletion_report": deletion_report,
         }
 
+        # Readers rely on this record: failing to write it fails the forget
+        self._append_tombstone_log(tombstone_record)
+        logger.info("Tombstone record added", user_hash=user_hash)
+        return tombstone_id
+
+    def _pending_purges(self) -> Dict[str, Dict[str, Set[str]]]:
+        """segment -> {"sessions", "user_hashes", "tombstones"} not yet purged"""
+        pending: Dict[str, Dict[str, Set[str]]] = {}
+        purged: Set[tuple] = set()
+        tombstones = []
+        for rec in _iter_records(self.tombstone_file):
+            if rec.get("type") == "user_deletion":
+                tombstones.append(rec)
+            elif rec.get("type") == "purge":
+                for tid in rec.get("tombstone_ids", []):
+                    purged.add((tid, rec.get("segment")))
+
+        for rec in tombstones:
+            sessions = set(rec.get("session_ids") or [])
+            user_hashes = {rec["user_hash"]} if rec.get("user_hash") else set()
+            if not sessions and not user_hashes:
+                continue
+            for segment in rec.get("segments") or []:
+                if (rec.get("id"), segment) in purged:
+                    continue
+                entry = pending.setdefault(
+                    segment,
+                    {"sessions": set(), "user_hashes": set(), "tombstones": set()},
+                )
+                entry["sessions"] |= sessions
+                entry["user_hashes"] |= user_hashes
+                entry["tombstones"].add(rec.get("id"))
+        return pending
+
+    def _purge_segment(
+        self, segment: str, session_ids: Set[str], user_hashes: Set[str]
+    ) -> int:
+        """
+        Rewrite one segment without the sessions' lines and any line that
+        contains a forgotten user hash (atomic replace)
+        """
+        path = os.path.join(self.telemetry_dir, segment)
+        session_needles = [json.dumps(sid).encode() for sid in session_ids]
+        hash_needles = [h.encode() for h in user_hashes]
+        removed = 0
+        ranges: List[List[int]] = []  # [start, length] in the original file
+        pos = 0
+        # Temp file outside the telemetry globs (events_*.jsonl*)
+        fd, tmp_path = tempfile.mkstemp(prefix="purge-", dir=self.privacy_dir)
         try:
-            with open(tombstone_file, "a") as f:
-                f.write(json.dumps(tombstone_record) + "\n")
-            logger.info("Tombstone record added", user_hash=user_hash)
-        except Exception as e:
-            logger.error("Failed to add tombstone record", error=str(e))
+            with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+                for line in src:
+                    start, pos = pos, pos + len(line)
+                    drop = any(n in line for n in hash_needles)
+                    # Parse only lines that mention a tombstoned session
+                    if not drop and any(n in line for n in session_needles):
+                        try:
+                            drop = any(
+                                sid in session_ids
+                                for sid in _line_session_ids(json.loads(line))
+                            )
+                        except (json.JSONDecodeError, AttributeError, TypeError):
+                            pass
+                    if not drop:
+                        dst.write(line)
+                        continue
+                    removed += 1
+                    if ranges and ranges[-1][0] + ranges[-1][1] == start:
+                        ranges[-1][1] += len(line)
+                    else:
+                        ranges.append([start, len(line)])
+
+            if removed:
+                # Offset readers need the mapping before they see the new inode
+                self._append_tombstone_log(
+                    {
+                        "type": "segment_rewrite",
+                        "segment": segment,
+                        "inode_before": os.stat(path).st_ino,
+                        "inode_after": os.stat(tmp_path).st_ino,
+                        "removed_ranges": ranges,
+                        "timestamp": datetime.utcnow().isoformat(),
+                    }
+                )
+                os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return removed
+
+    def compact_telemetry(
+        self,
+        max_segments: Optional[int] = None,
+        min_age_s: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Physically purge tombstoned telemetry, a batch of segments per run"""
+        # One compactor at a time, across threads and worker processes
+        with open(os.path.join(self.privacy_dir, COMPACT_LOCK_FILE), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return self._compact_telemetry(max_segments, min_age_s)
+
+    def _compact_telemetry(
+        self, max_segments: Optional[int], min_age_s: Optional[float]
+    ) -> Dict[str, Any]:
+        max_segments = max_segments or PRIVACY_CONFIG["compact_batch_segments"]
+        min_age_s = (
+            PRIVACY_CONFIG["compact_min_age_s"] if min_age_s is None else min_age_s
+        )
+        now = time.time()
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        report = {"segments_purged": 0, "lines_removed": 0, "deferred": 0}
+
+        pending = self._pending_purges()
+        for segment in sorted(pending)[:max_segments]:
+            entry = pending[segment]
+            path = os.path.join(self.telemetry_dir, segment)
+            try:
+                if os.path.exists(path):
+                    # Writers append to today's segments (even after a quiet
+                    # gap) and to recently touched ones; purge them later
+                    live = today in segment.split(os.sep)
+                    if live or now - os.path.getmtime(path) < min_age_s:
+                        report["deferred"] += 1
+                        continue
+                    removed = self._purge_segment(
+                        segment, entry["sessions"], entry["user_hashes"]
+                    )
+                else:
+                    removed = 0  # Already gone (retention)
+                self._append_tombstone_log(
+                    {
+                        "type": "purge",
+                        "segment": segment,
+                        "tombstone_ids": sorted(entry["tombstones"]),
+                        "lines_removed": removed,
+                        "timestamp": datetime.utcnow().isoformat(),
+                    }
+                )
+                report["segments_purged"] += 1
+                report["lines_removed"] += removed
+            except Exception as e:
+                logger.error("Telemetry purge failed", segment=segment, error=str(e))
+
+        report["pending"] = len(pending) - report["segments_purged"]
+        if report["segments_purged"] or report["deferred"]:
+            logger.info("Telemetry compaction completed", **report)
+        return report
 
     def cleanup_expired_data(self):
         """Clean up expired data based on retention policies"""
-        cutoff_date = datetime.utcnow() - timedelta(
-            days=PRIVACY_CONFIG["session_retention_days"]
-        )
+        cutoff_ts = (
+            datetime.utcnow() - timedelta(days=PRIVACY_CONFIG["session_retention_days"])
+        ).timestamp()
 
         cleaned_items = []
 
-        # Clean expired sessions
+        # Clean expired sessions (scandir: no per-file path joins or opens)
         try:
-            for filename in os.listdir(self.sessions_dir):
-                if filename.endswith(".json"):
-                    filepath = os.path.join(self.sessions_dir, filename)
-                    file_time = datetime.fromtimestamp(os.path.getmtime(filepath))
-
-                    if file_time < cutoff_date:
-                        os.remove(filepath)
-                        cleaned_items.append(f"expired_session:{filename}")
+            with os.scandir(self.sessions_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        if entry.stat().st_mtime < cutoff_ts:
+                            os.remove(entry.path)
+                            cleaned_items.append(f"expired_session:{entry.name}")
         except Exception as e:
             logger.error("Failed to clean expired sessions", error=str(e))
 
@@ -228,5 +495,8 @@ class PrivacyManager:
         return cleaned_items
 
 
-# Global privacy manager
-privacy_manager = PrivacyManager()
+# Global privacy manager (telemetry where the turn events are written)
+privacy_manager = PrivacyManager(
+    data_dir=os.getenv("PRIVACY_DATA_DIR", "./data"),
+    telemetry_dir=os.getenv("LOG_DIR"),
+)
@@ -9,6 +9,8 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import structlog
 
+from ..middleware.logging import Lazy
+
 logger = structlog.get_logger(__name__)
 
 
@@ -165,13 +167,14 @@ class RouterPolicy:
         # Record decision for quota tracking
         quota_tracker.record_decision(best_route)
 
-        logger.info(
+        # Full features only at DEBUG; route_request logs the sampled summary
+        logger.debug(
             "Route decision made",
             route=best_route,
             confidence=best_score,
             reason=reason,
             features=features,
-            quota_share=quota_tracker.get_current_share(),
+            quota_share=Lazy(quota_tracker.get_current_share),
         )
 
         return RouteDecision(
@@ -2,23 +2,26 @@
 Learning API endpoints for Alice Smart Ingestion Module.
 
 Provides endpoints for:
-- /api/learn/ingest: Run ingestion pipeline
+- /api/learn/ingest: Enqueue an incremental ingestion job
+- /api/learn/jobs/{job_id}: Poll ingestion job progress
 - /api/learn/snapshot: Create daily snapshot
 - /api/learn/stats: Get learning statistics
 """
 
+import asyncio
 import json
 import os
-import subprocess
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
+from ..intent_guard import get_guard_decision_cache
 from ..metrics.metrics import METRICS
+from ..services.learn_jobs import IngestJob, IngestJobManager
 
 router = APIRouter(prefix="/api/learn", tags=["learning"])
 
@@ -29,20 +32,31 @@ LEARN_TESTS_FILE = os.environ.get("LEARN_TESTS_FILE", "data/tests/results.jsonl"
 LEARN_OUT_PARQUET = os.environ.get("LEARN_OUT_PARQUET", "data/learn/parquet")
 LEARN_OUT_SNAPSHOT = os.environ.get("LEARN_OUT_SNAPSHOT", "data/learn/snapshots")
 LEARN_LOG = os.environ.get("LEARN_LOG", "data/learn/logs/learn.jsonl")
+LEARN_JOB_TIMEOUT_S = float(os.environ.get("LEARN_JOB_TIMEOUT_S", "3600"))
+LEARN_SNAPSHOT_WAIT_S = float(os.environ.get("LEARN_SNAPSHOT_WAIT_S", "300"))
 
 
-class IngestResponse(BaseModel):
+class IngestJobResponse(BaseModel):
     v: str = "1"
-    success: bool
-    rows_raw: int
-    rows_learnable: int
-    learning_rate: float
-    hard_intent: int
-    tool_fail: int
-    rag_miss: int
+    job_id: str
+    status: str
+    poll_url: str
     message: str
 
 
+class IngestJobStatus(BaseModel):
+    v: str = "1"
+    job_id: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    duration_s: Optional[float] = None
+    progress: Dict[str, int] = {}
+    result: Dict[str, Any] = {}
+    error: Optional[str] = None
+
+
 class SnapshotResponse(BaseModel):
     v: str = "1"
     success: bool
@@ -64,61 +78,63 @@ class StatsResponse(BaseModel):
     snapshot: Optional[str] = None
 
 
-def run_ingest_script() -> Dict[str, Any]:
-    """Run the ingestion script and return results."""
+def ingest_command() -> List[str]:
+    """Command line for one incremental ingestion run."""
     if not LEARN_ENABLED:
         raise HTTPException(status_code=503, detail="Learning module disabled")
 
     # Find the ingest script
-    script_path = Path(__file__).parent.parent.parent / "ingest" / "run_ingest.py"
+    script_path = (
+        Path(__file__).parent.parent.parent.parent / "ingest" / "run_ingest.py"
+    )
     if not script_path.exists():
         raise HTTPException(status_code=500, detail="Ingest script not found")
 
-    try:
-        # Run the ingestion script
-        result = subprocess.run(
-            [
-                sys.executable,
-                str(script_path),
-                "--input",
-                LEARN_INPUT_DIR,
-                "--tests",
-                LEARN_TESTS_FILE,
-                "--parquet_out",
-                LEARN_OUT_PARQUET,
-                "--snapshot_out",
-                LEARN_OUT_SNAPSHOT,
-                "--log_out",
-                LEARN_LOG,
-            ],
-            capture_output=True,
-            text=True,
-            timeout=300,
+    return [
+        sys.executable,
+        str(script_path),
+        "--input",
+        LEARN_INPUT_DIR,
+        "--tests",
+        LEARN_TESTS_FILE,
+        "--parquet_out",
+        LEARN_OUT_PARQUET,
+        "--snapshot_out",
+        LEARN_OUT_SNAPSHOT,
+        "--log_out",
+        LEARN_LOG,
+        "--progress",
+    ]
+
+
+def _record_job_metrics(job: IngestJob) -> None:
+    """Update learning metrics when an ingest job finishes."""
+    if job.status != "succeeded":
+        METRICS.learn_ingest_errors += 1
+        return
+
+    METRICS.learn_ingest_total += 1
+    if job.result:
+        METRICS.learn_rows_raw = job.result.get("rows_raw", 0)
+        METRICS.learn_rows_learnable = job.result.get("rows_learnable", 0)
+        METRICS.learn_hard_intent = job.result.get("hard_intent", 0)
+        METRICS.learn_tool_fail = job.result.get("tool_fail", 0)
+        METRICS.learn_rag_miss = job.result.get("rag_miss", 0)
+
+
+_ingest_jobs: Optional[IngestJobManager] = None
+
+
+def get_ingest_jobs() -> IngestJobManager:
+    """Get or create the ingest job manager"""
+    global _ingest_jobs
+    if _ingest_jobs is None:
+        _ingest_jobs = IngestJobManager(
+            ingest_command,
+            timeout_s=LEARN_JOB_TIMEOUT_S,
+            on_finished=_record_job_metrics,
         )
-
-        if result.returncode != 0:
-            raise HTTPException(
-                status_code=500, detail=f"Ingestion failed: {result.stderr}"
-            )
-
-        # Parse the last log entry to get stats
-        stats = parse_latest_stats()
-
-        return {
-            "success": True,
-            "rows_raw": stats.get("rows_raw", 0),
-            "rows_learnable": stats.get("rows_learnable", 0),
-            "learning_rate": stats.get("learning_rate", 0.0),
-            "hard_intent": stats.get("hard_intent", 0),
-            "tool_fail": stats.get("tool_fail", 0),
-            "rag_miss": stats.get("rag_miss", 0),
-            "message": "Ingestion completed successfully",
-        }
-
-    except subprocess.TimeoutExpired:
-        raise HTTPException(status_code=408, detail="Ingestion timed out")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Ingestion error: {str(e)}")
+    return _ingest_jobs
 
 
 def parse_latest_stats() -> Dict[str, Any]:
@@ -182,35 +198,55 @@ def get_snapshot_info() -> Optional[Dict[str, Any]]:
         return None
 
 
-@router.post("/ingest", response_model=IngestResponse)
-async def ingest_data(background_tasks: BackgroundTasks):
-    """Run the ingestion pipeline."""
-    try:
-        result = run_ingest_script()
+@router.post("/ingest", response_model=IngestJobResponse, status_code=202)
+async def ingest_data():
+    """Enqueue an incremental ingestion run; poll /jobs/{job_id} for progress."""
+    ingest_command()  # Fail fast if disabled or the script is missing
+    job = get_ingest_jobs().submit()
 
-        # Update metrics
-        METRICS.learn_ingest_total.inc()
-        METRICS.learn_rows_raw.set(result["rows_raw"])
-        METRICS.learn_rows_learnable.set(result["rows_learnable"])
-        METRICS.learn_hard_intent.set(result["hard_intent"])
-        METRICS.learn_tool_fail.set(result["tool_fail"])
-        METRICS.learn_rag_miss.set(result["rag_miss"])
+    return IngestJobResponse(
+        job_id=job.job_id,
+        status=job.status,
+        poll_url=f"{router.prefix}/jobs/{job.job_id}",
+        message="Ingestion queued",
+    )
 
-        return IngestResponse(**result)
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        METRICS.learn_ingest_errors.inc()
-        raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
+@router.get("/jobs/{job_id}", response_model=IngestJobStatus)
+async def get_ingest_job(job_id: str):
+    """Status, progress and result of an ingestion job."""
+    job = get_ingest_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return IngestJobStatus(**job.to_dict())
+
+
+@router.get("/jobs")
+async def list_ingest_jobs():
+    """Recent ingestion jobs, newest first."""
+    return {"v": "1", "jobs": [job.to_dict() for job in get_ingest_jobs().recent()]}
 
 
 @router.post("/snapshot", response_model=SnapshotResponse)
-async def create_snapshot(background_tasks: BackgroundTasks):
-    """Create a daily snapshot."""
+async def create_snapshot():
+    """Ingest new data into today's snapshot and report it."""
     try:
-        # Run ingestion to create snapshot
-        result = run_ingest_script()
+        ingest_command()
+        job = get_ingest_jobs().submit()
+
+        # Waits without blocking the event loop; the job keeps running if we
+        # give up, and its outcome stays pollable
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout=LEARN_SNAPSHOT_WAIT_S)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=408,
+                detail=f"Ingestion still running, poll {router.prefix}/jobs/{job.job_id}",
+            )
+        if job.status != "succeeded":
+            raise HTTPException(
+                status_code=500, detail=f"Ingestion failed: {job.error}"
+            )
 
         # Get snapshot info
         snapshot_info = get_snapshot_info()
@@ -218,8 +254,8 @@ async def create_snapshot(background_tasks: BackgroundTasks):
             raise HTTPException(status_code=500, detail="Failed to create snapshot")
 
         # Update metrics
-        METRICS.learn_snapshot_total.inc()
-        METRICS.learn_snapshot_rows.set(snapshot_info["rows"])
+        METRICS.learn_snapshot_total += 1
+        METRICS.learn_snapshot_rows = snapshot_info["rows"]
 
         return SnapshotResponse(
             success=True,
@@ -230,9 +266,10 @@ async def create_snapshot(background_tasks: BackgroundTasks):
         )
 
     except HTTPException:
+        METRICS.learn_snapshot_errors += 1
         raise
     except Exception as e:
-        METRICS.learn_snapshot_errors.inc()
+        METRICS.learn_snapshot_errors += 1
         raise HTTPException(status_code=500, detail=f"Snapshot failed: {str(e)}")
 
 
@@ -299,16 +336,20 @@ async def forget_session(session_id: str):
         with open(forget_log, "a", encoding="utf-8") as f:
             f.write(json.dumps(forget_event, ensure_ascii=False) + "\n")
 
+        # Drop cached guard decisions (they key on the session's raw text)
+        guard_entries = get_guard_decision_cache().forget_session(session_id)
+
         # Update metrics
-        METRICS.learn_forget_total.inc()
+        METRICS.learn_forget_total += 1
 
         return {
             "v": "1",
             "success": True,
             "session_id": session_id,
+            "guard_cache_entries_removed": guard_entries,
             "message": "Forget request logged (implementation pending)",
         }
 
     except Exception as e:
-        METRICS.learn_forget_errors.inc()
+        METRICS.learn_forget_errors += 1
         raise HTTPException(status_code=500, detail=f"Forget failed: {str(e)}")
@@ -23,6 +23,7 @@ from ..utils.circuit_breaker import (
     CircuitOpenError,
     get_circuit_breaker,
 )
+from ..utils.tracing import finish_turn, start_turn
 
 logger = structlog.get_logger(__name__)
 router = APIRouter()
@@ -68,10 +69,18 @@ class OptimizedOrchestrator:
         )
 
     async def process_request(self, request: ChatRequest) -> ChatResponse:
-        """Process request with full optimization pipeline"""
+        """Process request with full optimization pipeline, traced as one turn"""
+        trace_id = f"opt_{int(time.time() * 1000)}"
+        turn = start_turn(trace_id, session_id=request.session_id)
+        try:
+            return await self._process_request(request, trace_id)
+        finally:
+            finish_turn(turn)
 
+    async def _process_request(
+        self, request: ChatRequest, trace_id: str
+    ) -> ChatResponse:
         start_time = time.perf_counter()
-        trace_id = f"opt_{int(time.time() * 1000)}"
 
         logger.info(
             "Processing optimized request",
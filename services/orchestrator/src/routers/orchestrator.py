@@ -3,18 +3,25 @@ Orchestrator API Router
 Handles LLM routing and ingestion requests with LLM integration v1
 """
 
+import asyncio
 import hashlib
 import json
 import os
 import pathlib
 import time
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import httpx
 import structlog
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
+from ..intent_guard import (
+    get_guard_decision_cache,
+    guard_intent_confident_sv,
+    guard_response_text,
+)
+
 # LLM Integration v1 imports
 from ..llm import (
     get_deep_driver,
@@ -22,6 +29,7 @@ from ..llm import (
     get_micro_driver,
     get_planner_driver,
     get_planner_v2_driver,
+    get_residency_manager,
 )
 from ..middleware.logging import get_logger_with_trace
 from ..models.api import (
@@ -32,13 +40,17 @@ from ..models.api import (
     IngestResponse,
     ModelType,
 )
+from ..models.turn_result import TurnResult, dumps, json_response, splice_json
 from ..planner import get_planner_executor
+from ..privacy import get_segment_index
 from ..router import get_router_policy
-from ..services.guardian_client import GuardianClient
+from ..services.admission_scheduler import AdmissionRejected, get_admission_scheduler
+from ..services.guardian_client import PREDICTION_MAX_AGE_S, GuardianClient
 from ..shadow import CanaryRouter
 from ..utils.energy import EnergyMeter
 from ..utils.ram_peak import ram_peak_mb
 from ..utils.tool_errors import classify_tool_error, record_tool_call
+from ..utils.tracing import finish_turn, span, start_turn
 
 
 # Calculate system prompt hash directly
@@ -71,6 +83,96 @@ async def get_guardian_client() -> GuardianClient:
     return guardian_client
 
 
+# Daily telemetry dirs already created by this process
+_telemetry_dirs: set = set()
+
+
+async def _generate(fn, *args, **kwargs) -> Dict[str, Any]:
+    """Run a blocking driver.generate off the event loop as an llm.generate span"""
+    with span("llm.generate") as s:
+        result = await asyncio.to_thread(fn, *args, **kwargs)
+        if s is not None and isinstance(result, dict):
+            s.set(model=result.get("model"), tokens=result.get("tokens_used"))
+        return result
+
+
+# Intent-guard fast path: a confident guard intent on a micro turn with a
+# known-good Guardian snapshot is answered from a precomputed template,
+# without NLU round-trip, admission slot or LLM
+GUARD_FAST_PATH = os.getenv("GUARD_FAST_PATH", "1") == "1"
+GUARD_FAST_PATH_MAX_AGE_S = float(os.getenv("GUARD_FAST_PATH_MAX_AGE_S", "10"))
+GUARD_FAST_PATH_STATES = {"NORMAL"}
+_guard_decisions = get_guard_decision_cache()
+
+
+def _guard_fast_path_intent(chat_request: ChatRequest) -> Optional[str]:
+    """Guard intent if the turn qualifies for the fast path (verdict cached)"""
+    key = _guard_decisions.key(chat_request.session_id, chat_request.message)
+    found, intent = _guard_decisions.get(key)
+    if not found:
+        intent = guard_intent_confident_sv(chat_request.message)
+        _guard_decisions.put(key, intent)
+    # Routing depends on quota state, so it is never cached
+    if intent and route_request(chat_request) != "micro":
+        return None
+    return intent
+
+
+def _guard_fast_path_response(
+    chat_request: ChatRequest,
+    response: Response,
+    intent: str,
+    guardian_state: str,
+    trace_id: str,
+    start_time: float,
+    energy_meter: EnergyMeter,
+    turn,
+) -> Response:
+    """Template response for a guard fast-path turn (still logs the turn event)"""
+    energy_wh = energy_meter.stop()
+    response_latency_ms = int((time.time() - start_time) * 1000)
+
+    result = TurnResult(
+        route="micro",
+        llm_model="intent_guard",
+        text=guard_response_text(intent),
+        planner_schema_ok=True,
+        fast_path="guard",
+    )
+    body = result.response_body(
+        chat_request.session_id,
+        int(time.time() * 1000),
+        trace_id,
+        response_latency_ms,
+    )
+
+    with span("telemetry.write"):
+        log_turn_event(
+            trace_id=trace_id,
+            session_id=chat_request.session_id,
+            route="micro",
+            e2e_first_ms=response_latency_ms,
+            e2e_full_ms=response_latency_ms,
+            ram_peak=ram_peak_mb(),
+            tool_calls=[],
+            energy_wh=energy_wh,
+            guardian_state=guardian_state,
+            pii_masked=True,
+            consent_scopes=["basic_logging"],
+            input_text=chat_request.message,
+            lang=(getattr(chat_request, "lang", None) or "sv"),
+            spans=turn.to_event(),
+            stages_ms=turn.stage_ms(),
+            result=result,
+        )
+
+    response.headers["X-Route"] = "micro"
+    response.headers["X-Intent"] = intent
+    response.headers["X-Fast-Path"] = "guard"
+
+    return json_response(body, response.headers)
+
+
 def log_turn_event(
     trace_id: str,
     session_id: str,
@@ -87,11 +189,18 @@ def log_turn_event(
     input_text: str | None = None,
     output_text: str | None = None,
     lang: str | None = None,
+    spans: List[Dict[str, Any]] | None = None,
+    stages_ms: Dict[str, float] | None = None,
+    result: TurnResult | None = None,
 ) -> None:
-    """Logga komplett turn event enligt observability standard"""
+    """
+    Logga komplett turn event enligt observability standard
+
+    With a TurnResult, rag and output_text are spliced in from the bytes
+    already encoded for the HTTP response (rag_data/output_text are ignored).
+    """
 
     logger = structlog.get_logger(__name__)
-    logger.info("log_turn_event called", trace_id=trace_id, session_id=session_id)
 
     turn_event = {
         "v": "1",
@@ -103,34 +212,45 @@ def log_turn_event(
         "e2e_full_ms": e2e_full_ms,
         "ram_peak_mb": ram_peak,
         "tool_calls": tool_calls,
-        "rag": rag_data or {"top_k": 0, "hits": 0},
         "energy_wh": energy_wh,
         "guardian_state": guardian_state,
         "pii_masked": pii_masked,
         "consent_scopes": consent_scopes or ["basic_logging"],
         "input_text": input_text,
-        "output_text": output_text,
         "lang": lang or "sv",
         "security": {"system_prompt_sha256": SYSTEM_PROMPT_SHA256},
     }
+    if spans is not None:
+        turn_event["spans"] = spans
+        turn_event["stages_ms"] = stages_ms or {}
+
+    if result is not None:
+        line = splice_json(
+            turn_event,
+            {"rag": result.rag_json(), "output_text": result.output_text_json()},
+        )
+    else:
+        turn_event["rag"] = rag_data or {"top_k": 0, "hits": 0}
+        turn_event["output_text"] = output_text
+        line = dumps(turn_event)
 
     # Skriv till JSONL fil
     try:
         # Använd konfigurerad katalog (monteras i Docker via LOG_DIR)
         telemetry_dir = os.getenv("LOG_DIR", "/data/telemetry")
-        logger.info("Telemetry dir", telemetry_dir=telemetry_dir)
-        os.makedirs(telemetry_dir, exist_ok=True)
-
         today = datetime.utcnow().strftime("%Y-%m-%d")
         daily_dir = os.path.join(telemetry_dir, today)
-        os.makedirs(daily_dir, exist_ok=True)
+        if daily_dir not in _telemetry_dirs:
+            os.makedirs(daily_dir, exist_ok=True)
+            _telemetry_dirs.add(daily_dir)
         filename = os.path.join(daily_dir, f"events_{today}.jsonl")
-        logger.info("Writing to file", filename=filename)
 
-        with open(filename, "a", encoding="utf-8") as f:
-            f.write(json.dumps(turn_event) + "\n")
+        with open(filename, "ab") as f:
+            f.write(line + b"\n")
+        # Session -> segment, so forget can tombstone without scanning
+        get_segment_index(telemetry_dir).register(session_id, filename)
 
-        logger.info("Turn event written successfully")
+        logger.debug("Turn event written", filename=filename)
 
     except Exception as e:
         # Fallback till logging om filskrivning misslyckas
@@ -266,7 +386,8 @@ async def orchestrator_ingest(
                 "session_id": ingest_request.session_id,
                 "text_length": len(ingest_request.text),
                 "lang": ingest_request.lang,
-            }
+            },
+            health=guardian_health,
         )
 
         if not admitted:
@@ -405,6 +526,12 @@ async def orchestrator_health(guardian: GuardianClient = Depends(get_guardian_cl
                 },
             },
             "guardian_status": guardian_health.get("state", "unknown"),
+            "admission": get_admission_scheduler().get_stats(),
+            "residency": get_residency_manager().get_stats(),
+            "guard_fast_path": {
+                "enabled": GUARD_FAST_PATH,
+                "decision_cache": _guard_decisions.info(),
+            },
             "features": {
                 "admission_control": True,
                 "priority_calculation": True,
@@ -425,6 +552,13 @@ async def orchestrator_health(guardian: GuardianClient = Depends(get_guardian_cl
         }
 
 
+@router.get("/residency")
+async def orchestrator_residency(limit: int = 50):
+    """Model residency: warm set, per-model cold starts and load/unload events"""
+    manager = get_residency_manager()
+    return {**manager.get_stats(), "events": manager.events(limit)}
+
+
 @router.post("/chat")
 async def orchestrator_chat(
     request: Request,
@@ -448,7 +582,7 @@ async def orchestrator_chat(
     # Get trace ID for observability
     trace_id = getattr(request.state, "trace_id", "unknown")
 
-    logger.info(
+    logger.debug(
         "Orchestrator chat request",
         session_id=chat_request.session_id,
         message_length=len(chat_request.message),
@@ -459,60 +593,123 @@ async def orchestrator_chat(
     # Track tool calls
     tool_calls: List[Dict[str, Any]] = []
 
+    # Per-turn spans (stage breakdown in turn event, histograms, OTLP export)
+    turn = start_turn(trace_id, session_id=chat_request.session_id)
+    route_final = None
+    guardian_state = "UNKNOWN"
+
     try:
+        # --- Intent-guard fast path (skips NLU, admission and LLM) ---
+        if GUARD_FAST_PATH and getattr(chat_request, "force_route", None) in (
+            None,
+            "micro",
+        ):
+            with span("intent.guard") as guard_span:
+                fast_intent = _guard_fast_path_intent(chat_request)
+                if guard_span is not None:
+                    guard_span.set(intent=fast_intent)
+            if fast_intent:
+                with span("guardian.snapshot"):
+                    snapshot = guardian.health_snapshot(GUARD_FAST_PATH_MAX_AGE_S)
+                if snapshot and snapshot.get("state") in GUARD_FAST_PATH_STATES:
+                    route_final = "micro"
+                    return _guard_fast_path_response(
+                        chat_request,
+                        response,
+                        fast_intent,
+                        snapshot["state"],
+                        trace_id,
+                        start_time,
+                        energy_meter,
+                        turn,
+                    )
+
         # --- NLU pre-parse (fail-open) ---
         nlu_route_hint = None
         nlu_intent_label = None
         nlu_slots = None
-        try:
-            nlu_payload = {
-                "v": "1",
-                "text": chat_request.message,
-                "lang": getattr(chat_request, "lang", "sv"),
-                "session_id": chat_request.session_id,
-            }
-            with httpx.Client(timeout=0.08) as client:
-                nlu_resp = client.post(
-                    "http://nlu:9002/api/nlu/parse", json=nlu_payload
+        with span("nlu") as nlu_span:
+            try:
+                nlu_payload = {
+                    "v": "1",
+                    "text": chat_request.message,
+                    "lang": getattr(chat_request, "lang", "sv"),
+                    "session_id": chat_request.session_id,
+                }
+                with httpx.Client(timeout=0.08) as client:
+                    nlu_resp = client.post(
+                        "http://nlu:9002/api/nlu/parse", json=nlu_payload
+                    )
+                    if nlu_resp.status_code == 200:
+                        nlu_json = nlu_resp.json()
+                        if nlu_span is not None:
+                            # NLU-side breakdown (encode, slots, ...)
+                            for k, v in (nlu_json.get("timings_ms") or {}).items():
+                                if isinstance(v, (int, float)):
+                                    nlu_span.attrs[f"nlu.{k}"] = v
+                        nlu_route_hint = nlu_json.get("route_hint")
+                        intent = nlu_json.get("intent") or {}
+                        nlu_intent_label = intent.get("label")
+                        nlu_slots = nlu_json.get("slots") or {}
+                        if nlu_intent_label:
+                            if nlu_span is not None:
+                                nlu_span.set(intent=nlu_intent_label)
+                            response.headers["X-Intent"] = nlu_intent_label
+                            conf = intent.get("confidence")
+                            if conf is not None:
+                                response.headers["X-Intent-Confidence"] = str(conf)
+                        if nlu_route_hint:
+                            response.headers["X-Route-Hint"] = nlu_route_hint
+            except Exception as nlu_err:
+                logger.warning("NLU parse failed or timed out", error=str(nlu_err))
+        # Route to appropriate model using LLM Integration v1 (+ NLU hint)
+        # Respect force_route parameter if provided
+        force_route = getattr(chat_request, "force_route", None)
+        with span("route.decide") as route_span:
+            if force_route:
+                route = force_route
+            else:
+                route = route_request(chat_request)
+                if nlu_route_hint in {"micro", "planner", "deep"}:
+                    route = nlu_route_hint
+            if route_span is not None:
+                route_span.set(route=route, forced=bool(force_route))
+        logger.debug("Route selected", route=route)
+
+        # Get Guardian health status (deep turns need a fresh RAM forecast)
+        with span("guardian.health"):
+            try:
+                guardian_health = await guardian.get_health(
+                    max_age_s=PREDICTION_MAX_AGE_S if route == "deep" else None
                 )
-                if nlu_resp.status_code == 200:
-                    nlu_json = nlu_resp.json()
-                    nlu_route_hint = nlu_json.get("route_hint")
-                    intent = nlu_json.get("intent") or {}
-                    nlu_intent_label = intent.get("label")
-                    nlu_slots = nlu_json.get("slots") or {}
-                    if nlu_intent_label:
-                        response.headers["X-Intent"] = nlu_intent_label
-                        conf = intent.get("confidence")
-                        if conf is not None:
-                            response.headers["X-Intent-Confidence"] = str(conf)
-                    if nlu_route_hint:
-                        response.headers["X-Route-Hint"] = nlu_route_hint
-        except Exception as nlu_err:
-            logger.warning("NLU parse failed or timed out", error=str(nlu_err))
-        # Get Guardian health status
-        try:
-            guardian_health = await guardian.get_health()
-            guardian_state = guardian_health.get("state", "UNKNOWN")
-            logger.info("Guardian health received", state=guardian_state)
-        except Exception as e:
-            logger.error("Guardian health check failed", error=str(e))
-            guardian_health = {"state": "ERROR"}
-            guardian_state = "ERROR"
+                guardian_state = guardian_health.get("state", "UNKNOWN")
+                logger.debug("Guardian health received", state=guardian_state)
+            except Exception as e:
+                logger.error("Guardian health check failed", error=str(e))
+                guardian_health = {"state": "ERROR"}
+                guardian_state = "ERROR"
 
         # Check admission control
-        try:
-            admitted = await guardian.check_admission(
-                {
-                    "type": "chat",
-                    "session_id": chat_request.session_id,
-                    "message_length": len(chat_request.message),
-                    "preferred_model": chat_request.model,
-                }
+        with span("guardian.admission") as admission_span:
+            try:
+                admitted = await guardian.check_admission(
+                    {
+                        "type": "chat",
+                        "session_id": chat_request.session_id,
+                        "message_length": len(chat_request.message),
+                        "preferred_model": chat_request.model,
+                    },
+                    health=guardian_health,
+                )
+            except Exception as e:
+                logger.error("Admission control failed", error=str(e))
+                admitted = True  # Fail-open
+            # Predicted RAM pressure refuses only the deep model (same snapshot)
+            deep_refused = route == "deep" and not guardian.deep_admission_allowed(
+                guardian_health
             )
-        except Exception as e:
-            logger.error("Admission control failed", error=str(e))
-            admitted = True  # Fail-open
+            if admission_span is not None:
+                admission_span.set(admitted=bool(admitted), deep_refused=deep_refused)
 
         if not admitted:
             retry_after = guardian.get_retry_after_seconds(guardian_health)
@@ -535,16 +732,41 @@ async def orchestrator_chat(
                 headers={"Retry-After": str(retry_after)},
             )
 
-        # Route to appropriate model using LLM Integration v1 (+ NLU hint)
-        # Respect force_route parameter if provided
-        force_route = getattr(chat_request, "force_route", None)
-        if force_route:
-            route = force_route
-        else:
-            route = route_request(chat_request)
-            if nlu_route_hint in {"micro", "planner", "deep"}:
-                route = nlu_route_hint
-        logger.info("Route selected", route=route)
+        # Per-route admission: bounded slots, priority queue, deadline shedding
+        admission = get_admission_scheduler()
+        priority = calculate_priority(chat_request, guardian_health)
+        try:
+            with span("admission.acquire", route=route, priority=priority):
+                admission_ticket = await admission.acquire(
+                    route,
+                    priority=priority,
+                    estimated_latency_ms=estimate_latency(
+                        route, len(chat_request.message)
+                    ),
+                )
+        except AdmissionRejected as shed:
+            logger.warning(
+                "Chat request shed by admission scheduler",
+                session_id=chat_request.session_id,
+                route=route,
+                reason=shed.reason,
+                priority=priority,
+            )
+            raise HTTPException(
+                status_code=503,
+                detail=APIError.create(
+                    code="SERVICE_OVERLOADED",
+                    message="System is currently overloaded, please try again later",
+                    details={"route": route, "reason": shed.reason},
+                    retry_after=shed.retry_after,
+                    trace_id=trace_id,
+                ).model_dump(),
+                headers={"Retry-After": str(shed.retry_after)},
+            )
+        if admission_ticket.waited_ms:
+            response.headers["X-Admission-Wait-Ms"] = str(
+                int(admission_ticket.waited_ms)
+            )
 
         # Initialize shadow mode if enabled
         shadow_enabled = os.getenv("PLANNER_SHADOW_ENABLED", "0") == "1"
@@ -568,19 +790,11 @@ async def orchestrator_chat(
                     from ..intent_guard import intent_to_tool
 
                     tool_name = intent_to_tool(guard_intent)
-                    print(f"🛡️ Intent guard hit: {guard_intent} → {tool_name}")
+                    logger.debug(
+                        "Intent guard hit", intent=guard_intent, tool=tool_name
+                    )
                     llm_response = {
-                        "text": json.dumps(
-                            {
-                                "intent": guard_intent,
-                                "tool": tool_name,
-                                "args": {},
-                                "render_instruction": {
-                                    "type": "text",
-                                    "content": f"Intent: {guard_intent}",
-                                },
-                            }
-                        ),
+                        "text": guard_response_text(guard_intent),
                         "model": "intent_guard",
                         "tokens_used": 0,
                         "prompt_tokens": 0,
@@ -601,8 +815,8 @@ async def orchestrator_chat(
 
                     # Generate response with scoped grammar
                     micro_driver = get_micro_driver()
-                    llm_response = micro_driver.generate(
-                        chat_request.message, grammar=grammar
+                    llm_response = await _generate(
+                        micro_driver.generate, chat_request.message, grammar=grammar
                     )
                     model_used = llm_response["model"]
                     llm_response["source"] = "micro"
@@ -614,7 +828,7 @@ async def orchestrator_chat(
                             response_json = json.loads(llm_response["response"])
                             response_json["tool"] = fast_tool
                             llm_response["response"] = json.dumps(response_json)
-                            print(f"🚀 Fast tool selector override: {fast_tool}")
+                            logger.debug("Fast tool selector override", tool=fast_tool)
                         except:
                             pass  # Keep original if parsing fails
 
@@ -624,15 +838,17 @@ async def orchestrator_chat(
                 # Use hybrid planner if enabled, otherwise fallback to local
                 if os.getenv("PLANNER_HYBRID_ENABLED", "0") == "1":
                     planner_driver = get_hybrid_planner_driver()
-                    logger.info(
+                    logger.debug(
                         "Using hybrid planner (EASY/MEDIUM → local, HARD → OpenAI)"
                     )
                 else:
                     planner_driver = get_planner_driver()
-                    logger.info("Using local planner only")
+                    logger.debug("Using local planner only")
 
                 # Generate primary response
-                llm_response = planner_driver.generate(chat_request.message)
+                llm_response = await _generate(
+                    planner_driver.generate, chat_request.message
+                )
                 model_used = llm_response["model"]
 
                 # Run shadow evaluation if enabled
@@ -640,7 +856,9 @@ async def orchestrator_chat(
                     try:
                         # Generate shadow response with planner v2
                         shadow_driver = get_planner_v2_driver()
-                        shadow_result = shadow_driver.generate(chat_request.message)
+                        shadow_result = await asyncio.to_thread(
+                            shadow_driver.generate, chat_request.message
+                        )
 
                         # Evaluate shadow vs primary
                         shadow_response = await canary_router.evaluate_shadow(
@@ -684,16 +902,31 @@ async def orchestrator_chat(
                             tool_calls.append(tool_call_result)
 
             elif route == "deep":
-                deep_driver = get_deep_driver()
-                llm_response = deep_driver.generate(chat_request.message)
-                model_used = llm_response["model"]
-                blocked_by_guardian = llm_response.get("blocked_by_guardian", False)
-                fallback_used = llm_response.get("fallback_used", False)
+                if not deep_refused:
+                    deep_driver = get_deep_driver()
+                    llm_response = await _generate(
+                        deep_driver.generate, chat_request.message
+                    )
+                    model_used = llm_response["model"]
+                    blocked_by_guardian = llm_response.get("blocked_by_guardian", False)
+                    fallback_used = llm_response.get("fallback_used", False)
+                else:
+                    # Guardian predicts RAM pressure - don't load the deep model
+                    logger.warning("Deep route refused by Guardian, using micro")
+                    micro_driver = get_micro_driver()
+                    llm_response = await _generate(
+                        micro_driver.generate, chat_request.message
+                    )
+                    model_used = llm_response["model"]
+                    blocked_by_guardian = True
+                    fallback_used = True
 
             else:
                 # Fallback to micro for unknown routes
                 micro_driver = get_micro_driver()
-                llm_response = micro_driver.generate(chat_request.message)
+                llm_response = await _generate(
+                    micro_driver.generate, chat_request.message
+                )
                 model_used = llm_response["model"]
                 fallback_used = True
 
@@ -702,12 +935,16 @@ async def orchestrator_chat(
             # Fallback to micro
             try:
                 micro_driver = get_micro_driver()
-                llm_response = micro_driver.generate(chat_request.message)
+                llm_response = await _generate(
+                    micro_driver.generate, chat_request.message
+                )
                 model_used = llm_response["model"]
                 fallback_used = True
             except Exception as fallback_error:
                 logger.error("Fallback to micro also failed", error=str(fallback_error))
                 raise llm_error
+        finally:
+            admission.release(admission_ticket)
 
         # Get RAM peak and energy consumption
         ram_peak = ram_peak_mb()
@@ -732,104 +969,10 @@ async def orchestrator_chat(
         if llm_response and llm_response.get("route") == "fallback":
             route_final = "fallback"
 
-        # Log turn event for observability with LLM integration data
-        logger.info("About to log turn event", session_id=chat_request.session_id)
-        log_turn_event(
-            trace_id=trace_id,
-            session_id=chat_request.session_id,
-            route=route_final,
-            e2e_first_ms=response_latency_ms,
-            e2e_full_ms=response_latency_ms,
-            ram_peak=ram_peak,
-            tool_calls=tool_calls,
-            energy_wh=energy_wh,
-            guardian_state=guardian_state,
-            pii_masked=True,
-            consent_scopes=["basic_logging"],
-            rag_data={
-                "top_k": 0,
-                "hits": 0,
-                "llm_model": model_used,
-                "planner_schema_ok": (
-                    llm_response.get(
-                        "schema_ok",
-                        llm_response.get("meta", {}).get("schema_ok", False),
-                    )
-                    if llm_response
-                    else False
-                ),
-                "repair_used": (
-                    llm_response.get("repair_used", False) if llm_response else False
-                ),
-                "circuit_open": (
-                    llm_response.get("circuit_open", False) if llm_response else False
-                ),
-                "fallback_used": (
-                    llm_response.get("fallback_used", False)
-                    if llm_response
-                    else fallback_used
-                ),
-                "fallback_reason": (
-                    llm_response.get("fallback_reason", None) if llm_response else None
-                ),
-                "blocked_by_guardian": blocked_by_guardian,
-                "tokens_used": (
-                    llm_response.get("tokens_used", 0) if llm_response else 0
-                ),
-            },
-            input_text=chat_request.message,
-            output_text=(llm_response or {}).get("text", ""),
-            lang=(getattr(chat_request, "lang", None) or "sv"),
-        )
-        logger.info("Turn event logged successfully", trace_id=trace_id)
-
-        # Set route header for metrics middleware
-        response.headers["X-Route"] = route_final
-
-        # Build response with LLM integration
-        if llm_response:
-            response_text = llm_response["text"]
-        else:
-            response_text = f"LLM response not available for route {route}"
-
-        # Add metadata for observability
-        metadata = {
-            "route": route_final,
-            "llm_model": model_used,
-            "planner_schema_ok": (
-                llm_response.get(
-                    "schema_ok", llm_response.get("meta", {}).get("schema_ok", False)
-                )
-                if llm_response
-                else False
-            ),
-            "repair_used": (
-                llm_response.get("repair_used", False) if llm_response else False
-            ),
-            "circuit_open": (
-                llm_response.get("circuit_open", False) if llm_response else False
-            ),
-            "fallback_used": (
-                llm_response.get("fallback_used", False)
-                if llm_response
-                else fallback_used
-            ),
-            "fallback_reason": (
-                llm_response.get("fallback_reason", None) if llm_response else None
-            ),
-            "blocked_by_guardian": blocked_by_guardian,
-            "tokens_used": llm_response.get("tokens_used", 0) if llm_response else 0,
-            "planner_execution": planner_execution,
-            "nlu": (
-                {"intent": nlu_intent_label, "slots": nlu_slots}
-                if (nlu_intent_label or nlu_slots)
-                else None
-            ),
-        }
-
-        # Add shadow mode metadata if enabled
+        # Assemble the turn result once; response and turn event share its bytes
+        shadow_meta = {"enabled": False}
         if shadow_enabled and "shadow_response" in locals():
-            metadata["shadow"] = {
+            shadow_meta = {
                 "enabled": True,
                 "canary_eligible": shadow_response.canary_eligible,
                 "canary_routed": shadow_response.canary_routed,
@@ -841,20 +984,53 @@ async def orchestrator_chat(
                     "latency_delta_ms", 0
                 ),
             }
-        else:
-            metadata["shadow"] = {"enabled": False}
-
-        response_data = ChatResponse(
-            session_id=chat_request.session_id,
-            timestamp=int(time.time() * 1000),
-            trace_id=trace_id,
-            response=response_text,
-            model_used=route,  # Use route as enum value instead of actual model name
-            latency_ms=response_latency_ms,
-            metadata=metadata,
+        result = TurnResult.from_llm(
+            route_final,
+            model_used,
+            llm_response,
+            requested_route=route,
+            fallback_used=fallback_used,
+            blocked_by_guardian=blocked_by_guardian,
+            planner_execution=planner_execution,
+            nlu=(
+                {"intent": nlu_intent_label, "slots": nlu_slots}
+                if (nlu_intent_label or nlu_slots)
+                else None
+            ),
+            shadow=shadow_meta,
+        )
+        body = result.response_body(
+            chat_request.session_id,
+            int(time.time() * 1000),
+            trace_id,
+            response_latency_ms,
         )
 
-        return response_data
+        # Log turn event for observability with LLM integration data
+        with span("telemetry.write"):
+            log_turn_event(
+                trace_id=trace_id,
+                session_id=chat_request.session_id,
+                route=route_final,
+                e2e_first_ms=response_latency_ms,
+                e2e_full_ms=response_latency_ms,
+                ram_peak=ram_peak,
+                tool_calls=tool_calls,
+                energy_wh=energy_wh,
+                guardian_state=guardian_state,
+                pii_masked=True,
+                consent_scopes=["basic_logging"],
+                input_text=chat_request.message,
+                lang=(getattr(chat_request, "lang", None) or "sv"),
+                spans=turn.to_event(),
+                stages_ms=turn.stage_ms(),
+                result=result,
+            )
+
+        # Set route header for metrics middleware
+        response.headers["X-Route"] = route_final
+
+        return json_response(body, response.headers)
 
     except HTTPException:
         raise
@@ -898,6 +1074,8 @@ async def orchestrator_chat(
                 input_text=chat_request.message,
                 output_text="",
                 lang=(getattr(chat_request, "lang", None) or "sv"),
+                spans=turn.to_event(),
+                stages_ms=turn.stage_ms(),
             )
         except Exception as log_error:
             logger.error("Failed to log turn event on error", error=str(log_error))
@@ -919,6 +1097,8 @@ async def orchestrator_chat(
                 trace_id=trace_id,
             ).model_dump(),
         )
+    finally:
+        finish_turn(turn, route=route_final)
 
 
 @router.post("/run")
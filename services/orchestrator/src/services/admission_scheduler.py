@@ -0,0 +1,323 @@
+"""
+Admission Scheduler
+Per-route concurrency slots with priority queues and deadline-based shedding
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Request was shed by the admission scheduler"""
+
+    def __init__(self, route: str, reason: str, retry_after: int = 1):
+        super().__init__(f"Admission rejected for {route}: {reason}")
+        self.route = route
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class RouteLimits:
+    """Concurrency and queueing limits for one route"""
+
+    slots: int
+    max_queue: int
+    deadline_ms: int  # Default end-to-end budget for queued requests
+
+
+def _limits_from_env(route: str, slots: int, max_queue: int, deadline_ms: int):
+    prefix = f"ADMISSION_{route.upper()}"
+    return RouteLimits(
+        slots=int(os.getenv(f"{prefix}_SLOTS", slots)),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue)),
+        deadline_ms=int(os.getenv(f"{prefix}_DEADLINE_MS", deadline_ms)),
+    )
+
+
+def default_route_limits() -> Dict[str, RouteLimits]:
+    """Cheap micro turns get many slots; deep turns queue behind a single slot"""
+    return {
+        "micro": _limits_from_env("micro", slots=8, max_queue=64, deadline_ms=2000),
+        "planner": _limits_from_env("planner", slots=2, max_queue=16, deadline_ms=8000),
+        "deep": _limits_from_env("deep", slots=1, max_queue=8, deadline_ms=20000),
+    }
+
+
+@dataclass(order=True)
+class _Waiter:
+    sort_key: tuple
+    future: asyncio.Future = field(compare=False)
+    deadline: float = field(compare=False)
+    estimated_latency_ms: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+@dataclass
+class _RouteState:
+    limits: RouteLimits
+    active: int = 0
+    queue: List[_Waiter] = field(default_factory=list)
+    admitted: int = 0
+    queued: int = 0
+    shed_deadline: int = 0
+    shed_queue_full: int = 0
+    wait_ms_total: float = 0.0
+    ewma_service_ms: Optional[float] = None
+
+
+@dataclass
+class AdmissionTicket:
+    """Held while a request occupies a route slot"""
+
+    route: str
+    admitted_at: float
+    waited_ms: float
+    released: bool = False
+
+
+class AdmissionScheduler:
+    """
+    Bounded per-route concurrency with priority queues
+
+    Queued requests are ordered by priority (high first), then by deadline.
+    Requests are shed when their deadline cannot be met - either up front
+    (estimated queue wait + own latency exceeds the budget) or when the
+    deadline passes while waiting - never simply because they arrived last.
+    """
+
+    SERVICE_EWMA_ALPHA = 0.2
+
+    def __init__(self, limits: Optional[Dict[str, RouteLimits]] = None):
+        self._routes: Dict[str, _RouteState] = {
+            route: _RouteState(limits=route_limits)
+            for route, route_limits in (limits or default_route_limits()).items()
+        }
+        self._seq = itertools.count()
+
+    def _state(self, route: str) -> _RouteState:
+        state = self._routes.get(route)
+        if state is None:
+            # Unknown routes share micro's limits but get their own slots
+            state = _RouteState(limits=self._routes["micro"].limits)
+            self._routes[route] = state
+        return state
+
+    def _estimated_wait_ms(self, state: _RouteState, priority: int) -> float:
+        """Expected queueing delay for a new request at this priority"""
+        ahead = sum(1 for w in state.queue if -w.sort_key[0] >= priority)
+        if state.active < state.limits.slots and ahead == 0:
+            return 0.0
+        per_slot_ms = state.ewma_service_ms or 0.0
+        if per_slot_ms == 0.0 and state.queue:
+            per_slot_ms = sum(w.estimated_latency_ms for w in state.queue) / len(
+                state.queue
+            )
+        return (ahead + 1) * per_slot_ms / max(state.limits.slots, 1)
+
+    async def acquire(
+        self,
+        route: str,
+        priority: int = 5,
+        estimated_latency_ms: int = 0,
+        deadline_ms: Optional[int] = None,
+    ) -> AdmissionTicket:
+        """
+        Wait for a slot on the given route
+
+        Args:
+            route: "micro", "planner" or "deep"
+            priority: 1-10, higher is served first
+            estimated_latency_ms: Expected service time once admitted
+            deadline_ms: Budget from now; defaults to the route's deadline
+
+        Raises:
+            AdmissionRejected: When the request cannot be served within its deadline
+        """
+        state = self._state(route)
+        now = time.monotonic()
+        budget_ms = deadline_ms if deadline_ms is not None else state.limits.deadline_ms
+        deadline = now + budget_ms / 1000.0
+
+        # Fast path: free slot and nobody queued ahead
+        if state.active < state.limits.slots and not state.queue:
+            state.active += 1
+            state.admitted += 1
+            return AdmissionTicket(route=route, admitted_at=now, waited_ms=0.0)
+
+        if len(state.queue) >= state.limits.max_queue and not self._make_room(
+            route, state, now, priority, budget_ms - estimated_latency_ms
+        ):
+            state.shed_queue_full += 1
+            raise AdmissionRejected(route, "queue_full", self._retry_after(state))
+
+        expected_ms = self._estimated_wait_ms(state, priority) + estimated_latency_ms
+        if expected_ms > budget_ms:
+            state.shed_deadline += 1
+            raise AdmissionRejected(
+                route, "deadline_unreachable", self._retry_after(state)
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(
+            sort_key=(-priority, deadline, next(self._seq)),
+            future=future,
+            deadline=deadline,
+            estimated_latency_ms=estimated_latency_ms,
+            enqueued_at=now,
+        )
+        heapq.heappush(state.queue, waiter)
+        state.queued += 1
+
+        try:
+            await asyncio.wait_for(future, timeout=max(deadline - now, 0.0))
+        except asyncio.TimeoutError:
+            self._remove_waiter(state, waiter)
+            state.shed_deadline += 1
+            raise AdmissionRejected(
+                route, "deadline_expired", self._retry_after(state)
+            ) from None
+        except asyncio.CancelledError:
+            # Client went away; hand the slot on if it was already granted
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self._release_slot(route, state)
+            else:
+                self._remove_waiter(state, waiter)
+            raise
+
+        admitted_at = time.monotonic()
+        waited_ms = (admitted_at - now) * 1000
+        state.wait_ms_total += waited_ms
+        return AdmissionTicket(
+            route=route, admitted_at=admitted_at, waited_ms=waited_ms
+        )
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Return a slot and wake the best eligible waiter"""
+        if ticket.released:
+            return
+        ticket.released = True
+        state = self._state(ticket.route)
+
+        service_ms = (time.monotonic() - ticket.admitted_at) * 1000
+        if state.ewma_service_ms is None:
+            state.ewma_service_ms = service_ms
+        else:
+            state.ewma_service_ms += self.SERVICE_EWMA_ALPHA * (
+                service_ms - state.ewma_service_ms
+            )
+
+        self._release_slot(ticket.route, state)
+
+    def _release_slot(self, route: str, state: _RouteState) -> None:
+        state.active -= 1
+        now = time.monotonic()
+        while state.queue and state.active < state.limits.slots:
+            waiter = heapq.heappop(state.queue)
+            if waiter.future.done():
+                continue  # Timed out or cancelled
+            if waiter.deadline <= now:
+                continue  # Its wait_for will shed it
+            state.active += 1
+            state.admitted += 1
+            waiter.future.set_result(True)
+
+    def _make_room(
+        self,
+        route: str,
+        state: _RouteState,
+        now: float,
+        priority: int,
+        slack_ms: float,
+    ) -> bool:
+        """
+        Free a queue position for a new request on a full queue
+
+        Already-resolved or expired waiters are dropped first (their own
+        wait_for sheds them). Otherwise the waiter with the least slack at the
+        same or lower priority is evicted - unless the new request has even
+        less slack, in which case it is the one to shed.
+        """
+        live = [w for w in state.queue if not w.future.done() and w.deadline > now]
+        if len(live) < len(state.queue):
+            state.queue[:] = live
+            heapq.heapify(state.queue)
+            if len(state.queue) < state.limits.max_queue:
+                return True
+
+        def waiter_slack_ms(w: _Waiter) -> float:
+            return (w.deadline - now) * 1000 - w.estimated_latency_ms
+
+        candidates = [w for w in state.queue if -w.sort_key[0] <= priority]
+        if not candidates:
+            return False
+        victim = min(candidates, key=waiter_slack_ms)
+        if waiter_slack_ms(victim) >= slack_ms:
+            return False
+
+        self._remove_waiter(state, victim)
+        state.shed_queue_full += 1
+        victim.future.set_exception(
+            AdmissionRejected(route, "queue_full", self._retry_after(state))
+        )
+        return True
+
+    @staticmethod
+    def _remove_waiter(state: _RouteState, waiter: _Waiter) -> None:
+        try:
+            state.queue.remove(waiter)
+            heapq.heapify(state.queue)
+        except ValueError:
+            pass
+
+    @staticmethod
+    def _retry_after(state: _RouteState) -> int:
+        service_s = (state.ewma_service_ms or state.limits.deadline_ms) / 1000.0
+        backlog = len(state.queue) + state.active
+        return max(1, int(service_s * backlog / max(state.limits.slots, 1)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-route slot usage, queue depth and shedding counters"""
+        stats = {}
+        for route, state in self._routes.items():
+            stats[route] = {
+                "slots": state.limits.slots,
+                "active": state.active,
+                "queue_depth": len(state.queue),
+                "admitted": state.admitted,
+                "queued": state.queued,
+                "shed_deadline": state.shed_deadline,
+                "shed_queue_full": state.shed_queue_full,
+                "avg_wait_ms": (
+                    round(state.wait_ms_total / state.queued, 1)
+                    if state.queued
+                    else 0.0
+                ),
+                "ewma_service_ms": (
+                    round(state.ewma_service_ms, 1)
+                    if state.ewma_service_ms is not None
+                    else None
+                ),
+            }
+        return stats
+
+
+# Global scheduler instance
+_admission_scheduler: Optional[AdmissionScheduler] = None
+
+
+def get_admission_scheduler() -> AdmissionScheduler:
+    """Get or create global admission scheduler"""
+    global _admission_scheduler
+    if _admission_scheduler is None:
+        _admission_scheduler = AdmissionScheduler()
+    return _admission_scheduler
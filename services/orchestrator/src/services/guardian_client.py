@@ -12,6 +12,10 @@ import structlog
 
 logger = structlog.get_logger(__name__)
 
+# Guardian's forecast leads a RAM threshold crossing by ~20 s
+# (prediction_lead_s), so deep admission must not use the 90 s health cache
+PREDICTION_MAX_AGE_S = float(os.getenv("GUARDIAN_PREDICTION_MAX_AGE_S", "5"))
+
 
 class GuardianClient:
     """Client for Guardian safety system integration"""
@@ -36,6 +40,7 @@ class GuardianClient:
         self._last_health: Optional[Dict[str, Any]] = None
         self._health_cache_ttl = 90.0  # Cache for 90 seconds (production-ready)
         self._last_health_check = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
 
     async def initialize(self) -> None:
         """Initialize HTTP client"""
@@ -52,23 +57,29 @@ class GuardianClient:
             await self._client.aclose()
             logger.info("Guardian client closed")
 
-    async def get_health(self, use_cache: bool = True) -> Dict[str, Any]:
+    async def get_health(
+        self, use_cache: bool = True, max_age_s: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Get Guardian health status with caching and retry logic
 
         Args:
             use_cache: Whether to use cached result if available
+            max_age_s: Tighter cache age for this call (e.g. fresh forecast)
 
         Returns:
             Guardian health status dict
         """
         current_time = asyncio.get_event_loop().time()
+        cache_ttl = self._health_cache_ttl
+        if max_age_s is not None:
+            cache_ttl = min(cache_ttl, max_age_s)
 
         # Return cached result if recent
         if (
             use_cache
             and self._last_health
-            and current_time - self._last_health_check < self._health_cache_ttl
+            and current_time - self._last_health_check < cache_ttl
         ):
             return self._last_health
 
@@ -138,20 +149,40 @@ class GuardianClient:
             "error": "All connection attempts failed",
         }
 
+    def health_snapshot(self, max_age_s: float) -> Optional[Dict[str, Any]]:
+        """
+        Last successful health response if it is at most max_age_s old (no I/O).
+        A missing or older snapshot schedules one background refresh so the
+        next caller sees a live value.
+        """
+        age = asyncio.get_event_loop().time() - self._last_health_check
+        if self._last_health and age <= max_age_s:
+            return self._last_health
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.get_health(use_cache=False))
+        return None
+
     async def check_admission(
-        self, request_data: Optional[Dict[str, Any]] = None
+        self,
+        request_data: Optional[Dict[str, Any]] = None,
+        health: Optional[Dict[str, Any]] = None,
     ) -> bool:
         """
         Check if request should be admitted based on Guardian state
 
         Args:
             request_data: Optional request data for advanced admission control
+            health: Health snapshot already fetched for this turn (no refetch)
 
         Returns:
             True if request should be admitted, False otherwise
         """
         try:
-            health = await self.get_health()
+            route = (request_data or {}).get("route")
+            if health is None:
+                health = await self.get_health(
+                    max_age_s=PREDICTION_MAX_AGE_S if route == "deep" else None
+                )
             state = health.get("state", "UNKNOWN")
 
             # Block during emergency and lockdown states
@@ -159,6 +190,10 @@ class GuardianClient:
                 logger.info("Guardian blocking request", state=state)
                 return False
 
+            # Refuse deep-route admission ahead of a predicted RAM crossing
+            if route == "deep" and not self.deep_admission_allowed(health):
+                return False
+
             # Allow during normal and brownout states
             # (brownout may have rate limiting but doesn't block entirely)
             return True
@@ -169,6 +204,17 @@ class GuardianClient:
             # In production, this should be configurable
             return True
 
+    def deep_admission_allowed(self, health: Dict[str, Any]) -> bool:
+        """False when Guardian forecasts RAM pressure for loading the deep model"""
+        prediction = health.get("prediction") or {}
+        if prediction.get("deep_admission") is False:
+            logger.info(
+                "Guardian refusing deep admission (predicted pressure)",
+                forecast=prediction.get("forecast"),
+            )
+            return False
+        return True
+
     async def get_recommended_model(
         self, request_data: Optional[Dict[str, Any]] = None
     ) -> str:
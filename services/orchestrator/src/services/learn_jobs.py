@@ -0,0 +1,179 @@
+"""
+Learn Jobs
+Background runner for the learning ingestion pipeline with pollable job status
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+MAX_JOB_HISTORY = 50
+STDERR_TAIL_BYTES = 2000
+
+
+@dataclass
+class IngestJob:
+    """One queued/running/finished ingestion run"""
+
+    job_id: str
+    status: str = "queued"  # queued | running | succeeded | failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, int] = field(default_factory=dict)
+    result: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "v": "1",
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_s": (
+                round(self.finished_at - self.started_at, 3)
+                if self.finished_at and self.started_at
+                else None
+            ),
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class IngestJobManager:
+    """
+    Runs ingestion subprocesses one at a time off the request path.
+
+    The ingest script is incremental (watermarks), so a job that is still
+    queued already covers any data that arrives before it starts: submitting
+    while a job is queued returns that job instead of queueing another.
+    """
+
+    def __init__(
+        self,
+        command: Callable[[], List[str]],
+        timeout_s: float = 3600.0,
+        max_history: int = MAX_JOB_HISTORY,
+        on_finished: Optional[Callable[[IngestJob], None]] = None,
+    ):
+        """
+        Args:
+            command: Builds the ingest command line (run with --progress)
+            timeout_s: Kill a run that takes longer than this
+            max_history: Finished jobs kept for polling
+            on_finished: Called with each job once it succeeded or failed
+        """
+        self.command = command
+        self.on_finished = on_finished
+        self.timeout_s = timeout_s
+        self.max_history = max_history
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock: Optional[asyncio.Lock] = None
+        self._tasks: set = set()
+
+    def submit(self) -> IngestJob:
+        """Enqueue an ingestion run (or return the one already queued)"""
+        for job in self._jobs.values():
+            if job.status == "queued":
+                return job
+
+        job = IngestJob(job_id=uuid.uuid4().hex[:12])
+        self._jobs[job.job_id] = job
+        self._trim()
+
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info("Ingest job queued", job_id=job.job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        return self._jobs.get(job_id)
+
+    def recent(self) -> List[IngestJob]:
+        return list(reversed(self._jobs.values()))
+
+    def _trim(self) -> None:
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in ("succeeded", "failed")
+        ]
+        for job_id in finished[: max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+    async def _run(self, job: IngestJob) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                await asyncio.wait_for(self._execute(job), timeout=self.timeout_s)
+                job.status = "succeeded"
+            except asyncio.TimeoutError:
+                job.status = "failed"
+                job.error = f"Ingestion timed out after {self.timeout_s:.0f}s"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                if self.on_finished:
+                    try:
+                        self.on_finished(job)
+                    except Exception as e:
+                        logger.warning("Ingest job hook failed", error=str(e))
+                job.done.set()
+
+        logger.info(
+            "Ingest job finished",
+            job_id=job.job_id,
+            status=job.status,
+            error=job.error,
+            duration_s=round(job.finished_at - job.started_at, 3),
+        )
+
+    async def _execute(self, job: IngestJob) -> None:
+        proc = await asyncio.create_subprocess_exec(
+            *self.command(),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stderr_task = asyncio.create_task(proc.stderr.read())
+        try:
+            async for raw in proc.stdout:
+                try:
+                    message = json.loads(raw)
+                except ValueError:
+                    continue
+                if not isinstance(message, dict):
+                    continue
+                if "progress" in message:
+                    job.progress = message["progress"]
+                elif "result" in message:
+                    job.result = message["result"] or {}
+            returncode = await proc.wait()
+        except asyncio.CancelledError:
+            proc.kill()
+            await proc.wait()
+            raise
+        finally:
+            stderr = await stderr_task
+
+        if returncode != 0:
+            tail = stderr.decode("utf-8", "replace")[-STDERR_TAIL_BYTES:]
+            raise RuntimeError(f"Ingestion failed (exit {returncode}): {tail}")
@@ -78,3 +78,10 @@ async def routes():
         "deep_p95_ms": snap.get("deep", {}).get("p95_ms"),
         "raw": snap,
     }
+
+
+@router.get("/stages")
+async def stages():
+    """Per-stage turn latency (p50/p95 over the sliding window)"""
+    snap = METRICS.snapshot()
+    return {"window_s": snap["window_s"], "stages": snap["stages"]}
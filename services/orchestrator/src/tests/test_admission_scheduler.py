@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from src.services.admission_scheduler import (
+    AdmissionRejected,
+    AdmissionScheduler,
+    RouteLimits,
+)
+
+
+def _scheduler():
+    return AdmissionScheduler(
+        {
+            "micro": RouteLimits(slots=2, max_queue=8, deadline_ms=2000),
+            "deep": RouteLimits(slots=1, max_queue=2, deadline_ms=2000),
+        }
+    )
+
+
+async def _test_micro_flows_while_deep_is_busy():
+    scheduler = _scheduler()
+    deep = await scheduler.acquire("deep")
+
+    micro = await asyncio.wait_for(scheduler.acquire("micro"), timeout=0.1)
+    assert micro.waited_ms == 0.0
+
+    scheduler.release(micro)
+    scheduler.release(deep)
+
+
+def test_micro_flows_while_deep_is_busy():
+    asyncio.run(_test_micro_flows_while_deep_is_busy())
+
+
+async def _test_queue_is_served_by_priority():
+    scheduler = _scheduler()
+    holder = await scheduler.acquire("deep")
+    order = []
+
+    async def waiter(priority):
+        ticket = await scheduler.acquire("deep", priority=priority)
+        order.append(priority)
+        scheduler.release(ticket)
+
+    tasks = [asyncio.create_task(waiter(p)) for p in (3, 9)]
+    await asyncio.sleep(0.01)
+    scheduler.release(holder)
+    await asyncio.gather(*tasks)
+
+    assert order == [9, 3]
+
+
+def test_queue_is_served_by_priority():
+    asyncio.run(_test_queue_is_served_by_priority())
+
+
+async def _test_shed_by_deadline():
+    scheduler = _scheduler()
+    holder = await scheduler.acquire("deep")
+
+    with pytest.raises(AdmissionRejected) as exc:
+        await scheduler.acquire("deep", deadline_ms=20)
+    assert exc.value.reason == "deadline_expired"
+
+    with pytest.raises(AdmissionRejected) as exc:
+        await scheduler.acquire("deep", estimated_latency_ms=5000)
+    assert exc.value.reason == "deadline_unreachable"
+
+    scheduler.release(holder)
+    assert scheduler.get_stats()["deep"]["shed_deadline"] == 2
+
+
+def test_shed_by_deadline():
+    asyncio.run(_test_shed_by_deadline())
+
+
+async def _test_full_queue_sheds_least_slack():
+    scheduler = _scheduler()
+    holder = await scheduler.acquire("deep")
+
+    relaxed = asyncio.create_task(scheduler.acquire("deep", deadline_ms=2000))
+    tight = asyncio.create_task(scheduler.acquire("deep", deadline_ms=300))
+    await asyncio.sleep(0.01)
+
+    # Full queue: the newcomer displaces the waiter closest to its deadline
+    newcomer = asyncio.create_task(scheduler.acquire("deep", deadline_ms=1000))
+    with pytest.raises(AdmissionRejected) as exc:
+        await tight
+    assert exc.value.reason == "queue_full"
+
+    # A newcomer with even less slack than everyone queued is the one shed
+    with pytest.raises(AdmissionRejected) as exc:
+        await scheduler.acquire("deep", deadline_ms=100)
+    assert exc.value.reason == "queue_full"
+
+    scheduler.release(holder)
+    scheduler.release(await newcomer)
+    scheduler.release(await relaxed)
+    assert scheduler.get_stats()["deep"]["shed_queue_full"] == 2
+
+
+def test_full_queue_sheds_least_slack():
+    asyncio.run(_test_full_queue_sheds_least_slack())
@@ -0,0 +1,131 @@
+import json
+import os
+
+import numpy as np
+
+from src.policies.compiled_routing import CompiledRoutingPolicy, compile_routing_policy
+from src.policies.rl_policy_loader import RLPolicyLoader
+from src.policies.rl_routing_policy import RLRoutingPolicy
+
+ARMS = ["micro", "planner", "deep"]
+NUMERIC = ["text_len", "word_count", "intent_confidence"]
+HASH_DIM = 16
+
+
+def _policy_data(seed=0):
+    rng = np.random.default_rng(seed)
+    d = HASH_DIM + len(NUMERIC)
+    models = {}
+    for arm in ARMS:
+        m = rng.normal(size=(d, d))
+        models[arm] = {
+            "w": rng.normal(size=d).tolist(),
+            "A_inv": np.linalg.inv(m @ m.T + np.eye(d)).tolist(),
+        }
+    return {
+        "routing_policy": {
+            "algorithm": "linucb",
+            "arms": ARMS,
+            "alpha": 0.5,
+            "models": models,
+        },
+        "feature_maker": {
+            "dim": HASH_DIM,
+            "categorical_keys": ["intent", "lang", "guardian_state"],
+            "numeric_keys": NUMERIC,
+            "means": {"text_len": 40.0, "word_count": 7.0},
+            "stds": {"text_len": 20.0, "word_count": 3.0},
+        },
+    }
+
+
+def _naive_scores(data, x):
+    routing = data["routing_policy"]
+    out = {}
+    for arm in routing["arms"]:
+        w = np.array(routing["models"][arm]["w"])
+        a_inv = np.array(routing["models"][arm]["A_inv"])
+        out[arm] = (float(x @ w), routing["alpha"] * float(np.sqrt(x @ a_inv @ x)))
+    return out
+
+
+def test_compiled_scores_match_per_arm_loop():
+    data = _policy_data()
+    compiled = CompiledRoutingPolicy.from_policy_data(data)
+    x = compiled.featurize(
+        {"intent": "time.now", "lang": "sv", "text_len": 30, "word_count": 5}
+    )
+
+    means, widths = compiled.score(x)
+    naive = _naive_scores(data, x)
+    for i, arm in enumerate(compiled.arms):
+        assert np.isclose(means[i], naive[arm][0])
+        assert np.isclose(widths[i], naive[arm][1])
+
+
+def test_batch_scoring_matches_single():
+    compiled = CompiledRoutingPolicy.from_policy_data(_policy_data(1))
+    episodes = [
+        {"intent": intent, "lang": "sv", "text_len": n, "word_count": n // 5}
+        for intent, n in [
+            ("greeting.hello", 5),
+            ("calendar.create", 80),
+            ("unknown", 300),
+        ]
+    ]
+    X = compiled.featurize_batch(episodes)
+    means, widths = compiled.score_batch(X)
+
+    for i, episode in enumerate(episodes):
+        m, w = compiled.score(compiled.featurize(episode))
+        assert np.allclose(means[i], m)
+        assert np.allclose(widths[i], w)
+
+
+def test_trainer_layout_and_bad_shapes():
+    data = _policy_data()
+    routing = data["routing_policy"]
+    trainer_layout = {
+        "routing_policy": {
+            "arms": ARMS,
+            "alpha": 0.5,
+            "weights": {a: routing["models"][a]["w"] for a in ARMS},
+            "A_inv": {a: routing["models"][a]["A_inv"] for a in ARMS},
+        },
+        "feature_maker": data["feature_maker"],
+    }
+    assert compile_routing_policy(trainer_layout).arms == ARMS
+
+    data["feature_maker"]["dim"] = HASH_DIM + 1
+    assert compile_routing_policy(data) is None
+
+
+def test_greedy_routing_picks_best_mean():
+    data = _policy_data(2)
+    policy = RLRoutingPolicy(data, enable_exploration=False)
+    decision = policy.decide_route("vad är klockan", {"intent": "time.now"})
+
+    scores = decision.features["arm_scores"]
+    assert decision.route == max(scores, key=lambda a: scores[a]["mean"])
+
+    batch = policy.decide_routes_batch(["vad är klockan"], [{"intent": "time.now"}])
+    assert batch[0].route == decision.route
+
+
+def _write_pack(policy_dir, data, mtime):
+    path = policy_dir / "active_policy_pack.json"
+    path.write_text(json.dumps({"version": "t", "policies": {"routing": data}}))
+    os.utime(path, (mtime, mtime))
+
+
+def test_policy_shares_loader_compiled_across_reloads(tmp_path):
+    _write_pack(tmp_path, _policy_data(3), 1_000_000)
+    loader = RLPolicyLoader(policy_dir=str(tmp_path), enable_hot_reload=False)
+    policy = RLRoutingPolicy.from_loader(loader, enable_exploration=False)
+    assert policy.compiled is loader.get_compiled_routing_policy()
+
+    first = policy.compiled
+    _write_pack(tmp_path, _policy_data(4), 2_000_000)
+    loader.load_all_policies()
+    assert policy.compiled is loader.get_compiled_routing_policy()
+    assert policy.compiled is not first
@@ -0,0 +1,81 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.intent_guard import GuardDecisionCache, guard_intent_confident_sv
+from src.middleware.instrumentation import InstrumentationMiddleware
+from src.routers import orchestrator
+
+
+class SnapshotGuardian:
+    def __init__(self, state):
+        self.state = state
+
+    def health_snapshot(self, max_age_s):
+        return {"state": self.state} if self.state else None
+
+    async def get_health(self, max_age_s=None):
+        return {"state": "NORMAL"}
+
+    async def check_admission(self, request_data=None, health=None):
+        return True
+
+
+def _client(guardian):
+    app = FastAPI()
+    app.include_router(orchestrator.router, prefix="/api/orchestrator")
+    app.add_middleware(InstrumentationMiddleware)
+    app.dependency_overrides[orchestrator.get_guardian_client] = lambda: guardian
+    return TestClient(app)
+
+
+def test_confident_guard_and_negative_cache():
+    assert guard_intent_confident_sv("Hej Alice!") == "greeting.hello"
+    assert guard_intent_confident_sv("Hej, boka ett möte imorgon") is None
+
+    cache = GuardDecisionCache(max_entries=1)
+    key = cache.key("s1", "  Hej  ALICE ")
+    cache.put(key, None)
+    assert cache.get(cache.key("s1", "hej alice")) == (True, None)
+    assert cache.get(cache.key("s2", "hej alice")) == (False, None)
+    cache.put(cache.key("s2", "x"), "greeting.hello")
+    assert cache.info()["size"] == 1
+
+
+def test_guard_turn_short_circuits_with_known_good_guardian(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("TRACE_EXPORT", "0")
+    client = _client(SnapshotGuardian("NORMAL"))
+
+    resp = client.post(
+        "/api/orchestrator/chat",
+        json={"v": "1", "session_id": "fast-1", "message": "Hej Alice!"},
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["x-fast-path"] == "guard"
+    body = resp.json()
+    assert json.loads(body["response"])["intent"] == "greeting.hello"
+    assert body["metadata"]["llm_model"] == "intent_guard"
+
+    [events] = tmp_path.glob("*/events_*.jsonl")
+    event = json.loads(events.read_text().splitlines()[-1])
+    assert event["route"] == "micro"
+    assert set(event["stages_ms"]) == {"intent.guard", "guardian.snapshot"}
+
+
+def test_no_fast_path_without_live_guardian_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_DIR", str(tmp_path))
+    monkeypatch.setenv("TRACE_EXPORT", "0")
+    client = _client(SnapshotGuardian(None))
+
+    # Full path: NLU is unreachable here (fail-open), guard answers on micro
+    resp = client.post(
+        "/api/orchestrator/chat",
+        json={"v": "1", "session_id": "fast-2", "message": "Hej Alice!"},
+    )
+
+    assert resp.status_code == 200
+    assert "x-fast-path" not in resp.headers
+    assert json.loads(resp.json()["response"])["intent"] == "greeting.hello"
@@ -0,0 +1,50 @@
+import asyncio
+from datetime import timedelta
+
+from src.services.guardian_client import GuardianClient
+
+
+class CountingHTTP:
+    def __init__(self, payloads):
+        self.payloads = list(payloads)
+        self.calls = 0
+
+    async def get(self, url, timeout=None):
+        self.calls += 1
+        payload = self.payloads.pop(0)
+
+        class Resp:
+            elapsed = timedelta(milliseconds=1)
+
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return payload
+
+        return Resp()
+
+
+def test_deep_admission_uses_fresh_prediction_and_single_snapshot():
+    async def run():
+        client = GuardianClient(base_url="http://guardian")
+        client._client = CountingHTTP(
+            [
+                {"state": "NORMAL", "prediction": {"deep_admission": True}},
+                {"state": "NORMAL", "prediction": {"deep_admission": False}},
+            ]
+        )
+        first = await client.get_health()
+        # Pretend the cached snapshot is 30 s old: fine for state, stale forecast
+        client._last_health_check -= 30
+        assert await client.get_health() is first
+        fresh = await client.get_health(max_age_s=5)
+        assert client._client.calls == 2
+
+        # Admission on an already-fetched snapshot does no I/O
+        assert await client.check_admission({"type": "chat"}, health=fresh)
+        assert not client.deep_admission_allowed(fresh)
+        assert not await client.check_admission({"route": "deep"}, health=fresh)
+        assert client._client.calls == 2
+
+    asyncio.run(run())
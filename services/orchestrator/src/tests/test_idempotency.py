@@ -0,0 +1,118 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.middleware.idempotency import IdempotencyMiddleware, InMemoryIdempotencyStore
+
+
+def _app(max_body_bytes=1024):
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/api/work")
+    async def work(payload: dict):
+        app.state.calls += 1
+        await asyncio.sleep(0.05)
+        return {"calls": app.state.calls, "echo": payload}
+
+    @app.post("/api/stream")
+    async def stream():
+        app.state.calls += 1
+
+        async def chunks():
+            for _ in range(4):
+                yield b"x" * 512
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.post("/api/fail")
+    async def fail():
+        app.state.calls += 1
+        return StreamingResponse(iter([b"nope"]), status_code=503)
+
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=InMemoryIdempotencyStore(),
+        max_body_bytes=max_body_bytes,
+    )
+    return app
+
+
+def test_retry_replays_without_reexecuting():
+    app = _app()
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "abc123"}
+
+    first = client.post("/api/work", json={"q": 1}, headers=headers)
+    second = client.post("/api/work", json={"q": 1}, headers=headers)
+
+    assert first.json() == second.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert app.state.calls == 1
+
+
+def test_concurrent_duplicates_execute_once():
+    app = _app()
+    middleware = IdempotencyMiddleware(app.router, store=InMemoryIdempotencyStore())
+
+    async def call():
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b'{"q": 1}', "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/api/work",
+            "headers": [
+                (b"idempotency-key", b"same"),
+                (b"content-type", b"application/json"),
+            ],
+            "query_string": b"",
+        }
+        await middleware(scope, receive, send)
+        return b"".join(m.get("body", b"") for m in sent[1:])
+
+    async def run():
+        return await asyncio.gather(*[call() for _ in range(5)])
+
+    bodies = asyncio.run(run())
+    assert len(set(bodies)) == 1
+    assert app.state.calls == 1
+
+
+def test_payload_mismatch_rejected():
+    client = TestClient(_app())
+    headers = {"Idempotency-Key": "k1"}
+    client.post("/api/work", json={"q": 1}, headers=headers)
+
+    assert client.post("/api/work", json={"q": 2}, headers=headers).status_code == 422
+
+
+def test_large_streaming_body_passes_through_but_is_not_replayed():
+    app = _app(max_body_bytes=1024)
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "big"}
+
+    first = client.post("/api/stream", headers=headers)
+    assert len(first.content) == 2048
+
+    second = client.post("/api/stream", headers=headers)
+    assert second.status_code == 409
+    assert app.state.calls == 1
+
+
+def test_errors_are_not_cached():
+    app = _app()
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "err"}
+
+    client.post("/api/fail", headers=headers)
+    client.post("/api/fail", headers=headers)
+    assert app.state.calls == 2
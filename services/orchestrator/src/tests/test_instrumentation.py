@@ -0,0 +1,54 @@
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.metrics import METRICS
+from src.middleware.instrumentation import InstrumentationMiddleware
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/api/items/{item_id}")
+    async def item(item_id: int, request: Request, response: Response):
+        response.headers["X-Route"] = "micro"
+        return {"trace_id": request.state.trace_id}
+
+    @app.get("/api/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk{i};".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/api/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(InstrumentationMiddleware)
+    return app
+
+
+def test_trace_id_and_single_measurement_feed_metrics():
+    client = TestClient(_app())
+    before = len(METRICS.lat["micro"])
+
+    resp = client.get("/api/items/7")
+
+    assert resp.status_code == 200
+    assert resp.headers["x-trace-id"] == resp.json()["trace_id"]
+    assert len(METRICS.lat["micro"]) == before + 1
+    assert METRICS.codes[-1][1] == 200
+
+
+def test_streaming_body_passes_through_and_errors_are_counted():
+    client = TestClient(_app(), raise_server_exceptions=False)
+
+    resp = client.get("/api/stream")
+    assert resp.text == "chunk0;chunk1;chunk2;"
+    assert "x-trace-id" in resp.headers
+
+    resp = client.get("/api/boom")
+    assert resp.status_code == 500
+    assert METRICS.codes[-1][1] == 500
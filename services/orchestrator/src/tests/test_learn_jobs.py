@@ -0,0 +1,54 @@
+import asyncio
+import json
+import sys
+
+from src.services.learn_jobs import IngestJobManager
+
+
+def _script(lines, exit_code=0):
+    body = "".join(
+        f"print({json.dumps(json.dumps(line))}, flush=True);" for line in lines
+    )
+    return lambda: [sys.executable, "-c", f"{body}import sys; sys.exit({exit_code})"]
+
+
+def test_job_reports_progress_and_result():
+    async def scenario():
+        finished = []
+        manager = IngestJobManager(
+            _script(
+                [
+                    {"progress": {"tasks_done": 1, "tasks_total": 1, "rows": 5}},
+                    {"result": {"rows_raw": 7, "rows_learnable": 5}},
+                ]
+            ),
+            on_finished=finished.append,
+        )
+        job = manager.submit()
+        assert job.status == "queued"
+
+        await asyncio.wait_for(job.done.wait(), timeout=30)
+        assert job.status == "succeeded"
+        assert job.progress["rows"] == 5
+        assert job.result["rows_learnable"] == 5
+        assert finished == [job]
+        assert manager.get(job.job_id) is job
+
+    asyncio.run(scenario())
+
+
+def test_failed_job_and_queued_coalescing():
+    async def scenario():
+        manager = IngestJobManager(_script([], exit_code=3))
+        first = manager.submit()
+        # Still queued (nothing has run yet): a second submit coalesces
+        assert manager.submit() is first
+
+        await asyncio.wait_for(first.done.wait(), timeout=30)
+        assert first.status == "failed"
+        assert "exit 3" in first.error
+
+        second = manager.submit()
+        assert second is not first
+
+    asyncio.run(scenario())
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+import structlog
+
+from src.cache import smart_cache
+from src.middleware.logging import (
+    DEFAULT_SAMPLE_RATES,
+    EventSampler,
+    Lazy,
+    resolve_lazy,
+)
+
+
+def test_sampler_keeps_rate_and_never_drops_errors():
+    draws = iter([0.05, 0.5, 0.5])
+    sampler = EventSampler({"Route decision": 0.1}, rng=lambda: next(draws))
+
+    kept = sampler(None, "info", {"event": "Route decision"})
+    assert kept["sample_rate"] == 0.1
+    with pytest.raises(structlog.DropEvent):
+        sampler(None, "info", {"event": "Route decision"})
+
+    # Errors and unlisted events pass regardless of the draw
+    assert sampler(None, "error", {"event": "Route decision"})
+    assert "sample_rate" not in sampler(None, "info", {"event": "Other"})
+    assert sampler.dropped == 1
+
+
+def test_lazy_fields_only_evaluated_for_kept_events():
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return {"share": 0.2}
+
+    sampler = EventSampler({"Route decision made": 0.0})
+    event = {"event": "Route decision made", "quota": Lazy(expensive)}
+    with pytest.raises(structlog.DropEvent):
+        sampler(None, "info", event)
+    assert calls == []
+
+    event = resolve_lazy(None, "info", {"event": "kept", "quota": Lazy(expensive)})
+    assert event["quota"] == {"share": 0.2}
+    assert calls == [1]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def keys(self, pattern):
+        return [k for k in self.data if k.startswith(pattern.rstrip("*"))]
+
+    def hgetall(self, key):
+        return self.data.get(key) or {}
+
+    def hset(self, key, mapping):
+        self.data[key] = dict(mapping)
+
+    def expire(self, key, ttl):
+        pass
+
+
+def test_default_rates_sample_smart_cache_events(monkeypatch):
+    emitted = []
+
+    def record(logger, method_name, event_dict):
+        emitted.append(event_dict["event"])
+        return ""
+
+    sampler = EventSampler(DEFAULT_SAMPLE_RATES, rng=lambda: 0.99)
+    monkeypatch.setattr(
+        smart_cache,
+        "logger",
+        structlog.wrap_logger(structlog.ReturnLogger(), processors=[sampler, record]),
+    )
+    cache = smart_cache.SmartCache.__new__(smart_cache.SmartCache)
+    cache.redis_url = "redis://fake"
+    cache.semantic_threshold = 0.85
+    cache.stats = dict.fromkeys(
+        ["total_requests", "l1_hits", "l2_hits", "negative_hits", "misses", "errors"],
+        0,
+    )
+    cache.stats.update(avg_hit_latency_ms=0.0, avg_miss_latency_ms=0.0)
+    cache.redis_client = FakeRedis()
+
+    async def turns():
+        prompt = "vad är klockan i stockholm just nu"
+        await cache.get("time.now", prompt)  # Cache MISS
+        cache.set("time.now", prompt, {"ok": True})  # Cache SET
+        await cache.get("time.now", prompt)  # L1 cache HIT
+        await cache.get("time.now", prompt + " idag")  # L2 semantic HIT
+        cache.set_negative("trasig fråga")
+        await cache.get("other", "trasig fråga")  # Negative cache HIT
+
+    asyncio.run(turns())
+
+    # Only the rare negative SET survives a 0.99 draw
+    assert emitted == ["Negative cache SET"]
+    assert sampler.dropped == 5
+    assert (cache.stats["l1_hits"], cache.stats["l2_hits"]) == (1, 1)
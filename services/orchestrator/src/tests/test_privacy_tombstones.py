@@ -0,0 +1,139 @@
+import json
+from datetime import datetime, timedelta
+
+from src import privacy
+from src.intent_guard import get_guard_decision_cache
+from src.privacy import PrivacyManager
+from src.routers.orchestrator import log_turn_event
+from src.utils import tracing
+
+
+def _write_turn(session_id):
+    log_turn_event(
+        trace_id=f"t-{session_id}",
+        session_id=session_id,
+        route="micro",
+        e2e_first_ms=1,
+        e2e_full_ms=1,
+        ram_peak={},
+        tool_calls=[],
+        energy_wh=0.0,
+        guardian_state="NORMAL",
+        input_text="hej",
+        output_text="hej",
+    )
+
+
+class _Tomorrow(datetime):
+    @classmethod
+    def utcnow(cls):
+        return datetime.utcnow() + timedelta(days=1)
+
+
+def test_forget_tombstones_then_compactor_purges(tmp_path, monkeypatch):
+    telemetry = tmp_path / "telemetry"
+    monkeypatch.setenv("LOG_DIR", str(telemetry))
+    for session_id in ("keep", "forget", "forget"):
+        _write_turn(session_id)
+    [segment] = telemetry.glob("*/events_*.jsonl")
+
+    manager = PrivacyManager(data_dir=str(tmp_path), telemetry_dir=str(telemetry))
+    report = manager.forget_user("user-1", session_id="forget")
+
+    # Forget only appends a tombstone; telemetry is untouched until compaction
+    assert report["telemetry"]["segments_pending_purge"] == 1
+    assert len(segment.read_text().splitlines()) == 3
+    [tombstone] = [
+        json.loads(line)
+        for line in (telemetry / "_privacy" / "tombstones.jsonl")
+        .read_text()
+        .splitlines()
+    ]
+    assert tombstone["session_ids"] == ["forget"]
+
+    # Recently written segments are live and deferred, today's even when idle
+    assert manager.compact_telemetry()["deferred"] == 1
+    assert manager.compact_telemetry(min_age_s=0)["deferred"] == 1
+
+    monkeypatch.setattr(privacy, "datetime", _Tomorrow)
+    result = manager.compact_telemetry(min_age_s=0)
+    assert (result["segments_purged"], result["lines_removed"]) == (1, 2)
+    sessions = [json.loads(line)["session_id"] for line in segment.open()]
+    assert sessions == ["keep"]
+    assert manager.compact_telemetry(min_age_s=0)["segments_purged"] == 0
+
+
+def test_forget_drops_cached_guard_decisions(tmp_path, monkeypatch):
+    telemetry = tmp_path / "telemetry"
+    monkeypatch.setenv("LOG_DIR", str(telemetry))
+    cache = get_guard_decision_cache()
+    cache.put(cache.key("forget-guard", "hej alice"), "greeting.hello")
+    cache.put(cache.key("keep-guard", "hej alice"), "greeting.hello")
+
+    manager = PrivacyManager(data_dir=str(tmp_path), telemetry_dir=str(telemetry))
+    report = manager.forget_user("user-2", session_id="forget-guard")
+
+    assert "guard_cache:forget-guard" in report["deleted_items"]
+    assert cache.get(cache.key("forget-guard", "hej alice")) == (False, None)
+    assert cache.get(cache.key("keep-guard", "hej alice"))[0]
+
+
+def test_compactor_purges_pre_index_lines_by_user_hash(tmp_path, monkeypatch):
+    telemetry = tmp_path / "telemetry"
+    manager = PrivacyManager(data_dir=str(tmp_path), telemetry_dir=str(telemetry))
+    user_hash = manager.hash_user_id("user-3")
+
+    # Written before the segment index existed; its session is long gone
+    segment = telemetry / "2025-01-01" / "events_2025-01-01.jsonl"
+    segment.parent.mkdir(parents=True)
+    lines = [
+        json.dumps({"session_id": "old", "user_hash": user_hash}),
+        json.dumps({"session_id": "other", "user_hash": "someone-else"}),
+    ]
+    segment.write_text("\n".join(lines) + "\n")
+    inode_before = segment.stat().st_ino
+
+    report = manager.forget_user("user-3")
+    assert report["telemetry"]["segments_pending_purge"] == 1
+
+    result = manager.compact_telemetry(min_age_s=0)
+    assert (result["segments_purged"], result["lines_removed"]) == (1, 1)
+    assert segment.read_text() == lines[1] + "\n"
+
+    [rewrite] = [
+        record
+        for record in map(
+            json.loads,
+            (telemetry / "_privacy" / "tombstones.jsonl").read_text().splitlines(),
+        )
+        if record["type"] == "segment_rewrite"
+    ]
+    assert rewrite["segment"] == "2025-01-01/events_2025-01-01.jsonl"
+    assert rewrite["inode_before"] == inode_before
+    assert rewrite["inode_after"] == segment.stat().st_ino
+    assert rewrite["removed_ranges"] == [[0, len(lines[0]) + 1]]
+
+
+def test_forget_purges_indexed_trace_spans(tmp_path, monkeypatch):
+    telemetry = tmp_path / "telemetry"
+    monkeypatch.setenv("LOG_DIR", str(telemetry))
+    monkeypatch.delenv("TRACE_DIR", raising=False)
+    monkeypatch.setenv("TRACE_EXPORT", "1")
+    monkeypatch.setattr(tracing, "_exporter", None)
+    for session_id in ("keep-span", "forget-span"):
+        turn = tracing.start_turn(f"t-{session_id}", session_id=session_id)
+        tracing.finish_turn(turn, route="micro")
+    tracing.get_trace_exporter().flush()
+    [spans] = telemetry.glob("traces/*/spans_*.jsonl")
+
+    manager = PrivacyManager(data_dir=str(tmp_path), telemetry_dir=str(telemetry))
+    # The exporter registers trace segments: forget does not rescan them
+    assert manager.segment_index.unindexed_segments() == set()
+    report = manager.forget_user("user-4", session_id="forget-span")
+    assert report["telemetry"]["segments_pending_purge"] == 1
+
+    monkeypatch.setattr(privacy, "datetime", _Tomorrow)
+    result = manager.compact_telemetry(min_age_s=0)
+    assert result["lines_removed"] == 1
+    assert "forget-span" not in spans.read_text()
+    assert "keep-span" in spans.read_text()
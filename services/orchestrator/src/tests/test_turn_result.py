@@ -0,0 +1,62 @@
+import json
+
+from src.models.api import ChatResponse
+from src.models.turn_result import TurnResult, splice_json
+
+
+def test_response_body_matches_chat_response_and_shares_rag_fields():
+    llm_response = {
+        "text": "Klart – mötet är bokat",
+        "model": "qwen2.5:3b",
+        "meta": {"schema_ok": True},
+        "tokens_used": 42,
+    }
+    result = TurnResult.from_llm(
+        "planner",
+        "qwen2.5:3b",
+        llm_response,
+        requested_route="planner",
+        nlu={"intent": "calendar.create_draft", "slots": {}},
+    )
+
+    body = result.response_body("s1", 1700000000000, "t1", 12)
+    parsed = ChatResponse.model_validate_json(body)
+    assert parsed.response == llm_response["text"]
+    assert parsed.model_used.value == "planner"
+    assert parsed.metadata["planner_schema_ok"] is True
+    assert parsed.metadata["shadow"] == {"enabled": False}
+
+    rag = json.loads(result.rag_json())
+    assert rag["top_k"] == 0 and rag["tokens_used"] == 42
+    assert {k: v for k, v in rag.items() if k not in ("top_k", "hits")} == {
+        k: v
+        for k, v in parsed.metadata.items()
+        if k not in ("route", "planner_execution", "nlu", "shadow")
+    }
+
+
+def test_missing_llm_response_and_splice():
+    result = TurnResult.from_llm(
+        "micro", "none", None, requested_route="micro", fallback_used=True
+    )
+    assert result.text == "LLM response not available for route micro"
+    assert result.output_text_json() == b'""'
+    assert json.loads(result.metadata_json())["fallback_used"] is True
+
+    assert json.loads(splice_json({"a": 1}, {"b": b"[2]"})) == {"a": 1, "b": [2]}
+    assert json.loads(splice_json({}, {"b": b"true"})) == {"b": True}
+
+
+def test_fallback_route_reports_requested_model():
+    llm_response = {"text": "Jag kunde inte planera det", "route": "fallback"}
+    result = TurnResult.from_llm(
+        "fallback",
+        "qwen2.5:3b",
+        llm_response,
+        requested_route="planner",
+        fallback_used=True,
+    )
+
+    parsed = ChatResponse.model_validate_json(result.response_body("s1", 1, "t1", 5))
+    assert parsed.model_used.value == "planner"
+    assert parsed.metadata["route"] == "fallback"
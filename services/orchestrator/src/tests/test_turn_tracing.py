@@ -0,0 +1,54 @@
+import asyncio
+import json
+import uuid
+
+from src.metrics import METRICS
+from src.utils import tracing
+from src.utils.tracing import current_trace, finish_turn, span, start_turn
+
+
+def test_span_is_noop_without_turn():
+    assert current_trace() is None
+    with span("nlu") as s:
+        assert s is None
+
+
+def test_turn_spans_nest_across_threads_and_export_otlp(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRACE_DIR", str(tmp_path))
+    monkeypatch.setattr(tracing, "_exporter", None)
+    trace_id = str(uuid.uuid4())
+
+    def blocking_generate():
+        with span("tool", tool="time.now"):
+            pass
+        return {"model": "test"}
+
+    async def turn_body():
+        turn = start_turn(trace_id, session_id="s1")
+        with span("nlu") as s:
+            s.set(**{"nlu.encode_ms": 1.5})
+        with span("llm.generate"):
+            await asyncio.to_thread(blocking_generate)
+        return turn
+
+    before = len(METRICS.stages["llm.generate"])
+    turn = asyncio.run(turn_body())
+    finish_turn(turn, route="micro")
+    tracing.get_trace_exporter().flush()
+
+    by_name = {s.name: s for s in turn.spans}
+    assert by_name["nlu"].parent_id == turn.root.span_id
+    assert by_name["tool"].parent_id == by_name["llm.generate"].span_id
+    assert set(turn.stage_ms()) == {"nlu", "llm.generate", "tool"}
+    assert len(METRICS.stages["llm.generate"]) == before + 1
+    assert "llm.generate" in METRICS.snapshot()["stages"]
+
+    [export_file] = tmp_path.glob("*/spans_*.jsonl")
+    [line] = export_file.read_text().splitlines()
+    spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {s["traceId"] for s in spans} == {trace_id.replace("-", "")}
+    assert len(spans) == 4
+    root = next(s for s in spans if s["name"] == "turn")
+    assert "parentSpanId" not in root
+    assert {"key": "route", "value": {"stringValue": "micro"}} in root["attributes"]
+    assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
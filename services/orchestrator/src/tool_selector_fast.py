@@ -6,8 +6,11 @@ Replaces 3B model for EASY/MEDIUM intents to improve tool precision
 
 from typing import Optional
 
+import structlog
 from rapidfuzz import fuzz
 
+logger = structlog.get_logger(__name__)
+
 # Tool mapping with synonyms
 TOOL_MAP = {
     "time.now": [
@@ -121,12 +124,11 @@ def pick_tool(text: str) -> Optional[str]:
                 best_score = score
                 best_tool = tool
 
-    print(f"🔍 Tool match: '{text}' → {best_tool} (score: {best_score})")
+    logger.debug("Tool match", tool=best_tool, score=best_score)
 
     if best_score >= 65:  # Lowered from 80 to catch more variants
         return best_tool
 
-    print(f"❌ No tool match for: '{text}' (best score: {best_score})")
     return None
 
 
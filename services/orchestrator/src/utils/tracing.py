@@ -0,0 +1,334 @@
+"""
+Turn Tracing
+Per-turn spans with a stage-level latency breakdown
+
+One TurnTrace per chat turn, keyed by the trace id from
+InstrumentationMiddleware. Stages (nlu, guardian.*, route.decide,
+admission.acquire, cache.lookup, llm.generate, tool, telemetry.write) open
+spans with `span(name)`; the active trace and parent span live in
+ContextVars, so spans opened in awaited code or in asyncio.to_thread workers
+attach to the right turn and parent. Without an active trace `span()` is a
+no-op, so library code can be instrumented unconditionally.
+
+On finish_turn():
+- per-stage durations feed METRICS (sliding p50/p95) and Prometheus
+- the turn is exported as OTLP/JSON (ExportTraceServiceRequest) to
+  TRACE_DIR/<date>/spans_<date>.jsonl on a background thread; under LOG_DIR
+  the turn's session is registered in the privacy segment index, so forget
+  can purge its spans without scanning the trace history
+"""
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import structlog
+
+from ..metrics import METRICS
+
+try:
+    from ..metrics.prometheus import TURN_STAGE_DURATION
+except Exception:  # pragma: no cover - prometheus_client missing in dev
+    TURN_STAGE_DURATION = None
+
+logger = structlog.get_logger(__name__)
+
+SERVICE_NAME = "alice-orchestrator"
+SCOPE_NAME = "alice.orchestrator.turn"
+ROOT_SPAN = "turn"
+
+_SPAN_KIND_INTERNAL = 1
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+_current_trace: ContextVar[Optional["TurnTrace"]] = ContextVar(
+    "alice_turn_trace", default=None
+)
+_current_span: ContextVar[Optional["Span"]] = ContextVar(
+    "alice_turn_span", default=None
+)
+
+
+def _span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def _otlp_trace_id(trace_id: str) -> str:
+    """uuid4 from the middleware -> 32 hex chars; anything else gets a fresh id"""
+    hex_id = trace_id.replace("-", "").lower()
+    if len(hex_id) == 32 and all(c in "0123456789abcdef" for c in hex_id):
+        return hex_id
+    return f"{random.getrandbits(128):032x}"
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """One timed stage of a turn"""
+
+    __slots__ = (
+        "name",
+        "span_id",
+        "parent_id",
+        "start_unix_ns",
+        "start_ns",
+        "end_ns",
+        "attrs",
+        "error",
+    )
+
+    def __init__(self, name: str, parent_id: Optional[str], attrs: Dict[str, Any]):
+        self.name = name
+        self.span_id = _span_id()
+        self.parent_id = parent_id
+        self.start_unix_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.attrs = attrs
+        self.error: Optional[str] = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+
+class TurnTrace:
+    """All spans of one chat turn, rooted in a "turn" span"""
+
+    def __init__(self, trace_id: str, **attrs: Any):
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self.root = Span(ROOT_SPAN, None, attrs)
+        self._lock = threading.Lock()
+        self._tokens: tuple = ()
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span]:
+        parent = _current_span.get() or self.root
+        s = Span(name, parent.span_id, attrs)
+        token = _current_span.set(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.error = type(e).__name__
+            raise
+        finally:
+            s.end()
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(s)
+
+    def stage_ms(self) -> Dict[str, float]:
+        """Total time per stage name (repeated stages are summed)"""
+        stages: Dict[str, float] = {}
+        for s in self.spans:
+            stages[s.name] = stages.get(s.name, 0.0) + s.duration_ms
+        return {name: round(ms, 3) for name, ms in stages.items()}
+
+    def to_event(self) -> List[Dict[str, Any]]:
+        """Compact span list for the turn event (offsets relative to turn start)"""
+        t0 = self.root.start_ns
+        out = []
+        for s in sorted(self.spans, key=lambda s: s.start_ns):
+            item: Dict[str, Any] = {
+                "name": s.name,
+                "span_id": s.span_id,
+                "parent_id": s.parent_id,
+                "start_ms": round((s.start_ns - t0) / 1e6, 3),
+                "ms": round(s.duration_ms, 3),
+            }
+            if s.attrs:
+                item["attrs"] = s.attrs
+            if s.error:
+                item["error"] = s.error
+            out.append(item)
+        return out
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest for this turn"""
+        trace_id = _otlp_trace_id(self.trace_id)
+        # perf_counter offsets applied to the root's wall clock start
+        t0_ns = self.root.start_ns
+        t0_unix = self.root.start_unix_ns
+        spans = []
+        for s in [self.root, *self.spans]:
+            end_ns = s.end_ns if s.end_ns is not None else s.start_ns
+            otlp_span: Dict[str, Any] = {
+                "traceId": trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": _SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": str(t0_unix + s.start_ns - t0_ns),
+                "endTimeUnixNano": str(t0_unix + end_ns - t0_ns),
+                "attributes": [
+                    {"key": k, "value": _otlp_value(v)}
+                    for k, v in s.attrs.items()
+                    if v is not None
+                ],
+                "status": (
+                    {"code": _STATUS_ERROR, "message": s.error}
+                    if s.error
+                    else {"code": _STATUS_OK}
+                ),
+            }
+            if s.parent_id:
+                otlp_span["parentSpanId"] = s.parent_id
+            spans.append(otlp_span)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": SERVICE_NAME},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": spans}],
+                }
+            ]
+        }
+
+
+class TraceFileExporter:
+    """Appends OTLP/JSON lines per day; file I/O runs on a daemon thread"""
+
+    def __init__(self, root: str, telemetry_dir: Optional[str] = None):
+        self.root = root
+        self.telemetry_dir = telemetry_dir  # Segment index owner, if any
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=1000)
+        self._thread: Optional[threading.Thread] = None
+        self._dirs: set = set()
+        self.dropped = 0
+
+    def export(self, payload: Dict[str, Any], session_id: Optional[str] = None) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="trace-exporter", daemon=True
+            )
+            self._thread.start()
+        try:
+            self._queue.put_nowait((payload, session_id))
+        except queue.Full:
+            self.dropped += 1  # Tracing must never backpressure a turn
+
+    def flush(self) -> None:
+        if self._thread is not None:
+            self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            payload, session_id = self._queue.get()
+            try:
+                self._write(payload, session_id)
+            except Exception as e:
+                logger.warning("Trace export failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+    def _write(self, payload: Dict[str, Any], session_id: Optional[str]) -> None:
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        daily_dir = os.path.join(self.root, today)
+        if daily_dir not in self._dirs:
+            os.makedirs(daily_dir, exist_ok=True)
+            self._dirs.add(daily_dir)
+        line = json.dumps(payload, separators=(",", ":"), default=str)
+        filename = os.path.join(daily_dir, f"spans_{today}.jsonl")
+        with open(filename, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        if session_id and self.telemetry_dir:
+            from ..privacy import get_segment_index
+
+            get_segment_index(self.telemetry_dir).register(session_id, filename)
+
+
+_exporter: Optional[TraceFileExporter] = None
+
+
+def get_trace_exporter() -> Optional[TraceFileExporter]:
+    """File exporter, or None when TRACE_EXPORT=0"""
+    global _exporter
+    if os.getenv("TRACE_EXPORT", "1") != "1":
+        return None
+    if _exporter is None:
+        telemetry_dir = os.getenv("LOG_DIR", "/data/telemetry")
+        root = os.getenv("TRACE_DIR") or os.path.join(telemetry_dir, "traces")
+        # Spans outside the telemetry dir are not covered by forget/compaction
+        inside = os.path.commonpath(
+            [os.path.abspath(root), os.path.abspath(telemetry_dir)]
+        ) == os.path.abspath(telemetry_dir)
+        _exporter = TraceFileExporter(root, telemetry_dir if inside else None)
+    return _exporter
+
+
+def start_turn(trace_id: str, **attrs: Any) -> TurnTrace:
+    """Begin a turn trace and make it current for this task"""
+    trace = TurnTrace(trace_id, **attrs)
+    trace._tokens = (_current_trace.set(trace), _current_span.set(None))
+    return trace
+
+
+def finish_turn(trace: TurnTrace, **attrs: Any) -> None:
+    """Close the root span, feed stage histograms and export the turn"""
+    trace.root.set(**attrs)
+    trace.root.end()
+    if trace._tokens:
+        trace_token, span_token = trace._tokens
+        trace._tokens = ()
+        try:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+        except ValueError:  # Finished from another context
+            pass
+
+    try:
+        for name, ms in trace.stage_ms().items():
+            METRICS.observe_stage(name, ms)
+            if TURN_STAGE_DURATION is not None:
+                TURN_STAGE_DURATION.labels(stage=name).observe(ms / 1000.0)
+        METRICS.observe_stage(ROOT_SPAN, round(trace.root.duration_ms, 3))
+
+        exporter = get_trace_exporter()
+        if exporter is not None:
+            exporter.export(trace.to_otlp(), trace.root.attrs.get("session_id"))
+    except Exception as e:  # Tracing must never fail a turn
+        logger.warning("Turn trace finish failed", error=str(e))
+
+
+def current_trace() -> Optional[TurnTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """Time a stage of the current turn; yields None when no turn is traced"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name, **attrs) as s:
+        yield s
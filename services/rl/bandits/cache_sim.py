@@ -0,0 +1,448 @@
+"""
+Trace-driven simulator for Alice's SmartCache.
+
+Replays recorded turns (prompt, intent, timestamp, outcome) through a model
+of the orchestrator's SmartCache tiers and reports, per candidate config,
+what the hit rate and latency saved would have been:
+
+- L1: exact canonical prompt + intent within the same 5-minute bucket
+- L2: per-intent Jaccard similarity over `l2_scan_limit` entries (the
+  most recent ones; Redis KEYS order is arbitrary), hit when
+  similarity >= semantic_threshold
+- Negative: failed prompts are negatively cached for `negative_ttl_seconds`
+
+Entries expire after `ttl_seconds` and are evicted (LRU or FIFO) beyond
+`max_cache_size`. All candidate configs are simulated in a single pass over
+the trace; prompt normalization, keys and pairwise similarities are computed
+once and shared between configs.
+"""
+
+from __future__ import annotations
+
+import heapq
+import pathlib
+import re
+import statistics
+import unicodedata
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import structlog
+from rl.utils.io import find_files, iter_jsonl
+
+logger = structlog.get_logger(__name__)
+
+# Mirrors SmartCache defaults (services/orchestrator/src/cache/smart_cache.py)
+DEFAULT_SEMANTIC_THRESHOLD = 0.85
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_NEGATIVE_TTL_SECONDS = 60
+L1_BUCKET_SECONDS = 300
+L2_SCAN_LIMIT = 10
+
+# Cost of serving from cache when the trace has no observed cache hits
+DEFAULT_HIT_LATENCY_MS = 5.0
+
+
+def canonical_prompt(text: str) -> str:
+    """Same normalization as the orchestrator's cache_key.canonical_prompt."""
+    t = unicodedata.normalize("NFKC", text or "")
+    t = t.lower()
+    t = re.sub(r"\s+", " ", t).strip()
+    t = re.sub(r"^(hej|snälla|kan du|skulle du kunna|vänligen|tack)\s+", "", t)
+    t = re.sub(r"\s+(tack|snälla|vänligen)$", "", t)
+    return t
+
+
+@dataclass(frozen=True)
+class CacheConfig:
+    """One candidate SmartCache configuration."""
+
+    ttl_seconds: float = DEFAULT_TTL_SECONDS
+    max_cache_size: Optional[int] = None  # Entries; None = unbounded (Redis TTL only)
+    semantic_threshold: float = DEFAULT_SEMANTIC_THRESHOLD
+    eviction: str = "lru"  # "lru" or "fifo"
+    negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS
+    l2_scan_limit: int = L2_SCAN_LIMIT
+
+    def label(self) -> str:
+        size = self.max_cache_size if self.max_cache_size is not None else "inf"
+        return (
+            f"ttl={self.ttl_seconds:g}s size={size} "
+            f"thr={self.semantic_threshold:g} evict={self.eviction}"
+        )
+
+
+@dataclass
+class TraceRequest:
+    """One recorded turn, pre-normalized for simulation."""
+
+    ts: float  # Seconds
+    intent: str
+    prompt_id: int  # Interned raw prompt (L2/negative key)
+    canonical_id: int  # Interned canonical prompt (L1 key, similarity)
+    success: bool
+    miss_latency_ms: float  # Estimated cost of serving without cache
+
+
+@dataclass
+class Trace:
+    """Replayable request trace with interned prompts."""
+
+    requests: List[TraceRequest]
+    words: List[FrozenSet[str]]  # canonical_id -> word set
+    hit_latency_ms: float = DEFAULT_HIT_LATENCY_MS
+
+    def __len__(self) -> int:
+        return len(self.requests)
+
+
+def _event_text(event: Dict[str, Any]) -> str:
+    for key in ("input_text", "prompt", "text", "message"):
+        if event.get(key):
+            return str(event[key])
+    value = event.get("input")
+    if isinstance(value, dict):
+        return str(value.get("text", ""))
+    return str(value or "")
+
+
+def _event_ts(event: Dict[str, Any]) -> Optional[float]:
+    value = event.get("timestamp") or event.get("ts")
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000.0 if value > 1e11 else float(value)  # ms or s
+    try:
+        from datetime import datetime
+
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _event_success(event: Dict[str, Any]) -> bool:
+    """Explicit outcome fields, else orchestrator turn-event shape: an answer
+    was produced and no tool call failed."""
+    if "success" in event or "status" in event:
+        return bool(event.get("success") or event.get("status") in ("ok", "success"))
+    if event.get("error") or event.get("route") == "error":
+        return False
+    if any(
+        isinstance(call, dict) and call.get("success") is False
+        for call in event.get("tool_calls") or []
+    ):
+        return False
+    return bool(event.get("output_text") or event.get("response"))
+
+
+def _event_intent(event: Dict[str, Any]) -> str:
+    """Episode/NLU intent fields, else the intent attribute the orchestrator
+    records on the turn's nlu / intent.guard spans."""
+    nlu = event.get("nlu") if isinstance(event.get("nlu"), dict) else {}
+    intent = event.get("intent") or nlu.get("intent")
+    if isinstance(intent, dict):
+        intent = intent.get("label")
+    if not intent:
+        for span in event.get("spans") or []:
+            attrs = span.get("attrs") if isinstance(span, dict) else None
+            if attrs and attrs.get("intent"):
+                intent = attrs["intent"]
+                break
+    return str(intent or "unknown").lower()
+
+
+def build_trace(events: Iterable[Dict[str, Any]]) -> Trace:
+    """
+    Build a trace from turn events or episodes that carry prompt text.
+
+    Rows without text or timestamp are skipped. The miss cost of a request
+    that was itself served from cache is unknown, so it is estimated as the
+    median non-cached latency for its intent.
+    """
+    rows = []
+    for event in events:
+        text = _event_text(event)
+        ts = _event_ts(event)
+        if not text or ts is None:
+            continue
+        intent = _event_intent(event)
+        success = _event_success(event)
+        cache_hit = bool(event.get("cache_hit") or event.get("cacheHit"))
+        latency = float(
+            event.get("latency_ms")
+            or event.get("latencyMs")
+            or event.get("e2e_full_ms")
+            or 0.0
+        )
+        rows.append((ts, intent, text, success, cache_hit, latency))
+
+    rows.sort(key=lambda r: r[0])
+
+    miss_latencies: Dict[str, List[float]] = {}
+    hit_latencies: List[float] = []
+    for _, intent, _, _, cache_hit, latency in rows:
+        if latency <= 0:
+            continue
+        if cache_hit:
+            hit_latencies.append(latency)
+        else:
+            miss_latencies.setdefault(intent, []).append(latency)
+
+    all_misses = [v for values in miss_latencies.values() for v in values]
+    global_miss = statistics.median(all_misses) if all_misses else 0.0
+    intent_miss = {k: statistics.median(v) for k, v in miss_latencies.items()}
+
+    prompt_ids: Dict[str, int] = {}
+    canonical_ids: Dict[str, int] = {}
+    words: List[FrozenSet[str]] = []
+    requests = []
+    for ts, intent, text, success, cache_hit, latency in rows:
+        prompt_id = prompt_ids.setdefault(text, len(prompt_ids))
+        canonical = canonical_prompt(text)
+        canonical_id = canonical_ids.get(canonical)
+        if canonical_id is None:
+            canonical_id = canonical_ids[canonical] = len(words)
+            words.append(frozenset(canonical.split()))
+
+        if cache_hit or latency <= 0:
+            latency = intent_miss.get(intent, global_miss)
+        requests.append(
+            TraceRequest(ts, intent, prompt_id, canonical_id, success, latency)
+        )
+
+    return Trace(
+        requests=requests,
+        words=words,
+        hit_latency_ms=(
+            statistics.median(hit_latencies)
+            if hit_latencies
+            else DEFAULT_HIT_LATENCY_MS
+        ),
+    )
+
+
+def load_trace(telemetry_dir: pathlib.Path) -> Trace:
+    """Load a trace from events_*.jsonl turn telemetry."""
+    files = find_files(telemetry_dir, "events_*.jsonl*") or find_files(
+        telemetry_dir, "*.jsonl*"
+    )
+
+    def events():
+        for path in files:
+            yield from iter_jsonl(path)
+
+    trace = build_trace(events())
+    logger.info(
+        "Loaded cache trace",
+        files=len(files),
+        requests=len(trace),
+        distinct_prompts=len(trace.words),
+    )
+    return trace
+
+
+# Expiry-heap key prefix for negative entries (never a lowercased intent)
+_NEGATIVE = "\0negative"
+
+
+@dataclass
+class _Entry:
+    expires: float
+    intent: str
+    l1_key: Tuple[str, int, int]
+    canonical_id: int
+
+
+@dataclass
+class _CacheState:
+    config: CacheConfig
+    entries: "OrderedDict[Tuple[str, int], _Entry]" = field(default_factory=OrderedDict)
+    l1_index: Dict[Tuple[str, int, int], Tuple[str, int]] = field(default_factory=dict)
+    by_intent: Dict[str, "OrderedDict[Tuple[str, int], None]"] = field(
+        default_factory=dict
+    )
+    negative: Dict[int, float] = field(default_factory=dict)
+    expiry: List[Tuple[float, Tuple[str, int]]] = field(default_factory=list)
+
+    requests: int = 0
+    l1_hits: int = 0
+    l2_hits: int = 0
+    negative_hits: int = 0
+    evictions: int = 0
+    latency_saved_ms: float = 0.0
+    peak_entries: int = 0
+
+    def _drop(self, key: Tuple[str, int]) -> None:
+        entry = self.entries.pop(key)
+        if self.l1_index.get(entry.l1_key) == key:
+            del self.l1_index[entry.l1_key]
+        bucket = self.by_intent.get(entry.intent)
+        if bucket is not None:
+            bucket.pop(key, None)
+
+    def _touch(self, key: Tuple[str, int]) -> None:
+        if self.config.eviction == "lru":
+            self.entries.move_to_end(key)
+
+    def expire(self, now: float) -> None:
+        """Drop entries whose TTL has passed (Redis expires keys itself)."""
+        while self.expiry and self.expiry[0][0] <= now:
+            expires, key = heapq.heappop(self.expiry)
+            if key[0] == _NEGATIVE:
+                if self.negative.get(key[1]) == expires:
+                    del self.negative[key[1]]
+                continue
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires == expires:
+                self._drop(key)
+
+    def lookup(self, req: TraceRequest, l1_key, similarity) -> Optional[str]:
+        """Return the tier that would serve the request, or None on miss."""
+        self.expire(req.ts)
+
+        # L1: exact canonical match in the same time bucket
+        key = self.l1_index.get(l1_key)
+        if key is not None:
+            self._touch(key)
+            return "l1"
+
+        # L2: best similarity among the most recent entries for the intent
+        bucket = self.by_intent.get(req.intent)
+        if bucket:
+            best_key = None
+            best = 0.0
+            for scanned, key in enumerate(reversed(bucket)):
+                if scanned >= self.config.l2_scan_limit:
+                    break
+                sim = similarity(req.canonical_id, self.entries[key].canonical_id)
+                if sim > best and sim >= self.config.semantic_threshold:
+                    best, best_key = sim, key
+            if best_key is not None:
+                self._touch(best_key)
+                return "l2"
+
+        # Negative cache: prompts that recently failed
+        if req.prompt_id in self.negative:
+            return "negative"
+
+        return None
+
+    def store(self, req: TraceRequest, l1_key) -> None:
+        cfg = self.config
+        if not req.success:
+            expires = req.ts + cfg.negative_ttl_seconds
+            self.negative[req.prompt_id] = expires
+            heapq.heappush(self.expiry, (expires, (_NEGATIVE, req.prompt_id)))
+            return
+
+        key = (req.intent, req.prompt_id)
+        if key in self.entries:
+            self._drop(key)  # SET overwrites the L2 hash and resets its TTL
+        expires = req.ts + cfg.ttl_seconds
+        self.entries[key] = _Entry(
+            expires=expires,
+            intent=req.intent,
+            l1_key=l1_key,
+            canonical_id=req.canonical_id,
+        )
+        heapq.heappush(self.expiry, (expires, key))
+        self.l1_index[l1_key] = key
+        self.by_intent.setdefault(req.intent, OrderedDict())[key] = None
+
+        if cfg.max_cache_size is not None:
+            while len(self.entries) > cfg.max_cache_size:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+        self.peak_entries = max(self.peak_entries, len(self.entries))
+
+    def report(self, trace: Trace) -> Dict[str, Any]:
+        n = max(self.requests, 1)
+        hits = self.l1_hits + self.l2_hits + self.negative_hits
+        return {
+            "config": asdict(self.config),
+            "label": self.config.label(),
+            "requests": self.requests,
+            "cache_hits": hits,
+            "cache_hit_rate": hits / n,
+            "l1_hit_rate": self.l1_hits / n,
+            "l2_hit_rate": self.l2_hits / n,
+            "negative_hit_rate": self.negative_hits / n,
+            "evictions": self.evictions,
+            "peak_entries": self.peak_entries,
+            "latency_saved_ms_total": self.latency_saved_ms,
+            "latency_saved_ms_per_request": self.latency_saved_ms / n,
+        }
+
+
+def simulate(trace: Trace, configs: List[CacheConfig]) -> List[Dict[str, Any]]:
+    """
+    Replay a trace against many cache configs in one pass.
+
+    Returns:
+        One report per config, in the order given
+    """
+    states = [_CacheState(config=config) for config in configs]
+    words = trace.words
+    sim_cache: Dict[Tuple[int, int], float] = {}
+
+    def similarity(a: int, b: int) -> float:
+        if a == b:
+            return 1.0
+        pair = (a, b) if a < b else (b, a)
+        sim = sim_cache.get(pair)
+        if sim is None:
+            w1, w2 = words[a], words[b]
+            if not w1 or not w2:
+                sim = 1.0 if not w1 and not w2 else 0.0
+            else:
+                sim = len(w1 & w2) / len(w1 | w2)
+            sim_cache[pair] = sim
+        return sim
+
+    for req in trace.requests:
+        l1_key = (req.intent, req.canonical_id, int(req.ts // L1_BUCKET_SECONDS))
+        saved = max(0.0, req.miss_latency_ms - trace.hit_latency_ms)
+
+        for state in states:
+            state.requests += 1
+            tier = state.lookup(req, l1_key, similarity)
+            if tier is None:
+                state.store(req, l1_key)
+                continue
+            if tier == "l1":
+                state.l1_hits += 1
+            elif tier == "l2":
+                state.l2_hits += 1
+            else:
+                state.negative_hits += 1
+            state.latency_saved_ms += saved
+
+    return [state.report(trace) for state in states]
+
+
+def config_grid(
+    base: Optional[CacheConfig] = None,
+    ttl_seconds: Optional[List[float]] = None,
+    max_cache_size: Optional[List[Optional[int]]] = None,
+    semantic_threshold: Optional[List[float]] = None,
+    eviction: Optional[List[str]] = None,
+) -> List[CacheConfig]:
+    """Cartesian product of candidate values around a base config."""
+    base = base or CacheConfig()
+    configs = []
+    for ttl in ttl_seconds or [base.ttl_seconds]:
+        for size in max_cache_size or [base.max_cache_size]:
+            for threshold in semantic_threshold or [base.semantic_threshold]:
+                for policy in eviction or [base.eviction]:
+                    configs.append(
+                        CacheConfig(
+                            ttl_seconds=ttl,
+                            max_cache_size=size,
+                            semantic_threshold=threshold,
+                            eviction=policy,
+                            negative_ttl_seconds=base.negative_ttl_seconds,
+                            l2_scan_limit=base.l2_scan_limit,
+                        )
+                    )
+    return configs
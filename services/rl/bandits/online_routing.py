@@ -0,0 +1,360 @@
+"""
+Online LinUCB routing learner.
+
+Tails Alice turn-event telemetry, turns each finished turn into an
+(context, route, reward) observation and applies a Sherman–Morrison rank-1
+update to the routing policy. The updated policy is checkpointed into the
+live policy directory, where the orchestrator's RLPolicyLoader hot-reloads
+it - so routing adapts within minutes without a full pipeline run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError(f"Required packages missing: {e}. Run: pip install numpy") from e
+
+from rl.bandits.routing_linucb import LinUCBRouting
+from rl.build_dataset import _flatten_event
+from rl.utils.features import FeatureMaker
+from rl.utils.tombstones import PurgeLog
+
+logger = structlog.get_logger(__name__)
+
+ACTIVE_PACK = "active_policy_pack.json"
+ONLINE_PACK = "policy_pack_online.json"
+
+
+def _pack_signature(policy_dir: pathlib.Path) -> Optional[Tuple]:
+    """Identity of the deployed pack: link target plus inode/mtime/size."""
+    active = policy_dir / ACTIVE_PACK
+    try:
+        target = os.readlink(active) if active.is_symlink() else None
+        st = active.stat()
+    except OSError:
+        return None
+    return (target, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _load_routing(policy_dir: pathlib.Path) -> Tuple[LinUCBRouting, FeatureMaker]:
+    with open(policy_dir / ACTIVE_PACK, "r", encoding="utf-8") as f:
+        package = json.load(f)
+
+    routing = package.get("policies", {}).get("routing")
+    if not routing:
+        raise ValueError(f"No routing policy in {policy_dir / ACTIVE_PACK}")
+
+    return (
+        LinUCBRouting.from_dict(routing["routing_policy"]),
+        FeatureMaker.from_dict(routing["feature_maker"]),
+    )
+
+
+class TelemetryTailer:
+    """
+    Follows events_*.jsonl files under a telemetry directory.
+
+    Keeps a byte offset per file and only ever reads complete lines, so a
+    line that is still being written is picked up on the next poll. A file
+    replaced by the GDPR compactor keeps its position (mapped through the
+    purge log) so events are not applied twice.
+    """
+
+    def __init__(self, telemetry_dir: pathlib.Path, from_start: bool = False):
+        self.telemetry_dir = telemetry_dir
+        self._offsets: Dict[pathlib.Path, int] = {}
+        self._inodes: Dict[pathlib.Path, int] = {}
+        if not from_start:
+            for path in self._files():
+                stat = path.stat()
+                self._offsets[path] = stat.st_size
+                self._inodes[path] = stat.st_ino
+
+    def _files(self):
+        return sorted(self.telemetry_dir.rglob("events_*.jsonl"))
+
+    def poll(self):
+        """Yield events appended since the previous poll."""
+        purges: Optional[PurgeLog] = None
+        for path in self._files():
+            offset = self._offsets.get(path, 0)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            size = stat.st_size
+            inode = self._inodes.get(path, stat.st_ino)
+            if inode != stat.st_ino:
+                if purges is None:
+                    purges = PurgeLog.load(self.telemetry_dir)
+                offset = purges.translate(path, offset, inode, stat.st_ino) or 0
+            self._inodes[path] = stat.st_ino
+            if size < offset:
+                offset = 0  # Truncated/rotated
+            self._offsets[path] = offset
+            if size == offset:
+                continue
+
+            with open(path, "rb") as f:
+                f.seek(offset)
+                chunk = f.read(size - offset)
+
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                continue
+            self._offsets[path] = offset + end + 1
+
+            for line in chunk[: end + 1].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+class OnlineRoutingLearner:
+    """
+    Incremental LinUCB updates from live turn events with periodic checkpoints.
+    """
+
+    def __init__(
+        self,
+        model: LinUCBRouting,
+        feature_maker: FeatureMaker,
+        policy_dir: pathlib.Path,
+        checkpoint_every: int = 50,
+        checkpoint_interval_s: float = 120.0,
+    ):
+        """
+        Args:
+            model: Routing model to update (usually loaded from the live pack)
+            feature_maker: Feature maker the model was trained with
+            policy_dir: Live policy directory watched by the orchestrator
+            checkpoint_every: Checkpoint after this many updates...
+            checkpoint_interval_s: ...or this long after the first pending update
+        """
+        self.model = model
+        self.feature_maker = feature_maker
+        self.policy_dir = policy_dir
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval_s = checkpoint_interval_s
+
+        self.updates = 0
+        self.skipped = 0
+        self.checkpoints = 0
+        self.reloads = 0
+        self._pending = 0
+        self._pending_since: Optional[float] = None
+        # Pack the model was loaded from / last checkpointed to
+        self._pack_signature = _pack_signature(policy_dir)
+
+    @classmethod
+    def from_live_pack(
+        cls, policy_dir: pathlib.Path, **kwargs
+    ) -> "OnlineRoutingLearner":
+        """Continue from the routing policy currently deployed in policy_dir."""
+        signature = _pack_signature(policy_dir)
+        model, feature_maker = _load_routing(policy_dir)
+        learner = cls(model, feature_maker, policy_dir, **kwargs)
+        learner._pack_signature = signature
+        return learner
+
+    def reload_if_replaced(self) -> bool:
+        """
+        Adopt the active pack if something else deployed it since our last
+        load/checkpoint (promote.py deploy or rollback).
+
+        Pending online updates were made against the replaced policy and are
+        dropped. Returns True if the model was reloaded.
+        """
+        signature = _pack_signature(self.policy_dir)
+        if signature == self._pack_signature:
+            return False
+
+        self.model, self.feature_maker = _load_routing(self.policy_dir)
+        self._pack_signature = signature
+        self.reloads += 1
+        logger.warning(
+            "Active policy pack replaced externally, reloaded",
+            link_target=signature[0] if signature else None,
+            dropped_updates=self._pending,
+        )
+        self._pending = 0
+        self._pending_since = None
+        return True
+
+    def observe_event(self, event: Dict[str, Any]) -> bool:
+        """
+        Learn from one turn event.
+
+        Returns:
+            True if the event produced an update
+        """
+        episode = _flatten_event(event)
+        if episode["route"] not in self.model.arms:
+            self.skipped += 1
+            return False
+
+        x = np.asarray(self.feature_maker.transform(episode), dtype=np.float64)
+        try:
+            self.model.update(x, episode["route"], episode["reward"])
+        except ValueError as e:
+            self.skipped += 1
+            logger.debug("Skipped online update", error=str(e))
+            return False
+
+        self.updates += 1
+        self._pending += 1
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+        return True
+
+    def checkpoint_due(self) -> bool:
+        if not self._pending:
+            return False
+        return (
+            self._pending >= self.checkpoint_every
+            or time.monotonic() - self._pending_since >= self.checkpoint_interval_s
+        )
+
+    def checkpoint(self) -> Optional[pathlib.Path]:
+        """
+        Write the updated routing policy into the live policy directory.
+
+        The current active pack is copied with only its routing policy
+        replaced and written to a temp file. If the active pack is a symlink
+        (release-managed), the pack goes to ONLINE_PACK and the link is
+        repointed at it; a regular active file is atomically replaced in
+        place, so no deployed file is ever turned into a link. If the pack
+        was replaced since the last load/checkpoint nothing is written; the
+        learner reloads it instead and returns None.
+        """
+        if self.reload_if_replaced():
+            return None
+
+        active = self.policy_dir / ACTIVE_PACK
+        with open(active, "r", encoding="utf-8") as f:
+            package = json.load(f)
+
+        routing = package.setdefault("policies", {}).setdefault("routing", {})
+        routing["routing_policy"] = self.model.to_dict()
+        routing["feature_maker"] = self.feature_maker.serialize()
+        routing["online_info"] = {
+            "updated_at": datetime.now().isoformat(),
+            "online_updates": self.updates,
+            "counts": dict(self.model.counts),
+        }
+
+        linked = active.is_symlink()
+        target = self.policy_dir / ONLINE_PACK if linked else active
+        tmp = target.with_name(f".{target.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(package, f)
+        os.replace(tmp, target)
+
+        if linked and os.readlink(active) != ONLINE_PACK:
+            link_tmp = self.policy_dir / f".{ACTIVE_PACK}.tmp"
+            if link_tmp.is_symlink() or link_tmp.exists():
+                link_tmp.unlink()
+            link_tmp.symlink_to(ONLINE_PACK)
+            os.replace(link_tmp, active)
+
+        self._pack_signature = _pack_signature(self.policy_dir)
+        self.checkpoints += 1
+        self._pending = 0
+        self._pending_since = None
+
+        logger.info(
+            "Online routing checkpoint",
+            path=str(target),
+            updates=self.updates,
+            counts=self.model.counts,
+        )
+        return target
+
+    def run(self, tailer: TelemetryTailer, poll_interval_s: float = 5.0) -> None:
+        """Tail telemetry forever, updating and checkpointing as events arrive."""
+        while True:
+            self.reload_if_replaced()
+            for event in tailer.poll():
+                self.observe_event(event)
+            if self.checkpoint_due():
+                try:
+                    self.checkpoint()
+                except OSError as e:
+                    logger.error("Online checkpoint failed", error=str(e))
+            time.sleep(poll_interval_s)
+
+
+def main():
+    """Run the online routing learner."""
+    parser = argparse.ArgumentParser(description="Online LinUCB routing updates")
+    parser.add_argument(
+        "--telemetry", required=True, help="Directory with events_*.jsonl files"
+    )
+    parser.add_argument(
+        "--policy-dir",
+        default="services/orchestrator/src/policies/live",
+        help="Live policy directory (must contain active_policy_pack.json)",
+    )
+    parser.add_argument(
+        "--checkpoint-every", type=int, default=50, help="Updates per checkpoint"
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=120.0,
+        help="Max seconds between pending update and checkpoint",
+    )
+    parser.add_argument(
+        "--poll-interval", type=float, default=5.0, help="Telemetry poll seconds"
+    )
+    parser.add_argument(
+        "--from-start",
+        action="store_true",
+        help="Replay existing telemetry instead of only new events",
+    )
+
+    args = parser.parse_args()
+
+    structlog.configure(
+        processors=[structlog.dev.ConsoleRenderer()],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+    )
+
+    learner = OnlineRoutingLearner.from_live_pack(
+        pathlib.Path(args.policy_dir),
+        checkpoint_every=args.checkpoint_every,
+        checkpoint_interval_s=args.checkpoint_interval,
+    )
+    tailer = TelemetryTailer(pathlib.Path(args.telemetry), from_start=args.from_start)
+
+    logger.info(
+        "Online routing learner started",
+        telemetry=args.telemetry,
+        policy_dir=args.policy_dir,
+        arms=learner.model.arms,
+    )
+
+    try:
+        learner.run(tailer, poll_interval_s=args.poll_interval)
+    except KeyboardInterrupt:
+        if learner._pending:
+            learner.checkpoint()
+        logger.info("Online routing learner stopped", updates=learner.updates)
+
+
+if __name__ == "__main__":
+    main()
@@ -62,6 +62,7 @@ class LinUCBRouting:
         # Per-arm linear models: w = (X'X + λI)^-1 X'y
         self.weights: Dict[str, np.ndarray] = {}
         self.A_inv: Dict[str, np.ndarray] = {}  # (X'X + λI)^-1 for UCB
+        self.b: Dict[str, np.ndarray] = {}  # X'y, kept for online updates
         self.counts: Dict[str, int] = {}
 
         logger.info(
@@ -99,8 +100,7 @@ class LinUCBRouting:
             if len(X_arm) < 2:
                 logger.warning("Insufficient data for arm", arm=arm, samples=len(X_arm))
                 # Initialize with zeros
-                self.weights[arm] = np.zeros(n_features)
-                self.A_inv[arm] = np.eye(n_features) / self.l2_reg
+                self._init_arm(arm, n_features)
                 self.counts[arm] = len(X_arm)
                 continue
 
@@ -115,6 +115,7 @@ class LinUCBRouting:
 
                 self.weights[arm] = w
                 self.A_inv[arm] = A_inv
+                self.b[arm] = b
                 self.counts[arm] = len(X_arm)
 
                 # Compute training metrics for logging
@@ -132,10 +133,55 @@ class LinUCBRouting:
             except np.linalg.LinAlgError as e:
                 logger.error("Matrix inversion failed for arm", arm=arm, error=str(e))
                 # Fallback to regularized solution
-                self.weights[arm] = np.zeros(n_features)
-                self.A_inv[arm] = np.eye(n_features) / self.l2_reg
+                self._init_arm(arm, n_features)
                 self.counts[arm] = len(X_arm)
 
+    def _init_arm(self, arm: str, n_features: int) -> None:
+        """Prior-only model for an arm: w = 0, A = λI."""
+        self.weights[arm] = np.zeros(n_features)
+        self.A_inv[arm] = np.eye(n_features) / self.l2_reg
+        self.b[arm] = np.zeros(n_features)
+        self.counts.setdefault(arm, 0)
+
+    def update(self, x: np.ndarray, arm: str, reward: float) -> None:
+        """
+        Incorporate one observed (context, arm, reward) online.
+
+        Applies a Sherman–Morrison rank-1 update to A^-1 instead of
+        re-inverting (X'X + λI), so each update is O(d²).
+
+        Args:
+            x: Context feature vector (n_features,)
+            arm: Arm that was played
+            reward: Observed reward
+        """
+        if arm not in self.arms:
+            raise ValueError(f"Unknown arm: {arm}")
+
+        x = np.asarray(x, dtype=np.float64).ravel()
+        if self.feature_dim is None:
+            self.feature_dim = x.shape[0]
+        elif x.shape[0] != self.feature_dim:
+            raise ValueError(
+                f"Feature dim {x.shape[0]} does not match model dim {self.feature_dim}"
+            )
+        if arm not in self.A_inv:
+            self._init_arm(arm, self.feature_dim)
+
+        A_inv = self.A_inv[arm]
+        A_inv_x = A_inv @ x
+        # (A + xx')^-1 = A^-1 - (A^-1 x)(A^-1 x)' / (1 + x'A^-1 x)
+        A_inv -= np.outer(A_inv_x, A_inv_x) / (1.0 + x @ A_inv_x)
+
+        self.b[arm] += reward * x
+        self.weights[arm] = A_inv @ self.b[arm]
+        self.counts[arm] = self.counts.get(arm, 0) + 1
+
+    def update_batch(self, X: np.ndarray, y: np.ndarray, arms: np.ndarray) -> None:
+        """Apply update() for each row, in order."""
+        for x, reward, arm in zip(X, y, arms):
+            self.update(x, arm, float(reward))
+
     def predict(self, X: np.ndarray) -> Dict[str, np.ndarray]:
         """
         Predict rewards and confidence bounds for all arms.
@@ -149,7 +195,6 @@ class LinUCBRouting:
         if not self.weights:
             raise ValueError("Model not fitted yet")
 
-        n_samples = X.shape[0]
         results = {}
 
         for arm in self.arms:
@@ -162,10 +207,9 @@ class LinUCBRouting:
             # Mean prediction
             mean_pred = X @ w
 
-            # Confidence bounds: α * sqrt(x' A^-1 x)
-            conf_width = np.array(
-                [self.alpha * np.sqrt(X[i] @ A_inv @ X[i]) for i in range(n_samples)]
-            )
+            # Confidence bounds: α * sqrt(x' A^-1 x), batched over rows
+            quad = np.einsum("nd,de,ne->n", X, A_inv, X)
+            conf_width = self.alpha * np.sqrt(np.maximum(quad, 0.0))
 
             results[arm] = {
                 "mean": mean_pred,
@@ -251,6 +295,36 @@ class LinUCBRouting:
 
         return best_arm, debug_info
 
+    def select_arms_batch(
+        self, X: np.ndarray, mode: str = "mean"
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Select arms for many contexts at once (no exploration sampling).
+
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            mode: "mean" (greedy) or "ucb"
+
+        Returns:
+            (fitted_arms, choices) where choices[i] indexes fitted_arms;
+            ties resolve to the earlier arm, as in select_arm
+        """
+        if not self.weights:
+            raise ValueError("Model not fitted yet")
+        if mode not in ("mean", "ucb"):
+            raise ValueError(f"Unsupported batch selection mode: {mode}")
+
+        arms = [arm for arm in self.arms if arm in self.weights]
+        W = np.stack([self.weights[arm] for arm in arms])
+        scores = X @ W.T
+
+        if mode == "ucb":
+            A_inv = np.stack([self.A_inv[arm] for arm in arms])
+            quad = np.einsum("nd,kde,ne->nk", X, A_inv, X, optimize=True)
+            scores = scores + self.alpha * np.sqrt(np.maximum(quad, 0.0))
+
+        return arms, np.argmax(scores, axis=1)
+
     def to_dict(self) -> Dict[str, Any]:
         """Serialize model to dictionary."""
         return {
@@ -262,6 +336,7 @@ class LinUCBRouting:
             "feature_dim": self.feature_dim,
             "weights": {arm: w.tolist() for arm, w in self.weights.items()},
             "A_inv": {arm: A.tolist() for arm, A in self.A_inv.items()},
+            "b": {arm: b.tolist() for arm, b in self.b.items()},
             "counts": self.counts,
         }
 
@@ -280,6 +355,15 @@ class LinUCBRouting:
         model.A_inv = {arm: np.array(A) for arm, A in data["A_inv"].items()}
         model.counts = data["counts"]
 
+        # Older policies lack b; recover it from w = A^-1 b
+        if "b" in data:
+            model.b = {arm: np.array(b) for arm, b in data["b"].items()}
+        else:
+            model.b = {
+                arm: np.linalg.solve(model.A_inv[arm], model.weights[arm])
+                for arm in model.weights
+            }
+
         return model
 
 
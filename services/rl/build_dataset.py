@@ -8,9 +8,14 @@ for routing, tool selection, and preference modeling.
 from __future__ import annotations
 
 import argparse
+import hashlib
+import heapq
 import json
+import math
 import pathlib
-from typing import Any, Dict, List, Optional
+import random
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 import structlog
 
@@ -19,8 +24,10 @@ try:
 except ImportError:
     pd = None
 
-from rl.reward import turn_reward
+from rl.reward import REWARD_FIELDS, turn_reward
+from rl.utils import columnar
 from rl.utils.io import find_files, iter_jsonl, peek_jsonl_schema
+from rl.utils.tombstones import PRIVACY_SUBDIR, TombstoneFilter, Tombstones
 
 logger = structlog.get_logger(__name__)
 
@@ -207,6 +214,127 @@ def _flatten_event(event: Dict[str, Any]) -> Dict[str, Any]:
     return episode
 
 
+TURN_EVENT_TYPES = {"turn", "turn_completed", "response", "chat"}
+
+
+def telemetry_episode(
+    event: Dict[str, Any], counters: Optional[Counter] = None
+) -> Optional[Dict[str, Any]]:
+    """Episode for a telemetry turn event, or None if the event is not one."""
+    # Filter for turn events
+    event_type = event.get("event_type") or event.get("type") or ""
+    if event_type and event_type not in TURN_EVENT_TYPES:
+        return None
+
+    # Skip events without basic required fields
+    if not (event.get("intent") or event.get("text") or event.get("message")):
+        return None
+
+    return _flatten_event(event)
+
+
+def result_episode(
+    event: Dict[str, Any], counters: Optional[Counter] = None
+) -> Optional[Dict[str, Any]]:
+    """Episode for a test result; these need intent/route info."""
+    if event.get("intent") or event.get("route"):
+        return _flatten_event(event)
+    return None
+
+
+def episode_partition(episode: Dict[str, Any]) -> str:
+    """Hive-style day partition for an episode."""
+    return f"day={columnar.event_day(episode.get('timestamp'))}"
+
+
+def _find_telemetry_files(telemetry_dir: pathlib.Path) -> List[pathlib.Path]:
+    telemetry_files = find_files(telemetry_dir, "events_*.jsonl*")
+    if not telemetry_files:
+        # Try broader pattern
+        telemetry_files = find_files(telemetry_dir, "*.jsonl*")
+    # Tombstone/segment logs are not telemetry
+    return [p for p in telemetry_files if PRIVACY_SUBDIR not in p.parts]
+
+
+def build_episode_dataset(
+    telemetry_dir: pathlib.Path,
+    output_path: pathlib.Path,
+    tests_dir: Optional[pathlib.Path] = None,
+    max_events: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> int:
+    """
+    Stream telemetry into Parquet with the columnar ingest engine.
+
+    An output path ending in .parquet gets a single file (parts are written in
+    parallel, then compacted batch by batch); any other path becomes a
+    day-partitioned dataset directory.
+
+    Returns:
+        Number of episodes written
+    """
+    single_file = output_path.suffix == ".parquet"
+    out_dir = (
+        output_path.with_name(output_path.name + ".parts")
+        if single_file
+        else output_path
+    )
+    partition_by = None if single_file else episode_partition
+
+    # GDPR: drop forgotten sessions/users the compactor has not purged yet
+    tombstones = Tombstones.load(telemetry_dir)
+    sources = [
+        (
+            "telemetry",
+            _find_telemetry_files(telemetry_dir),
+            TombstoneFilter(telemetry_episode, tombstones),
+        )
+    ]
+    if tests_dir and tests_dir.exists():
+        sources.append(
+            ("tests", find_files(tests_dir, "results*.jsonl*"), result_episode)
+        )
+
+    parts: List[pathlib.Path] = []
+    total = 0
+    for prefix, files, transform in sources:
+        remaining = None if max_events is None else max_events - total
+        if not files or (remaining is not None and remaining <= 0):
+            continue
+        result = columnar.ingest_to_parquet(
+            files,
+            transform,
+            out_dir,
+            prefix=prefix,
+            partition_by=partition_by,
+            workers=workers,
+            max_rows=remaining,
+        )
+        logger.info(
+            "Ingested episodes",
+            source=prefix,
+            files=len(files),
+            episodes=result.rows_out,
+            skipped=result.rows_in - result.rows_out,
+            bad_lines=result.bad_lines,
+            dropped_forgotten=result.counters.get("dropped_forgotten", 0),
+        )
+        parts.extend(result.parts)
+        total += result.rows_out
+
+    if not total:
+        columnar.remove_parts(parts)
+        raise ValueError(
+            "No valid episodes found. Check telemetry directory and file patterns."
+        )
+
+    if single_file:
+        columnar.compact_parts(parts, output_path)
+        columnar.remove_parts(parts)
+
+    return total
+
+
 def load_telemetry_data(
     telemetry_dir: pathlib.Path,
     tests_dir: Optional[pathlib.Path] = None,
@@ -226,10 +354,7 @@ def load_telemetry_data(
     episodes = []
 
     # Load telemetry events
-    telemetry_files = find_files(telemetry_dir, "events_*.jsonl*")
-    if not telemetry_files:
-        # Try broader pattern
-        telemetry_files = find_files(telemetry_dir, "*.jsonl*")
+    telemetry_files = _find_telemetry_files(telemetry_dir)
 
     logger.info("Found telemetry files", count=len(telemetry_files))
 
@@ -242,26 +367,18 @@ def load_telemetry_data(
             unique_fields=schema.get("unique_fields", 0),
         )
 
+    tombstones = Tombstones.load(telemetry_dir)
     event_count = 0
     for file_path in telemetry_files:
         logger.info("Processing telemetry file", path=str(file_path))
 
         for event in iter_jsonl(file_path):
-            # Filter for turn events
-            event_type = event.get("event_type") or event.get("type") or ""
-            if event_type and event_type not in {
-                "turn",
-                "turn_completed",
-                "response",
-                "chat",
-            }:
+            if tombstones.is_forgotten(event):
                 continue
-
-            # Skip events without basic required fields
-            if not (event.get("intent") or event.get("text") or event.get("message")):
+            episode = telemetry_episode(event)
+            if episode is None:
                 continue
 
-            episode = _flatten_event(event)
             episodes.append(episode)
             event_count += 1
 
@@ -279,9 +396,8 @@ def load_telemetry_data(
 
         for file_path in test_files:
             for event in iter_jsonl(file_path):
-                # Test results should have intent/route info
-                if event.get("intent") or event.get("route"):
-                    episode = _flatten_event(event)
+                episode = result_episode(event)
+                if episode is not None:
                     episodes.append(episode)
                     event_count += 1
 
@@ -301,94 +417,238 @@ def load_telemetry_data(
     return episodes
 
 
-def create_preference_pairs(episodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _preference_key(episode: Dict[str, Any]) -> tuple:
+    """Sort key: success first, then tool success, then latency and cost (asc)."""
+    return (
+        -int(bool(episode.get("success", False))),
+        -int(bool(episode.get("tool_ok", False))),
+        episode.get("latency_ms", float("inf")),
+        episode.get("cost_usd", float("inf")),
+    )
+
+
+def _context_similarity(a: Dict[str, Any], b: Dict[str, Any]) -> float:
     """
-    Create preference pairs for DPO training.
+    Context similarity for hard-negative mining (1.0 = same context).
 
-    Uses heuristic: successful + fast responses preferred over failed/slow ones.
+    Same language, same primary tool and similar input length make a pair
+    differ in outcome rather than in what was asked.
+    """
+    len_a = math.log1p(float(a.get("text_len", 0) or 0))
+    len_b = math.log1p(float(b.get("text_len", 0) or 0))
+    sim = 1.0 / (1.0 + abs(len_a - len_b))
+    if a.get("lang") != b.get("lang"):
+        sim -= 0.5
+    if a.get("tool_primary") != b.get("tool_primary"):
+        sim -= 0.25
+    return sim
+
+
+def _pair_side(episode: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "success": episode.get("success", False),
+        "latency_ms": episode.get("latency_ms", 0),
+        "tool_ok": episode.get("tool_ok", False),
+        "route": episode.get("route", ""),
+        "reward": episode.get("reward", 0),
+    }
 
-    Args:
-        episodes: List of episode dicts
 
-    Returns:
-        List of preference pairs
+def _episode_id(episode: Dict[str, Any]) -> str:
+    """Stable identity for dedup: trace id if logged, else the pair-relevant fields."""
+    trace_id = episode.get("trace_id")
+    if trace_id:
+        return str(trace_id)
+    fields = (
+        episode.get("session_id"),
+        episode.get("timestamp"),
+        episode.get("text_len"),
+        episode.get("lang"),
+        *_pair_side(episode).values(),
+    )
+    return json.dumps(fields, default=str)
+
+
+def iter_preference_pairs(
+    episodes: Iterable[Dict[str, Any]],
+    max_pairs_per_intent: int = 10,
+    reservoir_size: int = 256,
+    negatives_per_chosen: int = 2,
+    min_latency_gap_ms: float = 100.0,
+    seed: int = 42,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Generate preference pairs for DPO training in one pass over episodes.
+
+    Episodes are reservoir-sampled per (intent, success) stratum, so memory is
+    bounded and rare failures are not crowded out by frequent successes. Each
+    intent's sample is ranked (successful + fast preferred over failed/slow);
+    every best-quartile episode is paired with its most context-similar
+    worst-quartile episodes (hard negatives) that differ meaningfully in
+    outcome. Pairs are deduplicated by a (chosen, rejected) hash and capped
+    per intent. Total work is O(episodes) plus a constant per intent.
+
+    Args:
+        episodes: Iterable of episode dicts (may be a stream)
+        max_pairs_per_intent: Cap on pairs per intent
+        reservoir_size: Sampled episodes kept per (intent, success) stratum
+        negatives_per_chosen: Hard negatives paired with each chosen episode
+        min_latency_gap_ms: Latency difference that makes a pair meaningful
+            when both sides have the same success
+        seed: Sampling seed
+
+    Yields:
+        Preference pair dicts (context, chosen, rejected, pair_id, similarity)
     """
-    # Group by intent for fair comparison
-    intent_groups = {}
+    rng = random.Random(seed)
+    reservoirs: Dict[tuple, List[Dict[str, Any]]] = {}
+    seen: Counter = Counter()
+
+    # Stratified reservoir sampling (algorithm R per stratum)
     for episode in episodes:
-        intent = episode.get("intent", "unknown")
-        if intent not in intent_groups:
-            intent_groups[intent] = []
-        intent_groups[intent].append(episode)
+        stratum = (
+            episode.get("intent", "unknown"),
+            bool(episode.get("success", False)),
+        )
+        seen[stratum] += 1
+        reservoir = reservoirs.setdefault(stratum, [])
+        if len(reservoir) < reservoir_size:
+            reservoir.append(episode)
+        else:
+            slot = rng.randrange(seen[stratum])
+            if slot < reservoir_size:
+                reservoir[slot] = episode
 
-    pairs = []
+    intents: Dict[str, List[Dict[str, Any]]] = {}
+    for (intent, _), reservoir in reservoirs.items():
+        intents.setdefault(intent, []).extend(reservoir)
 
-    for intent, group in intent_groups.items():
+    total = 0
+    for intent, group in intents.items():
         if len(group) < 2:
             continue
 
-        # Sort by preference: success first, then by latency
-        group.sort(
-            key=lambda x: (
-                -int(x.get("success", False)),  # Success first (negative for desc)
-                -int(x.get("tool_ok", False)),  # Tool success second
-                x.get("latency_ms", float("inf")),  # Then by latency (asc)
-                x.get("cost_usd", float("inf")),  # Then by cost (asc)
-            )
-        )
-
-        # Create pairs between best and worst quartiles
+        group.sort(key=_preference_key)
         n = len(group)
         best_quartile = group[: max(1, n // 4)]
         worst_quartile = group[max(1, 3 * n // 4) :]
 
+        emitted = 0
+        hashes = set()
         for chosen in best_quartile:
-            for rejected in worst_quartile:
-                # Only create pair if there's a meaningful difference
-                if (
-                    chosen.get("success", False) != rejected.get("success", False)
-                    or abs(chosen.get("latency_ms", 0) - rejected.get("latency_ms", 0))
-                    > 100
-                ):
-                    pairs.append(
-                        {
-                            "context": {
-                                "intent": intent,
-                                "lang": chosen.get("lang", "sv"),
-                                "text_len": chosen.get("text_len", 0),
-                            },
-                            "chosen": {
-                                "success": chosen.get("success", False),
-                                "latency_ms": chosen.get("latency_ms", 0),
-                                "tool_ok": chosen.get("tool_ok", False),
-                                "route": chosen.get("route", ""),
-                                "reward": chosen.get("reward", 0),
-                            },
-                            "rejected": {
-                                "success": rejected.get("success", False),
-                                "latency_ms": rejected.get("latency_ms", 0),
-                                "tool_ok": rejected.get("tool_ok", False),
-                                "route": rejected.get("route", ""),
-                                "reward": rejected.get("reward", 0),
-                            },
-                        }
-                    )
-
-                    # Limit pairs per intent to avoid imbalance
-                    if (
-                        len([p for p in pairs if p["context"]["intent"] == intent])
-                        >= 10
-                    ):
-                        break
+            # Only candidates with a meaningful difference in outcome
+            candidates = [
+                rejected
+                for rejected in worst_quartile
+                if chosen.get("success", False) != rejected.get("success", False)
+                or abs(chosen.get("latency_ms", 0) - rejected.get("latency_ms", 0))
+                > min_latency_gap_ms
+            ]
+            hard_negatives = heapq.nlargest(
+                negatives_per_chosen,
+                candidates,
+                key=lambda rejected: _context_similarity(chosen, rejected),
+            )
 
-            if len([p for p in pairs if p["context"]["intent"] == intent]) >= 10:
+            for rejected in hard_negatives:
+                pair_id = hashlib.blake2b(
+                    f"{_episode_id(chosen)}|{_episode_id(rejected)}".encode(),
+                    digest_size=8,
+                ).hexdigest()
+                if pair_id in hashes:
+                    continue
+                hashes.add(pair_id)
+
+                yield {
+                    "pair_id": pair_id,
+                    "context": {
+                        "intent": intent,
+                        "lang": chosen.get("lang", "sv"),
+                        "text_len": chosen.get("text_len", 0),
+                    },
+                    "chosen": _pair_side(chosen),
+                    "rejected": _pair_side(rejected),
+                    "similarity": round(_context_similarity(chosen, rejected), 4),
+                }
+                emitted += 1
+                if emitted >= max_pairs_per_intent:
+                    break
+
+            if emitted >= max_pairs_per_intent:
                 break
+        total += emitted
 
     logger.info(
-        "Created preference pairs", total=len(pairs), intents=len(intent_groups)
+        "Created preference pairs",
+        total=total,
+        intents=len(intents),
+        episodes_seen=sum(seen.values()),
     )
 
-    return pairs
+
+def create_preference_pairs(
+    episodes: Iterable[Dict[str, Any]], **kwargs
+) -> List[Dict[str, Any]]:
+    """
+    Create preference pairs for DPO training.
+
+    Uses heuristic: successful + fast responses preferred over failed/slow ones.
+    See iter_preference_pairs for sampling and caps.
+
+    Args:
+        episodes: Episode dicts
+        **kwargs: Options for iter_preference_pairs
+
+    Returns:
+        List of preference pairs
+    """
+    return list(iter_preference_pairs(episodes, **kwargs))
+
+
+def write_preference_pairs(
+    episodes: Iterable[Dict[str, Any]],
+    prefs_path: pathlib.Path,
+    shard_size: int = 100_000,
+    **kwargs,
+) -> int:
+    """
+    Stream preference pairs into JSONL or Parquet shards (by suffix).
+
+    Returns:
+        Number of pairs written
+    """
+    with columnar.ShardedWriter(prefs_path, shard_size=shard_size) as writer:
+        for pair in iter_preference_pairs(episodes, **kwargs):
+            writer.write(pair)
+    logger.info(
+        "Saved preference pairs",
+        path=str(prefs_path),
+        count=writer.count,
+        shards=len(writer.shards),
+    )
+    return writer.count
+
+
+def save_episodes(episodes: List[Dict[str, Any]], output_path: pathlib.Path) -> None:
+    """Save in-memory episodes as Parquet, CSV or JSONL (fallback path)."""
+    if pd is not None and output_path.suffix == ".parquet":
+        df = pd.DataFrame(episodes)
+        df.to_parquet(output_path, index=False)
+        logger.info("Saved episodes to parquet", path=output_path, count=len(episodes))
+    elif pd is not None:
+        # Fallback to CSV
+        df = pd.DataFrame(episodes)
+        csv_path = output_path.with_suffix(".csv")
+        df.to_csv(csv_path, index=False)
+        logger.info("Saved episodes to CSV", path=csv_path, count=len(episodes))
+    else:
+        # Pure JSON fallback
+        json_path = output_path.with_suffix(".jsonl")
+        with open(json_path, "w", encoding="utf-8") as f:
+            for episode in episodes:
+                json.dump(episode, f, ensure_ascii=False)
+                f.write("\\n")
+        logger.info("Saved episodes to JSONL", path=json_path, count=len(episodes))
 
 
 def main():
@@ -400,9 +660,27 @@ def main():
         "--telemetry", required=True, help="Directory with telemetry JSONL files"
     )
     parser.add_argument("--tests", help="Directory with test results JSONL files")
-    parser.add_argument("--out", required=True, help="Output file (.parquet or .csv)")
-    parser.add_argument("--prefs", help="Output preference pairs for DPO (.jsonl)")
+    parser.add_argument(
+        "--out",
+        required=True,
+        help="Output file (.parquet or .csv), or directory for a day-partitioned dataset",
+    )
+    parser.add_argument(
+        "--prefs", help="Output preference pairs for DPO (.jsonl or .parquet)"
+    )
+    parser.add_argument(
+        "--prefs-per-intent",
+        type=int,
+        default=10,
+        help="Max preference pairs per intent",
+    )
+    parser.add_argument(
+        "--prefs-shard-size", type=int, default=100_000, help="Pairs per output shard"
+    )
     parser.add_argument("--max-events", type=int, help="Maximum events to process")
+    parser.add_argument(
+        "--workers", type=int, help="Ingest worker processes (default: CPU count)"
+    )
     parser.add_argument(
         "--sample-schema",
         action="store_true",
@@ -439,53 +717,47 @@ def main():
         return
 
     try:
-        # Load data
-        episodes = load_telemetry_data(
-            telemetry_dir=telemetry_dir, tests_dir=tests_dir, max_events=args.max_events
-        )
-
         # Create output directory
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Save episodes
-        if pd is not None and output_path.suffix == ".parquet":
-            df = pd.DataFrame(episodes)
-            df.to_parquet(output_path, index=False)
-            logger.info(
-                "Saved episodes to parquet", path=output_path, count=len(episodes)
+        if columnar.available() and output_path.suffix in (".parquet", ""):
+            # Stream telemetry -> Parquet in parallel; read back batch by batch
+            count = build_episode_dataset(
+                telemetry_dir=telemetry_dir,
+                output_path=output_path,
+                tests_dir=tests_dir,
+                max_events=args.max_events,
+                workers=args.workers,
+            )
+            logger.info("Saved episodes to parquet", path=output_path, count=count)
+
+            if args.prefs:
+                write_preference_pairs(
+                    columnar.iter_parquet_rows(output_path),
+                    pathlib.Path(args.prefs),
+                    shard_size=args.prefs_shard_size,
+                    max_pairs_per_intent=args.prefs_per_intent,
+                )
+            # Statistics only need the reward columns
+            episodes = list(
+                columnar.iter_parquet_rows(output_path, columns=REWARD_FIELDS)
             )
         else:
-            # Fallback to CSV
-            if pd is not None:
-                df = pd.DataFrame(episodes)
-                csv_path = output_path.with_suffix(".csv")
-                df.to_csv(csv_path, index=False)
-                logger.info("Saved episodes to CSV", path=csv_path, count=len(episodes))
-            else:
-                # Pure JSON fallback
-                json_path = output_path.with_suffix(".jsonl")
-                with open(json_path, "w", encoding="utf-8") as f:
-                    for episode in episodes:
-                        json.dump(episode, f, ensure_ascii=False)
-                        f.write("\\n")
-                logger.info(
-                    "Saved episodes to JSONL", path=json_path, count=len(episodes)
+            episodes = load_telemetry_data(
+                telemetry_dir=telemetry_dir,
+                tests_dir=tests_dir,
+                max_events=args.max_events,
+            )
+            save_episodes(episodes, output_path)
+
+            if args.prefs:
+                write_preference_pairs(
+                    episodes,
+                    pathlib.Path(args.prefs),
+                    shard_size=args.prefs_shard_size,
+                    max_pairs_per_intent=args.prefs_per_intent,
                 )
 
-        # Create preference pairs if requested
-        if args.prefs:
-            prefs_path = pathlib.Path(args.prefs)
-            prefs_path.parent.mkdir(parents=True, exist_ok=True)
-
-            pairs = create_preference_pairs(episodes)
-
-            with open(prefs_path, "w", encoding="utf-8") as f:
-                for pair in pairs:
-                    json.dump(pair, f, ensure_ascii=False)
-                    f.write("\\n")
-
-            logger.info("Saved preference pairs", path=prefs_path, count=len(pairs))
-
         # Summary statistics
         from rl.reward import analyze_rewards
 
@@ -10,7 +10,7 @@ from __future__ import annotations
 import argparse
 import json
 import pathlib
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import structlog
 
@@ -29,6 +29,32 @@ from rl.utils.features import FeatureMaker
 logger = structlog.get_logger(__name__)
 
 
+def _column(df: "pd.DataFrame", key: str, default: Any) -> "pd.Series":
+    """Column with missing values (or a missing column) set to default."""
+    if key not in df.columns:
+        return pd.Series(default, index=df.index)
+    return df[key].fillna(default)
+
+
+def _distribution(actions: np.ndarray) -> Dict[str, float]:
+    values, counts = np.unique(actions.astype(str), return_counts=True)
+    return {str(v): float(c / len(actions)) for v, c in zip(values, counts)}
+
+
+def _safe_ratio(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    return np.divide(num, den, out=np.zeros_like(num, dtype=float), where=den > 0)
+
+
+# Each estimator as a function of per-episode term sums (wr, w, dr, matched)
+# and n, so the point estimate and every bootstrap draw share one code path.
+# Standard IPS averages over the matched episodes only (as it always has).
+ESTIMATORS = {
+    "ips": lambda wr, w, dr, m, n: _safe_ratio(wr, m),
+    "snips": lambda wr, w, dr, m, n: _safe_ratio(wr, w),
+    "dr": lambda wr, w, dr, m, n: dr / n,
+}
+
+
 class IPSEvaluator:
     """
     Inverse Propensity Scoring evaluator for offline policy evaluation.
@@ -43,6 +69,9 @@ class IPSEvaluator:
         clip_weights: bool = True,
         max_weight: float = 100.0,
         min_propensity: float = 1e-6,
+        n_bootstrap: int = 200,
+        confidence: float = 0.95,
+        seed: int = 42,
     ):
         """
         Initialize IPS evaluator.
@@ -52,11 +81,17 @@ class IPSEvaluator:
             clip_weights: Clip extreme importance weights
             max_weight: Maximum allowed importance weight
             min_propensity: Minimum propensity score (prevents division by zero)
+            n_bootstrap: Bootstrap resamples for confidence intervals (0 = off)
+            confidence: Confidence level of the bootstrap intervals
+            seed: Bootstrap RNG seed (reproducible intervals)
         """
         self.self_normalized = self_normalized
         self.clip_weights = clip_weights
         self.max_weight = max_weight
         self.min_propensity = min_propensity
+        self.n_bootstrap = n_bootstrap
+        self.confidence = confidence
+        self.seed = seed
 
         logger.info(
             "IPS evaluator initialized",
@@ -69,61 +104,49 @@ class IPSEvaluator:
         self,
         policy: LinUCBRouting,
         feature_maker: FeatureMaker,
-        episodes: List[Dict[str, Any]],
-    ) -> Dict[str, float]:
+        episodes: Union[List[Dict[str, Any]], "pd.DataFrame"],
+    ) -> Dict[str, Any]:
         """
-        Evaluate routing policy using IPS.
+        Evaluate routing policy using IPS, SNIPS and doubly-robust estimators.
+
+        Runs column-wise: one feature matrix for all episodes, one batched
+        arm selection, and array arithmetic for the estimators.
 
         Args:
             policy: Routing policy to evaluate
             feature_maker: Feature transformation
-            episodes: Logged episodes with propensity scores
+            episodes: Logged episodes (DataFrame or list of dicts) with
+                route, reward and route_propensity
 
         Returns:
             Evaluation metrics dict
         """
-        if not episodes:
+        df = episodes if isinstance(episodes, pd.DataFrame) else pd.DataFrame(episodes)
+        if df.empty:
             return {"error": "No episodes provided"}
 
-        logger.info("Evaluating routing policy with IPS", episodes=len(episodes))
-
-        # Collect IPS data
-        rewards = []
-        weights = []
-        policy_actions = []
-        logged_actions = []
+        n = len(df)
+        logger.info("Evaluating routing policy with IPS", episodes=n)
 
-        for episode in episodes:
-            # Extract features and transform
-            features = feature_maker.transform(episode)
-            x = np.array(features)
-
-            # Get policy's action
-            policy_action, _ = policy.select_arm(
-                x, mode="mean"
-            )  # Greedy for evaluation
-            policy_actions.append(policy_action)
-
-            # Get logged action
-            logged_action = episode.get("route", "micro")
-            logged_actions.append(logged_action)
-
-            # Check if actions match (only include matching episodes in IPS)
-            if policy_action == logged_action:
-                # Get importance weight
-                propensity = max(
-                    episode.get("route_propensity", 1.0), self.min_propensity
-                )
-                weight = 1.0 / propensity
+        # Batched features and greedy arm choice
+        X = feature_maker.transform_frame(df)
+        arms, choices = policy.select_arms_batch(X, mode="mean")
+        policy_actions = np.asarray(arms, dtype=object)[choices]
 
-                # Clip weight if requested
-                if self.clip_weights:
-                    weight = min(weight, self.max_weight)
+        logged_actions = (
+            _column(df, "route", "micro").astype(str).to_numpy(dtype=object)
+        )
+        rewards = _column(df, "reward", 0.0).astype(float).to_numpy()
+        propensities = _column(df, "route_propensity", 1.0).astype(float).to_numpy()
 
-                weights.append(weight)
-                rewards.append(episode.get("reward", 0.0))
+        # Importance weights, zero where the policy disagrees with the log
+        match = policy_actions == logged_actions
+        weights = 1.0 / np.maximum(propensities, self.min_propensity)
+        if self.clip_weights:
+            weights = np.minimum(weights, self.max_weight)
+        matched_weights = weights * match
 
-        if not weights:
+        if not match.any():
             logger.warning("No matching actions found for IPS evaluation")
             return {
                 "error": "No matching actions",
@@ -132,50 +155,49 @@ class IPSEvaluator:
                 "overlap": 0,
             }
 
-        weights = np.array(weights)
-        rewards = np.array(rewards)
+        # Direct-method reward model: the policy's own per-arm ridge predictions
+        W = np.stack([policy.weights[arm] for arm in arms])
+        q_all = X @ W.T
+        q_policy = q_all[np.arange(n), choices]
+        arm_index = {arm: i for i, arm in enumerate(arms)}
+        logged_idx = np.array([arm_index.get(a, -1) for a in logged_actions])
+        q_logged = np.where(
+            logged_idx >= 0, q_all[np.arange(n), np.maximum(logged_idx, 0)], 0.0
+        )
 
-        # Calculate IPS estimate
-        if self.self_normalized:
-            # Self-normalized IPS: more stable, less biased
-            weight_sum = weights.sum()
-            if weight_sum > 0:
-                normalized_weights = weights / weight_sum
-                ips_estimate = (normalized_weights * rewards).sum()
-            else:
-                ips_estimate = 0.0
-        else:
-            # Standard IPS
-            ips_estimate = (weights * rewards).mean()
+        # Per-episode terms: importance-weighted reward, weight, DR correction,
+        # matched indicator
+        terms = np.stack(
+            [
+                matched_weights * rewards,
+                matched_weights,
+                q_policy + matched_weights * (rewards - q_logged),
+                match.astype(float),
+            ]
+        )
+        estimators = self._estimate(terms)
+        ips_estimate = estimators["snips" if self.self_normalized else "ips"]["value"]
 
-        # Calculate effective sample size (measure of estimation quality)
-        ess = (weights.sum() ** 2) / (weights**2).sum() if len(weights) > 0 else 0
+        w_used = weights[match]
+        ess = (w_used.sum() ** 2) / (w_used**2).sum()
 
-        # Additional metrics
         weight_stats = {
-            "mean_weight": weights.mean(),
-            "max_weight": weights.max(),
-            "min_weight": weights.min(),
-            "weight_variance": weights.var(),
-            "effective_sample_size": ess,
-            "coverage": len(weights) / len(episodes),  # Fraction of episodes used
+            "mean_weight": float(w_used.mean()),
+            "max_weight": float(w_used.max()),
+            "min_weight": float(w_used.min()),
+            "weight_variance": float(w_used.var()),
+            "effective_sample_size": float(ess),
+            "coverage": float(match.mean()),  # Fraction of episodes used
         }
 
-        # Policy distribution analysis
-        policy_dist = {}
-        logged_dist = {}
-
-        for action in set(policy_actions + logged_actions):
-            policy_dist[action] = policy_actions.count(action) / len(policy_actions)
-            logged_dist[action] = logged_actions.count(action) / len(logged_actions)
-
         results = {
             "ips_estimate": float(ips_estimate),
-            "episodes_used": len(weights),
-            "total_episodes": len(episodes),
+            "estimators": estimators,
+            "episodes_used": int(match.sum()),
+            "total_episodes": n,
             "weight_stats": weight_stats,
-            "policy_distribution": policy_dist,
-            "logged_distribution": logged_dist,
+            "policy_distribution": _distribution(policy_actions),
+            "logged_distribution": _distribution(logged_actions),
             "evaluation_method": (
                 "self_normalized_ips" if self.self_normalized else "standard_ips"
             ),
@@ -184,12 +206,44 @@ class IPSEvaluator:
         logger.info(
             "Routing policy IPS evaluation complete",
             ips_estimate=ips_estimate,
-            episodes_used=len(weights),
+            dr_estimate=estimators["dr"]["value"],
+            episodes_used=int(match.sum()),
             effective_sample_size=ess,
         )
 
         return results
 
+    def _estimate(self, terms: np.ndarray) -> Dict[str, Dict[str, float]]:
+        """
+        IPS/SNIPS/DR point estimates with percentile bootstrap intervals.
+
+        Args:
+            terms: (4, n) per-episode terms (w*r, w, dr, matched)
+        """
+        n = terms.shape[1]
+        totals = terms.sum(axis=1)
+        results = {
+            name: {"value": float(fn(*totals, n))} for name, fn in ESTIMATORS.items()
+        }
+        if self.n_bootstrap <= 0:
+            return results
+
+        # Each draw only needs term sums: resample counts via bincount and
+        # take one (4, n) @ (n,) product instead of gathering resampled rows
+        rng = np.random.default_rng(self.seed)
+        sums = np.empty((len(terms), self.n_bootstrap))
+        for i in range(self.n_bootstrap):
+            counts = np.bincount(rng.integers(0, n, size=n), minlength=n)
+            sums[:, i] = terms @ counts
+        draws = {name: fn(*sums, n) for name, fn in ESTIMATORS.items()}
+
+        tail = (1.0 - self.confidence) / 2 * 100
+        for name, values in draws.items():
+            low, high = np.percentile(values, [tail, 100 - tail])
+            results[name]["ci_low"] = float(low)
+            results[name]["ci_high"] = float(high)
+        return results
+
     def evaluate_tool_policy(
         self, policy: ThompsonSamplingTools, episodes: List[Dict[str, Any]]
     ) -> Dict[str, float]:
@@ -227,14 +281,11 @@ class IPSEvaluator:
             policy_tools = []
             logged_tools = []
 
-            for episode in intent_eps:
-                # Get policy's tool recommendation (greedy)
-                rankings = policy.get_tool_ranking(intent)
-                if rankings:
-                    policy_tool = rankings[0][0]  # Top ranked tool
-                else:
-                    policy_tool = "none"
+            # Policy's tool recommendation (greedy) depends only on the intent
+            rankings = policy.get_tool_ranking(intent)
+            policy_tool = rankings[0][0] if rankings else "none"
 
+            for episode in intent_eps:
                 policy_tools.append(policy_tool)
 
                 # Get logged tool
@@ -389,6 +440,17 @@ class IPSEvaluator:
             return "DO_NOT_DEPLOY - Performance regression detected"
 
 
+def load_episodes_frame(path: str) -> "pd.DataFrame":
+    """Load logged episodes as a DataFrame (Parquet/Arrow, CSV or JSONL)."""
+    if path.endswith(".parquet") or pathlib.Path(path).is_dir():
+        return pd.read_parquet(path)  # Dir = partitioned dataset
+    if path.endswith((".arrow", ".feather")):
+        return pd.read_feather(path)
+    if path.endswith((".jsonl", ".jsonl.gz")):
+        return pd.read_json(path, lines=True)
+    return pd.read_csv(path)
+
+
 def load_policies(
     routing_path: str, tool_path: str
 ) -> Tuple[
@@ -448,6 +510,13 @@ def main():
     parser.add_argument(
         "--no-clip", action="store_true", help="Don't clip importance weights"
     )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=200,
+        help="Bootstrap resamples for confidence intervals (0 disables)",
+    )
+    parser.add_argument("--seed", type=int, default=42, help="Bootstrap seed")
 
     args = parser.parse_args()
 
@@ -458,15 +527,10 @@ def main():
     )
 
     try:
-        # Load episodes
+        # Load episodes (columnar; row dicts only for the tool evaluator)
         logger.info("Loading episodes", path=args.episodes)
-        if args.episodes.endswith(".parquet"):
-            df = pd.read_parquet(args.episodes)
-        else:
-            df = pd.read_csv(args.episodes)
-
-        episodes = df.to_dict("records")
-        logger.info("Loaded episodes", count=len(episodes))
+        df = load_episodes_frame(args.episodes)
+        logger.info("Loaded episodes", count=len(df))
 
         # Initialize evaluator
         evaluator = IPSEvaluator(
@@ -474,6 +538,8 @@ def main():
             clip_weights=not args.no_clip,
             max_weight=args.max_weight,
             min_propensity=args.min_propensity,
+            n_bootstrap=args.bootstrap,
+            seed=args.seed,
         )
 
         results = {
@@ -482,7 +548,8 @@ def main():
                 "clip_weights": not args.no_clip,
                 "max_weight": args.max_weight,
                 "min_propensity": args.min_propensity,
-                "episodes_count": len(episodes),
+                "bootstrap": args.bootstrap,
+                "episodes_count": len(df),
             }
         }
 
@@ -494,10 +561,11 @@ def main():
         if routing_policy and feature_maker:
             logger.info("Evaluating candidate routing policy")
             routing_results = evaluator.evaluate_routing_policy(
-                routing_policy, feature_maker, episodes
+                routing_policy, feature_maker, df
             )
             results["candidate_routing"] = routing_results
 
+        episodes = df.to_dict("records") if tool_policy else []
         if tool_policy:
             logger.info("Evaluating candidate tool policy")
             tool_results = evaluator.evaluate_tool_policy(tool_policy, episodes)
@@ -511,7 +579,7 @@ def main():
 
             if baseline_routing and baseline_fm and routing_policy:
                 baseline_routing_results = evaluator.evaluate_routing_policy(
-                    baseline_routing, baseline_fm, episodes
+                    baseline_routing, baseline_fm, df
                 )
                 results["baseline_routing"] = baseline_routing_results
 
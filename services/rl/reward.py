@@ -28,6 +28,16 @@ DEFAULT_WEIGHTS = {
     "guard_flag": -0.7,  # Penalty for security violations
 }
 
+# Episode fields read by turn_reward/analyze_rewards
+REWARD_FIELDS = (
+    "success",
+    "tool_ok",
+    "latency_ms",
+    "cost_usd",
+    "cache_hit",
+    "guard_flag",
+)
+
 
 def turn_reward(
     success: bool,
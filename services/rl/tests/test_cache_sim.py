@@ -0,0 +1,74 @@
+from rl.bandits.cache_sim import CacheConfig, TraceRequest, _CacheState, build_trace
+
+
+def _turn_event(ts, text, output_text="Klockan är 14:05.", **fields):
+    # Shape written by the orchestrator's log_turn_event
+    event = {
+        "v": "1",
+        "ts": ts,
+        "trace_id": f"t-{ts}",
+        "session_id": "s1",
+        "route": "micro",
+        "e2e_first_ms": 120,
+        "e2e_full_ms": 240,
+        "tool_calls": [],
+        "guardian_state": "NORMAL",
+        "input_text": text,
+        "lang": "sv",
+        "rag": {"top_k": 0, "hits": 0},
+        "output_text": output_text,
+    }
+    event.update(fields)
+    return event
+
+
+def test_build_trace_from_turn_events():
+    events = [
+        _turn_event("2025-09-01T10:00:00Z", "Vad är klockan?"),
+        _turn_event("2025-09-01T10:00:05Z", "vad är klockan", e2e_full_ms=360),
+        _turn_event(
+            "2025-09-01T10:00:09Z",
+            "boka möte",
+            output_text="",
+            route="error",
+            tool_calls=[{"tool": "orchestrator.chat", "success": False}],
+        ),
+    ]
+
+    trace = build_trace(events)
+
+    assert len(trace) == 3
+    assert [r.success for r in trace.requests] == [True, True, False]
+    assert [r.miss_latency_ms for r in trace.requests] == [240.0, 360.0, 240.0]
+    assert trace.requests[0].canonical_id != trace.requests[2].canonical_id
+
+
+def test_build_trace_reads_intent_from_turn_spans():
+    events = [
+        _turn_event(
+            "2025-09-01T10:00:00Z",
+            "Vad är klockan?",
+            spans=[{"name": "nlu", "attrs": {"intent": "time.now"}}],
+        ),
+        _turn_event(
+            "2025-09-01T10:00:05Z",
+            "Hej Alice!",
+            spans=[{"name": "intent.guard", "attrs": {"intent": "greeting.hello"}}],
+        ),
+        _turn_event("2025-09-01T10:00:09Z", "boka möte", nlu={"intent": "CAL.BOOK"}),
+    ]
+
+    intents = [r.intent for r in build_trace(events).requests]
+
+    assert intents == ["time.now", "greeting.hello", "cal.book"]
+
+
+def test_negative_entries_expire_through_ttl_heap():
+    state = _CacheState(CacheConfig(negative_ttl_seconds=60))
+    for i in range(100):
+        req = TraceRequest(i * 30.0, "time.now", i, i, False, 100.0)
+        state.lookup(req, ("time.now", i, 0), lambda a, b: 0.0)
+        state.store(req, ("time.now", i, 0))
+
+    # Only failures within the last TTL are still negatively cached
+    assert len(state.negative) <= 3
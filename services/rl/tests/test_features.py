@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from rl.utils.features import FeatureMaker
+
+EPISODES = [
+    {"intent": "time.now", "lang": "sv", "text_len": 12, "word_count": 3},
+    {"intent": None, "lang": "en", "text_len": 80, "word_count": 14},
+    {"lang": "sv", "text_len": 300, "word_count": 50},
+    {"intent": "", "lang": None, "text_len": 5, "word_count": 1},
+]
+
+
+def _feature_maker():
+    fm = FeatureMaker(
+        dim=32,
+        numeric_keys=["text_len", "word_count"],
+        categorical_keys=["intent", "lang", "session_length"],
+        interaction_pairs=[("intent", "lang")],
+    )
+    fm.fit_numeric(EPISODES)
+    return fm
+
+
+def test_frame_matches_per_row_transform_with_missing_values():
+    fm = _feature_maker()
+    expected = np.vstack([fm.transform(e) for e in EPISODES])
+
+    # List-of-dicts frames turn missing keys/None into NaN
+    assert np.allclose(fm.transform_frame(pd.DataFrame(EPISODES)), expected)
+    assert np.allclose(
+        fm.transform_frame(pd.DataFrame.from_records(EPISODES, coerce_float=False)),
+        expected,
+    )
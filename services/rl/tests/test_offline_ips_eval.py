@@ -0,0 +1,36 @@
+import numpy as np
+from rl.eval.offline_ips_eval import IPSEvaluator
+
+
+class FixedPolicy:
+    """Always picks micro; zero reward model"""
+
+    weights = {"micro": np.zeros(2), "planner": np.zeros(2)}
+
+    def select_arms_batch(self, X, mode="mean"):
+        return ["micro", "planner"], np.zeros(len(X), dtype=int)
+
+
+class ZeroFeatures:
+    def transform_frame(self, df):
+        return np.zeros((len(df), 2))
+
+
+EPISODES = [
+    {"route": "micro", "reward": 1.0, "route_propensity": 0.5},
+    {"route": "micro", "reward": 0.0, "route_propensity": 0.25},
+    {"route": "planner", "reward": 1.0, "route_propensity": 0.5},
+    {"route": "planner", "reward": 1.0, "route_propensity": 0.5},
+]
+
+
+def test_ips_averages_over_matched_episodes():
+    evaluator = IPSEvaluator(self_normalized=False, n_bootstrap=0)
+    result = evaluator.evaluate_routing_policy(FixedPolicy(), ZeroFeatures(), EPISODES)
+
+    # Matched: weights 2 and 4, rewards 1 and 0
+    estimators = result["estimators"]
+    assert result["ips_estimate"] == estimators["ips"]["value"] == (2 * 1 + 4 * 0) / 2
+    assert estimators["snips"]["value"] == 2 / 6
+    assert estimators["dr"]["value"] == 2 / 4
+    assert result["episodes_used"] == 2
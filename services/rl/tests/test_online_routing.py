@@ -0,0 +1,41 @@
+import json
+import os
+
+from rl.bandits.online_routing import ACTIVE_PACK, ONLINE_PACK, OnlineRoutingLearner
+from rl.bandits.routing_linucb import LinUCBRouting
+from rl.utils.features import FeatureMaker
+
+
+def _deploy(policy_dir, name):
+    fm = FeatureMaker(dim=8, numeric_keys=[], categorical_keys=["intent"])
+    routing = {
+        "routing_policy": LinUCBRouting(feature_dim=8).to_dict(),
+        "feature_maker": fm.serialize(),
+    }
+    path = policy_dir / name
+    path.write_text(json.dumps({"version": "v1", "policies": {"routing": routing}}))
+    return path
+
+
+def test_checkpoint_keeps_regular_active_pack_a_file(tmp_path):
+    active = _deploy(tmp_path, ACTIVE_PACK)
+    learner = OnlineRoutingLearner.from_live_pack(tmp_path)
+    learner.updates = 3
+
+    assert learner.checkpoint() == active
+    assert not active.is_symlink()
+    assert not (tmp_path / ONLINE_PACK).exists()
+    pack = json.loads(active.read_text())
+    assert pack["version"] == "v1"
+    assert pack["policies"]["routing"]["online_info"]["online_updates"] == 3
+
+
+def test_checkpoint_repoints_linked_active_pack(tmp_path):
+    _deploy(tmp_path, "policy_pack_v1.json")
+    os.symlink("policy_pack_v1.json", tmp_path / ACTIVE_PACK)
+    learner = OnlineRoutingLearner.from_live_pack(tmp_path)
+
+    assert learner.checkpoint() == tmp_path / ONLINE_PACK
+    assert os.readlink(tmp_path / ACTIVE_PACK) == ONLINE_PACK
+    assert (tmp_path / "policy_pack_v1.json").exists()
+    assert learner.reload_if_replaced() is False
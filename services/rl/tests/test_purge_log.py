@@ -0,0 +1,61 @@
+import json
+
+from rl.bandits.online_routing import TelemetryTailer
+from rl.utils.columnar import Watermarks
+from rl.utils.tombstones import PurgeLog
+
+
+def _compact(telemetry, segment, keep):
+    # What the orchestrator's compactor does: rewrite, log, replace
+    lines = segment.read_bytes().splitlines(keepends=True)
+    tmp = telemetry / "_privacy" / "purge.tmp"
+    tmp.parent.mkdir(exist_ok=True)
+    tmp.write_bytes(b"".join(line for i, line in enumerate(lines) if i in keep))
+    removed = [
+        [sum(map(len, lines[:i])), len(line)]
+        for i, line in enumerate(lines)
+        if i not in keep
+    ]
+    record = {
+        "type": "segment_rewrite",
+        "segment": segment.relative_to(telemetry).as_posix(),
+        "inode_before": segment.stat().st_ino,
+        "inode_after": tmp.stat().st_ino,
+        "removed_ranges": removed,
+    }
+    with open(telemetry / "_privacy" / "tombstones.jsonl", "a") as f:
+        f.write(json.dumps(record) + "\n")
+    tmp.replace(segment)
+
+
+def _append(segment, *trace_ids):
+    with open(segment, "a") as f:
+        for trace_id in trace_ids:
+            f.write(json.dumps({"trace_id": trace_id}) + "\n")
+
+
+def test_tailer_resumes_after_compaction(tmp_path):
+    segment = tmp_path / "2025-09-01" / "events_2025-09-01.jsonl"
+    segment.parent.mkdir()
+    _append(segment, "a", "b", "c")
+
+    tailer = TelemetryTailer(tmp_path, from_start=True)
+    assert [e["trace_id"] for e in tailer.poll()] == ["a", "b", "c"]
+
+    _compact(tmp_path, segment, keep={0, 2})
+    _append(segment, "d")
+    assert [e["trace_id"] for e in tailer.poll()] == ["d"]
+
+
+def test_watermark_follows_compaction(tmp_path):
+    segment = tmp_path / "2025-09-01" / "events_2025-09-01.jsonl"
+    segment.parent.mkdir()
+    _append(segment, "a", "b")
+    marks = Watermarks(tmp_path / "watermarks.json")
+    marks.advance({str(segment): segment.stat().st_size})
+
+    _compact(tmp_path, segment, keep={1})
+    purges = PurgeLog.load(tmp_path)
+    assert marks.offsets([segment], purges) == {str(segment): segment.stat().st_size}
+    # Without the purge log a new inode means rotation
+    assert marks.offsets([segment]) == {}
@@ -0,0 +1,716 @@
+"""
+Columnar, parallel JSONL → Parquet ingestion for Alice telemetry.
+
+Shared engine behind rl/build_dataset.py and ingest/run_ingest.py. Files (and
+byte-range chunks of large uncompressed files) are processed in a process
+pool; each worker parses lines with orjson when available, applies a row
+transform and streams Arrow record batches into its own Parquet part files.
+Memory per worker is bounded by the batch size, not by the input size.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import structlog
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str)
+
+except ImportError:
+    orjson = None
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_BATCH_ROWS = 50_000
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+# transform(event, counters) -> row or None. Must be picklable (module-level
+# function or bound method of a picklable object) to run in worker processes.
+RowTransform = Callable[[Dict[str, Any], Counter], Optional[Dict[str, Any]]]
+# partition_by(row) -> partition directory name, e.g. "day=2025-09-01"
+PartitionFn = Callable[[Dict[str, Any]], str]
+
+
+def available() -> bool:
+    """True if pyarrow is installed (columnar output possible)."""
+    return pa is not None
+
+
+def event_day(timestamp: Any) -> str:
+    """YYYY-MM-DD (UTC) for epoch seconds/ms or ISO timestamps, else "unknown"."""
+    try:
+        if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+            seconds = timestamp / 1000.0 if timestamp > 1e11 else float(timestamp)
+            if seconds <= 0:
+                return "unknown"
+            return datetime.fromtimestamp(seconds, tz=timezone.utc).strftime("%Y-%m-%d")
+        if timestamp:
+            text = str(timestamp)
+            datetime.strptime(text[:10], "%Y-%m-%d")
+            return text[:10]
+    except (ValueError, OverflowError, OSError):
+        pass
+    return "unknown"
+
+
+def iter_json_lines(
+    path: pathlib.Path, start: int = 0, end: Optional[int] = None
+) -> Iterator[Tuple[Optional[Dict[str, Any]], int]]:
+    """
+    Fast JSONL reader over a byte range.
+
+    Lines are owned by the chunk they start in: a chunk starting mid-line
+    skips ahead to the next line, and the last line may run past ``end``.
+    Gzipped files are always read whole.
+
+    Yields:
+        (event or None for a malformed line, byte offset after the line)
+    """
+    if path.suffix == ".gz":
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                yield _parse_line(line), 0
+        return
+
+    with open(path, "rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                f.readline()  # Partial line belongs to the previous chunk
+        pos = f.tell()
+        for line in f:
+            if end is not None and pos >= end:
+                break
+            pos += len(line)
+            if not line.endswith(b"\n"):
+                break  # Incomplete trailing line (still being written)
+            yield _parse_line(line), pos
+
+
+def _parse_line(line: bytes) -> Optional[Dict[str, Any]]:
+    line = line.strip()
+    if not line:
+        return {}
+    try:
+        obj = _loads(line)
+    except ValueError:  # orjson.JSONDecodeError and json.JSONDecodeError
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+@dataclass
+class IngestTask:
+    """One unit of work: a file or a byte range of a file."""
+
+    path: pathlib.Path
+    start: int = 0
+    end: Optional[int] = None
+    index: int = 0
+
+
+@dataclass
+class IngestResult:
+    """Totals over all tasks of an ingest run."""
+
+    rows_in: int = 0
+    rows_out: int = 0
+    bad_lines: int = 0
+    tasks: int = 0
+    parts: List[pathlib.Path] = field(default_factory=list)
+    jsonl_parts: List[pathlib.Path] = field(default_factory=list)
+    counters: Counter = field(default_factory=Counter)
+    # str(path) -> byte offset after the last complete line consumed
+    offsets: Dict[str, int] = field(default_factory=dict)
+
+    def merge(self, other: "IngestResult") -> None:
+        self.rows_in += other.rows_in
+        self.rows_out += other.rows_out
+        self.bad_lines += other.bad_lines
+        self.tasks += other.tasks
+        self.parts.extend(other.parts)
+        self.jsonl_parts.extend(other.jsonl_parts)
+        self.counters.update(other.counters)
+        for path, offset in other.offsets.items():
+            self.offsets[path] = max(offset, self.offsets.get(path, 0))
+
+
+def plan_tasks(
+    files: List[pathlib.Path],
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    start_offsets: Optional[Dict[str, int]] = None,
+) -> List[IngestTask]:
+    """
+    Split files into tasks; large uncompressed files become byte-range chunks.
+
+    With start_offsets, only bytes past each file's offset are planned and
+    files without new data get no task. Gzipped files cannot be resumed
+    mid-stream: they are read whole unless their offset equals their size.
+    """
+    start_offsets = start_offsets or {}
+    tasks = []
+    for path in files:
+        size = path.stat().st_size
+        offset = start_offsets.get(str(path), 0)
+        if offset >= size:
+            continue
+        if path.suffix == ".gz":
+            tasks.append(IngestTask(path=path, end=size, index=len(tasks)))
+            continue
+        for start in range(offset, size, chunk_bytes):
+            tasks.append(
+                IngestTask(
+                    path=path,
+                    start=start,
+                    end=min(start + chunk_bytes, size),
+                    index=len(tasks),
+                )
+            )
+    return tasks
+
+
+class Watermarks:
+    """
+    Per-file ingest offsets persisted as JSON, for incremental runs.
+
+    A file whose inode changed or that shrank below its watermark was rotated
+    or truncated and is read again from the start - unless the change was a
+    GDPR compaction, whose purge log maps the watermark into the new file.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.files: Dict[str, Dict[str, int]] = {}
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+    def offsets(self, files: List[pathlib.Path], purges=None) -> Dict[str, int]:
+        """
+        Start offset per file (0 for new, rotated or truncated files).
+
+        Args:
+            files: Files about to be read
+            purges: PurgeLog of the telemetry dir, to follow compactions
+        """
+        offsets = {}
+        for path in files:
+            mark = self.files.get(str(path))
+            if not mark:
+                continue
+            stat = path.stat()
+            offset = mark["offset"]
+            if mark.get("inode") != stat.st_ino:
+                offset = (
+                    purges.translate(path, offset, mark.get("inode"), stat.st_ino)
+                    if purges is not None
+                    else None
+                )
+            if offset is not None and stat.st_size >= offset:
+                offsets[str(path)] = offset
+        return offsets
+
+    def advance(self, offsets: Dict[str, int]) -> None:
+        for path, offset in offsets.items():
+            self.files[path] = {
+                "offset": offset,
+                "inode": pathlib.Path(path).stat().st_ino,
+            }
+
+    def save(self) -> None:
+        """Atomically persist (write temp file, then rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "v": "1",
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                    "files": self.files,
+                },
+                f,
+                indent=2,
+            )
+        os.replace(tmp, self.path)
+
+
+class _PartWriter:
+    """
+    Streams record batches for one partition into Parquet part files.
+
+    The schema is inferred from the first batch. A later batch whose inferred
+    schema cannot be cast to it (e.g. a new key inside a nested dict) starts a
+    new part file instead of silently dropping fields. Free-form dict fields
+    listed in json_columns are stored as JSON strings instead.
+    """
+
+    def __init__(
+        self,
+        directory: pathlib.Path,
+        stem: str,
+        compression: str,
+        json_columns: Sequence[str] = (),
+    ):
+        self.directory = directory
+        self.stem = stem
+        self.compression = compression
+        self.json_paths = [tuple(c.split(".")) for c in json_columns]
+        self.parts: List[pathlib.Path] = []
+        self._writer = None
+
+    def _encode(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        row = dict(row)
+        for path in self.json_paths:
+            parent = row
+            for key in path[:-1]:
+                child = parent.get(key)
+                if not isinstance(child, dict):
+                    break
+                parent[key] = child = dict(child)  # Copy-on-write
+                parent = child
+            else:
+                if path[-1] in parent:
+                    parent[path[-1]] = _dumps(parent[path[-1]]).decode("utf-8")
+        return row
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if self.json_paths:
+            rows = [self._encode(row) for row in rows]
+        table = pa.Table.from_pylist(rows)
+        if self._writer is not None and table.schema != self._writer.schema:
+            try:
+                table = table.cast(self._writer.schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+                self.close()
+        if self._writer is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{self.stem}-{len(self.parts)}.parquet"
+            try:
+                self._writer = pq.ParquetWriter(
+                    path, table.schema, compression=self.compression
+                )
+            except Exception:
+                path.unlink(missing_ok=True)
+                raise
+            self.parts.append(path)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def _run_task(
+    task: IngestTask,
+    transform: RowTransform,
+    out_dir: pathlib.Path,
+    prefix: str,
+    partition_by: Optional[PartitionFn],
+    batch_rows: int,
+    max_rows: Optional[int],
+    jsonl_dir: Optional[pathlib.Path],
+    compression: str,
+    json_columns: Sequence[str],
+) -> IngestResult:
+    """Worker entry point: parse, transform and write one task."""
+    result = IngestResult(tasks=1)
+    stem = f"{prefix}-{task.index:05d}"
+    writers: Dict[str, _PartWriter] = {}
+    buffers: Dict[str, List[Dict[str, Any]]] = {}
+    jsonl = None
+    if jsonl_dir is not None:
+        jsonl_dir.mkdir(parents=True, exist_ok=True)
+        jsonl_path = jsonl_dir / f"{stem}.jsonl.gz"
+        jsonl = gzip.open(jsonl_path, "wb", compresslevel=6)
+        result.jsonl_parts.append(jsonl_path)
+
+    def flush(key: str) -> None:
+        rows = buffers.pop(key, None)
+        if not rows:
+            return
+        writer = writers.get(key)
+        if writer is None:
+            writer = writers[key] = _PartWriter(
+                out_dir / key if key else out_dir, stem, compression, json_columns
+            )
+        writer.write(rows)
+
+    pos = task.start
+    try:
+        for event, pos in iter_json_lines(task.path, task.start, task.end):
+            if event is None:
+                result.bad_lines += 1
+                continue
+            if not event:
+                continue
+            result.rows_in += 1
+
+            row = transform(event, result.counters)
+            if row is None:
+                continue
+
+            key = partition_by(row) if partition_by else ""
+            buffer = buffers.setdefault(key, [])
+            buffer.append(row)
+            if jsonl is not None:
+                jsonl.write(_dumps(row) + b"\n")
+            result.rows_out += 1
+
+            if len(buffer) >= batch_rows:
+                flush(key)
+            if max_rows is not None and result.rows_out >= max_rows:
+                break
+
+        else:
+            if task.path.suffix == ".gz":
+                pos = task.end or 0  # Whole file consumed
+        if pos > task.start:
+            result.offsets[str(task.path)] = pos
+
+        for key in list(buffers):
+            flush(key)
+    finally:
+        for writer in writers.values():
+            writer.close()
+            result.parts.extend(writer.parts)
+        if jsonl is not None:
+            jsonl.close()
+
+    return result
+
+
+def ingest_to_parquet(
+    files: List[pathlib.Path],
+    transform: RowTransform,
+    out_dir: pathlib.Path,
+    prefix: str = "part",
+    partition_by: Optional[PartitionFn] = None,
+    workers: Optional[int] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    max_rows: Optional[int] = None,
+    jsonl_dir: Optional[pathlib.Path] = None,
+    compression: str = "zstd",
+    json_columns: Sequence[str] = (),
+    start_offsets: Optional[Dict[str, int]] = None,
+    on_progress: Optional[Callable[[int, int, int], None]] = None,
+) -> IngestResult:
+    """
+    Transform JSONL files into (optionally partitioned) Parquet part files.
+
+    Args:
+        files: Input JSONL files (.jsonl or .jsonl.gz)
+        transform: Row transform applied to each event, see RowTransform
+        out_dir: Output directory; partitions become subdirectories
+        prefix: Part file name prefix (keeps several sources apart in one dir)
+        partition_by: Optional row -> partition directory name
+        workers: Process count (default: CPU count, 1 = run inline)
+        batch_rows: Rows buffered per partition before writing a record batch
+        chunk_bytes: Uncompressed files larger than this are split into chunks
+        max_rows: Stop after this many output rows (forces a single worker,
+            since a global cap across processes would not be deterministic)
+        jsonl_dir: Also write each task's rows as a gzip JSONL member there
+        compression: Parquet codec
+        json_columns: Dotted paths of free-form dict fields (e.g. "nlu.slots")
+            stored as JSON strings in Parquet; the JSONL output keeps them as-is
+        start_offsets: Per-file byte offsets to resume from (see Watermarks)
+        on_progress: Called as (tasks_done, tasks_total, rows_out) per task
+
+    Returns:
+        IngestResult with totals, part paths and merged transform counters
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for columnar ingestion")
+
+    tasks = plan_tasks(files, chunk_bytes, start_offsets)
+    workers = 1 if max_rows is not None else (workers or os.cpu_count() or 1)
+    workers = max(1, min(workers, len(tasks)))
+    total = IngestResult()
+
+    logger.info(
+        "Columnar ingest started",
+        files=len(files),
+        tasks=len(tasks),
+        workers=workers,
+        out=str(out_dir),
+        json_parser="orjson" if orjson is not None else "json",
+    )
+
+    run = partial(
+        _run_task,
+        transform=transform,
+        out_dir=out_dir,
+        prefix=prefix,
+        partition_by=partition_by,
+        batch_rows=batch_rows,
+        jsonl_dir=jsonl_dir,
+        compression=compression,
+        json_columns=json_columns,
+    )
+
+    if workers == 1:
+        for task in tasks:
+            remaining = None if max_rows is None else max_rows - total.rows_out
+            if remaining is not None and remaining <= 0:
+                break
+            total.merge(run(task, max_rows=remaining))
+            if on_progress:
+                on_progress(total.tasks, len(tasks), total.rows_out)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run, task, max_rows=None) for task in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                total.merge(future.result())
+                if on_progress:
+                    on_progress(done, len(tasks), total.rows_out)
+                logger.debug(
+                    "Ingest task done", done=done, tasks=len(tasks), rows=total.rows_out
+                )
+
+    total.parts.sort()
+    total.jsonl_parts.sort()
+    logger.info(
+        "Columnar ingest complete",
+        rows_in=total.rows_in,
+        rows_out=total.rows_out,
+        bad_lines=total.bad_lines,
+        parts=len(total.parts),
+    )
+    return total
+
+
+def write_rows(
+    rows: List[Dict[str, Any]],
+    out_dir: pathlib.Path,
+    stem: str,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    compression: str = "zstd",
+    json_columns: Sequence[str] = (),
+) -> List[pathlib.Path]:
+    """Write in-memory rows as Parquet part files (for small side inputs)."""
+    writer = _PartWriter(out_dir, stem, compression, json_columns)
+    try:
+        for i in range(0, len(rows), batch_rows):
+            writer.write(rows[i : i + batch_rows])
+    finally:
+        writer.close()
+    return writer.parts
+
+
+def write_jsonl_gz(rows: List[Dict[str, Any]], path: pathlib.Path) -> pathlib.Path:
+    """Write rows as one gzip JSONL member (concatenable with concat_gzip)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "wb", compresslevel=6) as f:
+        for row in rows:
+            f.write(_dumps(row) + b"\n")
+    return path
+
+
+class ShardedWriter:
+    """
+    Streams records into numbered JSONL or Parquet shards.
+
+    Shards are named ``<stem>-00000<suffix>``; if everything fit in a single
+    shard it is renamed to the requested path on close. Parquet shards are
+    written in record batches, so memory is bounded by batch_rows.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        shard_size: int = 100_000,
+        batch_rows: int = 10_000,
+        compression: str = "zstd",
+    ):
+        self.path = path
+        self.shard_size = shard_size
+        self.batch_rows = min(batch_rows, shard_size)
+        self.compression = compression
+        self.parquet = path.suffix == ".parquet"
+        if self.parquet and pa is None:
+            raise ImportError("pyarrow is required for Parquet shards")
+
+        self.shards: List[pathlib.Path] = []
+        self.count = 0
+        self._in_shard = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._file = None
+        self._writer = None
+
+    def _open_shard(self) -> None:
+        self._close_shard()
+        shard = self.path.with_name(
+            f"{self.path.stem}-{len(self.shards):05d}{self.path.suffix}"
+        )
+        shard.parent.mkdir(parents=True, exist_ok=True)
+        self.shards.append(shard)
+        self._in_shard = 0
+        if not self.parquet:
+            self._file = open(shard, "wb")
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        table = pa.Table.from_pylist(self._buffer)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(
+                self.shards[-1], table.schema, compression=self.compression
+            )
+        self._writer.write_table(table.cast(self._writer.schema))
+        self._buffer = []
+
+    def _close_shard(self) -> None:
+        if self.parquet:
+            self._flush()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        elif self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if not self.shards or self._in_shard >= self.shard_size:
+            self._open_shard()
+        if self.parquet:
+            self._buffer.append(record)
+            if len(self._buffer) >= self.batch_rows:
+                self._flush()
+        else:
+            self._file.write(_dumps(record) + b"\n")
+        self._in_shard += 1
+        self.count += 1
+
+    def close(self) -> List[pathlib.Path]:
+        """Finish the last shard; returns the written shard paths."""
+        self._close_shard()
+        if len(self.shards) == 1:
+            os.replace(self.shards[0], self.path)
+            self.shards = [self.path]
+        return self.shards
+
+    def __enter__(self) -> "ShardedWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def compact_parts(
+    parts: List[pathlib.Path], output: pathlib.Path, compression: str = "zstd"
+) -> int:
+    """
+    Stream Parquet part files into one file, batch by batch.
+
+    Part schemas are unified (permissive promotion) so files whose columns
+    only differ in nullability or nested fields still combine.
+
+    Returns:
+        Number of rows written
+    """
+    if not parts:
+        return 0
+
+    schema = pa.unify_schemas(
+        [pq.read_schema(p) for p in parts], promote_options="permissive"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    with pq.ParquetWriter(output, schema, compression=compression) as writer:
+        for part in parts:
+            for batch in pq.ParquetFile(part).iter_batches():
+                table = pa.Table.from_batches([batch])
+                for name in schema.names:
+                    if name not in table.schema.names:
+                        table = table.append_column(
+                            name, pa.nulls(len(table), schema.field(name).type)
+                        )
+                writer.write_table(table.select(schema.names).cast(schema))
+                rows += len(table)
+    return rows
+
+
+def iter_parquet_rows(
+    path: pathlib.Path,
+    columns: Optional[Sequence[str]] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream rows from a Parquet file or dataset directory, batch by batch.
+
+    Only the requested columns that exist in each file are read.
+    """
+    files = [path] if path.is_file() else sorted(path.rglob("*.parquet"))
+    for file in files:
+        parquet = pq.ParquetFile(file)
+        wanted = None
+        if columns is not None:
+            names = set(parquet.schema_arrow.names)
+            wanted = [c for c in columns if c in names]
+        for batch in parquet.iter_batches(batch_size=batch_rows, columns=wanted):
+            yield from batch.to_pylist()
+
+
+def concat_gzip(
+    parts: List[pathlib.Path], output: pathlib.Path, append: bool = False
+) -> str:
+    """
+    Concatenate gzip members into one file (a valid multi-member gzip).
+
+    With append=True the parts are added after the existing file content;
+    only the compressed bytes are re-hashed, nothing is decompressed.
+
+    Returns:
+        sha256 hex digest of the resulting file
+    """
+    digest = hashlib.sha256()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if append and output.exists():
+        with open(output, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    with open(output, "ab" if append else "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+                    out.write(block)
+    return digest.hexdigest()
+
+
+def remove_parts(paths: List[pathlib.Path]) -> None:
+    """Delete part files and any directories left empty under them."""
+    for path in paths:
+        path.unlink(missing_ok=True)
+    for parent in sorted({p.parent for p in paths}, reverse=True):
+        if parent.exists() and not any(parent.iterdir()):
+            shutil.rmtree(parent, ignore_errors=True)
@@ -309,6 +309,161 @@ class FeatureMaker:
 
         return x
 
+    # --- Columnar transform -------------------------------------------------
+
+    def _frame_categorical(self, df, key: str) -> Tuple[Any, List[str]]:
+        """
+        Normalized categorical values for a frame column as (codes, values).
+
+        values[codes[i]] equals _extract_categorical_value(row_i, key); each
+        distinct value is normalized once instead of once per row.
+        """
+        import numpy as np
+        import pandas as pd
+
+        n = len(df)
+        if key not in df.columns:
+            return np.zeros(n, dtype=np.int64), ["unknown"]
+
+        col = df[key]
+        if key in ("time_of_day", "session_length"):
+            # Derived from timestamp/text_len, and only for rows that carry
+            # the column at all
+            present = col.notna() & (col.astype(str).str.strip() != "")
+            derived = pd.Series("unknown", index=df.index, dtype=object)
+            if key == "session_length":
+                text_len = self._frame_numeric(df, "text_len")
+                buckets = np.select(
+                    [text_len < 50, text_len < 200], ["short", "medium"], "long"
+                )
+                derived[present] = buckets[present.to_numpy()]
+            elif present.any():
+                cols = [c for c in (key, "timestamp", "text_len") if c in df.columns]
+                derived[present] = [
+                    self._extract_categorical_value(row, key)
+                    for row in df.loc[present, cols].to_dict("records")
+                ]
+            codes, uniques = pd.factorize(derived)
+            return codes.astype(np.int64), list(uniques)
+
+        codes, uniques = pd.factorize(col)
+        values = [self._extract_categorical_value({key: u}, key) for u in uniques]
+        codes = codes.astype(np.int64)
+
+        # None and NaN (a key missing from some records, or a null read back
+        # from Parquet) are both "unknown" to transform(): row.get() yields
+        # None or the "" default for them
+        missing = codes < 0
+        if missing.any():
+            values.append("unknown")
+            codes[missing] = len(uniques)
+        return codes, values
+
+    def _frame_numeric(self, df, key: str):
+        """Raw float column with the same None/invalid → 0.0 defaults as transform."""
+        import numpy as np
+        import pandas as pd
+
+        if key not in df.columns:
+            return np.zeros(len(df), dtype=np.float64)
+        return (
+            pd.to_numeric(df[key], errors="coerce")
+            .fillna(0.0)
+            .to_numpy(dtype=np.float64)
+        )
+
+    def transform_frame(self, df) -> Any:
+        """
+        Transform a whole DataFrame into a feature matrix.
+
+        Columnar equivalent of calling transform() per row: hashes are
+        computed per distinct value, numerics are normalized as arrays.
+
+        Args:
+            df: pandas DataFrame of episodes
+
+        Returns:
+            Feature matrix of shape (len(df), n_features)
+        """
+        import numpy as np
+
+        if not self.fitted:
+            logger.warning("FeatureMaker not fitted - using defaults")
+
+        n = len(df)
+        n_numeric = len(self.numeric_keys)
+        X = np.zeros((n, self.dim + n_numeric + len(self.interaction_pairs)))
+        rows = np.arange(n)
+
+        categorical: Dict[str, Tuple[Any, List[str]]] = {}
+
+        def cat(key: str):
+            if key not in categorical:
+                categorical[key] = self._frame_categorical(df, key)
+            return categorical[key]
+
+        def sign_of(s: str) -> float:
+            return 1.0 if (_signed_hash(s) % 2) == 0 else -1.0
+
+        # 1. Categorical features using hashing trick
+        for key in self.categorical_keys:
+            codes, values = cat(key)
+            idx = np.zeros(len(values), dtype=np.int64)
+            sign = np.zeros(len(values))
+            for i, val in enumerate(values):
+                if val != "unknown":
+                    idx[i] = _signed_hash(f"{key}={val}") % self.dim
+                    sign[i] = sign_of(val)
+            np.add.at(X, (rows, idx[codes]), sign[codes])
+
+        # 2. Numeric features (z-score normalized, clipped)
+        def zscore(key: str, values):
+            return (values - self.means.get(key, 0.0)) / self.stds.get(key, 1.0)
+
+        for i, key in enumerate(self.numeric_keys):
+            X[:, self.dim + i] = np.clip(
+                zscore(key, self._frame_numeric(df, key)), -10.0, 10.0
+            )
+
+        # 3. Interaction features
+        base = self.dim + n_numeric
+        for i, (key1, key2) in enumerate(self.interaction_pairs):
+            if key1 in self.categorical_keys and key2 in self.categorical_keys:
+                codes1, values1 = cat(key1)
+                codes2, values2 = cat(key2)
+                pair_codes = codes1 * len(values2) + codes2
+                uniq, inverse = np.unique(pair_codes, return_inverse=True)
+                out = np.zeros(len(uniq))
+                for j, code in enumerate(uniq):
+                    val1 = values1[code // len(values2)]
+                    val2 = values2[code % len(values2)]
+                    if val1 != "unknown" and val2 != "unknown":
+                        name = f"{key1}={val1}*{key2}={val2}"
+                        out[j] = (
+                            1.0 if (_signed_hash(name) % self.dim) % 2 == 0 else -1.0
+                        )
+                X[:, base + i] = out[inverse]
+
+            elif key1 in self.numeric_keys and key2 in self.categorical_keys:
+                codes2, values2 = cat(key2)
+                coeff = np.array(
+                    [0.0 if v == "unknown" else sign_of(f"{key2}={v}") for v in values2]
+                )
+                X[:, base + i] = (
+                    zscore(key1, self._frame_numeric(df, key1)) * coeff[codes2]
+                )
+
+            else:
+                val1 = self._frame_numeric(df, key1)
+                val2 = self._frame_numeric(df, key2)
+                if key1 in self.numeric_keys:
+                    val1 = zscore(key1, val1)
+                if key2 in self.numeric_keys:
+                    val2 = zscore(key2, val2)
+                X[:, base + i] = val1 * val2
+
+        return X
+
     def serialize(self) -> Dict[str, Any]:
         """Serialize feature maker for saving."""
         return {
@@ -0,0 +1,148 @@
+"""
+GDPR tombstone filter for telemetry readers.
+
+The orchestrator forgets a user by appending a tombstone to
+``<telemetry>/_privacy/tombstones.jsonl`` instead of rewriting telemetry; the
+lines are purged later by a background compactor. Until then every reader
+must drop events from tombstoned sessions/users while streaming. Tombstones
+is small and picklable, so it travels with row transforms into the columnar
+ingest workers.
+
+Compaction replaces a segment with a smaller file (new inode). PurgeLog reads
+the compactor's segment_rewrite records so readers that keep byte offsets
+can carry them over to the compacted file instead of re-reading it.
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib
+from collections import Counter
+from typing import Any, Dict, FrozenSet, List, Optional, Union
+
+PRIVACY_SUBDIR = "_privacy"
+TOMBSTONES_FILE = "tombstones.jsonl"
+
+
+class Tombstones:
+    """Forgotten session ids and user hashes"""
+
+    __slots__ = ("session_ids", "user_hashes")
+
+    def __init__(
+        self,
+        session_ids: FrozenSet[str] = frozenset(),
+        user_hashes: FrozenSet[str] = frozenset(),
+    ):
+        self.session_ids = session_ids
+        self.user_hashes = user_hashes
+
+    def __getstate__(self):
+        return (self.session_ids, self.user_hashes)
+
+    def __setstate__(self, state):
+        self.session_ids, self.user_hashes = state
+
+    def __bool__(self) -> bool:
+        return bool(self.session_ids or self.user_hashes)
+
+    @classmethod
+    def load(cls, telemetry_dir: Union[str, pathlib.Path]) -> "Tombstones":
+        """Read the tombstone log next to the telemetry (empty if missing)"""
+        path = pathlib.Path(telemetry_dir) / PRIVACY_SUBDIR / TOMBSTONES_FILE
+        sessions, users = set(), set()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if rec.get("type") != "user_deletion":
+                        continue
+                    sessions.update(rec.get("session_ids") or [])
+                    if rec.get("user_hash"):
+                        users.add(rec["user_hash"])
+        except FileNotFoundError:
+            pass
+        return cls(frozenset(sessions), frozenset(users))
+
+    def is_forgotten(self, event: Dict[str, Any]) -> bool:
+        return (
+            event.get("session_id") in self.session_ids
+            or event.get("user_hash") in self.user_hashes
+        )
+
+
+class PurgeLog:
+    """Byte ranges removed from segments by the compactor, keyed by inode"""
+
+    def __init__(self, rewrites: List[Dict[str, Any]] = ()):
+        self._by_inode: Dict[int, List[Dict[str, Any]]] = {}
+        for rec in rewrites:
+            self._by_inode.setdefault(rec["inode_before"], []).append(rec)
+
+    @classmethod
+    def load(cls, telemetry_dir: Union[str, pathlib.Path]) -> "PurgeLog":
+        """Read the segment_rewrite records of the tombstone log"""
+        path = pathlib.Path(telemetry_dir) / PRIVACY_SUBDIR / TOMBSTONES_FILE
+        rewrites = []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if rec.get("type") == "segment_rewrite":
+                        rewrites.append(rec)
+        except FileNotFoundError:
+            pass
+        return cls(rewrites)
+
+    def translate(
+        self, path: Union[str, pathlib.Path], offset: int, inode: int, new_inode: int
+    ) -> Optional[int]:
+        """
+        Offset in the file now at `path` (new_inode) that corresponds to
+        `offset` in its earlier version (inode), following chained purges.
+
+        Returns None if the inode change is not a known purge (rotation).
+        """
+        path = pathlib.Path(path).as_posix()
+        for _ in range(len(self._by_inode) + 1):
+            if inode == new_inode:
+                return offset
+            rec = next(
+                (
+                    r
+                    for r in self._by_inode.get(inode, [])
+                    if path.endswith(r.get("segment", ""))
+                ),
+                None,
+            )
+            if rec is None:
+                return None
+            shift = 0
+            for start, length in rec.get("removed_ranges", []):
+                if start < offset:
+                    shift += min(length, offset - start)
+            offset -= shift
+            inode = rec["inode_after"]
+        return None
+
+
+class TombstoneFilter:
+    """Row transform wrapper dropping forgotten events (picklable)"""
+
+    def __init__(self, transform, tombstones: Tombstones):
+        self.transform = transform
+        self.tombstones = tombstones
+
+    def __call__(
+        self, event: Dict[str, Any], counters: Counter
+    ) -> Optional[Dict[str, Any]]:
+        if self.tombstones.is_forgotten(event):
+            counters["dropped_forgotten"] += 1
+            return None
+        return self.transform(event, counters)
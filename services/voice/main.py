@@ -3,19 +3,34 @@ Alice Voice Service
 Local speech-to-text and text-to-speech processing
 """
 
+import asyncio
 import base64
+import io
+import json
 import os
-import tempfile
 import time
+import wave
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional
 
 import numpy as np
 import structlog
 import whisper
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import (
+    FastAPI,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel, Field
+from stt_pool import PoolBusy, StreamingSession, TranscriptionPool, decode_audio
+from tts_cache import TTSCache, normalize_tts_text, tts_cache_key
 
 # Configure logging
 structlog.configure(
@@ -42,6 +57,22 @@ logger = structlog.get_logger(__name__)
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
 TTS_MODEL_PATH = os.getenv("TTS_MODEL_PATH", "/models/piper")
 CACHE_DIR = Path("/data/voice_cache")
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "512"))
+TTS_CACHE_MEMORY_MB = int(os.getenv("TTS_CACHE_MEMORY_MB", "64"))
+TTS_PRESYNTH_TOP_N = int(os.getenv("TTS_PRESYNTH_TOP_N", "50"))
+TTS_PRESYNTH_FILE = os.getenv("TTS_PRESYNTH_FILE")  # JSON-lista med fraser
+TTS_DEFAULT_VOICE = "alice_neutral"
+# Bumpas när syntesen ändras så att gamla renderingar inte serveras
+TTS_SYNTH_VERSION = "placeholder-1"
+TTS_SAMPLE_RATE = 22050
+STT_WORKERS = int(os.getenv("STT_WORKERS", "2"))
+STT_MAX_QUEUE = int(os.getenv("STT_MAX_QUEUE", "8"))
+STT_PARTIAL_INTERVAL_S = float(os.getenv("STT_PARTIAL_INTERVAL_S", "1.0"))
+STT_STREAM_MAX_S = float(os.getenv("STT_STREAM_MAX_S", "300"))
+STT_RETRY_AFTER_S = 2
+
+# Partials ska vara snabba: ingen temperature-fallback, ingen kedjad kontext
+PARTIAL_OPTIONS = {"temperature": 0.0, "condition_on_previous_text": False}
 
 
 # Pydantic models
@@ -67,6 +98,7 @@ class TTSResponse(BaseModel):
     audio_data: str = Field(..., description="Base64 encoded audio")
     duration_ms: float = Field(..., description="Audio duration")
     processing_time_ms: float = Field(..., description="Processing time")
+    cache: str = Field(default="miss", description="memory | disk | miss")
 
 
 class BenchmarkRequest(BaseModel):
@@ -100,18 +132,43 @@ app.add_middleware(
 )
 
 # Global variables
-whisper_model: Optional[whisper.Whisper] = None
 tts_model: Optional[Any] = None
 
 
-def get_whisper_model() -> whisper.Whisper:
-    """Get or load Whisper model"""
-    global whisper_model
-    if whisper_model is None:
-        logger.info("Loading Whisper model", model=WHISPER_MODEL)
-        whisper_model = whisper.load_model(WHISPER_MODEL)
-        logger.info("Whisper model loaded successfully")
-    return whisper_model
+def load_whisper_model() -> whisper.Whisper:
+    """Load one Whisper model instance (one per STT worker)"""
+    logger.info("Loading Whisper model", model=WHISPER_MODEL)
+    model = whisper.load_model(WHISPER_MODEL)
+    logger.info("Whisper model loaded successfully")
+    return model
+
+
+stt_pool = TranscriptionPool(
+    load_whisper_model, workers=STT_WORKERS, max_queue=STT_MAX_QUEUE
+)
+
+
+# Alices vanligaste repliker (greetings, negative cache, fallback-svar)
+DEFAULT_PRESYNTH_PHRASES = [
+    "Hej! Hur kan jag hjälpa dig?",
+    "Hej!",
+    "God morgon!",
+    "Ursäkta, jag kan inte hjälpa med den frågan just nu.",
+    "Jag förstod inte riktigt, kan du säga det igen?",
+    "Okej.",
+    "Klart!",
+    "Ett ögonblick.",
+    "Ingen fara.",
+    "Vi hörs!",
+]
+
+tts_cache = TTSCache(
+    CACHE_DIR / "tts",
+    max_disk_bytes=TTS_CACHE_MAX_MB * 1024 * 1024,
+    max_memory_bytes=TTS_CACHE_MEMORY_MB * 1024 * 1024,
+)
+_tts_inflight: Dict[str, "asyncio.Future[bytes]"] = {}
+presynth_status: Dict[str, Any] = {"state": "pending", "rendered": 0, "cached": 0}
 
 
 def get_tts_model():
@@ -133,28 +190,39 @@ async def startup_event():
     # Create cache directory
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Load models
+    # Load models (one Whisper per worker) off the event loop
     try:
-        get_whisper_model()
+        await asyncio.get_running_loop().run_in_executor(None, stt_pool.load)
         get_tts_model()
         logger.info("All models loaded successfully")
+        await asyncio.get_running_loop().run_in_executor(None, tts_cache.load_index)
+        asyncio.create_task(presynthesize(presynth_phrases()))
     except Exception as e:
         logger.error("Failed to load models", error=str(e))
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    stt_pool.shutdown()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     try:
-        whisper_model = get_whisper_model()
-        tts_model = get_tts_model()
+        get_tts_model()
 
         return {
-            "status": "healthy",
+            "status": "healthy" if stt_pool.ready else "loading",
             "timestamp": time.time(),
-            "services": {"whisper": "loaded", "tts": "loaded"},
+            "services": {
+                "whisper": "loaded" if stt_pool.ready else "loading",
+                "tts": "loaded",
+            },
             "models": {"whisper": WHISPER_MODEL, "tts": str(TTS_MODEL_PATH)},
+            "stt_pool": stt_pool.stats(),
+            "tts_cache": {**tts_cache.info(), "presynth": presynth_status},
         }
     except Exception as e:
         logger.error("Health check failed", error=str(e))
@@ -169,27 +237,17 @@ async def speech_to_text(
     start_time = time.time()
 
     try:
-        # Read audio file
         audio_content = await audio.read()
 
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_file.write(audio_content)
-            temp_file_path = temp_file.name
-
-        # Load Whisper model
-        model = get_whisper_model()
+        # Decode in memory (ffmpeg fallback is a subprocess, keep it off the loop)
+        loop = asyncio.get_running_loop()
+        samples = await loop.run_in_executor(None, decode_audio, audio_content)
 
-        # Transcribe
-        result = model.transcribe(
-            temp_file_path,
-            language=language if language != "auto" else None,
-            task="transcribe",
+        # Transcribe on a pool worker
+        result = await stt_pool.transcribe(
+            samples, language=language if language != "auto" else None
         )
 
-        # Clean up temp file
-        Path(temp_file_path).unlink()
-
         processing_time = (time.time() - start_time) * 1000
 
         logger.info(
@@ -207,60 +265,247 @@ async def speech_to_text(
             processing_time_ms=processing_time,
         )
 
+    except PoolBusy as e:
+        logger.warning("STT rejected, pool saturated", error=str(e))
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(STT_RETRY_AFTER_S)},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error("STT processing failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"STT processing failed: {str(e)}")
 
 
-@app.post("/api/tts", response_model=TTSResponse)
-async def text_to_speech(request: TTSRequest):
-    """Convert text to speech using local TTS"""
-    start_time = time.time()
+@app.websocket("/ws/stt")
+async def speech_to_text_stream(websocket: WebSocket, language: str = "sv"):
+    """
+    Streaming STT.
+
+    The client sends binary frames of raw 16 kHz mono s16le PCM and a text
+    frame {"event": "end"} when done. The server answers with
+    {"type": "partial", ...} messages while audio arrives and one
+    {"type": "final", ...} after "end".
+    """
+    await websocket.accept()
+    session = StreamingSession(partial_interval_s=STT_PARTIAL_INTERVAL_S)
+    lang = language if language != "auto" else None
+    send_lock = asyncio.Lock()
+    partial_task: Optional[asyncio.Task] = None
+
+    async def send(message: dict) -> None:
+        async with send_lock:
+            await websocket.send_json(message)
+
+    async def run_partial() -> None:
+        audio_ms = session.duration_ms
+        try:
+            result = await stt_pool.transcribe(
+                session.window(), language=lang, **PARTIAL_OPTIONS
+            )
+            await send(
+                {
+                    "type": "partial",
+                    "text": result["text"].strip(),
+                    "audio_ms": audio_ms,
+                }
+            )
+        except PoolBusy:
+            pass  # Partials are best effort; the final still runs
+        except Exception as e:
+            logger.warning("STT partial failed", error=str(e))
+        finally:
+            session.partial_in_flight = False
 
     try:
-        # TODO: Implement actual TTS synthesis
-        # For now, return placeholder
-        logger.info(
-            "TTS request received",
-            text_length=len(request.text),
-            voice=request.voice,
-            speed=request.speed,
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            if message.get("bytes"):
+                session.append_pcm16(message["bytes"])
+                if session.duration_ms > STT_STREAM_MAX_S * 1000:
+                    await send(
+                        {
+                            "type": "error",
+                            "detail": f"Stream longer than {STT_STREAM_MAX_S:.0f}s",
+                        }
+                    )
+                    await websocket.close(code=1009)
+                    return
+                if session.partial_due():
+                    session.partial_in_flight = True
+                    partial_task = asyncio.create_task(run_partial())
+            elif message.get("text"):
+                try:
+                    event = json.loads(message["text"]).get("event")
+                except (ValueError, AttributeError):
+                    event = None
+                if event == "end":
+                    break
+
+        # A partial racing the final would only arrive stale
+        if partial_task and not partial_task.done():
+            partial_task.cancel()
+
+        start_time = time.time()
+        result = await stt_pool.transcribe(session.audio(), language=lang)
+        await send(
+            {
+                "type": "final",
+                "text": result["text"],
+                "language": result.get("language", language),
+                "confidence": result.get("avg_logprob", 0.0),
+                "audio_ms": session.duration_ms,
+                "processing_time_ms": (time.time() - start_time) * 1000,
+            }
         )
+        await websocket.close()
 
-        # Placeholder audio data (silence)
-        sample_rate = 22050
-        duration_ms = len(request.text) * 50  # Rough estimate
-        samples = int(sample_rate * duration_ms / 1000)
-        audio_data = np.zeros(samples, dtype=np.int16)
-
-        # Convert to base64
-        import io
-
-        buffer = io.BytesIO()
-        import wave
+    except WebSocketDisconnect:
+        pass
+    except PoolBusy as e:
+        await send(
+            {"type": "error", "detail": str(e), "retry_after_s": STT_RETRY_AFTER_S}
+        )
+        await websocket.close(code=1013)  # Try again later
+    except Exception as e:
+        logger.error("Streaming STT failed", error=str(e))
+        try:
+            await send({"type": "error", "detail": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
+    finally:
+        if partial_task and not partial_task.done():
+            partial_task.cancel()
+
+
+def synthesize(text: str, voice: str, speed: float) -> bytes:
+    """Render text to WAV bytes (placeholder: silence until a TTS model lands)"""
+    duration_ms = len(text) * 50  # Rough estimate
+    samples = int(TTS_SAMPLE_RATE * duration_ms / 1000)
+    audio_data = np.zeros(samples, dtype=np.int16)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(TTS_SAMPLE_RATE)
+        wav_file.writeframes(audio_data.tobytes())
+    return buffer.getvalue()
+
+
+def wav_duration_ms(data: bytes) -> float:
+    with wave.open(io.BytesIO(data), "rb") as wav_file:
+        return wav_file.getnframes() / wav_file.getframerate() * 1000
+
+
+async def render_cached(text: str, voice: str, speed: float) -> bytes:
+    """
+    Synthesize and store a cache miss.
+
+    Concurrent misses for the same key share one synthesis (single flight).
+    """
+    key = tts_cache_key(text, voice, speed, TTS_SYNTH_VERSION)
+    pending = _tts_inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    loop = asyncio.get_running_loop()
+    future: "asyncio.Future[bytes]" = loop.create_future()
+    _tts_inflight[key] = future
+    try:
+        data = await loop.run_in_executor(
+            None, synthesize, normalize_tts_text(text), voice, speed
+        )
+        await loop.run_in_executor(None, tts_cache.put, key, data)
+        future.set_result(data)
+        return data
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Mark retrieved when nobody else is waiting
+        raise
+    finally:
+        del _tts_inflight[key]
+
+
+def presynth_phrases() -> List[str]:
+    """Top-N phrases to render at startup (file first, then built-ins)"""
+    phrases: List[str] = []
+    if TTS_PRESYNTH_FILE:
+        try:
+            with open(TTS_PRESYNTH_FILE, "r", encoding="utf-8") as f:
+                phrases.extend(str(p) for p in json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read TTS presynth file", error=str(e))
+    phrases.extend(DEFAULT_PRESYNTH_PHRASES)
+    return list(dict.fromkeys(phrases))[: max(0, TTS_PRESYNTH_TOP_N)]
+
+
+async def presynthesize(phrases: List[str], voice: str = TTS_DEFAULT_VOICE) -> None:
+    """Background job: make sure the common phrases are already on disk"""
+    presynth_status.update(state="running", total=len(phrases))
+    started = time.time()
+    for phrase in phrases:
+        key = tts_cache_key(phrase, voice, 1.0, TTS_SYNTH_VERSION)
+        if tts_cache.contains(key):
+            presynth_status["cached"] += 1
+            continue
+        try:
+            await render_cached(phrase, voice, 1.0)
+            presynth_status["rendered"] += 1
+        except Exception as e:
+            logger.warning("TTS presynth failed", phrase=phrase[:40], error=str(e))
+    presynth_status.update(
+        state="done", duration_ms=round((time.time() - started) * 1000, 1)
+    )
+    logger.info("TTS presynth finished", **presynth_status)
 
-        with wave.open(buffer, "wb") as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(sample_rate)
-            wav_file.writeframes(audio_data.tobytes())
 
-        audio_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+@app.post("/api/tts", response_model=TTSResponse)
+async def text_to_speech(request: TTSRequest):
+    """Convert text to speech using local TTS"""
+    start_time = time.time()
 
+    try:
+        key = tts_cache_key(
+            request.text, request.voice, request.speed, TTS_SYNTH_VERSION
+        )
+        hit = tts_cache.get(key)
+        if hit is None:
+            tier = "miss"
+            data = await render_cached(request.text, request.voice, request.speed)
+        elif hit[0] == "memory":
+            tier, data = hit
+        else:
+            tier = "disk"
+            data = await asyncio.get_running_loop().run_in_executor(
+                None, tts_cache.load, key, hit[1]
+            )
+            if data is None:  # Evicted between lookup and read
+                data = await render_cached(request.text, request.voice, request.speed)
+
+        duration_ms = wav_duration_ms(data)
         processing_time = (time.time() - start_time) * 1000
 
-        logger.info(
-            "TTS completed successfully",
+        logger.debug(
+            "TTS completed",
             text_length=len(request.text),
             voice=request.voice,
+            cache=tier,
             duration_ms=duration_ms,
             processing_time_ms=processing_time,
         )
 
         return TTSResponse(
-            audio_data=audio_base64,
+            audio_data=base64.b64encode(data).decode("utf-8"),
             duration_ms=duration_ms,
             processing_time_ms=processing_time,
+            cache=tier,
         )
 
     except Exception as e:
@@ -268,6 +513,41 @@ async def text_to_speech(request: TTSRequest):
         raise HTTPException(status_code=500, detail=f"TTS processing failed: {str(e)}")
 
 
+@app.post("/api/tts/audio")
+async def text_to_speech_audio(request: TTSRequest, http_request: Request):
+    """
+    Same as /api/tts but returns audio/wav directly.
+
+    Disk hits are streamed straight from the cache file, memory hits are
+    sent from the cached bytes; the content address doubles as ETag.
+    """
+    key = tts_cache_key(request.text, request.voice, request.speed, TTS_SYNTH_VERSION)
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": "public, max-age=86400",
+    }
+    if http_request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        hit = tts_cache.get(key)
+        if hit is not None and hit[0] == "disk":
+            return FileResponse(
+                hit[1], media_type="audio/wav", headers={**headers, "X-Cache": "disk"}
+            )
+        if hit is not None:
+            tier, data = hit
+        else:
+            tier = "miss"
+            data = await render_cached(request.text, request.voice, request.speed)
+        return Response(
+            content=data, media_type="audio/wav", headers={**headers, "X-Cache": tier}
+        )
+    except Exception as e:
+        logger.error("TTS processing failed", error=str(e))
+        raise HTTPException(status_code=500, detail=f"TTS processing failed: {str(e)}")
+
+
 @app.post("/api/benchmark", response_model=BenchmarkResponse)
 async def social_benchmark(request: BenchmarkRequest):
     """Run social intelligence benchmark"""
@@ -0,0 +1,263 @@
+"""
+STT worker pool
+In-memory audio decoding and a bounded pool of Whisper workers
+"""
+
+import asyncio
+import io
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+SAMPLE_RATE = 16000  # Whisper arbetar på 16 kHz mono float32
+
+
+class PoolBusy(Exception):
+    """Admission queue is full; the caller should retry later"""
+
+
+def decode_audio(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an uploaded audio file to mono float32 at sample_rate, in memory.
+
+    WAV/FLAC/OGG go through libsndfile directly; anything it cannot read
+    (webm/opus from browsers, mp3, m4a) is piped through ffmpeg via
+    stdin/stdout - no temp files either way.
+    """
+    try:
+        audio, sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    except RuntimeError:  # LibsndfileError: okänt format
+        return _decode_ffmpeg(data, sample_rate)
+
+    audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+    if sr != sample_rate:
+        import librosa  # Tung import, bara när resampling behövs
+
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=sample_rate)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+
+def _decode_ffmpeg(data: bytes, sample_rate: int) -> np.ndarray:
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        "pipe:0",
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        "pipe:1",
+    ]
+    proc = subprocess.run(cmd, input=data, capture_output=True, check=False)
+    if proc.returncode != 0:
+        raise ValueError(
+            f"Could not decode audio: {proc.stderr.decode('utf-8', 'replace')[-300:]}"
+        )
+    return pcm16_to_float(proc.stdout)
+
+
+def pcm16_to_float(pcm: bytes) -> np.ndarray:
+    """Raw little-endian s16 PCM -> float32 in [-1, 1]"""
+    usable = len(pcm) - (len(pcm) % 2)
+    return np.frombuffer(pcm[:usable], dtype="<i2").astype(np.float32) / 32768.0
+
+
+class TranscriptionPool:
+    """
+    Bounded pool of Whisper workers.
+
+    Each worker thread owns its own model: whisper's decoder installs
+    kv-cache hooks on the model during transcribe(), so one model must not
+    decode two requests at once. PyTorch releases the GIL during inference,
+    so threads give real parallelism. At most workers + max_queue requests
+    are admitted; the rest get PoolBusy immediately instead of piling up.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Any],
+        workers: int = 2,
+        max_queue: int = 8,
+    ):
+        """
+        Args:
+            loader: Loads one model instance (called once per worker)
+            workers: Concurrent transcriptions
+            max_queue: Requests allowed to wait for a free worker
+        """
+        self.loader = loader
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._models: "queue.Queue[Any]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="stt"
+        )
+        self._loaded = 0
+        self._load_lock = threading.Lock()
+
+        # Slots are released by the worker future, possibly on a worker thread
+        self._slots_lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._busy_ms = 0.0
+        self._wait_ms: List[float] = []
+
+    def load(self) -> None:
+        """Load all worker models (call at startup, blocking)"""
+        with self._load_lock:
+            while self._loaded < self.workers:
+                self._models.put(self.loader())
+                self._loaded += 1
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded >= self.workers
+
+    def _run(self, audio: np.ndarray, options: Dict[str, Any]) -> Dict[str, Any]:
+        # executor har exakt lika många trådar som modeller -> get() blockerar aldrig
+        model = self._models.get()
+        try:
+            return model.transcribe(audio, **options)
+        finally:
+            self._models.put(model)
+
+    async def transcribe(
+        self, audio: np.ndarray, language: Optional[str] = None, **options: Any
+    ) -> Dict[str, Any]:
+        """
+        Transcribe float32 16 kHz audio on a worker thread.
+
+        Raises:
+            PoolBusy: All workers busy and the admission queue is full
+        """
+        with self._slots_lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PoolBusy(
+                    f"STT pool saturated ({self.in_flight} in flight, "
+                    f"{self.workers} workers)"
+                )
+            self.in_flight += 1
+        options = {"language": language, "task": "transcribe", **options}
+        submitted = time.perf_counter()
+        try:
+            if not self.ready:
+                await asyncio.get_running_loop().run_in_executor(None, self.load)
+            future = self._executor.submit(self._timed_run, audio, options, submitted)
+        except BaseException:
+            self._release_slot()
+            raise
+        # A cancelled caller does not stop a decode that already started: the
+        # slot is held until the worker is done (or the queued job is dropped)
+        future.add_done_callback(self._release_slot)
+        try:
+            result = await asyncio.wrap_future(future)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+
+    def _release_slot(self, _future: Any = None) -> None:
+        with self._slots_lock:
+            self.in_flight -= 1
+
+    def _timed_run(
+        self, audio: np.ndarray, options: Dict[str, Any], submitted: float
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        self._wait_ms.append((started - submitted) * 1000)
+        if len(self._wait_ms) > 200:
+            del self._wait_ms[:100]
+        try:
+            return self._run(audio, options)
+        finally:
+            self._busy_ms += (time.perf_counter() - started) * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._wait_ms)
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "models_loaded": self._loaded,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "busy_ms_total": round(self._busy_ms, 1),
+            "queue_wait_p95_ms": (
+                round(waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0
+            ),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class StreamingSession:
+    """
+    Accumulates streamed PCM and decides when to emit a partial transcript.
+
+    Partials are re-decoded over the trailing window (Whisper's 30 s
+    context); a new partial is only started once enough new audio has
+    arrived and the previous partial has finished, so a slow pool never
+    builds a backlog for one stream.
+    """
+
+    def __init__(
+        self,
+        partial_interval_s: float = 1.0,
+        window_s: float = 30.0,
+        sample_rate: int = SAMPLE_RATE,
+    ):
+        self.sample_rate = sample_rate
+        self.partial_samples = int(partial_interval_s * sample_rate)
+        self.window_samples = int(window_s * sample_rate)
+        self._chunks: List[np.ndarray] = []
+        self.total_samples = 0
+        self._last_partial_at = 0
+        self.partial_in_flight = False
+
+    def append_pcm16(self, pcm: bytes) -> None:
+        chunk = pcm16_to_float(pcm)
+        if chunk.size:
+            self._chunks.append(chunk)
+            self.total_samples += chunk.size
+
+    def partial_due(self) -> bool:
+        return (
+            not self.partial_in_flight
+            and self.total_samples - self._last_partial_at >= self.partial_samples
+        )
+
+    def audio(self) -> np.ndarray:
+        """All audio received so far (float32)"""
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+
+    def window(self) -> np.ndarray:
+        """Trailing audio window for a partial, marking it as the latest one"""
+        self._last_partial_at = self.total_samples
+        return self.audio()[-self.window_samples :]
+
+    @property
+    def duration_ms(self) -> float:
+        return self.total_samples / self.sample_rate * 1000
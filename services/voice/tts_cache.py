@@ -0,0 +1,206 @@
+"""
+TTS cache
+Content-addressed audio cache: size-bounded LRU on disk plus an in-memory hot tier
+"""
+
+import hashlib
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+def normalize_tts_text(text: str) -> str:
+    """Same spoken output -> same key (NFC, collapsed whitespace)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def tts_cache_key(text: str, voice: str, speed: float, version: str) -> str:
+    """
+    Content address for one rendering.
+
+    version should change whenever the synthesizer output changes, so old
+    renderings are never served for a new model.
+    """
+    material = "\0".join(
+        [version, voice, f"{speed:.3f}", normalize_tts_text(text)]
+    ).encode("utf-8")
+    return hashlib.sha256(material).hexdigest()
+
+
+class TTSCache:
+    """
+    Two-tier audio cache keyed by tts_cache_key().
+
+    Disk entries live under <root>/<key[:2]>/<key>.wav and are evicted in
+    LRU order once the directory exceeds max_disk_bytes; recency survives
+    restarts through the file mtime, which is bumped on every hit. Small
+    entries are also kept in memory up to max_memory_bytes.
+    """
+
+    SUFFIX = ".wav"
+
+    def __init__(
+        self,
+        root: Path,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_memory_entry_bytes: int = 1024 * 1024,
+    ):
+        self.root = Path(root)
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.max_memory_entry_bytes = max_memory_entry_bytes
+
+        self._lock = threading.Lock()
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # key -> bytes
+        self._disk_bytes = 0
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+
+        self.stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def path_for(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.SUFFIX}"
+
+    def load_index(self) -> None:
+        """Rebuild the disk LRU from what is on disk (oldest mtime first)"""
+        entries = []
+        if self.root.exists():
+            for path in self.root.glob(f"*/*{self.SUFFIX}"):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, path.stem, st.st_size))
+        entries.sort()
+
+        with self._lock:
+            self._disk = OrderedDict((key, size) for _, key, size in entries)
+            self._disk_bytes = sum(size for _, _, size in entries)
+        self._evict_disk()
+        logger.info(
+            "TTS cache index loaded", entries=len(self._disk), bytes=self._disk_bytes
+        )
+
+    def get(self, key: str) -> Optional[Tuple[str, Union[bytes, Path]]]:
+        """
+        Returns:
+            ("memory", bytes), ("disk", path) or None on a miss
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return "memory", data
+
+            if key in self._disk:
+                self._disk.move_to_end(key)
+                path = self.path_for(key)
+            else:
+                path = None
+
+        if path is not None:
+            try:
+                os.utime(path)  # Persist recency for the next load_index()
+                self._count("disk_hits")
+                return "disk", path
+            except OSError:
+                # Removed behind our back: treat as a miss
+                with self._lock:
+                    self._disk_bytes -= self._disk.pop(key, 0)
+
+        self._count("misses")
+        return None
+
+    def contains(self, key: str) -> bool:
+        """On disk, without counting a lookup"""
+        with self._lock:
+            return key in self._disk
+
+    def load(self, key: str, path: Path) -> Optional[bytes]:
+        """Read a disk hit and promote it to the memory tier"""
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> Path:
+        """Store audio in both tiers (atomic file write)"""
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._disk_bytes += len(data) - self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            self.stats["stores"] += 1
+        self._remember(key, data)
+        self._evict_disk()
+        return path
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_memory_entry_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old)
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self) -> None:
+        victims = []
+        with self._lock:
+            while self._disk_bytes > self.max_disk_bytes and self._disk:
+                key, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                victims.append(key)
+                self.stats["evictions"] += 1
+        for key in victims:
+            try:
+                self.path_for(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def info(self) -> Dict[str, float]:
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_hit_rate": (
+                    round(self.stats["memory_hits"] / lookups, 4) if lookups else 0.0
+                ),
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }